@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
 import logging
 import os
 from pathlib import Path
 
-from services.slide_processing_service import get_slide_processing_service
+from services.slide_processing_service import SlideProcessingService, get_slide_processing_service
+from services.ingestion_jobs import get_ingestion_job_manager
+from services.folder_watcher import get_folder_watcher
 
 logger = logging.getLogger(__name__)
 
@@ -14,17 +16,30 @@ router = APIRouter(prefix="/slides", tags=["slides"])
 # Request/Response models
 class ProcessFolderRequest(BaseModel):
     folder_path: str
+    exclude_patterns: Optional[List[str]] = None
+    max_depth: Optional[int] = None
+    sources: Optional[List[str]] = None  # 'pptx' and/or 'images' (default: pptx only)
+    priority: Optional[str] = None  # 'interactive', 'normal' (default) or 'background'
+
+class ProcessFileRequest(BaseModel):
+    file_path: str
+    priority: Optional[str] = None  # 'interactive' (default), 'normal' or 'background'
+
+class JobPriorityRequest(BaseModel):
+    priority: str
 
 class DeleteFolderRequest(BaseModel):
     folder_path: str
 
+class UnwatchFolderRequest(BaseModel):
+    folder_path: str
+
 class ProcessFolderResponse(BaseModel):
     success: bool
     message: str
-    files_processed: int
-    slides_processed: int
-    failed_files: Optional[list] = []
-    error: Optional[str] = None
+    job_id: str
+    status: str
+    queue_position: Optional[int] = None
 
 class SearchSlidesRequest(BaseModel):
     query: str
@@ -49,138 +64,278 @@ class SearchSlidesResponse(BaseModel):
     used_reranker: bool
     error: Optional[str] = None
 
-# Global variable to track processing status
-_processing_status = {
-    'is_processing': False,
-    'current_file': '',
-    'progress': 0.0,
-    'files_processed': 0,
-    'slides_processed': 0
-}
+def _validate_folder_request(request: ProcessFolderRequest) -> str:
+    """
+    Validate the folder path and sources of a folder request
+    
+    Returns:
+        Normalized folder path
+        
+    Raises:
+        HTTPException: 400 if the folder does not exist or a source type is unknown
+    """
+    # Log the received path for debugging
+    logger.info(f"Received folder path: '{request.folder_path}'")
+    logger.info(f"Path type: {type(request.folder_path)}")
+    logger.info(f"Path repr: {repr(request.folder_path)}")
+    
+    # Clean the path to handle common issues
+    cleaned_path = request.folder_path.strip()  # Remove leading/trailing whitespace
+    
+    # Remove surrounding quotes if present
+    if (cleaned_path.startswith('"') and cleaned_path.endswith('"')) or \
+       (cleaned_path.startswith("'") and cleaned_path.endswith("'")):
+        cleaned_path = cleaned_path[1:-1]
+        logger.info(f"Removed quotes from path: '{cleaned_path}'")
+    
+    # Normalize the path to handle different formats
+    normalized_path = os.path.normpath(cleaned_path)
+    logger.info(f"Cleaned path: '{cleaned_path}'")
+    logger.info(f"Normalized path: '{normalized_path}'")
+    
+    # Try different path validation methods
+    exists_os = os.path.exists(normalized_path)
+    exists_pathlib = Path(normalized_path).exists()
+    is_dir_os = os.path.isdir(normalized_path) if exists_os else False
+    is_dir_pathlib = Path(normalized_path).is_dir() if exists_pathlib else False
+    
+    logger.info(f"Path validation results:")
+    logger.info(f"  os.path.exists(): {exists_os}")
+    logger.info(f"  pathlib.Path.exists(): {exists_pathlib}")
+    logger.info(f"  os.path.isdir(): {is_dir_os}")
+    logger.info(f"  pathlib.Path.is_dir(): {is_dir_pathlib}")
+    
+    # Validate folder path
+    if not (exists_os or exists_pathlib):
+        raise HTTPException(status_code=400, detail=f"Folder path does not exist: '{request.folder_path}' (normalized: '{normalized_path}')")
+    
+    if not (is_dir_os or is_dir_pathlib):
+        raise HTTPException(status_code=400, detail=f"Path is not a directory: '{request.folder_path}' (normalized: '{normalized_path}')")
+    
+    unknown_sources = set(request.sources or []) - set(SlideProcessingService.SOURCE_EXTENSIONS)
+    if unknown_sources:
+        raise HTTPException(status_code=400, detail=f"Unknown sources: {', '.join(sorted(unknown_sources))} "
+                                                    f"(supported: {', '.join(SlideProcessingService.SOURCE_EXTENSIONS)})")
+    
+    return normalized_path
 
-def update_progress(progress_data: Dict[str, Any]):
-    """Update global processing status"""
-    global _processing_status
-    _processing_status.update(progress_data)
-    _processing_status['is_processing'] = progress_data.get('status') != 'completed'
-    logger.info(f"Processing progress: {progress_data}")
+def _folder_options(request: ProcessFolderRequest) -> Dict[str, Any]:
+    """Build process_folder options (scanner rules, sources) from a folder request"""
+    # Optional scanner rules for this folder
+    scan_options = {}
+    if request.exclude_patterns:
+        scan_options['exclude_patterns'] = request.exclude_patterns
+    if request.max_depth is not None:
+        scan_options['max_depth'] = request.max_depth
+    
+    options = {}
+    if scan_options:
+        options['scan_options'] = scan_options
+    if request.sources:
+        options['sources'] = request.sources
+    return options
 
 @router.post("/process-folder", response_model=ProcessFolderResponse)
-async def process_folder(request: ProcessFolderRequest, background_tasks: BackgroundTasks):
+async def process_folder(request: ProcessFolderRequest):
     """
-    Process only PowerPoint files in a folder
+    Queue a folder of PowerPoint files and/or slide images for indexing
     
-    This endpoint:
-    1. Scans the folder for .pptx files only (image files like jpg, png are excluded)
-    2. Converts slides to images using COM automation
-    3. Creates multimodal embeddings using VoyageAI
-    4. Stores embeddings in vector database
+    Returns a job id immediately; the job runs in the background ingestion worker,
+    and further folders submitted meanwhile are queued behind it. Poll
+    GET /slides/jobs/{job_id} for progress and the final result.
     
-    Note: Image file processing has been disabled. Only PowerPoint (.pptx) presentations are processed.
+    Each job:
+    1. Scans the folder for the requested sources - .pptx decks ('pptx', the default) and/or
+       standalone .jpg/.jpeg/.png/.webp slide images ('images') - honouring optional
+       exclude_patterns/max_depth and skipping Office ~$ lock files, and skips files whose
+       size/mtime/content hash match the slide catalog
+    2. Converts new or modified decks to slide images using COM automation and
+       preprocesses new or modified images
+    3. Creates multimodal embeddings using VoyageAI (decks and images share batches)
+    4. Stores embeddings in vector database
     """
     try:
-        # Log the received path for debugging
-        logger.info(f"Received folder path: '{request.folder_path}'")
-        logger.info(f"Path type: {type(request.folder_path)}")
-        logger.info(f"Path repr: {repr(request.folder_path)}")
-        
-        # Clean the path to handle common issues
-        cleaned_path = request.folder_path.strip()  # Remove leading/trailing whitespace
-        
-        # Remove surrounding quotes if present
-        if (cleaned_path.startswith('"') and cleaned_path.endswith('"')) or \
-           (cleaned_path.startswith("'") and cleaned_path.endswith("'")):
-            cleaned_path = cleaned_path[1:-1]
-            logger.info(f"Removed quotes from path: '{cleaned_path}'")
-        
-        # Normalize the path to handle different formats
-        normalized_path = os.path.normpath(cleaned_path)
-        logger.info(f"Cleaned path: '{cleaned_path}'")
-        logger.info(f"Normalized path: '{normalized_path}'")
+        folder_path_to_use = _validate_folder_request(request)
         
-        # Try different path validation methods
-        exists_os = os.path.exists(normalized_path)
-        exists_pathlib = Path(normalized_path).exists()
-        is_dir_os = os.path.isdir(normalized_path) if exists_os else False
-        is_dir_pathlib = Path(normalized_path).is_dir() if exists_pathlib else False
+        logger.info(f"Queueing folder processing job for: '{folder_path_to_use}'")
         
-        logger.info(f"Path validation results:")
-        logger.info(f"  os.path.exists(): {exists_os}")
-        logger.info(f"  pathlib.Path.exists(): {exists_pathlib}")
-        logger.info(f"  os.path.isdir(): {is_dir_os}")
-        logger.info(f"  pathlib.Path.is_dir(): {is_dir_pathlib}")
-        
-        # Validate folder path
-        if not (exists_os or exists_pathlib):
-            raise HTTPException(status_code=400, detail=f"Folder path does not exist: '{request.folder_path}' (normalized: '{normalized_path}')")
-        
-        if not (is_dir_os or is_dir_pathlib):
-            raise HTTPException(status_code=400, detail=f"Path is not a directory: '{request.folder_path}' (normalized: '{normalized_path}')")
-        
-        # Use the normalized path for processing
-        folder_path_to_use = normalized_path
-        
-        # Check if already processing
-        global _processing_status
-        if _processing_status['is_processing']:
-            raise HTTPException(status_code=409, detail="Another folder is currently being processed")
-        
-        logger.info(f"Starting folder processing request for: '{folder_path_to_use}'")
-        
-        # Initialize slide processing service
+        # Initialize slide processing service here so initialization errors surface to the caller
         try:
-            slide_service = get_slide_processing_service()
+            get_slide_processing_service()
         except Exception as e:
             logger.error(f"Failed to initialize slide processing service: {e}")
             raise HTTPException(status_code=500, detail=f"Service initialization failed: {str(e)}")
         
-        # Reset processing status
-        _processing_status = {
-            'is_processing': True,
-            'current_file': '',
-            'progress': 0.0,
-            'files_processed': 0,
-            'slides_processed': 0
-        }
-        
-        # Process folder (this will take time, so we do it synchronously for now)
-        # In production, you might want to make this truly async with a job queue
-        result = slide_service.process_folder(
-            folder_path=folder_path_to_use,
-            progress_callback=update_progress
-        )
+        options = _folder_options(request)
         
-        # Update final status
-        _processing_status['is_processing'] = False
+        try:
+            job = get_ingestion_job_manager().submit(folder_path_to_use, options=options or None,
+                                                     priority=request.priority)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        if result['success']:
-            logger.info(f"Successfully processed folder: {result}")
-            return ProcessFolderResponse(
-                success=True,
-                message=result['message'],
-                files_processed=result['files_processed'],
-                slides_processed=result['slides_processed'],
-                failed_files=result.get('failed_files', [])
-            )
-        else:
-            logger.error(f"Folder processing failed: {result}")
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Processing failed: {result.get('error', 'Unknown error')}"
-            )
+        return ProcessFolderResponse(
+            success=True,
+            message=f"Folder queued for processing (position {job.get('queue_position', 1)})",
+            job_id=job['job_id'],
+            status=job['status'],
+            queue_position=job.get('queue_position')
+        )
             
     except HTTPException:
-        _processing_status['is_processing'] = False
         raise
     except Exception as e:
-        _processing_status['is_processing'] = False
-        logger.error(f"Unexpected error processing folder: {e}")
+        logger.error(f"Unexpected error queueing folder: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post("/estimate-folder")
+def estimate_folder(request: ProcessFolderRequest):
+    """
+    Dry run of /process-folder: estimate what indexing a folder would cost
+    
+    Scans the folder and diffs it against the slide catalog like a real job, counts the
+    slides of new or modified decks from their .pptx zip directory (nothing is rendered)
+    and predicts embedding requests, upload bytes and duration from the throughput
+    recorded by previous runs. Nothing is converted, embedded, stored or deleted.
+    Runs synchronously (in the server's thread pool) and returns the estimate.
+    """
+    folder_path = _validate_folder_request(request)
+    
+    try:
+        slide_service = get_slide_processing_service()
+    except Exception as e:
+        logger.error(f"Failed to initialize slide processing service: {e}")
+        raise HTTPException(status_code=500, detail=f"Service initialization failed: {str(e)}")
+    
+    result = slide_service.process_folder(folder_path, dry_run=True, **_folder_options(request))
+    if not result.get('success'):
+        raise HTTPException(status_code=500, detail=result.get('error', 'Estimate failed'))
+    return result
+
+@router.post("/process-file", response_model=ProcessFolderResponse)
+async def process_file(request: ProcessFileRequest):
+    """
+    Queue a single PowerPoint file or slide image for indexing
+    
+    Meant for a file that was just saved: the job is interactive by default, so it
+    runs ahead of queued folder jobs and a running folder job pauses at its next
+    file boundary until the file is indexed. Unchanged files are skipped.
+    """
+    file_path = os.path.normpath(request.file_path.strip().strip('"').strip("'"))
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=400, detail=f"File does not exist: '{request.file_path}'")
+    
+    supported = set().union(*SlideProcessingService.SOURCE_EXTENSIONS.values())
+    if os.path.splitext(file_path)[1].lower() not in supported:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: '{request.file_path}' "
+                                                    f"(supported: {', '.join(sorted(supported))})")
+    
+    try:
+        get_slide_processing_service()
+    except Exception as e:
+        logger.error(f"Failed to initialize slide processing service: {e}")
+        raise HTTPException(status_code=500, detail=f"Service initialization failed: {str(e)}")
+    
+    try:
+        job = get_ingestion_job_manager().submit_file(file_path, priority=request.priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return ProcessFolderResponse(
+        success=True,
+        message=f"File queued for processing (position {job.get('queue_position', 1)})",
+        job_id=job['job_id'],
+        status=job['status'],
+        queue_position=job.get('queue_position')
+    )
+
+@router.get("/watches")
+async def list_watched_folders():
+    """List the folders the server watches and reindexes on change"""
+    watcher = get_folder_watcher()
+    folders = watcher.list_folders()
+    return {
+        "success": True,
+        "folders": folders,
+        "total": len(folders),
+        "stats": watcher.get_stats()
+    }
+
+@router.post("/watches")
+def watch_folder(request: ProcessFolderRequest):
+    """
+    Watch a folder and keep its index fresh
+    
+    The folder is indexed incrementally right away, at the requested priority. Afterwards,
+    added, modified and deleted files are picked up by the server itself (inotify where
+    available, polling otherwise), debounced, and reindexed incrementally without
+    rescanning the whole folder. Watched folders persist across server restarts.
+    Runs in the server's thread pool, since setting up the watches walks the whole tree.
+    """
+    folder_path = _validate_folder_request(request)
+    options = _folder_options(request)
+    sources = request.sources or SlideProcessingService.DEFAULT_SOURCES
+    extensions = set().union(*(SlideProcessingService.SOURCE_EXTENSIONS[source] for source in sources))
+    
+    try:
+        folder = get_folder_watcher().add_folder(folder_path, extensions, options, priority=request.priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "folder": folder}
+
+@router.post("/watches/remove")
+async def unwatch_folder(request: UnwatchFolderRequest):
+    """Stop watching a folder (its indexed slides are kept)"""
+    folder_path = os.path.normpath(request.folder_path.strip().strip('"').strip("'"))
+    if not get_folder_watcher().remove_folder(folder_path):
+        raise HTTPException(status_code=404, detail=f"Folder is not watched: '{request.folder_path}'")
+    return {"success": True, "message": f"Stopped watching {folder_path}"}
+
 @router.get("/processing-status")
 async def get_processing_status():
-    """Get current processing status"""
-    return _processing_status
+    """Get current processing status (aggregated over queued and running jobs)"""
+    return get_ingestion_job_manager().get_status_summary()
+
+@router.get("/jobs")
+async def list_jobs():
+    """List queued, running and recently finished processing jobs"""
+    jobs = get_ingestion_job_manager().list_jobs()
+    return {
+        "success": True,
+        "jobs": jobs,
+        "total": len(jobs)
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get progress, throughput and result of a processing job"""
+    job = get_ingestion_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"success": True, "job": job}
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running processing job"""
+    job = get_ingestion_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {
+        "success": True,
+        "message": f"Job {job_id} is {job['status']}" if job['status'] != 'running' else f"Cancellation requested for job {job_id}",
+        "job": job
+    }
+
+@router.post("/jobs/{job_id}/priority")
+async def set_job_priority(job_id: str, request: JobPriorityRequest):
+    """Change the priority of a queued or running processing job"""
+    try:
+        job = get_ingestion_job_manager().set_priority(job_id, request.priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"success": True, "job": job}
 
 @router.get("/stats")
 async def get_slide_stats():
@@ -291,7 +446,7 @@ async def search_slides(request: SearchSlidesRequest):
         
         # Perform search with optional reranking
         try:
-            search_results = slide_service.search_slides(
+            search_results = await slide_service.asearch_slides(
                 query=request.query,
                 top_k=request.top_k,
                 file_filter=request.file_filter,
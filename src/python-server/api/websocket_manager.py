@@ -22,10 +22,20 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 from uuid import uuid4
-from core.events import event_bus
 
 logger = logging.getLogger(__name__)
 
+# Optional integrations - not part of every build
+try:
+    from core.events import event_bus
+except ImportError:
+    event_bus = None
+
+try:
+    from ai_services.orchestration.cancellation_manager import cancellation_manager
+except ImportError:
+    cancellation_manager = None
+
 class ConnectionManager:
     """Manages WebSocket connections with heartbeat support"""
     
@@ -111,7 +121,8 @@ class ConnectionManager:
             await self.start_heartbeat()
         
         # Emit connection event
-        await event_bus.emit("client_connected", {"client_id": client_id})
+        if event_bus is not None:
+            await event_bus.emit("client_connected", {"client_id": client_id})
         
         logger.info(f"Client {client_id} connected")
         return client_id
@@ -151,13 +162,14 @@ class ConnectionManager:
             self.heartbeat_task = None
             
         # Cancel any pending requests for this client
-        from ai_services.orchestration.cancellation_manager import cancellation_manager
-        cancelled_count = cancellation_manager.cancel_client_requests(client_id)
-        if cancelled_count > 0:
-            logger.info(f"Cancelled {cancelled_count} pending requests for disconnected client {client_id}")
+        if cancellation_manager is not None:
+            cancelled_count = cancellation_manager.cancel_client_requests(client_id)
+            if cancelled_count > 0:
+                logger.info(f"Cancelled {cancelled_count} pending requests for disconnected client {client_id}")
         
         # Emit disconnection event
-        asyncio.create_task(event_bus.emit("client_disconnected", {"client_id": client_id}))
+        if event_bus is not None:
+            asyncio.create_task(event_bus.emit("client_disconnected", {"client_id": client_id}))
         logger.info(f"Client {client_id} disconnected")
         
     async def send_message(self, client_id: str, message: dict):
@@ -24,7 +24,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request
+import asyncio
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
@@ -57,6 +58,9 @@ sys.path.append(str(current_dir))
 
 # Import routers
 from api.routes.slides import router as slides_router
+from api.websocket_manager import manager as connection_manager
+from services.progress_publisher import get_progress_publisher
+from services.folder_watcher import get_folder_watcher
 
 # Create FastAPI app
 app = FastAPI(title="Siffs API")
@@ -68,12 +72,63 @@ app.include_router(slides_router, prefix="/api")
 async def startup_event():
     logger.info("Siffs API starting up...")
     
+    # Push ingestion progress to WebSocket clients
+    publisher = get_progress_publisher()
+    publisher.attach(asyncio.get_running_loop(), connection_manager.broadcast)
+    app.state.progress_task = asyncio.create_task(publisher.run())
+    
+    # Resume watching the registered folders (and catch up on changes made meanwhile)
+    try:
+        get_folder_watcher().start()
+    except Exception as e:
+        logger.error(f"Failed to start folder watcher: {e}")
+    
     # Print all registered routes
     for route in app.routes:
         if hasattr(route, 'methods'):
             logger.info(f"HTTP {list(route.methods)} {route.path}")
     
     logger.info("Siffs API startup completed")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_folder_watcher().stop()
+    get_progress_publisher().detach()
+    progress_task = getattr(app.state, 'progress_task', None)
+    if progress_task:
+        progress_task.cancel()
+
+@app.websocket("/ws/{client_id}")
+async def websocket_endpoint(websocket: WebSocket, client_id: str):
+    """
+    WebSocket for pushed updates (INGESTION_JOB / INGESTION_PROGRESS messages)
+    
+    Clients may send {"type": "SET_PROGRESS_INTERVAL", "data": {"interval_seconds": 1.0}}
+    to change how often progress messages are sent.
+    """
+    client_id = await connection_manager.connect(websocket, client_id)
+    try:
+        while True:
+            message = await websocket.receive_json()
+            connection_manager.update_last_seen(client_id)
+            message_type = message.get('type') if isinstance(message, dict) else None
+            data = message.get('data') or {} if isinstance(message, dict) else {}
+            
+            if message_type == 'USER_AUTHENTICATION' and data.get('user_id'):
+                connection_manager.set_user_id(client_id, data['user_id'])
+            elif message_type == 'SET_PROGRESS_INTERVAL' and 'interval_seconds' in data:
+                interval = get_progress_publisher().set_interval(data['interval_seconds'])
+                await connection_manager.send_message(client_id, {
+                    'type': 'PROGRESS_INTERVAL',
+                    'interval_seconds': interval
+                })
+    except WebSocketDisconnect:
+        connection_manager.disconnect(client_id)
+    except Exception as e:
+        logger.error(f"WebSocket error for client {client_id}: {e}")
+        connection_manager.disconnect(client_id)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
@@ -18,6 +18,12 @@
 import sys
 import os
 import warnings
+import multiprocessing
+
+# Image preprocessing worker processes re-launch the frozen executable - hand them
+# off before the application is imported
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
 
 # Set environment variable for subprocesses
 os.environ['PYTHONIOENCODING'] = 'utf-8'
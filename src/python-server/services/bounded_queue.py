@@ -0,0 +1,157 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import logging
+import threading
+from collections import deque
+from queue import Empty, Full
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ByteBudgetQueue:
+    """
+    FIFO queue bounded by the total byte size of its items (and optionally their count)
+
+    Producers block in put() while the queued payload bytes would exceed the budget,
+    which gives backpressure when a fast producer (e.g. decoding slide images) feeds
+    slow consumers (embedding API calls). A single item larger than the whole budget
+    is still accepted once the queue is empty, so oversized items cannot deadlock.
+    None items (end-of-stream sentinels) are never blocked and count as zero bytes.
+
+    The get()/put() signatures and Empty/Full exceptions mirror queue.Queue.
+    """
+
+    def __init__(self, max_bytes: Optional[int], sizer: Callable[[Any], int],
+                 on_size_change: Callable[[int], None] = None, name: str = "queue",
+                 max_items: int = None):
+        """
+        Initialize the queue
+
+        Args:
+            max_bytes: Byte budget for queued items (None to track bytes without a budget)
+            sizer: Function returning the approximate size of an item in bytes
+            on_size_change: Optional callback receiving the byte delta on every put/get
+            name: Queue name used in log messages
+            max_items: Optional maximum number of queued items, like queue.Queue(maxsize)
+        """
+        self.max_bytes = max(1, int(max_bytes)) if max_bytes is not None else None
+        self.max_items = max(1, int(max_items)) if max_items is not None else None
+        self.sizer = sizer
+        self.on_size_change = on_size_change
+        self.name = name
+
+        self._items = deque()
+        self._bytes = 0
+        self._condition = threading.Condition()
+
+        self.stats = {
+            'peak_bytes': 0,
+            'blocked_puts': 0,
+            'blocked_seconds': 0.0
+        }
+
+    def _item_size(self, item: Any) -> int:
+        """Size of an item in bytes (sentinels are free)"""
+        if item is None:
+            return 0
+        try:
+            return max(0, int(self.sizer(item)))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not size item for {self.name}: {e}")
+            return 0
+
+    def put(self, item: Any, block: bool = True, timeout: float = None):
+        """
+        Add an item, blocking while it would exceed the byte budget or the item limit
+
+        Args:
+            item: Item to enqueue
+            block: Wait for room if True, raise Full immediately if False
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        """
+        size = self._item_size(item)
+        with self._condition:
+            def has_room():
+                if item is None or not self._items:
+                    return True
+                if self.max_items is not None and len(self._items) >= self.max_items:
+                    return False
+                return self.max_bytes is None or self._bytes + size <= self.max_bytes
+
+            if not has_room():
+                if not block:
+                    raise Full
+                wait_start = time.time()
+                self.stats['blocked_puts'] += 1
+                if not self._condition.wait_for(has_room, timeout=timeout):
+                    self.stats['blocked_seconds'] += time.time() - wait_start
+                    raise Full
+                self.stats['blocked_seconds'] += time.time() - wait_start
+
+            self._items.append((item, size))
+            self._bytes += size
+            self.stats['peak_bytes'] = max(self.stats['peak_bytes'], self._bytes)
+            self._condition.notify_all()
+
+        if size and self.on_size_change:
+            self.on_size_change(size)
+
+    def get(self, block: bool = True, timeout: float = None) -> Any:
+        """
+        Remove and return the oldest item
+
+        Args:
+            block: Wait for an item if True, raise Empty immediately if False
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        """
+        with self._condition:
+            if not self._items:
+                if not block or not self._condition.wait_for(lambda: self._items, timeout=timeout):
+                    raise Empty
+            item, size = self._items.popleft()
+            self._bytes -= size
+            self._condition.notify_all()
+
+        if size and self.on_size_change:
+            self.on_size_change(-size)
+        return item
+
+    def qsize(self) -> int:
+        """Number of queued items"""
+        with self._condition:
+            return len(self._items)
+
+    @property
+    def bytes_queued(self) -> int:
+        """Total byte size of queued items"""
+        with self._condition:
+            return self._bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        with self._condition:
+            return {
+                'items': len(self._items),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_items': self.max_items,
+                'peak_bytes': self.stats['peak_bytes'],
+                'blocked_puts': self.stats['blocked_puts'],
+                'blocked_seconds': round(self.stats['blocked_seconds'], 3)
+            }
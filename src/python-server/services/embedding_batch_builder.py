@@ -0,0 +1,297 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import threading
+from typing import List, Dict, Any, Tuple, Optional
+
+from services.slide_image import get_slide_image
+
+logger = logging.getLogger(__name__)
+
+# Why a batch was closed
+CLOSED_BY_COUNT = 'count'
+CLOSED_BY_BYTES = 'bytes'
+CLOSED_BY_TOKENS = 'tokens'
+CLOSED_BY_FLUSH = 'flush'
+
+class EmbeddingBatchBuilder:
+    """
+    Cuts slide data into embedding batches by count, upload bytes and image tokens
+
+    Cutting by count alone makes request size depend on the images: 75 slides
+    exported at 1920x1080 PNG are many times the payload of 75 small JPEGs, and
+    oversized requests are what time out. Every item is costed when it is added:
+
+    - upload bytes: size of its base64 payload (what goes over the wire)
+    - tokens: image pixels / 560 (VoyageAI's multimodal token rule) plus its text
+
+    A batch is closed as soon as the next item would push any of the three limits
+    over; a single item above a limit still forms a batch of its own.
+
+    The builder also tracks the upload bytes per second achieved by the API calls
+    of its batches, so the limits can be tuned against real throughput.
+    """
+
+    PIXELS_PER_TOKEN = 560
+    CHARS_PER_TOKEN = 4
+    TEXT_TOKENS_PER_ITEM = 10  # "Slide N from deck.pptx" context text
+
+    # Defaults keep requests well inside VoyageAI's per-request limits
+    DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+    DEFAULT_MAX_TOKENS = 150000
+
+    def __init__(self, max_items: int, max_bytes: int = None, max_tokens: int = None):
+        """
+        Initialize the batch builder
+
+        Args:
+            max_items: Maximum number of items per batch
+            max_bytes: Maximum upload bytes per batch (None for DEFAULT_MAX_BYTES)
+            max_tokens: Maximum estimated tokens per batch (None for DEFAULT_MAX_TOKENS)
+        """
+        self.max_items = max(1, max_items)
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self.max_tokens = max_tokens or self.DEFAULT_MAX_TOKENS
+
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._pending_bytes = 0
+        self._pending_tokens = 0
+
+        self.stats = {
+            'items': 0,
+            'batches': 0,
+            'bytes': 0,
+            'tokens': 0,
+            'closed_by': {CLOSED_BY_COUNT: 0, CLOSED_BY_BYTES: 0, CLOSED_BY_TOKENS: 0, CLOSED_BY_FLUSH: 0},
+            'requests_timed': 0,
+            'request_bytes': 0,
+            'request_seconds': 0.0,
+            'recent_bytes_per_second': None
+        }
+
+    @classmethod
+    def image_dimensions(cls, slide_data: Dict) -> Optional[Tuple[int, int]]:
+        """
+        Get the pixel dimensions of a slide image without decoding its pixels
+
+        Uses 'image_dimensions' when the producer recorded them, otherwise reads
+        the image header through the slide's image handle.
+
+        Args:
+            slide_data: Slide data dictionary with an 'image' SlideImage
+
+        Returns:
+            (width, height) tuple, or None if the image cannot be read
+        """
+        dimensions = slide_data.get('image_dimensions')
+        if dimensions:
+            return dimensions.get('width', 0), dimensions.get('height', 0)
+
+        image = get_slide_image(slide_data)
+        return image.dimensions if image is not None else None
+
+    @classmethod
+    def estimate_item(cls, slide_data: Dict) -> Tuple[int, int]:
+        """
+        Estimate the upload bytes and tokens of one slide
+
+        Args:
+            slide_data: Slide data dictionary
+
+        Returns:
+            Tuple of (upload bytes, estimated tokens)
+        """
+        image = get_slide_image(slide_data)
+        try:
+            upload_bytes = image.upload_bytes if image is not None else 0
+        except OSError:
+            upload_bytes = 0
+        tokens = cls.TEXT_TOKENS_PER_ITEM
+        dimensions = cls.image_dimensions(slide_data)
+        if dimensions:
+            width, height = dimensions
+            tokens += (width * height) // cls.PIXELS_PER_TOKEN
+        elif upload_bytes:
+            # Unknown image: assume a full HD slide export
+            tokens += (1920 * 1080) // cls.PIXELS_PER_TOKEN
+        return upload_bytes, tokens
+
+    def _close_reason(self, count: int, batch_bytes: int, batch_tokens: int,
+                      item_bytes: int, item_tokens: int) -> Optional[str]:
+        """Reason to close an open batch before adding an item to it, or None"""
+        if not count:
+            return None
+        if batch_bytes + item_bytes > self.max_bytes:
+            return CLOSED_BY_BYTES
+        if batch_tokens + item_tokens > self.max_tokens:
+            return CLOSED_BY_TOKENS
+        return None
+
+    def _record_close(self, reason: str, count: int, batch_bytes: int, batch_tokens: int):
+        """Count a closed batch in the statistics (lock must be held)"""
+        self.stats['items'] += count
+        self.stats['batches'] += 1
+        self.stats['bytes'] += batch_bytes
+        self.stats['tokens'] += batch_tokens
+        self.stats['closed_by'][reason] += 1
+        logger.debug(f"📦 Batch closed by {reason}: {count} items, "
+                     f"{batch_bytes / (1024 * 1024):.1f}MB, ~{batch_tokens} tokens")
+
+    def add(self, slide_data: Dict) -> List[List[Dict]]:
+        """
+        Add one item to the open batch
+
+        Args:
+            slide_data: Slide data dictionary
+
+        Returns:
+            Batches closed by this item (empty, one or two batches)
+        """
+        item_bytes, item_tokens = self.estimate_item(slide_data)
+        with self._lock:
+            closed = []
+            reason = self._close_reason(len(self._pending), self._pending_bytes, self._pending_tokens,
+                                        item_bytes, item_tokens)
+            if reason:
+                closed.append(self._close_pending(reason))
+
+            self._pending.append(slide_data)
+            self._pending_bytes += item_bytes
+            self._pending_tokens += item_tokens
+
+            if len(self._pending) >= self.max_items:
+                closed.append(self._close_pending(CLOSED_BY_COUNT))
+            return closed
+
+    def add_many(self, slides_data: List[Dict]) -> List[List[Dict]]:
+        """Add several items to the open batch and return every batch they closed"""
+        batches = []
+        for slide_data in slides_data:
+            batches.extend(self.add(slide_data))
+        return batches
+
+    def flush(self) -> List[List[Dict]]:
+        """Close the open partial batch, if any"""
+        with self._lock:
+            return [self._close_pending(CLOSED_BY_FLUSH)] if self._pending else []
+
+    def _close_pending(self, reason: str) -> List[Dict]:
+        """Close the open batch (lock must be held)"""
+        batch = self._pending
+        self._record_close(reason, len(batch), self._pending_bytes, self._pending_tokens)
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_tokens = 0
+        return batch
+
+    def split(self, slides_data: List[Dict]) -> List[List[Dict]]:
+        """
+        Cut a complete list of items into batches
+
+        Independent of the open batch used by add(), so several threads can split
+        their own lists with one shared builder.
+
+        Args:
+            slides_data: Slide data dictionaries
+
+        Returns:
+            List of batches
+        """
+        costs = [self.estimate_item(slide_data) for slide_data in slides_data]
+        batches = []
+        batch, batch_bytes, batch_tokens = [], 0, 0
+        with self._lock:
+            for slide_data, (item_bytes, item_tokens) in zip(slides_data, costs):
+                reason = self._close_reason(len(batch), batch_bytes, batch_tokens, item_bytes, item_tokens)
+                if reason:
+                    self._record_close(reason, len(batch), batch_bytes, batch_tokens)
+                    batches.append(batch)
+                    batch, batch_bytes, batch_tokens = [], 0, 0
+
+                batch.append(slide_data)
+                batch_bytes += item_bytes
+                batch_tokens += item_tokens
+
+                if len(batch) >= self.max_items:
+                    self._record_close(CLOSED_BY_COUNT, len(batch), batch_bytes, batch_tokens)
+                    batches.append(batch)
+                    batch, batch_bytes, batch_tokens = [], 0, 0
+
+            if batch:
+                self._record_close(CLOSED_BY_FLUSH, len(batch), batch_bytes, batch_tokens)
+                batches.append(batch)
+        return batches
+
+    @property
+    def pending_count(self) -> int:
+        """Number of items waiting in the open batch"""
+        with self._lock:
+            return len(self._pending)
+
+    @staticmethod
+    def batch_bytes(slides_data: List[Dict]) -> int:
+        """Upload bytes (base64 payload) of a batch"""
+        total = 0
+        for slide_data in slides_data:
+            image = get_slide_image(slide_data)
+            if image is not None:
+                try:
+                    total += image.upload_bytes
+                except OSError:
+                    continue
+        return total
+
+    def record_request(self, upload_bytes: int, seconds: float):
+        """
+        Record the duration of an API request to track achieved upload throughput
+
+        Args:
+            upload_bytes: Upload bytes of the request
+            seconds: Duration of the request
+        """
+        if seconds <= 0:
+            return
+        rate = upload_bytes / seconds
+        with self._lock:
+            self.stats['requests_timed'] += 1
+            self.stats['request_bytes'] += upload_bytes
+            self.stats['request_seconds'] += seconds
+            recent = self.stats['recent_bytes_per_second']
+            self.stats['recent_bytes_per_second'] = rate if recent is None else 0.8 * recent + 0.2 * rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching and throughput statistics"""
+        with self._lock:
+            batches = self.stats['batches']
+            request_seconds = self.stats['request_seconds']
+            recent = self.stats['recent_bytes_per_second']
+            return {
+                'max_items': self.max_items,
+                'max_bytes': self.max_bytes,
+                'max_tokens': self.max_tokens,
+                'batches': batches,
+                'items': self.stats['items'],
+                'closed_by': dict(self.stats['closed_by']),
+                'avg_items_per_batch': round(self.stats['items'] / batches, 1) if batches else 0.0,
+                'avg_bytes_per_batch': int(self.stats['bytes'] / batches) if batches else 0,
+                'avg_tokens_per_batch': int(self.stats['tokens'] / batches) if batches else 0,
+                'requests_timed': self.stats['requests_timed'],
+                'bytes_per_second': int(self.stats['request_bytes'] / request_seconds) if request_seconds else 0,
+                'recent_bytes_per_second': int(recent) if recent is not None else 0
+            }
@@ -0,0 +1,376 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import io
+import os
+import json
+import time
+import base64
+import asyncio
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+import numpy as np
+from PIL import Image
+
+from services.voyage_client import EmbeddingResult
+
+logger = logging.getLogger(__name__)
+
+# Optional local inference runtime - not part of every build
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+# Provider names (SIFFS_EMBEDDING_PROVIDER selects one)
+PROVIDER_VOYAGE = 'voyage'
+PROVIDER_LOCAL = 'local'
+
+class EmbeddingProvider:
+    """
+    Source of the slide and query vectors used by VoyageEmbeddingsService
+
+    A provider embeds multimodal inputs in the VoyageAI request format (dicts with
+    'content' segments, or [text, PIL.Image] lists) and returns an object with an
+    `embeddings` list. Its name, model and dimension identify the vector space:
+    vectors of different providers or models are never stored side by side.
+    """
+
+    name: str = None
+    model: str = None
+    dimension: int = None
+
+    # Remote providers go through the rate limiter and the circuit breaker
+    remote: bool = True
+    supports_rerank: bool = False
+
+    def multimodal_embed(self, inputs: List, input_type: Optional[str] = None):
+        """
+        Embed multimodal inputs
+
+        Args:
+            inputs: Dict inputs with 'content' segments, or content lists
+            input_type: "document" or "query"
+
+        Returns:
+            Result object with an `embeddings` list in input order
+        """
+        raise NotImplementedError
+
+    async def amultimodal_embed(self, inputs: List, input_type: Optional[str] = None):
+        """multimodal_embed for async callers (runs in a worker thread unless overridden)"""
+        return await asyncio.to_thread(self.multimodal_embed, inputs, input_type)
+
+    def rerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None):
+        """Rerank documents for a query (only if supports_rerank)"""
+        raise NotImplementedError(f"Embedding provider '{self.name}' does not support reranking")
+
+    async def arerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None):
+        """rerank for async callers"""
+        return await asyncio.to_thread(self.rerank, query, documents, model, top_k)
+
+    def describe(self) -> Dict[str, Any]:
+        """Identify the vector space: provider name, model and dimension"""
+        return {'provider': self.name, 'model': self.model, 'dimension': self.dimension}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get provider statistics"""
+        return {}
+
+    def close(self):
+        """Release the provider's resources"""
+
+class VoyageProvider(EmbeddingProvider):
+    """Embeddings and reranking from the VoyageAI API"""
+
+    name = PROVIDER_VOYAGE
+    supports_rerank = True
+
+    DEFAULT_MODEL = "voyage-multimodal-3"
+    DEFAULT_DIMENSION = 1024
+
+    def __init__(self, client, model: str = None, dimension: int = None):
+        """
+        Initialize the provider
+
+        Args:
+            client: VoyageAI client (PooledVoyageClient or anything with the voyageai.Client methods)
+            model: Multimodal embedding model
+            dimension: Vector dimension of the model
+        """
+        self.client = client
+        self.model = model or self.DEFAULT_MODEL
+        self.dimension = dimension or self.DEFAULT_DIMENSION
+
+    def multimodal_embed(self, inputs: List, input_type: Optional[str] = None):
+        return self.client.multimodal_embed(inputs=inputs, model=self.model, input_type=input_type)
+
+    async def amultimodal_embed(self, inputs: List, input_type: Optional[str] = None):
+        return await self.client.amultimodal_embed(inputs=inputs, model=self.model, input_type=input_type)
+
+    def rerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None):
+        return self.client.rerank(query=query, documents=documents, model=model, top_k=top_k, truncation=True)
+
+    async def arerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None):
+        return await self.client.arerank(query=query, documents=documents, model=model, top_k=top_k,
+                                         truncation=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.client.get_stats() if hasattr(self.client, 'get_stats') else {}
+
+    def close(self):
+        if hasattr(self.client, 'close'):
+            self.client.close()
+
+class LocalOnnxProvider(EmbeddingProvider):
+    """
+    CPU embeddings from a local CLIP-style ONNX image-text model
+
+    The model directory holds the two encoders exported to ONNX with their
+    projection heads (image_model.onnx taking pixel_values, text_model.onnx taking
+    input_ids/attention_mask) and the tokenizer (tokenizer.json). An optional
+    model.json overrides the name, image size, normalization and context length.
+    Slides are embedded by their image, queries and image-less inputs by their
+    text; both encoders share one vector space, so text queries find slide images.
+
+    Inputs are run through the encoders in batches of `batch_size`, with one batch
+    at a time using `threads` intra-op threads, so bulk indexing cannot oversubscribe
+    the CPU. Works offline and is not rate limited.
+    """
+
+    name = PROVIDER_LOCAL
+    remote = False
+
+    IMAGE_MODEL_FILE = 'image_model.onnx'
+    TEXT_MODEL_FILE = 'text_model.onnx'
+    TOKENIZER_FILE = 'tokenizer.json'
+    MANIFEST_FILE = 'model.json'
+
+    # CLIP ViT preprocessing defaults
+    DEFAULT_MANIFEST = {
+        'name': None,
+        'image_size': 224,
+        'image_mean': [0.48145466, 0.4578275, 0.40821073],
+        'image_std': [0.26862954, 0.26130258, 0.27577711],
+        'context_length': 77,
+        'dimension': None
+    }
+
+    DEFAULT_BATCH_SIZE = 16
+
+    def __init__(self, model_dir: str = None, threads: int = None, batch_size: int = None,
+                 session_factory: Callable = None):
+        """
+        Load the encoders
+
+        Args:
+            model_dir: Model directory (if None, SIFFS_LOCAL_EMBEDDING_MODEL_DIR or the default
+                       models directory in app data)
+            threads: Intra-op threads per inference (if None, SIFFS_LOCAL_EMBEDDING_THREADS or
+                     half the CPU cores)
+            batch_size: Inputs per inference call (if None, SIFFS_LOCAL_EMBEDDING_BATCH_SIZE or 16)
+            session_factory: Callable(model_path, threads) returning an inference session
+                             (if None, an onnxruntime CPU session)
+
+        Raises:
+            RuntimeError: If onnxruntime or tokenizers is not installed
+            FileNotFoundError: If a model file is missing
+        """
+        if model_dir is None:
+            model_dir = os.getenv('SIFFS_LOCAL_EMBEDDING_MODEL_DIR')
+        if model_dir is None:
+            # Use platform-appropriate app data directory
+            if os.name == 'nt':  # Windows
+                app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+                model_dir = os.path.join(app_data, 'SIFFS', 'models', 'clip')
+            else:  # Mac/Linux
+                app_data = os.path.expanduser('~/.local/share')
+                model_dir = os.path.join(app_data, 'SIFFS', 'models', 'clip')
+        self.model_dir = model_dir
+
+        self.threads = max(1, int(threads or os.getenv('SIFFS_LOCAL_EMBEDDING_THREADS') or
+                                  max(1, (os.cpu_count() or 2) // 2)))
+        self.batch_size = max(1, int(batch_size or os.getenv('SIFFS_LOCAL_EMBEDDING_BATCH_SIZE') or
+                                     self.DEFAULT_BATCH_SIZE))
+
+        if session_factory is None:
+            if onnxruntime is None:
+                raise RuntimeError("The local embedding provider requires onnxruntime (pip install onnxruntime)")
+            session_factory = self._create_session
+        if Tokenizer is None:
+            raise RuntimeError("The local embedding provider requires tokenizers (pip install tokenizers)")
+
+        manifest = dict(self.DEFAULT_MANIFEST)
+        manifest_path = os.path.join(model_dir, self.MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest.update(json.load(f))
+        self.image_size = int(manifest['image_size'])
+        self.image_mean = np.asarray(manifest['image_mean'], dtype=np.float32).reshape(3, 1, 1)
+        self.image_std = np.asarray(manifest['image_std'], dtype=np.float32).reshape(3, 1, 1)
+        self.context_length = int(manifest['context_length'])
+        model_name = manifest['name'] or os.path.basename(os.path.normpath(model_dir))
+        self.model = f"local/{model_name}"
+
+        for file_name in (self.IMAGE_MODEL_FILE, self.TEXT_MODEL_FILE, self.TOKENIZER_FILE):
+            if not os.path.exists(os.path.join(model_dir, file_name)):
+                raise FileNotFoundError(f"Local embedding model file missing: {os.path.join(model_dir, file_name)}")
+
+        self.image_session = session_factory(os.path.join(model_dir, self.IMAGE_MODEL_FILE), self.threads)
+        self.text_session = session_factory(os.path.join(model_dir, self.TEXT_MODEL_FILE), self.threads)
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, self.TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.context_length)
+        padding = self.tokenizer.padding or {}
+        self.tokenizer.enable_padding(length=self.context_length, pad_id=padding.get('pad_id', 0),
+                                      pad_token=padding.get('pad_token', '[PAD]'))
+
+        self.dimension = int(manifest['dimension'] or self._output_dimension(self.image_session))
+
+        # One inference at a time: each already uses `threads` cores
+        self._lock = threading.Lock()
+        self.stats = {'inference_calls': 0, 'images_embedded': 0, 'texts_embedded': 0, 'inference_seconds': 0.0}
+
+        logger.info(f"🖥️ Local embedding model ready: {self.model} ({self.dimension} dimensions, "
+                    f"{self.threads} threads, batch size {self.batch_size})")
+
+    @staticmethod
+    def _create_session(model_path: str, threads: int):
+        """Create an onnxruntime CPU session limited to `threads` intra-op threads"""
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return onnxruntime.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+    @staticmethod
+    def _output_dimension(session) -> int:
+        """Read the embedding dimension from the session's output shape"""
+        dimension = session.get_outputs()[0].shape[-1]
+        if not isinstance(dimension, int):
+            raise ValueError("Embedding dimension is not fixed by the model; set 'dimension' in model.json")
+        return dimension
+
+    def multimodal_embed(self, inputs: List, input_type: Optional[str] = None) -> EmbeddingResult:
+        texts: List[Tuple[int, str]] = []
+        images: List[Tuple[int, Image.Image]] = []
+        for index, content_input in enumerate(inputs):
+            text, image = self._split_input(content_input)
+            if image is not None:
+                images.append((index, image))
+            else:
+                texts.append((index, text))
+
+        embeddings: List[Optional[List[float]]] = [None] * len(inputs)
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            pixel_values = np.stack([self._preprocess_image(image) for _, image in chunk])
+            vectors = self._run(self.image_session, {'pixel_values': pixel_values})
+            for (index, _), vector in zip(chunk, vectors):
+                embeddings[index] = vector
+            self.stats['images_embedded'] += len(chunk)
+        for start in range(0, len(texts), self.batch_size):
+            chunk = texts[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([text for _, text in chunk])
+            feeds = {
+                'input_ids': np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+                'attention_mask': np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            }
+            vectors = self._run(self.text_session, feeds)
+            for (index, _), vector in zip(chunk, vectors):
+                embeddings[index] = vector
+            self.stats['texts_embedded'] += len(chunk)
+
+        return EmbeddingResult({'data': [{'embedding': embedding} for embedding in embeddings]})
+
+    def _run(self, session, feeds: Dict[str, np.ndarray]) -> List[List[float]]:
+        """Run one batch through an encoder and return L2-normalized vectors"""
+        input_names = {model_input.name for model_input in session.get_inputs()}
+        feeds = {name: value for name, value in feeds.items() if name in input_names}
+        with self._lock:
+            start = time.time()
+            output = np.asarray(session.run(None, feeds)[0], dtype=np.float32)
+            self.stats['inference_seconds'] += time.time() - start
+            self.stats['inference_calls'] += 1
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.maximum(norms, 1e-12)).tolist()
+
+    @staticmethod
+    def _split_input(content_input) -> Tuple[str, Optional[Image.Image]]:
+        """Extract the text and the image of one input in either VoyageAI format"""
+        texts, image = [], None
+        if isinstance(content_input, dict):
+            for segment in content_input.get('content', []):
+                if segment.get('type') == 'text':
+                    texts.append(segment.get('text', ''))
+                elif segment.get('type') == 'image_base64' and image is None:
+                    encoded = segment['image_base64'].split(',', 1)[-1]
+                    image = Image.open(io.BytesIO(base64.b64decode(encoded)))
+        else:
+            for item in content_input:
+                if isinstance(item, str):
+                    texts.append(item)
+                elif isinstance(item, Image.Image) and image is None:
+                    image = item
+        return ' '.join(texts), image
+
+    def _preprocess_image(self, image: Image.Image) -> np.ndarray:
+        """Resize the short side, center crop and normalize to a CHW float array"""
+        image = image.convert('RGB')
+        width, height = image.size
+        scale = self.image_size / min(width, height)
+        resized = (max(self.image_size, round(width * scale)), max(self.image_size, round(height * scale)))
+        image = image.resize(resized, Image.BICUBIC)
+        left = (resized[0] - self.image_size) // 2
+        top = (resized[1] - self.image_size) // 2
+        image = image.crop((left, top, left + self.image_size, top + self.image_size))
+        pixels = np.asarray(image, dtype=np.float32).transpose(2, 0, 1) / 255.0
+        return (pixels - self.image_mean) / self.image_std
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats.update({'threads': self.threads, 'batch_size': self.batch_size})
+        return stats
+
+def create_embedding_provider(name: str = None, client_factory: Callable = None, **options) -> EmbeddingProvider:
+    """
+    Create the embedding provider selected by name or by SIFFS_EMBEDDING_PROVIDER
+
+    Args:
+        name: 'voyage' or 'local' (if None, SIFFS_EMBEDDING_PROVIDER or 'voyage')
+        client_factory: Callable returning the VoyageAI client (voyage provider only)
+        **options: Provider options (model/dimension for voyage; model_dir/threads/batch_size for local)
+
+    Returns:
+        Embedding provider
+
+    Raises:
+        ValueError: If the provider name is unknown
+    """
+    name = (name or os.getenv('SIFFS_EMBEDDING_PROVIDER') or PROVIDER_VOYAGE).lower()
+    if name == PROVIDER_VOYAGE:
+        return VoyageProvider(client_factory(), **options)
+    if name == PROVIDER_LOCAL:
+        return LocalOnnxProvider(**options)
+    raise ValueError(f"Unknown embedding provider: {name}")
@@ -0,0 +1,309 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import stat
+import time
+import fnmatch
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Iterator, Iterable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ScannedFile(NamedTuple):
+    """A file found by the scanner, with the stat data the scan already paid for"""
+    path: str
+    size: int
+    mtime: float
+
+class FileScanner:
+    """
+    Streaming directory scanner built on os.scandir
+
+    Compared to glob/os.walk + os.path.isfile/getsize, every directory is listed
+    once and file type checks come from the DirEntry (free on Windows and most
+    POSIX filesystems); only matching files are stat'ed, once, and the size/mtime
+    are handed to the caller. This matters most on SMB shares where each stat is
+    a network round trip.
+
+    Features:
+    - Generator API: results are yielded while the walk continues
+    - Parallel walking of subtrees (max_workers threads)
+    - Exclude globs matched against names and root-relative paths
+    - Maximum depth
+    - Hidden/system directory skipping
+    - Office owner/lock file filtering (~$deck.pptx)
+
+    Directories that cannot be listed (and entries that cannot be inspected) are
+    reported by get_unlisted_paths() after a scan. Their files are missing from
+    the results without being gone, so callers must not treat them as deleted.
+    """
+
+    # Directories that never contain user documents
+    SYSTEM_DIRECTORIES = {'$recycle.bin', 'system volume information', '__macosx'}
+
+    # Office writes "~$name.pptx" owner files next to open documents
+    LOCK_FILE_PREFIXES = ('~$',)
+
+    def __init__(self,
+                 extensions: Iterable[str],
+                 exclude_patterns: List[str] = None,
+                 max_depth: Optional[int] = None,
+                 skip_hidden: bool = True,
+                 skip_lock_files: bool = True,
+                 min_size: int = 1,
+                 max_workers: int = 4,
+                 verbose: bool = True):
+        """
+        Initialize the scanner
+
+        Args:
+            extensions: File extensions to match (e.g. {'.pptx'}), case-insensitive
+            exclude_patterns: Glob patterns for files/directories to skip, matched against the
+                              entry name and its path relative to the scan root (using '/')
+            max_depth: Maximum directory depth below the root to descend (None for unlimited,
+                       0 for the root folder only)
+            skip_hidden: Skip hidden and system directories and files
+            skip_lock_files: Skip Office owner/lock files such as ~$deck.pptx
+            min_size: Minimum file size in bytes (empty files are skipped by default)
+            max_workers: Number of threads walking subtrees in parallel (1 walks serially)
+            verbose: Log each scan at INFO level (DEBUG when False, e.g. for periodic polling)
+        """
+        self.extensions = {ext.lower() for ext in extensions}
+        self.exclude_patterns = list(exclude_patterns or [])
+        self.max_depth = max_depth
+        self.skip_hidden = skip_hidden
+        self.skip_lock_files = skip_lock_files
+        self.min_size = min_size
+        self.max_workers = max(1, max_workers)
+        self._log_level = logging.INFO if verbose else logging.DEBUG
+
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        """Reset statistics for a new scan"""
+        self.stats = {
+            'directories_scanned': 0,
+            'entries_seen': 0,
+            'files_matched': 0,
+            'skipped_lock_files': 0,
+            'skipped_hidden': 0,
+            'skipped_excluded': 0,
+            'errors': 0,
+            'scan_time': 0.0
+        }
+        self._unlisted_paths = []
+
+    def _record_unlisted(self, path: str):
+        """Remember a directory or entry whose files the scan could not report"""
+        with self._stats_lock:
+            self.stats['errors'] += 1
+            self._unlisted_paths.append(path)
+
+    def _count(self, key: str, amount: int = 1):
+        """Thread-safe statistics update"""
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _is_excluded(self, name: str, relative_path: str) -> bool:
+        """Check an entry against the exclude patterns"""
+        for pattern in self.exclude_patterns:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+                return True
+        return False
+
+    def matches(self, path: str, root: str, is_dir: bool = False) -> bool:
+        """
+        Check a path below a scan root against the scanner's rules without listing anything
+
+        Used to filter paths reported by filesystem events the way a scan of the root
+        would. Hidden entries are recognized by name only (no Windows attribute lookup)
+        and file sizes are not checked.
+
+        Args:
+            path: File or directory path
+            root: Scan root the path lies in
+            is_dir: Whether the path is a directory (not matched against the extensions)
+
+        Returns:
+            True if a scan of root would descend into the directory or yield the file
+        """
+        relative_path = os.path.relpath(path, root)
+        if relative_path == os.curdir:
+            return is_dir
+        if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+            return False
+
+        parts = relative_path.replace(os.sep, '/').split('/')
+        depth = len(parts) if is_dir else len(parts) - 1
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        for index, name in enumerate(parts):
+            if self.skip_hidden and (name.startswith('.') or name.lower() in self.SYSTEM_DIRECTORIES):
+                return False
+            if self._is_excluded(name, '/'.join(parts[:index + 1])):
+                return False
+        if is_dir:
+            return True
+
+        name = parts[-1]
+        if os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        return not (self.skip_lock_files and name.startswith(self.LOCK_FILE_PREFIXES))
+
+    def _is_hidden(self, entry: os.DirEntry) -> bool:
+        """Check whether a directory entry is hidden or a system entry"""
+        if entry.name.startswith('.') or entry.name.lower() in self.SYSTEM_DIRECTORIES:
+            return True
+        if os.name == 'nt':
+            # On Windows DirEntry.stat() is served from the directory listing, no extra I/O
+            attributes = getattr(entry.stat(follow_symlinks=False), 'st_file_attributes', 0)
+            return bool(attributes & (stat.FILE_ATTRIBUTE_HIDDEN | stat.FILE_ATTRIBUTE_SYSTEM))
+        return False
+
+    def _scan_directory(self, directory: str, relative_dir: str, depth: int) -> Tuple[List[ScannedFile], List[Tuple[str, str, int]]]:
+        """
+        List one directory
+
+        Returns:
+            Tuple of (matching files, subdirectories to descend as (path, relative path, depth))
+        """
+        files = []
+        subdirectories = []
+        seen = 0
+
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    seen += 1
+                    name = entry.name
+                    relative_path = f"{relative_dir}/{name}" if relative_dir else name
+
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.max_depth is not None and depth + 1 > self.max_depth:
+                                continue
+                            if self.skip_hidden and self._is_hidden(entry):
+                                self._count('skipped_hidden')
+                                continue
+                            if self._is_excluded(name, relative_path):
+                                self._count('skipped_excluded')
+                                continue
+                            subdirectories.append((entry.path, relative_path, depth + 1))
+                            continue
+
+                        if not entry.is_file():
+                            continue
+                        if os.path.splitext(name)[1].lower() not in self.extensions:
+                            continue
+                        if self.skip_lock_files and name.startswith(self.LOCK_FILE_PREFIXES):
+                            self._count('skipped_lock_files')
+                            continue
+                        if self.skip_hidden and self._is_hidden(entry):
+                            self._count('skipped_hidden')
+                            continue
+                        if self._is_excluded(name, relative_path):
+                            self._count('skipped_excluded')
+                            continue
+
+                        # The only stat of a matching file; reused by the caller
+                        entry_stat = entry.stat()
+                        if entry_stat.st_size < self.min_size:
+                            continue
+                        files.append(ScannedFile(entry.path, entry_stat.st_size, entry_stat.st_mtime))
+                    except OSError as e:
+                        # Could be a directory - nothing below it is known to be gone
+                        logger.warning(f"⚠️ Scanner could not inspect {entry.path}: {e}")
+                        self._record_unlisted(entry.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Scanner could not list {directory}: {e}")
+            self._record_unlisted(directory)
+
+        with self._stats_lock:
+            self.stats['directories_scanned'] += 1
+            self.stats['entries_seen'] += seen
+            self.stats['files_matched'] += len(files)
+
+        return files, subdirectories
+
+    def scan(self, root: str) -> Iterator[ScannedFile]:
+        """
+        Walk a folder and yield matching files as they are found
+
+        Args:
+            root: Folder to scan
+
+        Yields:
+            ScannedFile entries (path, size, mtime)
+        """
+        self._reset_stats()
+        scan_start = time.time()
+        logger.log(self._log_level, f"📁 Scanning {root} for {', '.join(sorted(self.extensions))} "
+                    f"({self.max_workers} workers)")
+
+        try:
+            if self.max_workers == 1:
+                pending = [(root, '', 0)]
+                while pending:
+                    files, subdirectories = self._scan_directory(*pending.pop())
+                    pending.extend(subdirectories)
+                    yield from files
+                return
+
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scanner")
+            try:
+                futures = {executor.submit(self._scan_directory, root, '', 0)}
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        files, subdirectories = future.result()
+                        for subdirectory in subdirectories:
+                            futures.add(executor.submit(self._scan_directory, *subdirectory))
+                        yield from files
+            finally:
+                # Also reached when the consumer stops iterating early
+                executor.shutdown(wait=False, cancel_futures=True)
+        finally:
+            self.stats['scan_time'] = round(time.time() - scan_start, 3)
+            logger.log(self._log_level, f"📁 Scan of {root} finished in {self.stats['scan_time']:.2f}s: "
+                        f"{self.stats['files_matched']} files from {self.stats['entries_seen']} entries "
+                        f"in {self.stats['directories_scanned']} directories "
+                        f"({self.stats['skipped_lock_files']} lock files, {self.stats['skipped_hidden']} hidden, "
+                        f"{self.stats['skipped_excluded']} excluded skipped)")
+
+    def scan_paths(self, root: str) -> List[str]:
+        """Scan a folder and return the matching file paths"""
+        return [scanned.path for scanned in self.scan(root)]
+
+    def get_unlisted_paths(self) -> List[str]:
+        """
+        Get the directories and entries the last scan could not list or inspect
+
+        Returns:
+            Paths whose files (recursively) may be missing from the scan results;
+            contains the root itself if the root could not be listed
+        """
+        with self._stats_lock:
+            return list(self._unlisted_paths)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics of the last scan"""
+        with self._stats_lock:
+            return dict(self.stats)
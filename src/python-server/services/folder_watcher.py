@@ -0,0 +1,850 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import sys
+import json
+import time
+import errno
+import queue
+import ctypes
+import ctypes.util
+import select
+import struct
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Callable, Iterable
+
+from services.file_scanner import FileScanner
+from services.ingestion_scheduler import PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND, PRIORITY_LEVELS
+
+logger = logging.getLogger(__name__)
+
+# Watch event kinds
+EVENT_CHANGED = 'changed'   # file added or modified
+EVENT_DELETED = 'deleted'   # file removed or moved away
+EVENT_RESCAN = 'rescan'     # events were lost or a directory vanished - rescan the root
+EVENT_ROOT_LOST = 'root_lost'  # the root itself vanished or was unmounted - re-attach it once back
+
+# Watch backends
+BACKEND_AUTO = 'auto'
+BACKEND_INOTIFY = 'inotify'
+BACKEND_POLLING = 'polling'
+
+# inotify(7) constants
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_UNMOUNT = 0x00002000
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# Closed-after-write instead of every modify: a deck being saved is reported once
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE |
+               _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+
+# struct inotify_event header: wd, mask, cookie, name length
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _WatchedFolder:
+    """A registered root with the scanner rules its events are filtered by"""
+
+    def __init__(self, root: str, extensions: Iterable[str], options: Dict[str, Any], added_at: float):
+        self.root = root
+        self.extensions = sorted({extension.lower() for extension in extensions})
+        self.options = dict(options or {})
+        self.added_at = added_at
+        self.backend = None
+        self.scanner = FileScanner(extensions=self.extensions, verbose=False,
+                                   **(self.options.get('scan_options') or {}))
+
+
+class _InotifyBackend:
+    """
+    Recursive inotify watches through libc (Linux)
+
+    Every directory of a root gets a watch; directories created or moved in are
+    watched (and their files reported) as they appear.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, emit: Callable[[str, str, str], None]):
+        """
+        Initialize the inotify instance and start the reader thread
+
+        Args:
+            emit: Callback receiving (root, path, event kind)
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        self._emit = emit
+        self._libc = self._load_libc()
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        self._fd = fd
+        self._lock = threading.Lock()
+        self._watches: Dict[int, tuple] = {}       # wd → (root, directory)
+        self._directories: Dict[str, int] = {}     # directory → wd
+        self._folders: Dict[str, _WatchedFolder] = {}
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, name="folder-watch-inotify", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _load_libc():
+        """Load libc and declare the inotify functions"""
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether this platform's libc provides inotify"""
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            cls._load_libc()
+            return True
+        except (OSError, AttributeError):
+            return False
+
+    def add_folder(self, folder: _WatchedFolder):
+        """
+        Watch a root and all its (non-excluded) subdirectories
+
+        Raises:
+            OSError: If a watch cannot be added (e.g. the inotify watch limit is reached)
+        """
+        with self._lock:
+            self._folders[folder.root] = folder
+        try:
+            self._watch_tree(folder, folder.root)
+        except OSError:
+            self.remove_folder(folder.root)
+            raise
+        logger.info(f"👀 Watching {folder.root} with inotify ({self.watch_count(folder.root)} directories)")
+
+    def remove_folder(self, root: str):
+        """Stop watching a root"""
+        with self._lock:
+            self._folders.pop(root, None)
+        self._unwatch_tree(root)
+
+    def watch_count(self, root: str) -> int:
+        """Number of directories watched for a root"""
+        with self._lock:
+            return sum(1 for watch_root, _ in self._watches.values() if watch_root == root)
+
+    def _watch_tree(self, folder: _WatchedFolder, directory: str, report_files: bool = False):
+        """
+        Add watches for a directory tree
+
+        Args:
+            folder: Root the tree belongs to
+            directory: Top directory of the tree
+            report_files: Report the tree's files as changed (for directories that just
+                          appeared - their files were written before the watch existed)
+        """
+        for current, subdirectories, names in os.walk(directory):
+            if not self._add_watch(folder.root, current):
+                subdirectories[:] = []
+                continue
+            subdirectories[:] = [name for name in subdirectories
+                                 if folder.scanner.matches(os.path.join(current, name), folder.root, is_dir=True)]
+            if report_files:
+                for name in names:
+                    path = os.path.join(current, name)
+                    if folder.scanner.matches(path, folder.root):
+                        self._emit(folder.root, path, EVENT_CHANGED)
+
+    def _add_watch(self, root: str, directory: str) -> bool:
+        """Add one directory watch; False if the directory vanished meanwhile"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(error, f"inotify_add_watch failed: {os.strerror(error)}", directory)
+        with self._lock:
+            self._watches[wd] = (root, directory)
+            self._directories[directory] = wd
+        return True
+
+    def _unwatch_tree(self, directory: str):
+        """Remove the watches of a directory and everything below it"""
+        prefix = directory.rstrip(os.sep) + os.sep
+        with self._lock:
+            removed = [(path, wd) for path, wd in self._directories.items()
+                       if path == directory or path.startswith(prefix)]
+            for path, wd in removed:
+                del self._directories[path]
+                self._watches.pop(wd, None)
+        for _, wd in removed:
+            # Fails harmlessly for directories the kernel already dropped
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _read_loop(self):
+        """Read and dispatch inotify events until closed"""
+        while not self._stop_event.is_set():
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 0.5)
+            except (OSError, ValueError):
+                break
+            if not readable:
+                continue
+            try:
+                data = os.read(self._fd, self.READ_SIZE)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                logger.error(f"❌ Reading inotify events failed: {e}")
+                break
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+                offset += name_length
+                try:
+                    self._handle_event(wd, mask, name)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not handle inotify event for {name}: {e}")
+
+    def _handle_event(self, wd: int, mask: int, name: str):
+        """Turn one inotify event into watch events"""
+        if mask & _IN_Q_OVERFLOW:
+            logger.warning("⚠️ inotify event queue overflowed, rescanning watched folders")
+            with self._lock:
+                roots = list(self._folders)
+            for root in roots:
+                self._emit(root, root, EVENT_RESCAN)
+            return
+
+        with self._lock:
+            watch = self._watches.get(wd)
+            if watch and mask & _IN_IGNORED:
+                del self._watches[wd]
+                if self._directories.get(watch[1]) == wd:
+                    del self._directories[watch[1]]
+            folder = self._folders.get(watch[0]) if watch else None
+        if folder is None:
+            return
+        directory = watch[1]
+
+        if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_UNMOUNT | _IN_IGNORED):
+            # Subdirectories are handled through their parent's event, except for a file
+            # system unmounted below the root. A vanished root is not treated as deleted
+            # files (it may be an unmounted drive); the watcher re-attaches it once it is back
+            if directory == folder.root:
+                if not mask & _IN_IGNORED:
+                    logger.warning(f"⚠️ Watched folder {folder.root} was moved, deleted or unmounted")
+                self._unwatch_tree(folder.root)
+                self._emit(folder.root, folder.root, EVENT_ROOT_LOST)
+            elif mask & _IN_UNMOUNT:
+                self._unwatch_tree(directory)
+                self._emit(folder.root, directory, EVENT_RESCAN)
+            return
+
+        path = os.path.join(directory, name)
+        if mask & _IN_ISDIR:
+            if mask & (_IN_CREATE | _IN_MOVED_TO):
+                if folder.scanner.matches(path, folder.root, is_dir=True):
+                    self._watch_tree(folder, path, report_files=True)
+            elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                # Which indexed files were inside is known to the catalog, not to us
+                self._unwatch_tree(path)
+                self._emit(folder.root, path, EVENT_RESCAN)
+            return
+
+        if not folder.scanner.matches(path, folder.root):
+            return
+        if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+            self._emit(folder.root, path, EVENT_CHANGED)
+        elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+            self._emit(folder.root, path, EVENT_DELETED)
+
+    def close(self):
+        """Stop the reader thread and release the inotify instance"""
+        self._stop_event.set()
+        self._thread.join(5)
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """
+    Periodic rescans compared against the previous snapshot (any platform)
+
+    Uses the streaming FileScanner, which stats only matching files (served from the
+    directory listing on Windows), so a poll costs one directory listing per folder.
+    """
+
+    def __init__(self, emit: Callable[[str, str, str], None], interval_seconds: float):
+        """
+        Initialize the backend and start the polling thread
+
+        Args:
+            emit: Callback receiving (root, path, event kind)
+            interval_seconds: Seconds between two polls of a root
+        """
+        self._emit = emit
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._folders: Dict[str, _WatchedFolder] = {}
+        self._snapshots: Dict[str, Dict[str, tuple]] = {}
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._poll_loop, name="folder-watch-polling", daemon=True)
+        self._thread.start()
+
+    def add_folder(self, folder: _WatchedFolder):
+        """Poll a root (its first poll only takes the baseline snapshot)"""
+        with self._lock:
+            self._folders[folder.root] = folder
+        logger.info(f"👀 Watching {folder.root} by polling every {self.interval_seconds:.0f}s")
+
+    def remove_folder(self, root: str):
+        """Stop polling a root"""
+        with self._lock:
+            self._folders.pop(root, None)
+            self._snapshots.pop(root, None)
+
+    def _poll_loop(self):
+        """Poll all roots every interval until closed"""
+        while not self._stop_event.is_set():
+            with self._lock:
+                folders = list(self._folders.values())
+            for folder in folders:
+                if self._stop_event.is_set():
+                    break
+                try:
+                    self.poll(folder)
+                except Exception as e:
+                    logger.warning(f"⚠️ Polling {folder.root} failed: {e}")
+            self._stop_event.wait(self.interval_seconds)
+
+    def poll(self, folder: _WatchedFolder):
+        """Scan one root and report what changed since the previous poll"""
+        if not os.path.isdir(folder.root):
+            return  # offline drive: keep the snapshot, report nothing
+        snapshot = {scanned.path: (scanned.size, scanned.mtime) for scanned in folder.scanner.scan(folder.root)}
+        unlisted = folder.scanner.get_unlisted_paths()
+        with self._lock:
+            if folder.root not in self._folders:
+                return
+            previous = self._snapshots.get(folder.root)
+            if previous is not None and unlisted:
+                # Files below directories that could not be listed are kept, not reported deleted
+                prefixes = tuple(path.rstrip(os.sep) + os.sep for path in unlisted)
+                for path, stat in previous.items():
+                    if path not in snapshot and (path in unlisted or path.startswith(prefixes)):
+                        snapshot[path] = stat
+            self._snapshots[folder.root] = snapshot
+        if previous is None:
+            return
+
+        for path, stat in snapshot.items():
+            if previous.get(path) != stat:
+                self._emit(folder.root, path, EVENT_CHANGED)
+        for path in previous:
+            if path not in snapshot:
+                self._emit(folder.root, path, EVENT_DELETED)
+
+    def close(self):
+        """Stop the polling thread"""
+        self._stop_event.set()
+        self._thread.join(5)
+
+
+class FolderWatcher:
+    """
+    Keeps the index of registered folders fresh without full rescans
+
+    Registered roots are watched with inotify where available and by periodic
+    polling otherwise (or when a root exceeds the inotify watch limit). Events go
+    through a bounded queue into a debouncer that collects them per root until the
+    root has been quiet for `debounce_seconds` (or `max_delay_seconds` after its
+    first event, so a steady stream of saves still gets indexed). The collected
+    files are then submitted as one incremental job: existing files are indexed,
+    missing ones have their vectors deleted. Small batches run at interactive
+    priority, larger ones (a sync or checkout) at normal priority.
+
+    When events are lost - the queue overflowed, inotify overflowed or a directory
+    vanished - the root is rescanned instead (an incremental catalog diff).
+
+    Roots are persisted in SQLite. On start they are watched again and rescanned
+    at background priority to pick up changes made while the server was down.
+    """
+
+    DEBOUNCE_SECONDS = 2.0
+    MAX_DELAY_SECONDS = 30.0
+    MAX_QUEUED_EVENTS = 10000
+    POLL_INTERVAL_SECONDS = 15.0
+
+    # Largest batch of changed files submitted as interactive work
+    INTERACTIVE_MAX_FILES = 5
+
+    def __init__(self, db_path: str = None, job_manager=None, backend: str = BACKEND_AUTO,
+                 debounce_seconds: float = None, max_delay_seconds: float = None,
+                 max_queued_events: int = None, poll_interval_seconds: float = None):
+        """
+        Initialize the watcher (nothing is watched until start())
+
+        Args:
+            db_path: Path of the SQLite database of watched roots (if None, uses default
+                     app data location)
+            job_manager: Ingestion job manager receiving the jobs (if None, uses the global one)
+            backend: 'auto' (inotify if available), 'inotify' or 'polling'
+            debounce_seconds: Quiet time after the last event before a root's changes are submitted
+            max_delay_seconds: Longest time changes are held back while events keep arriving
+            max_queued_events: Capacity of the event queue; overflowing it triggers a rescan
+            poll_interval_seconds: Seconds between polls of roots watched by polling
+        """
+        if backend not in (BACKEND_AUTO, BACKEND_INOTIFY, BACKEND_POLLING):
+            raise ValueError(f"Unknown watch backend: {backend}")
+
+        if db_path is None:
+            # Use platform-appropriate app data directory
+            if os.name == 'nt':  # Windows
+                app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+                db_path = os.path.join(app_data, 'SIFFS', 'folder_watches.db')
+            else:  # Mac/Linux
+                app_data = os.path.expanduser('~/.local/share')
+                db_path = os.path.join(app_data, 'SIFFS', 'folder_watches.db')
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db_path = db_path
+        self.backend = backend
+        self.debounce_seconds = self.DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        self.max_delay_seconds = self.MAX_DELAY_SECONDS if max_delay_seconds is None else max_delay_seconds
+        self.poll_interval_seconds = poll_interval_seconds or self.POLL_INTERVAL_SECONDS
+        self._job_manager = job_manager
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._initialize_schema()
+
+        self._events = queue.Queue(maxsize=max_queued_events or self.MAX_QUEUED_EVENTS)
+        self._folders: Dict[str, _WatchedFolder] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._overflowed = set()
+        self._deferred: Dict[str, str] = {}  # root -> priority of the rescan waiting for it to come back
+        self._next_deferred_check = 0.0
+        self._inotify = None
+        self._inotify_failed = False
+        self._polling = None
+        self._dispatcher = None
+        self._stop_event = threading.Event()
+
+        self.stats = {
+            'events': 0,
+            'dropped_events': 0,
+            'change_jobs': 0,
+            'rescan_jobs': 0,
+            'deferred_rescans': 0,
+            'files_submitted': 0
+        }
+
+        logger.info(f"✅ Folder watcher initialized: {db_path}")
+
+    def _initialize_schema(self):
+        """Create the watched folder table if it doesn't exist"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS watched_folders (
+                    root TEXT PRIMARY KEY,
+                    extensions TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    added_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def _get_job_manager(self):
+        """Resolve the job manager receiving the jobs"""
+        if self._job_manager is None:
+            from services.ingestion_jobs import get_ingestion_job_manager
+            self._job_manager = get_ingestion_job_manager()
+        return self._job_manager
+
+    @property
+    def running(self) -> bool:
+        """Whether the watcher has been started"""
+        return self._dispatcher is not None
+
+    def start(self, catch_up: bool = True):
+        """
+        Watch the persisted roots and start dispatching events
+
+        Args:
+            catch_up: Rescan each root (at background priority) for changes made while
+                      the server was not running; roots that are offline are rescanned
+                      once they are back
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="folder-watch-dispatch", daemon=True)
+        self._dispatcher.start()
+
+        with self._lock:
+            rows = self._conn.execute("SELECT root, extensions, options, added_at FROM watched_folders").fetchall()
+        for root, extensions, options, added_at in rows:
+            folder = _WatchedFolder(root, json.loads(extensions), json.loads(options), added_at)
+            self._attach(folder)
+            if catch_up:
+                self._submit_rescan(folder, PRIORITY_BACKGROUND)
+        logger.info(f"👀 Folder watcher started with {len(rows)} watched folders")
+
+    def stop(self):
+        """Stop watching; changes not yet submitted are picked up by the next start's catch-up"""
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._dispatcher.join(5)
+        self._dispatcher = None
+        for backend in (self._inotify, self._polling):
+            if backend is not None:
+                backend.close()
+        self._inotify = None
+        self._polling = None
+        with self._lock:
+            self._folders.clear()
+            self._pending.clear()
+            self._overflowed.clear()
+            self._deferred.clear()
+        logger.info("👀 Folder watcher stopped")
+
+    def add_folder(self, root: str, extensions: Iterable[str], options: Dict[str, Any] = None,
+                   priority: str = None) -> Dict[str, Any]:
+        """
+        Register a root folder to watch (persisted across restarts)
+
+        The folder is indexed right away (incrementally) if the watcher is running.
+        Adding a large tree walks it to set up the watches, so call this off the event loop.
+
+        Args:
+            root: Folder to watch
+            extensions: File extensions to index (e.g. {'.pptx'})
+            options: Folder job options (e.g. {'sources': [...], 'scan_options': {...}});
+                     scan_options also filter the watch events
+            priority: Priority of the initial indexing job: 'interactive', 'normal'
+                      (default) or 'background'
+
+        Returns:
+            Description of the watched folder
+
+        Raises:
+            ValueError: If the folder does not exist, overlaps a watched folder or the
+                        priority is unknown
+        """
+        priority = priority or PRIORITY_NORMAL
+        if priority not in PRIORITY_LEVELS:
+            raise ValueError(f"Unknown priority '{priority}' (supported: {', '.join(PRIORITY_LEVELS)})")
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            raise ValueError(f"Folder does not exist: {root}")
+        options = dict(options or {})
+
+        with self._lock:
+            for watched in self._watched_roots():
+                if watched != root and os.path.commonpath([watched, root]) in (watched, root):
+                    raise ValueError(f"{root} overlaps watched folder {watched}")
+            added_at = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watched_folders (root, extensions, options, added_at) VALUES (?, ?, ?, ?)",
+                (root, json.dumps(sorted(extensions)), json.dumps(options), added_at)
+            )
+            self._conn.commit()
+            replaced = self._folders.get(root)
+
+        folder = _WatchedFolder(root, extensions, options, added_at)
+        if self.running:
+            if replaced:
+                self._detach(replaced)
+            self._attach(folder)
+            self._submit_rescan(folder, priority)
+        logger.info(f"👀 Added watched folder {root} ({', '.join(folder.extensions)})")
+        return self._describe(folder)
+
+    def remove_folder(self, root: str) -> bool:
+        """
+        Stop watching a root folder (its indexed slides are kept)
+
+        Args:
+            root: Watched folder
+
+        Returns:
+            True if the folder was watched
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM watched_folders WHERE root = ?", (root,)).rowcount
+            self._conn.commit()
+            folder = self._folders.get(root)
+        if folder:
+            self._detach(folder)
+        if removed:
+            logger.info(f"👀 Removed watched folder {root}")
+        return bool(removed)
+
+    def list_folders(self) -> List[Dict[str, Any]]:
+        """Describe all watched folders"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT root, extensions, options, added_at FROM watched_folders ORDER BY root"
+            ).fetchall()
+            folders = [self._folders.get(root) or _WatchedFolder(root, json.loads(extensions), json.loads(options), added_at)
+                       for root, extensions, options, added_at in rows]
+        return [self._describe(folder) for folder in folders]
+
+    def _watched_roots(self) -> List[str]:
+        """Persisted roots (lock must be held)"""
+        return [row[0] for row in self._conn.execute("SELECT root FROM watched_folders")]
+
+    def _describe(self, folder: _WatchedFolder) -> Dict[str, Any]:
+        """Public description of a watched folder"""
+        with self._lock:
+            pending = self._pending.get(folder.root)
+            pending_files = len(pending['changed']) + len(pending['deleted']) if pending else 0
+        return {
+            'folder_path': folder.root,
+            'extensions': folder.extensions,
+            'options': dict(folder.options),
+            'backend': folder.backend,
+            'pending_files': pending_files,
+            'added_at': folder.added_at
+        }
+
+    def _attach(self, folder: _WatchedFolder):
+        """Start watching a folder with the preferred backend"""
+        if self.backend != BACKEND_POLLING and not self._inotify_failed:
+            try:
+                if self._inotify is None:
+                    if not _InotifyBackend.available():
+                        raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+                    self._inotify = _InotifyBackend(self._emit)
+                self._inotify.add_folder(folder)
+                folder.backend = BACKEND_INOTIFY
+            except OSError as e:
+                if self._inotify is None:
+                    self._inotify_failed = True
+                logger.warning(f"⚠️ Cannot watch {folder.root} with inotify ({e}), falling back to polling")
+        if folder.backend is None:
+            if self._polling is None:
+                self._polling = _PollingBackend(self._emit, self.poll_interval_seconds)
+            self._polling.add_folder(folder)
+            folder.backend = BACKEND_POLLING
+        with self._lock:
+            self._folders[folder.root] = folder
+
+    def _detach(self, folder: _WatchedFolder):
+        """Stop watching a folder and drop its pending changes"""
+        backend = self._inotify if folder.backend == BACKEND_INOTIFY else self._polling
+        if backend is not None:
+            backend.remove_folder(folder.root)
+        with self._lock:
+            self._folders.pop(folder.root, None)
+            self._pending.pop(folder.root, None)
+            self._overflowed.discard(folder.root)
+            self._deferred.pop(folder.root, None)
+
+    def _emit(self, root: str, path: str, kind: str):
+        """Queue a watch event (called from the backend threads)"""
+        try:
+            self._events.put_nowait((root, path, kind, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self.stats['dropped_events'] += 1
+                first_drop = root not in self._overflowed
+                self._overflowed.add(root)
+            if first_drop:
+                logger.warning(f"⚠️ Watch event queue full, {root} will be rescanned")
+
+    def _dispatch_loop(self):
+        """Collect queued events per root and submit them once the root is quiet"""
+        while not self._stop_event.is_set():
+            try:
+                event = self._events.get(timeout=0.25)
+            except queue.Empty:
+                event = None
+            if event is not None:
+                self._record(*event)
+            now = time.monotonic()
+            self._flush_due(now)
+            self._submit_deferred(now)
+
+    def _record(self, root: str, path: str, kind: str, at: float):
+        """Add an event to its root's pending changes"""
+        with self._lock:
+            if root not in self._folders:
+                return
+            self.stats['events'] += 1
+            if kind == EVENT_ROOT_LOST:
+                self._defer(root, PRIORITY_NORMAL)
+                return
+            pending = self._pending_for(root, at)
+            if kind == EVENT_RESCAN:
+                pending['rescan'] = True
+            elif kind == EVENT_CHANGED:
+                pending['deleted'].discard(path)
+                pending['changed'].add(path)
+            else:
+                pending['changed'].discard(path)
+                pending['deleted'].add(path)
+
+    def _pending_for(self, root: str, at: float) -> Dict[str, Any]:
+        """Pending changes of a root, touched at the given time (lock must be held)"""
+        pending = self._pending.get(root)
+        if pending is None:
+            pending = {'changed': set(), 'deleted': set(), 'rescan': False, 'first': at}
+            self._pending[root] = pending
+        pending['last'] = at
+        return pending
+
+    def _flush_due(self, now: float):
+        """Submit the pending changes of roots that are quiet or have waited long enough"""
+        with self._lock:
+            for root in self._overflowed:
+                if root in self._folders:
+                    self._pending_for(root, now)['rescan'] = True
+            self._overflowed.clear()
+
+            due = [root for root, pending in self._pending.items()
+                   if now - pending['last'] >= self.debounce_seconds
+                   or now - pending['first'] >= self.max_delay_seconds]
+            batches = [(self._folders[root], self._pending.pop(root)) for root in due]
+
+        for folder, pending in batches:
+            if pending['rescan']:
+                self._submit_rescan(folder, PRIORITY_NORMAL)
+            else:
+                self._submit_changes(folder, pending)
+
+    def _submit_changes(self, folder: _WatchedFolder, pending: Dict[str, Any]):
+        """Submit a root's changed files as one incremental job"""
+        # Whatever happened in between, a path's final state decides
+        paths = pending['changed'] | pending['deleted']
+        changed = sorted(path for path in paths if os.path.isfile(path))
+        deleted = sorted(path for path in paths if not os.path.exists(path))
+        if not changed and not deleted:
+            return
+        priority = PRIORITY_INTERACTIVE if len(changed) + len(deleted) <= self.INTERACTIVE_MAX_FILES else PRIORITY_NORMAL
+        try:
+            job = self._get_job_manager().submit_changes(folder.root, changed, deleted, priority=priority)
+        except Exception as e:
+            logger.error(f"❌ Could not submit changes of {folder.root}: {e}")
+            return
+        with self._lock:
+            self.stats['change_jobs'] += 1
+            self.stats['files_submitted'] += len(changed) + len(deleted)
+        logger.info(f"🔄 {folder.root}: {len(changed)} changed and {len(deleted)} deleted files "
+                    f"queued as {priority} job {job['job_id']}")
+
+    def _defer(self, root: str, priority: str):
+        """Rescan (and re-attach) a root once it is available again (lock must be held)"""
+        current = self._deferred.get(root)
+        if current is None:
+            self.stats['deferred_rescans'] += 1
+            logger.warning(f"⚠️ Watched folder {root} is not available, rescan deferred until it is back")
+        if current is None or PRIORITY_LEVELS[priority] < PRIORITY_LEVELS[current]:
+            self._deferred[root] = priority
+
+    def _submit_deferred(self, now: float):
+        """Submit the rescans of offline roots that are back (checked once per poll interval)"""
+        with self._lock:
+            if not self._deferred or now < self._next_deferred_check:
+                return
+            self._next_deferred_check = now + self.poll_interval_seconds
+            waiting = [(self._folders[root], priority) for root, priority in self._deferred.items()
+                       if root in self._folders]
+        for folder, priority in waiting:
+            if not os.path.isdir(folder.root):
+                continue
+            logger.info(f"👀 Watched folder {folder.root} is back online")
+            # Its directories could not be watched while it was gone
+            self._detach(folder)
+            folder.backend = None
+            self._attach(folder)
+            self._submit_rescan(folder, priority)
+
+    def _submit_rescan(self, folder: _WatchedFolder, priority: str):
+        """
+        Submit an incremental rescan of a root
+
+        An offline root (unmounted share, unplugged drive) would scan as empty and have
+        all its slides purged, so its rescan is deferred until the root is back.
+        """
+        if not os.path.isdir(folder.root):
+            with self._lock:
+                self._defer(folder.root, priority)
+            return
+        try:
+            job = self._get_job_manager().submit(folder.root, options=dict(folder.options) or None, priority=priority)
+        except Exception as e:
+            logger.error(f"❌ Could not submit rescan of {folder.root}: {e}")
+            return
+        with self._lock:
+            self.stats['rescan_jobs'] += 1
+        logger.info(f"🔄 Rescan of watched folder {folder.root} queued as {priority} job {job['job_id']}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get watcher statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['watched_folders'] = len(self._folders)
+            stats['pending_roots'] = len(self._pending)
+            stats['deferred_roots'] = len(self._deferred)
+        stats['running'] = self.running
+        stats['queued_events'] = self._events.qsize()
+        stats['backend'] = self.backend
+        return stats
+
+    def close(self):
+        """Stop watching and close the database connection"""
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+
+# Global folder watcher instance
+_folder_watcher = None
+
+def get_folder_watcher(db_path: str = None) -> FolderWatcher:
+    """Get or create global folder watcher"""
+    global _folder_watcher
+    if _folder_watcher is None:
+        _folder_watcher = FolderWatcher(db_path=db_path)
+    return _folder_watcher
@@ -0,0 +1,347 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import math
+import time
+import logging
+import threading
+from io import BytesIO
+from typing import Dict, Any, Optional
+from PIL import Image, features
+
+from services.slide_image import SlideImage, get_slide_image
+
+logger = logging.getLogger(__name__)
+
+class ImageNormalizer:
+    """
+    Normalizes images before they are uploaded for embedding
+
+    Slides are exported at 1920x1080 PNG and user images arrive at whatever resolution
+    they were saved with, while the embedding model bills (and looks at) pixels/560
+    tokens. Normalizing before upload:
+
+    - Downscales to fit within max_width x max_height (aspect ratio kept, never upscales)
+    - Caps the output pixel count (max_pixels) for tall or wide images
+    - Re-encodes to a compact format (JPEG, or WebP when available); flat slides that
+      compress better losslessly stay PNG at the reduced size
+    - Rejects images whose header declares more than max_input_pixels before any
+      pixel data is decoded, so decompression bombs cannot exhaust memory
+
+    The original bytes are kept when re-encoding would not make a small image smaller.
+    """
+
+    DEFAULT_MAX_WIDTH = 1280
+    DEFAULT_MAX_HEIGHT = 1280
+    DEFAULT_MAX_PIXELS = 1280 * 960
+    DEFAULT_MAX_INPUT_PIXELS = 100000000  # 100 megapixels
+    DEFAULT_FORMAT = 'JPEG'
+    DEFAULT_QUALITY = 85
+
+    # Flattening background for transparent images (JPEG has no alpha channel)
+    BACKGROUND_COLOR = (255, 255, 255)
+
+    def __init__(self,
+                 max_width: int = None,
+                 max_height: int = None,
+                 max_pixels: int = None,
+                 max_input_pixels: int = None,
+                 output_format: str = None,
+                 quality: int = None):
+        """
+        Initialize the normalizer
+
+        Args:
+            max_width: Maximum output width in pixels
+            max_height: Maximum output height in pixels
+            max_pixels: Maximum output pixel count (width * height)
+            max_input_pixels: Images declaring more pixels than this are rejected undecoded
+            output_format: 'JPEG' or 'WEBP' (falls back to JPEG when WebP is unavailable)
+            quality: Encoder quality (1-100)
+        """
+        self.max_width = max_width or self.DEFAULT_MAX_WIDTH
+        self.max_height = max_height or self.DEFAULT_MAX_HEIGHT
+        self.max_pixels = max_pixels or self.DEFAULT_MAX_PIXELS
+        self.max_input_pixels = max_input_pixels or self.DEFAULT_MAX_INPUT_PIXELS
+        self.quality = quality or self.DEFAULT_QUALITY
+
+        self.output_format = (output_format or self.DEFAULT_FORMAT).upper()
+        if self.output_format == 'WEBP' and not features.check('webp'):
+            logger.warning("⚠️ WebP encoding is not available in this Pillow build, using JPEG")
+            self.output_format = 'JPEG'
+        elif self.output_format not in ('JPEG', 'WEBP'):
+            logger.warning(f"⚠️ Unsupported normalization format {self.output_format}, using JPEG")
+            self.output_format = 'JPEG'
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'images': 0,
+            'resized': 0,
+            'reencoded': 0,
+            'kept_original': 0,
+            'rejected': 0,
+            'errors': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'pixels_in': 0,
+            'pixels_out': 0,
+            'normalize_time': 0.0
+        }
+
+    def target_size(self, width: int, height: int) -> tuple:
+        """
+        Compute the output size for an image
+
+        Args:
+            width: Source width
+            height: Source height
+
+        Returns:
+            (width, height) fitting the box and pixel cap, never larger than the source
+        """
+        scale = min(1.0, self.max_width / width, self.max_height / height)
+        if width * height * scale * scale > self.max_pixels:
+            scale = math.sqrt(self.max_pixels / (width * height))
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def normalize_bytes(self, image_bytes: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Normalize encoded image bytes
+
+        Args:
+            image_bytes: Encoded image (PNG, JPEG, ...) as bytes or memoryview
+
+        Returns:
+            Dictionary with 'data', 'kept_original', 'width', 'height', 'format',
+            'original_bytes', 'normalized_bytes' and 'resized', or None if the image was
+            rejected or unreadable. When 'kept_original' is True, 'data' is the input object.
+        """
+        normalize_start = time.time()
+        try:
+            with Image.open(BytesIO(image_bytes)) as image:
+                # Header only so far - refuse decompression bombs before decoding pixels
+                width, height = image.size
+                if width * height > self.max_input_pixels:
+                    logger.warning(f"⚠️ Rejected {width}x{height} image: exceeds {self.max_input_pixels} pixel limit")
+                    self._count(rejected=1)
+                    return None
+
+                source_format = image.format
+                target_width, target_height = self.target_size(width, height)
+                resized = (target_width, target_height) != (width, height)
+
+                # JPEG sources can be decoded directly at a reduced scale
+                if resized and source_format == 'JPEG':
+                    image.draft('RGB', (target_width, target_height))
+
+                normalized = self._flatten(image)
+                if resized:
+                    normalized = normalized.resize((target_width, target_height), Image.LANCZOS)
+
+                output_format = self.output_format
+                data = self._encode(normalized, output_format)
+                if resized and source_format == 'PNG':
+                    # Flat, text-heavy slide exports often compress better losslessly - keep the smaller encoding
+                    png_data = self._encode(normalized, 'PNG')
+                    if len(png_data) < len(data):
+                        output_format, data = 'PNG', png_data
+
+            # Re-encoding a small, already compact image can make it larger - keep the original
+            if not resized and len(data) >= len(image_bytes):
+                result = {
+                    'data': image_bytes,
+                    'kept_original': True,
+                    'width': width,
+                    'height': height,
+                    'format': source_format,
+                    'original_bytes': len(image_bytes),
+                    'normalized_bytes': len(image_bytes),
+                    'resized': False
+                }
+                self._count(kept_original=1)
+            else:
+                result = {
+                    'data': data,
+                    'kept_original': False,
+                    'width': target_width,
+                    'height': target_height,
+                    'format': output_format,
+                    'original_bytes': len(image_bytes),
+                    'normalized_bytes': len(data),
+                    'resized': resized
+                }
+                self._count(reencoded=1, resized=1 if resized else 0)
+
+            self._count(images=1,
+                        bytes_in=len(image_bytes),
+                        bytes_out=result['normalized_bytes'],
+                        pixels_in=width * height,
+                        pixels_out=result['width'] * result['height'],
+                        normalize_time=time.time() - normalize_start)
+            return result
+
+        except Image.DecompressionBombError as e:
+            logger.warning(f"⚠️ Rejected image: {e}")
+            self._count(rejected=1)
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error normalizing image: {e}")
+            self._count(errors=1)
+            return None
+
+    def _encode(self, image: Image.Image, image_format: str) -> bytes:
+        """Encode an image in the given format"""
+        buffer = BytesIO()
+        if image_format == 'PNG':
+            image.save(buffer, format='PNG')
+        elif image_format == 'JPEG':
+            image.save(buffer, format='JPEG', quality=self.quality, optimize=True)
+        else:
+            image.save(buffer, format=image_format, quality=self.quality)
+        return buffer.getvalue()
+
+    def _flatten(self, image: Image.Image) -> Image.Image:
+        """Convert an image to RGB, compositing transparency onto the background color"""
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, self.BACKGROUND_COLOR)
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            return background
+        if image.mode != 'RGB':
+            return image.convert('RGB')
+        return image
+
+    def normalize_file(self, image_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Normalize an image file
+
+        Args:
+            image_path: Path to the image file
+
+        Returns:
+            Same as normalize_bytes, or None if the file could not be read or normalized
+        """
+        try:
+            with open(image_path, 'rb') as image_file:
+                image_bytes = image_file.read()
+        except OSError as e:
+            logger.error(f"❌ Could not read image {image_path}: {e}")
+            self._count(errors=1)
+            return None
+        return self.normalize_bytes(image_bytes)
+
+    def normalize_slide(self, slide_data: Dict) -> Optional[Dict]:
+        """
+        Normalize the image of a slide data dictionary
+
+        Args:
+            slide_data: Slide data with an 'image' SlideImage (or legacy 'image_base64')
+
+        Returns:
+            New slide data with the normalized 'image', 'image_dimensions' and
+            'image_format', or None if the image was rejected or unreadable
+        """
+        image = get_slide_image(slide_data)
+        if image is None:
+            return slide_data
+
+        try:
+            # File-backed images are memory-mapped, not copied into a bytes object
+            with image.buffer() as view:
+                result = self.normalize_bytes(view)
+                if result is not None and result['kept_original']:
+                    result['data'] = None  # the view dies with the mapping - keep the handle instead
+        except OSError as e:
+            logger.error(f"❌ Could not read image of {slide_data.get('file_name', '')}: {e}")
+            self._count(errors=1)
+            return None
+
+        if result is None:
+            return None
+        return self.apply_to_slide(slide_data, result, image if result['kept_original'] else None)
+
+    @staticmethod
+    def apply_to_slide(slide_data: Dict, result: Dict[str, Any], image: SlideImage = None) -> Dict:
+        """
+        Build slide data carrying a normalize_bytes/normalize_file result
+
+        Args:
+            slide_data: Original slide data
+            result: Normalization result
+            image: Existing image handle to keep (when the original encoding was kept)
+
+        Returns:
+            New slide data dictionary
+        """
+        dimensions = (result['width'], result['height'])
+        if image is None:
+            image = SlideImage.from_bytes(result['data'], dimensions=dimensions)
+        normalized = dict(
+            slide_data,
+            image=image,
+            image_dimensions={'width': result['width'], 'height': result['height']},
+            image_format=result['format']
+        )
+        normalized.pop('image_base64', None)
+        return normalized
+
+    def _count(self, **amounts):
+        """Thread-safe statistics update"""
+        with self._stats_lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def add_stats(self, amounts: Dict[str, Any]):
+        """
+        Add counters gathered elsewhere (e.g. by a normalizer in a worker process)
+
+        Args:
+            amounts: Statistics deltas keyed like self.stats
+        """
+        self._count(**{key: amount for key, amount in amounts.items() if key in self.stats})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get normalization statistics, including the upload bytes saved"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        stats['percent_saved'] = round(stats['bytes_saved'] / stats['bytes_in'] * 100, 1) if stats['bytes_in'] else 0.0
+        stats['normalize_time'] = round(stats['normalize_time'], 3)
+        stats['output_format'] = self.output_format
+        return stats
+
+    def get_settings(self) -> Dict[str, Any]:
+        """Get the normalization settings (to create a per-run normalizer with the same settings)"""
+        return {
+            'max_width': self.max_width,
+            'max_height': self.max_height,
+            'max_pixels': self.max_pixels,
+            'max_input_pixels': self.max_input_pixels,
+            'output_format': self.output_format,
+            'quality': self.quality
+        }
+
+
+# Global image normalizer instance
+_image_normalizer = None
+
+def get_image_normalizer() -> ImageNormalizer:
+    """Get or create global image normalizer"""
+    global _image_normalizer
+    if _image_normalizer is None:
+        _image_normalizer = ImageNormalizer()
+    return _image_normalizer
@@ -0,0 +1,343 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import time
+import logging
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from services.image_normalizer import ImageNormalizer
+from services.slide_image import SlideImage
+
+logger = logging.getLogger(__name__)
+
+# Normalizer of a worker process, reused across tasks with the same settings
+_worker_normalizer = None
+
+
+def _get_worker_normalizer(settings: Dict[str, Any]) -> ImageNormalizer:
+    """Get the worker process's normalizer for the given settings"""
+    global _worker_normalizer
+    if _worker_normalizer is None or _worker_normalizer.get_settings() != settings:
+        _worker_normalizer = ImageNormalizer(**settings)
+    return _worker_normalizer
+
+
+def _preprocess_image(image_path: str, normalizer_settings: Optional[Dict[str, Any]],
+                      max_input_pixels: int, shm_name: Optional[str]) -> Dict[str, Any]:
+    """
+    Decode, validate and (optionally) normalize one image - runs in a worker process
+
+    Normalized bytes are written into the shared memory block the parent allocated
+    for the task; only a small result dictionary travels back through the pipe.
+
+    Args:
+        image_path: Path to the image file
+        normalizer_settings: ImageNormalizer settings, or None to validate only
+        max_input_pixels: Pixel limit for validation-only runs
+        shm_name: Shared memory block for the normalized bytes (None when validating only)
+
+    Returns:
+        Dictionary with 'width', 'height', 'format', 'kept_original', 'size' (bytes written
+        to shared memory, 0 if none), 'data' (inline bytes if they did not fit), 'stats'
+        (normalizer counters of this task) and 'error'
+    """
+    result = {'width': 0, 'height': 0, 'format': None, 'kept_original': True,
+              'size': 0, 'data': None, 'stats': {}, 'error': None}
+    image = SlideImage.from_file(image_path)
+
+    if normalizer_settings is None:
+        # Validate only: header check against the pixel limit, then a full decode
+        try:
+            with image.open() as opened:
+                width, height = opened.size
+                if width * height > max_input_pixels:
+                    result['error'] = f"Rejected {width}x{height} image: exceeds {max_input_pixels} pixel limit"
+                    return result
+                result['format'] = opened.format
+                opened.load()
+            result['width'], result['height'] = width, height
+        except Exception as e:
+            result['error'] = f"Invalid image: {e}"
+        return result
+
+    normalizer = _get_worker_normalizer(normalizer_settings)
+    before = dict(normalizer.stats)
+    try:
+        with image.buffer() as view:
+            normalized = normalizer.normalize_bytes(view)
+            if normalized is not None and normalized['kept_original']:
+                normalized['data'] = None  # the parent keeps the file-backed handle
+    except OSError as e:
+        normalized = None
+        result['error'] = f"Could not read image: {e}"
+    result['stats'] = {key: normalizer.stats[key] - before[key] for key in before}
+    if result['error']:
+        result['stats']['errors'] += 1
+
+    if normalized is None:
+        result['error'] = result['error'] or "Could not normalize image"
+        return result
+
+    result.update(width=normalized['width'], height=normalized['height'],
+                  format=normalized['format'], kept_original=normalized['kept_original'])
+    data = normalized['data']
+    if data is not None:
+        block = shared_memory.SharedMemory(name=shm_name)
+        try:
+            if len(data) <= block.size:
+                block.buf[:len(data)] = data
+                result['size'] = len(data)
+            else:
+                result['data'] = data
+        finally:
+            block.close()
+    return result
+
+
+class ImagePreprocessPool:
+    """
+    Process pool that decodes, validates and resizes images on all cores
+
+    Image decoding and re-encoding is CPU-bound Python/Pillow work; in a single
+    processor thread it caps ingestion at one core. The pool spreads it over
+    worker processes:
+
+    - Without normalization, workers validate each image (pixel limit, full decode)
+      and report its dimensions; the image stays a file-backed SlideImage
+    - With normalization, workers downscale and re-encode. The parent allocates a
+      shared memory block per task (sized to the source file) that the worker writes
+      the result into, and the embedder reads it in place as a SlideImage - the
+      image bytes are never pickled. Blocks are freed with SlideImage.release()
+      after embedding; blocks still alive when the pool closes are freed then.
+
+    Results are yielded in submission order with a bounded number of tasks in flight.
+    """
+
+    def __init__(self, max_workers: int = None, normalizer: ImageNormalizer = None,
+                 max_pending: int = None):
+        """
+        Initialize the pool (worker processes start on first use)
+
+        Args:
+            max_workers: Worker processes (default: CPU count - 1)
+            normalizer: Optional normalizer whose settings the workers use; task
+                        statistics are added to it
+            max_pending: Maximum tasks in flight (default: 2 per worker)
+        """
+        self.max_workers = max_workers or self.default_workers()
+        self.normalizer = normalizer
+        self.normalizer_settings = normalizer.get_settings() if normalizer else None
+        self.max_input_pixels = normalizer.max_input_pixels if normalizer else ImageNormalizer.DEFAULT_MAX_INPUT_PIXELS
+        self.max_pending = max_pending or self.max_workers * 2
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._live_images = weakref.WeakSet()
+
+        self.stats = {
+            'images': 0,
+            'failed': 0,
+            'shared_memory_images': 0,
+            'shared_memory_bytes': 0,
+            'inline_images': 0,
+            'wait_time': 0.0
+        }
+
+    @staticmethod
+    def default_workers() -> int:
+        """Default worker count: all cores but one (left for the pipeline threads)"""
+        return max(1, (os.cpu_count() or 2) - 1)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker processes on first use"""
+        with self._lock:
+            if self._executor is None:
+                # Spawned (not forked) workers: the server process is multi-threaded
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context('spawn'))
+                logger.info(f"🧵 Image preprocessing pool started with {self.max_workers} worker processes")
+            return self._executor
+
+    def _submit(self, image_path: str):
+        """Allocate the task's shared memory block and submit it"""
+        block = None
+        if self.normalizer_settings is not None:
+            block = shared_memory.SharedMemory(create=True, size=max(1, os.path.getsize(image_path)))
+        try:
+            future = self._get_executor().submit(
+                _preprocess_image, image_path, self.normalizer_settings,
+                self.max_input_pixels, block.name if block else None
+            )
+        except Exception:
+            self._free_block(block)
+            raise
+        return future, block
+
+    @staticmethod
+    def _free_block(block: Optional[shared_memory.SharedMemory]):
+        """Close and unlink an unused shared memory block"""
+        if block is None:
+            return
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _collect(self, image_path: str, future, block) -> Dict[str, Any]:
+        """
+        Wait for a task and turn its result into a SlideImage
+
+        Returns:
+            Dictionary with 'image' (SlideImage or None), 'width', 'height', 'format' and 'error'
+        """
+        wait_start = time.time()
+        try:
+            result = future.result()
+        except Exception as e:
+            self._free_block(block)
+            if isinstance(e, BrokenProcessPool):
+                raise
+            result = {'error': f"Preprocessing failed: {e}"}
+        wait_time = time.time() - wait_start
+
+        if result.get('stats') and self.normalizer:
+            self.normalizer.add_stats(result['stats'])
+
+        prepared = {
+            'image': None,
+            'width': result.get('width', 0),
+            'height': result.get('height', 0),
+            'format': result.get('format'),
+            'error': result.get('error')
+        }
+        dimensions = (prepared['width'], prepared['height'])
+
+        with self._lock:
+            self.stats['wait_time'] += wait_time
+            if prepared['error']:
+                self.stats['failed'] += 1
+                self._free_block(block)
+                return prepared
+            self.stats['images'] += 1
+
+            if result.get('size'):
+                image = SlideImage.from_shared_memory(block, result['size'], dimensions=dimensions)
+                self._live_images.add(image)
+                self.stats['shared_memory_images'] += 1
+                self.stats['shared_memory_bytes'] += result['size']
+            else:
+                self._free_block(block)
+                if result.get('data') is not None:
+                    image = SlideImage.from_bytes(result['data'], dimensions=dimensions)
+                    self.stats['inline_images'] += 1
+                else:
+                    image = SlideImage.from_file(image_path, dimensions=dimensions)
+
+        prepared['image'] = image
+        return prepared
+
+    def imap(self, image_paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Preprocess images in the worker processes
+
+        Args:
+            image_paths: Iterable of image paths (may be a blocking stream)
+
+        Yields:
+            (image_path, result) in input order - see _collect for the result format
+        """
+        pending = deque()
+        source = iter(image_paths)
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                # Hand out finished results first, and wait once the window is full
+                while pending and (exhausted or pending[0][1].done() or len(pending) >= self.max_pending):
+                    image_path, future, block = pending.popleft()
+                    yield image_path, self._collect(image_path, future, block)
+                if exhausted:
+                    continue
+                try:
+                    image_path = next(source)
+                except StopIteration:
+                    exhausted = True
+                    continue
+                try:
+                    future, block = self._submit(image_path)
+                except OSError as e:
+                    # Unreadable file - report it without a worker round trip
+                    yield image_path, {'image': None, 'width': 0, 'height': 0, 'format': None,
+                                       'error': f"Could not read image: {e}"}
+                    continue
+                pending.append((image_path, future, block))
+        finally:
+            # Consumer stopped early or a task failed hard - free the blocks of abandoned tasks
+            for image_path, future, block in pending:
+                future.cancel()
+                self._free_block(block)
+
+    def preprocess(self, image_path: str) -> Dict[str, Any]:
+        """
+        Preprocess one image in a worker process and wait for it
+
+        Safe to call from many threads at once; each caller keeps one task in
+        flight, so N calling threads keep up to N workers busy.
+
+        Args:
+            image_path: Path to the image file
+
+        Returns:
+            Result dictionary - see _collect for the format
+        """
+        try:
+            future, block = self._submit(image_path)
+        except OSError as e:
+            return {'image': None, 'width': 0, 'height': 0, 'format': None,
+                    'error': f"Could not read image: {e}"}
+        return self._collect(image_path, future, block)
+
+    def release_all(self):
+        """Free the shared memory of every image still alive"""
+        with self._lock:
+            images = list(self._live_images)
+            self._live_images = weakref.WeakSet()
+        for image in images:
+            image.release()
+
+    def close(self):
+        """Free remaining shared memory and stop the worker processes"""
+        self.release_all()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("🧵 Image preprocessing pool stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get preprocessing statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['workers'] = self.max_workers
+        stats['wait_time'] = round(stats['wait_time'], 3)
+        return stats
@@ -19,10 +19,13 @@ import os
 import logging
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-import base64
 from PIL import Image
 import mimetypes
 
+from services.file_scanner import FileScanner
+from services.image_normalizer import get_image_normalizer
+from services.slide_image import SlideImage
+
 logger = logging.getLogger(__name__)
 
 class ImageProcessingService:
@@ -56,40 +59,32 @@ class ImageProcessingService:
                 logger.info("🔍 Using thorough scan (validating each image file)")
                 
             image_files = []
-            files_checked = 0
             
-            # Walk through directory recursively
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    files_checked += 1
-                    
-                    # Progress logging for large directories
-                    if files_checked % 1000 == 0:
-                        logger.info(f"📁 Checked {files_checked} files, found {len(image_files)} images so far...")
-                    
-                    file_path = os.path.join(root, file)
-                    file_ext = Path(file).suffix.lower()
-                    
-                    if file_ext in self.SUPPORTED_IMAGE_EXTENSIONS:
-                        if fast_scan:
-                            # Fast scan: just check extension and file exists
-                            if os.path.isfile(file_path) and os.path.getsize(file_path) > 0:
-                                image_files.append(file_path)
-                        else:
-                            # Thorough scan: verify it's actually a valid image file
-                            if self._is_valid_image(file_path):
-                                image_files.append(file_path)
-                            else:
-                                logger.warning(f"📁 Skipping invalid image file: {file_path}")
-                    
-                    # Stop if we've reached the maximum
-                    if max_files and len(image_files) >= max_files:
-                        logger.info(f"📁 Reached maximum file limit ({max_files}), stopping scan")
-                        break
+            # Stream files from the shared scandir scanner (lock files and hidden folders skipped)
+            scanner = FileScanner(extensions=self.SUPPORTED_IMAGE_EXTENSIONS)
+            scan = scanner.scan(folder_path)
+            for scanned in scan:
+                # Progress logging for large directories
+                if len(image_files) and len(image_files) % 1000 == 0:
+                    logger.info(f"📁 Found {len(image_files)} images so far...")
+                
+                if fast_scan:
+                    # Fast scan: extension and size already checked from the directory listing
+                    image_files.append(scanned.path)
+                else:
+                    # Thorough scan: verify it's actually a valid image file
+                    if self._is_valid_image(scanned.path):
+                        image_files.append(scanned.path)
+                    else:
+                        logger.warning(f"📁 Skipping invalid image file: {scanned.path}")
                 
+                # Stop if we've reached the maximum
                 if max_files and len(image_files) >= max_files:
+                    logger.info(f"📁 Reached maximum file limit ({max_files}), stopping scan")
+                    scan.close()
                     break
             
+            files_checked = scanner.get_stats()['entries_seen']
             logger.info(f"📁 Scan completed: checked {files_checked} files, found {len(image_files)} valid image files")
             if image_files:
                 logger.info("📁 Found image files:")
@@ -182,22 +177,23 @@ class ImageProcessingService:
                 logger.error(f"❌ Invalid image file {image_path}: {e}")
                 return None
             
-            # Convert to base64 for embedding/storage
-            image_base64 = self._image_to_base64(image_path)
-            if not image_base64:
-                logger.error(f"❌ Failed to convert image to base64: {image_path}")
+            # Downscale and re-encode for embedding (rejects decompression bombs undecoded)
+            normalized = get_image_normalizer().normalize_file(image_path)
+            if normalized is None:
+                logger.error(f"❌ Failed to normalize image: {image_path}")
                 return None
             
             # Create slide data in the same format as PowerPoint slides
             slide_info = {
                 'slide_number': slide_number,
                 'image_path': file_path,  # Store original path
-                'image_base64': image_base64,
+                'image': SlideImage.from_bytes(normalized['data'], dimensions=(normalized['width'], normalized['height'])),
                 'file_path': file_path,
                 'file_name': file_name,
                 'source_type': 'image_file',  # Mark as direct image file
-                'image_dimensions': {'width': width, 'height': height},
-                'image_format': format_name
+                'image_dimensions': {'width': normalized['width'], 'height': normalized['height']},
+                'image_format': normalized['format'],
+                'original_dimensions': {'width': width, 'height': height}
             }
             
             logger.debug(f"✅ Successfully processed image: {file_name}")
@@ -207,25 +203,6 @@ class ImageProcessingService:
             logger.error(f"❌ Error processing image {image_path}: {e}")
             return None
     
-    def _image_to_base64(self, image_path: str) -> str:
-        """
-        Convert image file to base64 string
-        
-        Args:
-            image_path: Path to the image file
-            
-        Returns:
-            Base64 encoded string of the image
-        """
-        try:
-            with open(image_path, 'rb') as image_file:
-                image_data = image_file.read()
-                base64_string = base64.b64encode(image_data).decode('utf-8')
-                return base64_string
-        except Exception as e:
-            logger.error(f"❌ Error converting image to base64: {e}")
-            return ""
-    
     def get_supported_extensions(self) -> List[str]:
         """Get list of supported image file extensions"""
         return list(self.SUPPORTED_IMAGE_EXTENSIONS)
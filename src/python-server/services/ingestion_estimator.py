@@ -0,0 +1,315 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import zipfile
+import logging
+from typing import Dict, Any
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+# Slide parts of a .pptx package (ppt/slides/slide1.xml, ...)
+_SLIDE_PART = re.compile(r'^ppt/slides/slide\d+\.xml$')
+
+
+def count_pptx_slides(pptx_path: str) -> int:
+    """
+    Count the slides of a PowerPoint file from its zip directory, without rendering
+
+    Args:
+        pptx_path: Path to the .pptx file
+
+    Returns:
+        Number of slide parts in the package
+
+    Raises:
+        OSError: If the file cannot be read
+        zipfile.BadZipFile: If the file is not a valid .pptx package
+    """
+    with zipfile.ZipFile(pptx_path) as package:
+        return sum(1 for name in package.namelist() if _SLIDE_PART.match(name))
+
+
+class IngestionEstimator:
+    """
+    Predicts the cost of an ingestion run from the throughput of previous runs
+
+    Every finished run records its slide counts, upload bytes, embedding requests and
+    the busy seconds of each pipeline stage. A dry run turns those into per-slide costs
+    (averaged over the most recent runs) and applies them to the files a folder scan
+    would process:
+
+    - API requests: slides packed into batches of `batch_size`, split further where a
+      batch would exceed the request byte limit
+    - Upload bytes: per deck slide as observed, per image as a ratio of the file size
+    - Duration: stages run concurrently, so the run takes about as long as its slowest
+      stage (busy seconds per slide × slides / workers), and never less than the
+      embedding rate limit allows
+
+    Until runs have been recorded, conservative built-in defaults are used.
+    """
+
+    # Recent runs averaged for the per-slide costs
+    HISTORY_RUNS = 20
+
+    # Runs kept in the history table
+    MAX_HISTORY = 200
+
+    # Busy seconds per slide of each stage when no run has measured it yet
+    DEFAULT_SECONDS_PER_SLIDE = {
+        'convert_pptx': 0.5,     # PowerPoint COM export
+        'convert_images': 0.05,  # decode/validate/downscale in the preprocessing pool
+        'normalize': 0.02,
+        'embed': 0.15,
+        'store': 0.005
+    }
+
+    # Upload bytes (base64) of an exported deck slide when no run has measured it yet
+    DEFAULT_UPLOAD_BYTES_PER_PPTX_SLIDE = 200 * 1024
+
+    # Upload bytes per source byte of a standalone image (base64 inflation, before downscaling)
+    DEFAULT_IMAGE_UPLOAD_RATIO = 4 / 3
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize the estimator
+
+        Args:
+            db_path: Path of the SQLite history database (if None, uses default app data location)
+        """
+        if db_path is None:
+            # Use platform-appropriate app data directory
+            if os.name == 'nt':  # Windows
+                app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+                db_path = os.path.join(app_data, 'SIFFS', 'ingestion_history.db')
+            else:  # Mac/Linux
+                app_data = os.path.expanduser('~/.local/share')
+                db_path = os.path.join(app_data, 'SIFFS', 'ingestion_history.db')
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._initialize_schema()
+
+        logger.info(f"✅ Ingestion estimator initialized: {db_path}")
+
+    def _initialize_schema(self):
+        """Create the history table if it doesn't exist"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingestion_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    finished_at REAL NOT NULL,
+                    pptx_files INTEGER NOT NULL,
+                    pptx_slides INTEGER NOT NULL,
+                    image_files INTEGER NOT NULL,
+                    image_source_bytes INTEGER NOT NULL,
+                    pptx_upload_bytes INTEGER NOT NULL,
+                    image_upload_bytes INTEGER NOT NULL,
+                    requests INTEGER NOT NULL,
+                    total_seconds REAL NOT NULL,
+                    stage_seconds TEXT NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def record_run(self, profile: Dict[str, Any]):
+        """
+        Record the throughput of a finished run
+
+        Args:
+            profile: Dictionary with 'pptx_files', 'pptx_slides', 'image_files',
+                     'image_source_bytes', 'pptx_upload_bytes', 'image_upload_bytes',
+                     'requests', 'total_seconds' and 'stage_seconds' (busy seconds per
+                     stage, keyed like DEFAULT_SECONDS_PER_SLIDE)
+        """
+        if not profile.get('pptx_slides') and not profile.get('image_files'):
+            return  # nothing was processed, nothing was measured
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO ingestion_runs
+                    (finished_at, pptx_files, pptx_slides, image_files, image_source_bytes,
+                     pptx_upload_bytes, image_upload_bytes, requests, total_seconds, stage_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (time.time(), profile.get('pptx_files', 0), profile.get('pptx_slides', 0),
+                 profile.get('image_files', 0), profile.get('image_source_bytes', 0),
+                 profile.get('pptx_upload_bytes', 0), profile.get('image_upload_bytes', 0),
+                 profile.get('requests', 0), profile.get('total_seconds', 0.0),
+                 json.dumps(profile.get('stage_seconds', {})))
+            )
+            self._conn.execute(
+                "DELETE FROM ingestion_runs WHERE id NOT IN "
+                "(SELECT id FROM ingestion_runs ORDER BY id DESC LIMIT ?)",
+                (self.MAX_HISTORY,)
+            )
+            self._conn.commit()
+        logger.debug(f"📈 Recorded ingestion run throughput: {profile}")
+
+    def get_throughput(self) -> Dict[str, Any]:
+        """
+        Per-slide costs averaged over the most recent runs
+
+        Returns:
+            Dictionary with 'runs' (number of runs averaged), 'seconds_per_slide' per stage,
+            'upload_bytes_per_pptx_slide', 'image_upload_ratio' and 'defaults' (the costs no
+            recorded run has measured yet, for which the built-in defaults are used)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM ingestion_runs ORDER BY id DESC LIMIT ?", (self.HISTORY_RUNS,)
+            ).fetchall()
+
+        pptx_slides = sum(row['pptx_slides'] for row in rows)
+        image_files = sum(row['image_files'] for row in rows)
+        image_source_bytes = sum(row['image_source_bytes'] for row in rows)
+        stage_seconds = {}
+        for row in rows:
+            for stage, seconds in json.loads(row['stage_seconds']).items():
+                stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+
+        # Each cost is measured over the slides that went through that stage
+        slides_per_stage = {
+            'convert_pptx': pptx_slides,
+            'convert_images': image_files,
+            'normalize': pptx_slides + image_files,
+            'embed': pptx_slides + image_files,
+            'store': pptx_slides + image_files
+        }
+        defaults = []
+        seconds_per_slide = {}
+        for stage, default in self.DEFAULT_SECONDS_PER_SLIDE.items():
+            if slides_per_stage[stage] and stage in stage_seconds:
+                seconds_per_slide[stage] = stage_seconds[stage] / slides_per_stage[stage]
+            else:
+                seconds_per_slide[stage] = default
+                defaults.append(stage)
+
+        if pptx_slides:
+            upload_bytes_per_pptx_slide = sum(row['pptx_upload_bytes'] for row in rows) / pptx_slides
+        else:
+            upload_bytes_per_pptx_slide = self.DEFAULT_UPLOAD_BYTES_PER_PPTX_SLIDE
+            defaults.append('upload_bytes_per_pptx_slide')
+        if image_source_bytes:
+            image_upload_ratio = sum(row['image_upload_bytes'] for row in rows) / image_source_bytes
+        else:
+            image_upload_ratio = self.DEFAULT_IMAGE_UPLOAD_RATIO
+            defaults.append('image_upload_ratio')
+
+        return {
+            'runs': len(rows),
+            'seconds_per_slide': {stage: round(seconds, 4) for stage, seconds in seconds_per_slide.items()},
+            'upload_bytes_per_pptx_slide': int(upload_bytes_per_pptx_slide),
+            'image_upload_ratio': round(image_upload_ratio, 3),
+            'defaults': defaults
+        }
+
+    def estimate(self, pptx_slides: int, image_files: int, image_bytes: int, batch_size: int,
+                 stage_workers: Dict[str, int], max_batch_bytes: int = None,
+                 requests_per_minute: int = None) -> Dict[str, Any]:
+        """
+        Estimate requests, upload size and duration of a run
+
+        Args:
+            pptx_slides: Slides of the decks the run would convert
+            image_files: Standalone images the run would process
+            image_bytes: Total size of those images on disk
+            batch_size: Slides per embedding request
+            stage_workers: Worker threads per stage, keyed like DEFAULT_SECONDS_PER_SLIDE
+            max_batch_bytes: Optional upload byte limit of one embedding request
+            requests_per_minute: Optional embedding request rate limit
+
+        Returns:
+            Dictionary with 'slides', 'requests', 'upload_bytes', 'duration_seconds',
+            'stage_seconds' (predicted wall seconds per stage), 'bottleneck' and the
+            'throughput' the estimate is based on
+        """
+        throughput = self.get_throughput()
+        slides = pptx_slides + image_files
+
+        upload_bytes = int(pptx_slides * throughput['upload_bytes_per_pptx_slide'] +
+                           image_bytes * throughput['image_upload_ratio'])
+
+        requests = math.ceil(slides / max(1, batch_size))
+        if max_batch_bytes:
+            requests = max(requests, math.ceil(upload_bytes / max_batch_bytes))
+
+        # Deck export and image preprocessing share the convert stage but not its workers
+        slides_per_stage = {
+            'convert_pptx': pptx_slides,
+            'convert_images': image_files,
+            'normalize': slides,
+            'embed': slides,
+            'store': slides
+        }
+        stage_seconds = {}
+        for stage, stage_slides in slides_per_stage.items():
+            workers = max(1, stage_workers.get(stage) or 1)
+            stage_seconds[stage] = round(stage_slides * throughput['seconds_per_slide'][stage] / workers, 1)
+
+        bottleneck = max(stage_seconds, key=stage_seconds.get)
+        duration = stage_seconds[bottleneck]
+        if requests_per_minute:
+            rate_limit_seconds = round(requests * 60.0 / requests_per_minute, 1)
+            stage_seconds['rate_limit'] = rate_limit_seconds
+            if rate_limit_seconds > duration:
+                bottleneck, duration = 'rate_limit', rate_limit_seconds
+
+        return {
+            'slides': slides,
+            'requests': requests,
+            'upload_bytes': upload_bytes,
+            'duration_seconds': round(duration, 1),
+            'stage_seconds': stage_seconds,
+            'bottleneck': bottleneck,
+            'throughput': throughput
+        }
+
+    def clear(self):
+        """Forget all recorded runs"""
+        with self._lock:
+            self._conn.execute("DELETE FROM ingestion_runs")
+            self._conn.commit()
+        logger.info("🧹 Cleared ingestion throughput history")
+
+    def close(self):
+        """Close the history database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+# Global estimator instance
+_ingestion_estimator = None
+
+def get_ingestion_estimator(db_path: str = None) -> IngestionEstimator:
+    """Get or create global ingestion estimator"""
+    global _ingestion_estimator
+    if _ingestion_estimator is None:
+        _ingestion_estimator = IngestionEstimator(db_path=db_path)
+    return _ingestion_estimator
@@ -0,0 +1,493 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+
+from services.progress_publisher import ProgressPublisher, get_progress_publisher
+from services.ingestion_scheduler import (IngestionScheduler, PRIORITY_INTERACTIVE, PRIORITY_NORMAL)
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+FINISHED_STATES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+# Job kinds
+JOB_KIND_FOLDER = 'folder'   # scan and index a folder
+JOB_KIND_FILE = 'file'       # index one saved file
+JOB_KIND_CHANGES = 'changes' # apply changed and deleted files reported by a folder watch
+
+class IngestionJobManager:
+    """
+    Prioritized queue of indexing jobs executed by managed background workers
+
+    Submitting a folder, a single file or the changes a folder watch collected
+    returns a job id immediately; jobs are
+    ordered by an IngestionScheduler (priority first, then a fair turn per root
+    folder) so several folders can be queued instead of rejected.
+
+    Interactive jobs (by default: single saved files) do not wait for a bulk run to
+    finish. A second worker runs them right away while the bulk job pauses at its
+    next file boundary - files already converted or embedding finish their batch -
+    and resumes once no interactive work is left.
+
+    Each job tracks its progress and throughput and can be cancelled while queued
+    or running (running jobs stop at the next pipeline item boundary).
+    """
+
+    def __init__(self, process_folder_fn: Callable[..., Dict[str, Any]] = None, max_finished_jobs: int = 100,
+                 publisher: ProgressPublisher = None, process_files_fn: Callable[..., Dict[str, Any]] = None):
+        """
+        Initialize the job manager
+
+        Args:
+            process_folder_fn: Function running one folder job, called as
+                               fn(folder_path, progress_callback=..., cancel_event=..., yield_fn=..., **options)
+                               (if None, uses the global slide processing service)
+            max_finished_jobs: Number of finished jobs kept for status queries
+            publisher: Progress publisher pushing job events to WebSocket clients
+                       (if None, uses the global progress publisher)
+            process_files_fn: Function running file and watched-change jobs, called like
+                              process_folder_fn with a list of file paths (if None, uses the
+                              global slide processing service)
+        """
+        self._process_folder_fn = process_folder_fn
+        self._process_files_fn = process_files_fn
+        self.max_finished_jobs = max_finished_jobs
+        self.publisher = publisher or get_progress_publisher()
+
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._scheduler = IngestionScheduler()
+        self._condition = threading.Condition()
+        self._running_interactive = 0
+        self._worker = None
+        self._interactive_worker = None
+
+    def _get_process_folder_fn(self) -> Callable[..., Dict[str, Any]]:
+        """Resolve the function that processes a folder"""
+        if self._process_folder_fn is None:
+            from services.slide_processing_service import get_slide_processing_service
+            self._process_folder_fn = get_slide_processing_service().process_folder
+        return self._process_folder_fn
+
+    def _get_process_files_fn(self) -> Callable[..., Dict[str, Any]]:
+        """Resolve the function that processes a list of files"""
+        if self._process_files_fn is None:
+            from services.slide_processing_service import get_slide_processing_service
+            self._process_files_fn = get_slide_processing_service().process_files
+        return self._process_files_fn
+
+    def _ensure_worker(self):
+        """Start the worker threads if they are not running (condition lock must be held)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._worker_loop, name="ingestion-jobs", daemon=True)
+            self._worker.start()
+        if self._interactive_worker is None or not self._interactive_worker.is_alive():
+            self._interactive_worker = threading.Thread(target=self._worker_loop, args=(PRIORITY_INTERACTIVE,),
+                                                        name="ingestion-interactive", daemon=True)
+            self._interactive_worker.start()
+
+    def submit(self, folder_path: str, options: Dict[str, Any] = None, priority: str = None) -> Dict[str, Any]:
+        """
+        Queue a folder for indexing
+
+        Args:
+            folder_path: Folder to index
+            options: Extra keyword arguments passed to the folder processing function
+            priority: 'interactive', 'normal' (default) or 'background'
+
+        Returns:
+            Snapshot of the created job
+
+        Raises:
+            ValueError: If the priority is unknown
+        """
+        return self._submit(JOB_KIND_FOLDER, folder_path, folder_path, options, priority or PRIORITY_NORMAL)
+
+    def submit_file(self, file_path: str, options: Dict[str, Any] = None, priority: str = None) -> Dict[str, Any]:
+        """
+        Queue a single file for indexing (e.g. a deck that was just saved)
+
+        Args:
+            file_path: File to index
+            options: Extra keyword arguments passed to the file processing function
+            priority: 'interactive' (default), 'normal' or 'background'
+
+        Returns:
+            Snapshot of the created job
+
+        Raises:
+            ValueError: If the priority is unknown
+        """
+        return self._submit(JOB_KIND_FILE, file_path, os.path.dirname(file_path), options,
+                            priority or PRIORITY_INTERACTIVE)
+
+    def submit_changes(self, root: str, changed_paths: List[str], deleted_paths: List[str] = None,
+                       options: Dict[str, Any] = None, priority: str = None) -> Dict[str, Any]:
+        """
+        Queue files that changed below a watched folder for incremental reindexing
+
+        Args:
+            root: Watched folder the files belong to (used for fair scheduling)
+            changed_paths: Added or modified files to index
+            deleted_paths: Removed files whose vectors should be deleted
+            options: Extra keyword arguments passed to the file processing function
+            priority: 'interactive', 'normal' (default) or 'background'
+
+        Returns:
+            Snapshot of the created job
+
+        Raises:
+            ValueError: If the priority is unknown
+        """
+        options = dict(options or {})
+        options['deleted_paths'] = list(deleted_paths or [])
+        return self._submit(JOB_KIND_CHANGES, root, root, options, priority or PRIORITY_NORMAL,
+                            file_paths=changed_paths)
+
+    def _submit(self, kind: str, path: str, root: str, options: Optional[Dict[str, Any]],
+                priority: str, file_paths: List[str] = None) -> Dict[str, Any]:
+        """Create a job and hand it to the scheduler"""
+        IngestionScheduler.validate_priority(priority)
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'folder_path': root,
+            'file_path': path if kind == JOB_KIND_FILE else None,
+            'file_paths': list(file_paths or []),
+            'priority': priority,
+            'paused': False,
+            'options': dict(options or {}),
+            'status': JOB_QUEUED,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'progress': {
+                'current_file': '',
+                'progress': 0.0,
+                'files_processed': 0,
+                'slides_processed': 0
+            },
+            'result': None,
+            'error': None
+        }
+
+        with self._condition:
+            self._jobs[job_id] = job
+            self._cancel_events[job_id] = threading.Event()
+            self._scheduler.push(job_id, priority, root)
+            self._prune_finished()
+            self._ensure_worker()
+            self._condition.notify_all()
+            snapshot = self._snapshot(job)
+
+        self.publisher.job_event(job_id, 'job_queued', {
+            'folder_path': root,
+            'file_path': job['file_path'],
+            'priority': priority,
+            'queue_position': snapshot['queue_position']
+        })
+        logger.info(f"📋 Queued {priority} indexing job {job_id} for {path} (position {snapshot['queue_position']})")
+        return snapshot
+
+    def set_priority(self, job_id: str, priority: str) -> Optional[Dict[str, Any]]:
+        """
+        Change the priority of a queued or running job
+
+        A running job raised to 'interactive' no longer pauses for other interactive work.
+
+        Args:
+            job_id: Job to change
+            priority: 'interactive', 'normal' or 'background'
+
+        Returns:
+            Snapshot of the job, or None if the job is unknown
+
+        Raises:
+            ValueError: If the priority is unknown
+        """
+        IngestionScheduler.validate_priority(priority)
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] == JOB_QUEUED:
+                self._scheduler.set_priority(job_id, priority)
+            if job['status'] in (JOB_QUEUED, JOB_RUNNING):
+                job['priority'] = priority
+                logger.info(f"🔀 Job {job_id} priority set to {priority}")
+                self._condition.notify_all()
+            return self._snapshot(job)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued or running job
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            Snapshot of the job, or None if the job is unknown
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            if job['status'] == JOB_QUEUED:
+                self._scheduler.remove(job_id)
+                job['status'] = JOB_CANCELLED
+                job['finished_at'] = time.time()
+                self._cancel_events.pop(job_id, None)
+                self.publisher.job_event(job_id, 'job_finished', {'status': JOB_CANCELLED, 'folder_path': job['folder_path']})
+                logger.info(f"🛑 Cancelled queued job {job_id}")
+            elif job['status'] == JOB_RUNNING:
+                self._cancel_events[job_id].set()
+                self._condition.notify_all()  # wake the job if it is paused
+                logger.info(f"🛑 Cancellation requested for running job {job_id}")
+
+            return self._snapshot(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job, or None if unknown"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Get snapshots of all known jobs (oldest first)"""
+        with self._condition:
+            return [self._snapshot(job) for job in self._jobs.values()]
+
+    def get_status_summary(self) -> Dict[str, Any]:
+        """
+        Aggregate status in the shape of the legacy processing-status endpoint
+
+        Returns:
+            Dictionary with is_processing, current_file, progress, files_processed,
+            slides_processed plus the running job id (the most recently started one
+            when an interactive job runs next to a paused bulk job), queue length,
+            scheduler and progress publisher statistics
+        """
+        with self._condition:
+            running_jobs = [job for job in self._jobs.values() if job['status'] == JOB_RUNNING]
+            running = max(running_jobs, key=lambda job: job['started_at']) if running_jobs else None
+            summary = {
+                'is_processing': running is not None or bool(len(self._scheduler)),
+                'current_file': '',
+                'progress': 0.0,
+                'files_processed': 0,
+                'slides_processed': 0,
+                'job_id': None,
+                'queued_jobs': len(self._scheduler),
+                'running_jobs': len(running_jobs),
+                'scheduler': self._scheduler.get_stats()
+            }
+            if running:
+                summary.update({
+                    'current_file': running['progress']['current_file'],
+                    'progress': running['progress']['progress'],
+                    'files_processed': running['progress']['files_processed'],
+                    'slides_processed': running['progress']['slides_processed'],
+                    'job_id': running['job_id']
+                })
+        summary['progress_publisher'] = self.publisher.get_stats()
+        return summary
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a copy of a job with derived throughput fields (condition lock must be held)"""
+        snapshot = dict(job)
+        snapshot['progress'] = dict(job['progress'])
+        snapshot['options'] = dict(job['options'])
+        snapshot['file_paths'] = list(job['file_paths'])
+
+        if job['status'] == JOB_QUEUED:
+            snapshot['queue_position'] = self._scheduler.position(job['job_id'])
+
+        elapsed = 0.0
+        if job['started_at']:
+            elapsed = (job['finished_at'] or time.time()) - job['started_at']
+        snapshot['elapsed_seconds'] = round(elapsed, 2)
+        snapshot['throughput'] = {
+            'files_per_second': round(job['progress']['files_processed'] / elapsed, 3) if elapsed > 0 else 0.0,
+            'slides_per_second': round(job['progress']['slides_processed'] / elapsed, 3) if elapsed > 0 else 0.0
+        }
+        return snapshot
+
+    def _prune_finished(self):
+        """Drop the oldest finished jobs beyond max_finished_jobs (condition lock must be held)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self, priority: str = None):
+        """
+        Run scheduled jobs one at a time
+
+        Args:
+            priority: Only run jobs of this priority (the interactive lane), or None for any
+        """
+        while True:
+            with self._condition:
+                job_id = None
+                while job_id is None:
+                    job_id = self._scheduler.pop(priority)
+                    if job_id is None:
+                        self._condition.wait()
+                job = self._jobs[job_id]
+                cancel_event = self._cancel_events[job_id]
+                job['status'] = JOB_RUNNING
+                job['started_at'] = time.time()
+                interactive = job['priority'] == PRIORITY_INTERACTIVE
+                if interactive:
+                    self._running_interactive += 1
+
+            try:
+                self._run_job(job, cancel_event)
+            finally:
+                if interactive:
+                    with self._condition:
+                        self._running_interactive -= 1
+                        self._condition.notify_all()
+
+    def _interactive_work_waiting(self) -> bool:
+        """Whether interactive jobs are queued or running (condition lock must be held)"""
+        return self._running_interactive > 0 or self._scheduler.has_pending(PRIORITY_INTERACTIVE)
+
+    def _yield_to_interactive(self, job: Dict[str, Any], cancel_event: threading.Event):
+        """
+        Pause a running job while interactive work is queued or running
+
+        Called by the processing function between files, so the job stops feeding
+        new files and lets its in-flight batches finish while interactive jobs run.
+        """
+        with self._condition:
+            if job['priority'] == PRIORITY_INTERACTIVE or not self._interactive_work_waiting():
+                return
+            job['paused'] = True
+
+        self.publisher.job_event(job['job_id'], 'job_paused', {'folder_path': job['folder_path']})
+        logger.info(f"⏸️ Indexing job {job['job_id']} paused for interactive work")
+        pause_start = time.time()
+
+        with self._condition:
+            self._condition.wait_for(lambda: cancel_event.is_set() or job['priority'] == PRIORITY_INTERACTIVE
+                                     or not self._interactive_work_waiting())
+            job['paused'] = False
+
+        self.publisher.job_event(job['job_id'], 'job_resumed', {'folder_path': job['folder_path']})
+        logger.info(f"▶️ Indexing job {job['job_id']} resumed after {time.time() - pause_start:.1f}s")
+
+    def _run_job(self, job: Dict[str, Any], cancel_event: threading.Event):
+        """Execute one job and record its outcome"""
+        job_id = job['job_id']
+        target = job['file_path'] or job['folder_path']
+        logger.info(f"🚀 Starting {job['priority']} indexing job {job_id} for {target}")
+        self.publisher.job_event(job_id, 'job_started', {'folder_path': job['folder_path'],
+                                                         'file_path': job['file_path'],
+                                                         'priority': job['priority']})
+
+        def progress_callback(progress_data: Dict[str, Any]):
+            with self._condition:
+                progress = job['progress']
+                if 'file' in progress_data and progress_data.get('status') != 'file_failed':
+                    progress['current_file'] = progress_data['file']
+                for key in ('progress', 'files_processed', 'slides_processed'):
+                    if key in progress_data:
+                        progress[key] = progress_data[key]
+            self.publisher.publish(job_id, progress_data)
+
+        def yield_fn():
+            self._yield_to_interactive(job, cancel_event)
+
+        try:
+            if job['kind'] in (JOB_KIND_FILE, JOB_KIND_CHANGES):
+                result = self._get_process_files_fn()(
+                    [job['file_path']] if job['kind'] == JOB_KIND_FILE else job['file_paths'],
+                    progress_callback=progress_callback,
+                    cancel_event=cancel_event,
+                    yield_fn=yield_fn,
+                    **job['options']
+                )
+            else:
+                result = self._get_process_folder_fn()(
+                    job['folder_path'],
+                    progress_callback=progress_callback,
+                    cancel_event=cancel_event,
+                    yield_fn=yield_fn,
+                    **job['options']
+                )
+            with self._condition:
+                job['result'] = result
+                if cancel_event.is_set():
+                    job['status'] = JOB_CANCELLED
+                elif result.get('success'):
+                    job['status'] = JOB_COMPLETED
+                    job['progress']['progress'] = 100.0
+                else:
+                    job['status'] = JOB_FAILED
+                    job['error'] = result.get('error', 'Unknown error')
+        except Exception as e:
+            logger.error(f"❌ Indexing job {job_id} crashed: {e}")
+            with self._condition:
+                job['status'] = JOB_FAILED
+                job['error'] = str(e)
+        finally:
+            with self._condition:
+                job['finished_at'] = time.time()
+                self._cancel_events.pop(job_id, None)
+                self._prune_finished()
+                snapshot = self._snapshot(job)
+
+        result = snapshot['result'] or {}
+        self.publisher.job_event(job_id, 'job_finished', {
+            'folder_path': job['folder_path'],
+            'file_path': job['file_path'],
+            'status': snapshot['status'],
+            'error': snapshot['error'],
+            'message': result.get('message', ''),
+            'files_processed': result.get('files_processed', 0),
+            'slides_processed': result.get('slides_processed', 0),
+            'failed_files': result.get('failed_files', []),
+            'failed_slides': result.get('failed_slides', []),
+            'elapsed_seconds': snapshot['elapsed_seconds']
+        })
+        logger.info(f"🏁 Indexing job {job_id} finished with status '{job['status']}'")
+
+
+# Global job manager instance
+_job_manager = None
+
+def get_ingestion_job_manager() -> IngestionJobManager:
+    """Get or create global ingestion job manager"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = IngestionJobManager()
+    return _job_manager
@@ -0,0 +1,439 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+from threading import Lock
+
+from services.qdrant_db import slide_point_id
+
+logger = logging.getLogger(__name__)
+
+# File states, in the order a file moves through them
+STATE_CONVERTED = 'converted'
+STATE_EMBEDDED = 'embedded'
+STATE_COMMITTED = 'committed'
+
+class IngestionJournal:
+    """
+    Write-ahead journal for crash-safe, resumable ingestion runs
+
+    Every run over a folder records, per file, when it was converted, embedded
+    and committed to the vector store. Embedded-but-uncommitted vectors are
+    persisted together with pre-assigned point ids, so after a crash (laptop
+    sleep, hung PowerPoint COM) the next run over the same folder:
+    - stores journaled vectors directly instead of paying for the embeddings again
+    - re-upserts with the same point ids, so no duplicate points are created
+    - skips files that were already committed
+
+    A run is removed from the journal once it finishes cleanly.
+    """
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize the ingestion journal
+
+        Args:
+            db_path: Path of the SQLite database file (if None, uses default app data location)
+        """
+        if db_path is None:
+            # Use platform-appropriate app data directory
+            if os.name == 'nt':  # Windows
+                app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+                db_path = os.path.join(app_data, 'SIFFS', 'ingestion_journal.db')
+            else:  # Mac/Linux
+                app_data = os.path.expanduser('~/.local/share')
+                db_path = os.path.join(app_data, 'SIFFS', 'ingestion_journal.db')
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._initialize_schema()
+
+        logger.info(f"✅ Ingestion journal initialized: {db_path}")
+
+    def _initialize_schema(self):
+        """Create journal tables if they don't exist"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: a journaled step must survive power loss, that is the point of the journal
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal_runs (
+                    run_key TEXT PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal_files (
+                    run_key TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    state TEXT NOT NULL,
+                    slide_count INTEGER NOT NULL DEFAULT 0,
+                    point_ids TEXT NOT NULL DEFAULT '[]',
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (run_key, file_path)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal_vectors (
+                    run_key TEXT NOT NULL,
+                    point_id TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    metadata TEXT NOT NULL,
+                    PRIMARY KEY (run_key, point_id)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_journal_vectors_file ON journal_vectors(run_key, file_path)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def normalize_path(file_path: str) -> str:
+        """Normalize a file path for use as a journal key"""
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def _stat(file_path: str) -> Optional[os.stat_result]:
+        """Stat a file, returning None if it is gone"""
+        try:
+            return os.stat(file_path)
+        except OSError:
+            return None
+
+    def begin_run(self, root: str, kind: str) -> str:
+        """
+        Open (or resume) the journaled run for a folder
+
+        Args:
+            root: Folder being ingested
+            kind: Kind of ingestion, e.g. 'pptx' or 'images'
+
+        Returns:
+            Run key used for all further journal calls of this run
+        """
+        root = self.normalize_path(root)
+        run_key = f"{kind}:{root}"
+        now = time.time()
+
+        try:
+            with self._lock:
+                existing = self._conn.execute(
+                    "SELECT started_at FROM journal_runs WHERE run_key = ?", (run_key,)
+                ).fetchone()
+                if existing:
+                    counts = dict(self._conn.execute(
+                        "SELECT state, COUNT(*) FROM journal_files WHERE run_key = ? GROUP BY state", (run_key,)
+                    ).fetchall())
+                    self._conn.execute("UPDATE journal_runs SET updated_at = ? WHERE run_key = ?", (now, run_key))
+                    logger.info(f"♻️ Resuming interrupted {kind} run for {root}: "
+                                f"{counts.get(STATE_EMBEDDED, 0)} files embedded, "
+                                f"{counts.get(STATE_COMMITTED, 0)} files committed")
+                else:
+                    self._conn.execute(
+                        "INSERT INTO journal_runs (run_key, root, kind, started_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (run_key, root, kind, now, now)
+                    )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to open journal run for {root}: {e}")
+
+        return run_key
+
+    def _upsert_file(self, run_key: str, file_path: str, state: str, slide_count: int,
+                     point_ids: List[str] = None, file_stat: Tuple[int, float] = None):
+        """
+        Record a file's state (lock must be held)
+
+        The (size, mtime) of the version that was converted is kept through the later
+        states; stat'ing again at embed or commit time would vouch for a newer version
+        saved while the old one was being processed.
+        """
+        if file_stat is None:
+            file_stat = self._conn.execute(
+                "SELECT size, mtime FROM journal_files WHERE run_key = ? AND file_path = ?", (run_key, file_path)
+            ).fetchone()
+        if file_stat is None:
+            stat = self._stat(file_path)
+            file_stat = (stat.st_size, stat.st_mtime) if stat else (0, 0.0)
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO journal_files
+                (run_key, file_path, size, mtime, state, slide_count, point_ids, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (run_key, file_path, file_stat[0], file_stat[1],
+             state, slide_count, json.dumps(point_ids or []), time.time())
+        )
+
+    def record_converted(self, run_key: str, file_path: str, slide_count: int,
+                         file_stat: Tuple[int, float] = None):
+        """
+        Record that a file was converted to slide images
+
+        Args:
+            run_key: Run key from begin_run
+            file_path: Converted file
+            slide_count: Number of slides produced
+            file_stat: (size, mtime) of the file captured before it was converted
+                       (stat'ed now if not provided)
+        """
+        try:
+            with self._lock:
+                self._upsert_file(run_key, self.normalize_path(file_path), STATE_CONVERTED, slide_count,
+                                  file_stat=file_stat)
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to journal conversion of {file_path}: {e}")
+
+    def record_embedded(self, run_key: str, embeddings_data: List[Dict]) -> List[Dict]:
+        """
+        Persist embeddings before they are written to the vector store
+
+        Each embedding gets a point id (metadata['point_id']) unless it already has one,
+        derived from its file, slide number and model; the vector store must use that id so a replay after a crash overwrites instead
+        of duplicating. Embeddings may belong to several files; each file is marked embedded.
+
+        Args:
+            run_key: Run key from begin_run
+            embeddings_data: Embedding dicts with 'embedding' and 'metadata'
+
+        Returns:
+            The same embedding dicts, with point ids assigned
+        """
+        per_file: Dict[str, List[Dict]] = {}
+        for embedding_data in embeddings_data:
+            metadata = embedding_data.setdefault('metadata', {})
+            if not metadata.get('point_id'):
+                metadata['point_id'] = (
+                    slide_point_id(metadata['file_path'], metadata.get('slide_number', 0), metadata.get('model'))
+                    if metadata.get('file_path') else str(uuid.uuid4())
+                )
+            file_path = self.normalize_path(metadata.get('file_path', ''))
+            per_file.setdefault(file_path, []).append(embedding_data)
+
+        try:
+            with self._lock:
+                for file_path, file_embeddings in per_file.items():
+                    self._conn.execute(
+                        "DELETE FROM journal_vectors WHERE run_key = ? AND file_path = ?", (run_key, file_path)
+                    )
+                    self._conn.executemany(
+                        """
+                        INSERT OR REPLACE INTO journal_vectors (run_key, point_id, file_path, vector, metadata)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        [
+                            (run_key, data['metadata']['point_id'], file_path,
+                             array('f', data['embedding']).tobytes(), json.dumps(data['metadata'], default=str))
+                            for data in file_embeddings
+                        ]
+                    )
+                    self._upsert_file(run_key, file_path, STATE_EMBEDDED, len(file_embeddings))
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to journal {len(embeddings_data)} embeddings: {e}")
+
+        return embeddings_data
+
+    def record_committed(self, run_key: str, file_paths: List[str]):
+        """
+        Record that files' embeddings were written to the vector store
+
+        The journaled vectors are dropped; their point ids are kept on the file entry.
+
+        Args:
+            run_key: Run key from begin_run
+            file_paths: Committed files
+        """
+        try:
+            with self._lock:
+                for file_path in {self.normalize_path(path) for path in file_paths}:
+                    point_ids = [row[0] for row in self._conn.execute(
+                        "SELECT point_id FROM journal_vectors WHERE run_key = ? AND file_path = ?",
+                        (run_key, file_path)
+                    ).fetchall()]
+                    self._conn.execute(
+                        "DELETE FROM journal_vectors WHERE run_key = ? AND file_path = ?", (run_key, file_path)
+                    )
+                    self._upsert_file(run_key, file_path, STATE_COMMITTED, len(point_ids), point_ids)
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to journal commit of {len(file_paths)} files: {e}")
+
+    def get_resumable(self, run_key: str, file_paths: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Find work of an interrupted run that does not need to be repeated
+
+        Entries whose file changed on disk since it was journaled are discarded.
+
+        Args:
+            run_key: Run key from begin_run
+            file_paths: Optional files to restrict the lookup to (results are keyed by
+                        these paths as given); if None, all journaled files are returned
+                        keyed by normalized path
+
+        Returns:
+            Dictionary with 'embedded' (file -> embedding dicts with point ids),
+            'committed' (file -> point ids) and 'file_stats' (file -> (size, mtime) of
+            the journaled version)
+        """
+        resumable = {'embedded': {}, 'committed': {}, 'file_stats': {}}
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT file_path, size, mtime, state, point_ids FROM journal_files WHERE run_key = ?",
+                    (run_key,)
+                ).fetchall()
+                if not rows:
+                    return resumable
+
+                if file_paths is None:
+                    wanted = None
+                else:
+                    wanted = {self.normalize_path(path): path for path in file_paths}
+
+                stale = []
+                for file_path, size, mtime, state, point_ids in rows:
+                    if wanted is not None and file_path not in wanted:
+                        continue
+                    key = wanted[file_path] if wanted is not None else file_path
+
+                    stat = self._stat(file_path)
+                    if stat is None or stat.st_size != size or stat.st_mtime != mtime:
+                        stale.append(file_path)
+                        continue
+
+                    resumable['file_stats'][key] = (size, mtime)
+                    if state == STATE_COMMITTED:
+                        resumable['committed'][key] = json.loads(point_ids)
+                    elif state == STATE_EMBEDDED:
+                        vectors = self._conn.execute(
+                            "SELECT vector, metadata FROM journal_vectors WHERE run_key = ? AND file_path = ?",
+                            (run_key, file_path)
+                        ).fetchall()
+                        resumable['embedded'][key] = [
+                            {'embedding': array('f', blob).tolist(), 'metadata': json.loads(metadata)}
+                            for blob, metadata in vectors
+                        ]
+
+                for file_path in stale:
+                    self._discard_file(run_key, file_path)
+                if stale:
+                    self._conn.commit()
+                    logger.info(f"🧹 Discarded {len(stale)} journal entries for files changed since the interrupted run")
+        except Exception as e:
+            logger.error(f"❌ Failed to read ingestion journal: {e}")
+            return {'embedded': {}, 'committed': {}, 'file_stats': {}}
+
+        if resumable['embedded'] or resumable['committed']:
+            logger.info(f"♻️ Journal: {len(resumable['embedded'])} files can be stored without re-embedding, "
+                        f"{len(resumable['committed'])} files are already committed")
+        return resumable
+
+    def discard_file(self, run_key: str, file_path: str):
+        """
+        Forget a file's progress so the next run processes it from scratch
+
+        Used for files that could not be embedded completely: their journaled
+        vectors must not be resumed as if they covered every slide.
+
+        Args:
+            run_key: Run key from begin_run
+            file_path: File to forget
+        """
+        try:
+            with self._lock:
+                self._discard_file(run_key, self.normalize_path(file_path))
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to discard journal entry of {file_path}: {e}")
+
+    def _discard_file(self, run_key: str, file_path: str):
+        """Drop everything journaled for a file (lock must be held)"""
+        self._conn.execute("DELETE FROM journal_vectors WHERE run_key = ? AND file_path = ?", (run_key, file_path))
+        self._conn.execute("DELETE FROM journal_files WHERE run_key = ? AND file_path = ?", (run_key, file_path))
+
+    def finish_run(self, run_key: str):
+        """
+        Close a run that completed cleanly, removing it from the journal
+
+        Args:
+            run_key: Run key from begin_run
+        """
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM journal_vectors WHERE run_key = ?", (run_key,))
+                self._conn.execute("DELETE FROM journal_files WHERE run_key = ?", (run_key,))
+                self._conn.execute("DELETE FROM journal_runs WHERE run_key = ?", (run_key,))
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Failed to close journal run {run_key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get journal statistics"""
+        with self._lock:
+            open_runs = self._conn.execute("SELECT COUNT(*) FROM journal_runs").fetchone()[0]
+            journaled_files = self._conn.execute("SELECT COUNT(*) FROM journal_files").fetchone()[0]
+            pending_vectors = self._conn.execute("SELECT COUNT(*) FROM journal_vectors").fetchone()[0]
+        return {
+            'open_runs': open_runs,
+            'journaled_files': journaled_files,
+            'pending_vectors': pending_vectors,
+            'journal_path': self.db_path
+        }
+
+    def clear(self):
+        """Remove all journaled runs"""
+        with self._lock:
+            self._conn.execute("DELETE FROM journal_vectors")
+            self._conn.execute("DELETE FROM journal_files")
+            self._conn.execute("DELETE FROM journal_runs")
+            self._conn.commit()
+        logger.info("🧹 Cleared ingestion journal")
+
+    def close(self):
+        """Close the journal database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+# Global journal instance
+_ingestion_journal = None
+
+def get_ingestion_journal(db_path: str = None) -> IngestionJournal:
+    """Get or create global ingestion journal"""
+    global _ingestion_journal
+    if _ingestion_journal is None:
+        _ingestion_journal = IngestionJournal(db_path=db_path)
+    return _ingestion_journal
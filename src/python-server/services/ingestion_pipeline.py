@@ -0,0 +1,352 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import logging
+import threading
+from queue import Empty
+from typing import List, Dict, Any, Optional, Callable
+
+from services.bounded_queue import ByteBudgetQueue
+
+logger = logging.getLogger(__name__)
+
+class PipelineStage:
+    """
+    One stage of an ingestion pipeline
+
+    A stage runs `workers` threads that take items from its input queue, apply
+    `handler` and pass the returned item on to the next stage. Handlers raise to
+    mark an item as failed; the failure is recorded and the item is dropped.
+
+    Handlers may also return a list to emit zero or more items (fan-in/fan-out
+    stages such as batch packing); such stages can release buffered items through
+    `idle_handler` while their input is quiet and `flush_handler` at end of input.
+
+    A stage whose input items hold large payloads (slide images) can bound its
+    input queue by bytes with `max_input_bytes`, sized by the pipeline's item sizer.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Dict], Any], workers: int = 1,
+                 thread_initializer: Callable = None, thread_finalizer: Callable = None,
+                 flush_handler: Callable[[], List[Dict]] = None,
+                 idle_handler: Callable[[], List[Dict]] = None, idle_interval: float = 0.5,
+                 max_input_bytes: int = None):
+        """
+        Initialize a pipeline stage
+
+        Args:
+            name: Stage name used for logging and timings
+            handler: Function transforming a work item (returns an item or a list of items)
+            workers: Number of concurrent worker threads for this stage
+            thread_initializer: Optional function run once in each worker thread before work starts
+            thread_finalizer: Optional function run once in each worker thread after work ends
+            flush_handler: Optional function returning buffered items to emit at end of input
+            idle_handler: Optional function returning buffered items to emit while input is quiet
+            idle_interval: Seconds without input before idle_handler is called
+            max_input_bytes: Optional byte budget of the queue feeding this stage; producers
+                             block once the queued items would exceed it
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.thread_initializer = thread_initializer
+        self.thread_finalizer = thread_finalizer
+        self.flush_handler = flush_handler
+        self.idle_handler = idle_handler
+        self.idle_interval = idle_interval
+        self.max_input_bytes = max_input_bytes
+
+
+class IngestionPipeline:
+    """
+    Staged producer/consumer pipeline for file ingestion
+
+    Architecture (PowerPoint ingestion):
+    1. Convert stage: render deck N+1 to slide images (local CPU/COM work)
+    2. Embed stage: create embeddings for deck N (network-bound)
+    3. Store stage: write deck N-1 to the vector database
+
+    Stages are connected by bounded queues so a fast stage cannot run arbitrarily
+    far ahead of a slow one, and every stage records per-stage timings. Queues are
+    bounded by item count and, per stage, by the payload bytes of the queued items
+    (see ByteBudgetQueue); the bytes queued between stages are tracked as in-flight bytes.
+    """
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 4,
+                 cancel_event: threading.Event = None,
+                 item_sizer: Callable[[Any], int] = None):
+        """
+        Initialize the pipeline
+
+        Args:
+            stages: Ordered list of pipeline stages
+            queue_size: Maximum number of items waiting between two stages
+            cancel_event: Optional externally owned event; setting it cancels the run
+            item_sizer: Optional function returning the approximate payload bytes of an
+                        item; needed for byte budgets and in-flight byte tracking
+        """
+        if not stages:
+            raise ValueError("Pipeline requires at least one stage")
+
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._cancel_event = cancel_event or threading.Event()
+        self._owns_cancel_event = cancel_event is None
+        self.item_sizer = item_sizer or (lambda item: 0)
+        self._lock = threading.Lock()
+        self._queues: List[ByteBudgetQueue] = []
+        self._reset_stats()
+
+    def _reset_stats(self):
+        """Reset statistics for a new run"""
+        self.stats = {
+            'items_submitted': 0,
+            'items_completed': 0,
+            'failed_items': [],
+            'in_flight_bytes': 0,
+            'peak_in_flight_bytes': 0,
+            'stage_timings': {
+                stage.name: {
+                    'workers': stage.workers,
+                    'items': 0,
+                    'failures': 0,
+                    'busy_seconds': 0.0,
+                    'wall_seconds': 0.0
+                }
+                for stage in self.stages
+            }
+        }
+        self._stage_windows = {stage.name: [None, None] for stage in self.stages}
+
+    def _track_in_flight(self, delta: int):
+        """Update the payload bytes queued between stages"""
+        with self._lock:
+            self.stats['in_flight_bytes'] += delta
+            if self.stats['in_flight_bytes'] > self.stats['peak_in_flight_bytes']:
+                self.stats['peak_in_flight_bytes'] = self.stats['in_flight_bytes']
+
+    @property
+    def in_flight_bytes(self) -> int:
+        """Payload bytes currently queued between stages"""
+        with self._lock:
+            return self.stats['in_flight_bytes']
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Get byte usage and backpressure statistics of the stage input queues"""
+        with self._lock:
+            stats = {
+                'in_flight_bytes': self.stats['in_flight_bytes'],
+                'peak_in_flight_bytes': self.stats['peak_in_flight_bytes']
+            }
+        for stage, queue in zip(self.stages, self._queues):
+            stats[stage.name] = queue.get_stats()
+        return stats
+
+    def cancel(self):
+        """Request cancellation; workers stop picking up new items"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation has been requested"""
+        return self._cancel_event.is_set()
+
+    def run(self, items: List[Dict], on_item_completed: Callable[[Dict], None] = None,
+            on_item_failed: Callable[[Dict], None] = None) -> Dict[str, Any]:
+        """
+        Push items through all stages and wait for them to drain
+
+        Args:
+            items: Work items (dicts) fed to the first stage
+            on_item_completed: Optional callback invoked with each item leaving the last stage
+            on_item_failed: Optional callback invoked with each failure record
+                            ({'file_path', 'stage', 'error'}) as it happens
+
+        Returns:
+            Dictionary with run statistics and per-stage timings
+        """
+        # An external cancel event belongs to the caller and may already be set
+        if self._owns_cancel_event:
+            self._cancel_event.clear()
+        self._reset_stats()
+        run_start = time.time()
+
+        queues = [
+            ByteBudgetQueue(stage.max_input_bytes, self.item_sizer, self._track_in_flight,
+                            name=f"{stage.name} input", max_items=self.queue_size)
+            for stage in self.stages
+        ]
+        self._queues = queues
+        completed = []
+
+        stage_threads = []
+        for index, stage in enumerate(self.stages):
+            input_queue = queues[index]
+            output_queue = queues[index + 1] if index + 1 < len(queues) else None
+            threads = []
+            for worker_id in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage, worker_id + 1, input_queue, output_queue, completed, on_item_completed,
+                          on_item_failed),
+                    name=f"{stage.name}-{worker_id + 1}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+            stage_threads.append(threads)
+
+        logger.info(f"🚀 Pipeline started: " + " → ".join(f"{s.name}×{s.workers}" for s in self.stages))
+
+        # Feed the first stage (blocks while the first queue is full)
+        for item in items:
+            if self.cancelled:
+                break
+            queues[0].put(item)
+            self.stats['items_submitted'] += 1
+
+        # Drain stage by stage: once a stage's workers are done, signal the next one
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                queues[index].put(None)
+            for thread in stage_threads[index]:
+                thread.join()
+            logger.info(f"✅ Pipeline stage '{stage.name}' drained")
+
+        for name, (first_start, last_end) in self._stage_windows.items():
+            if first_start is not None and last_end is not None:
+                self.stats['stage_timings'][name]['wall_seconds'] = round(last_end - first_start, 3)
+        for timing in self.stats['stage_timings'].values():
+            timing['busy_seconds'] = round(timing['busy_seconds'], 3)
+
+        self.stats['items_completed'] = len(completed)
+        self.stats['total_time'] = round(time.time() - run_start, 3)
+        self.stats['cancelled'] = self.cancelled
+        self.stats['queues'] = self.get_queue_stats()
+        self._log_stage_timings()
+
+        return {
+            'completed_items': completed,
+            'failed_items': list(self.stats['failed_items']),
+            'stats': self.stats
+        }
+
+    def _stage_worker(self, stage: PipelineStage, worker_id: int, input_queue: ByteBudgetQueue,
+                      output_queue: Optional[ByteBudgetQueue], completed: List[Dict],
+                      on_item_completed: Callable = None, on_item_failed: Callable = None):
+        """Worker loop for one stage thread"""
+        if stage.thread_initializer:
+            try:
+                stage.thread_initializer()
+            except Exception as e:
+                logger.error(f"❌ Pipeline stage '{stage.name}' worker {worker_id} failed to initialize: {e}")
+
+        try:
+            while True:
+                try:
+                    if stage.idle_handler:
+                        item = input_queue.get(timeout=stage.idle_interval)
+                    else:
+                        item = input_queue.get()
+                except Empty:
+                    if not self.cancelled:
+                        self._emit(stage.idle_handler(), output_queue, completed, on_item_completed)
+                    continue
+
+                if item is None:
+                    if stage.flush_handler and not self.cancelled:
+                        self._emit(stage.flush_handler(), output_queue, completed, on_item_completed)
+                    break
+
+                # Drain without working once cancelled
+                if self.cancelled:
+                    continue
+
+                work_start = time.time()
+                try:
+                    result = stage.handler(item)
+                    succeeded = result is not None
+                except Exception as e:
+                    logger.error(f"❌ Pipeline stage '{stage.name}' failed for {item.get('file_path', item)}: {e}")
+                    result = None
+                    succeeded = False
+                    item = dict(item, error=str(e))
+                work_end = time.time()
+
+                with self._lock:
+                    timing = self.stats['stage_timings'][stage.name]
+                    timing['busy_seconds'] += work_end - work_start
+                    window = self._stage_windows[stage.name]
+                    if window[0] is None or work_start < window[0]:
+                        window[0] = work_start
+                    if window[1] is None or work_end > window[1]:
+                        window[1] = work_end
+                    failure = None
+                    if succeeded:
+                        timing['items'] += 1
+                    else:
+                        timing['failures'] += 1
+                        failure = {
+                            'file_path': item.get('file_path', ''),
+                            'stage': stage.name,
+                            'error': item.get('error', f"{stage.name} stage produced no result")
+                        }
+                        self.stats['failed_items'].append(failure)
+
+                if not succeeded:
+                    if on_item_failed:
+                        try:
+                            on_item_failed(failure)
+                        except Exception as e:
+                            logger.warning(f"⚠️ Pipeline failure callback failed: {e}")
+                    continue
+
+                self._emit(result, output_queue, completed, on_item_completed)
+        finally:
+            if stage.thread_finalizer:
+                try:
+                    stage.thread_finalizer()
+                except Exception as e:
+                    logger.warning(f"⚠️ Pipeline stage '{stage.name}' worker {worker_id} cleanup failed: {e}")
+
+    def _emit(self, result: Any, output_queue: Optional[ByteBudgetQueue], completed: List[Dict],
+              on_item_completed: Callable = None):
+        """Pass one item or a list of items on to the next stage (or collect them at the end)"""
+        items = result if isinstance(result, list) else [result]
+        for item in items:
+            if output_queue is not None:
+                output_queue.put(item)
+                continue
+            with self._lock:
+                completed.append(item)
+            if on_item_completed:
+                try:
+                    on_item_completed(item)
+                except Exception as e:
+                    logger.warning(f"⚠️ Pipeline completion callback failed: {e}")
+
+    def _log_stage_timings(self):
+        """Log per-stage timing statistics"""
+        logger.info("📊 Pipeline Stage Timings:")
+        for name, timing in self.stats['stage_timings'].items():
+            logger.info(f"   {name}: {timing['items']} items, {timing['failures']} failures, "
+                        f"busy {timing['busy_seconds']:.2f}s, wall {timing['wall_seconds']:.2f}s "
+                        f"({timing['workers']} workers)")
+        logger.info(f"   Total: {self.stats['items_completed']}/{self.stats['items_submitted']} items "
+                    f"in {self.stats['total_time']:.2f}s "
+                    f"(peak {self.stats['peak_in_flight_bytes'] / (1024 * 1024):.1f}MB queued between stages)")
@@ -0,0 +1,202 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import heapq
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job priorities (lower value runs first)
+PRIORITY_INTERACTIVE = 'interactive'   # single files someone just saved - searchable in seconds
+PRIORITY_NORMAL = 'normal'             # folder runs started by the user
+PRIORITY_BACKGROUND = 'background'     # bulk re-indexing, rescans
+
+PRIORITY_LEVELS = {PRIORITY_INTERACTIVE: 0, PRIORITY_NORMAL: 1, PRIORITY_BACKGROUND: 2}
+
+class IngestionScheduler:
+    """
+    Priority queue of pending ingestion jobs with fair sharing between root folders
+
+    - Jobs run in priority order: interactive before normal before background
+    - Within a priority, root folders take turns: the next job comes from the root
+      that was served least recently, so one folder with many queued jobs cannot
+      starve the others; jobs of the same root run in submission order
+
+    The scheduler only orders job ids; it is not thread-safe on its own and is
+    guarded by the owning job manager's lock.
+    """
+
+    def __init__(self):
+        self._entries: List[Dict[str, Any]] = []   # pending jobs in submission order
+        self._last_served: Dict[str, int] = {}     # root folder → pop counter when last served
+        self._pops = 0
+        self._positions: Optional[Dict[str, int]] = None  # cached queue positions, reset on every change
+
+        self.stats = {
+            'scheduled': 0,
+            'by_priority': {priority: 0 for priority in PRIORITY_LEVELS}
+        }
+
+    @staticmethod
+    def validate_priority(priority: str) -> str:
+        """
+        Check a priority name
+
+        Args:
+            priority: Priority name
+
+        Returns:
+            The priority
+
+        Raises:
+            ValueError: If the priority is unknown
+        """
+        if priority not in PRIORITY_LEVELS:
+            raise ValueError(f"Unknown priority '{priority}' (supported: {', '.join(PRIORITY_LEVELS)})")
+        return priority
+
+    def push(self, job_id: str, priority: str, root: str):
+        """
+        Add a pending job
+
+        Args:
+            job_id: Job id
+            priority: Job priority (see PRIORITY_LEVELS)
+            root: Root folder the job belongs to (used for fair sharing)
+        """
+        self._entries.append({'job_id': job_id, 'priority': self.validate_priority(priority), 'root': root})
+        self._positions = None
+
+    def remove(self, job_id: str) -> bool:
+        """Remove a pending job; returns False if it was not pending"""
+        for index, entry in enumerate(self._entries):
+            if entry['job_id'] == job_id:
+                del self._entries[index]
+                self._positions = None
+                return True
+        return False
+
+    def set_priority(self, job_id: str, priority: str) -> bool:
+        """Change the priority of a pending job; returns False if it was not pending"""
+        self.validate_priority(priority)
+        for entry in self._entries:
+            if entry['job_id'] == job_id:
+                entry['priority'] = priority
+                self._positions = None
+                return True
+        return False
+
+    def has_pending(self, priority: str = None) -> bool:
+        """Whether any job (of the given priority, if set) is pending"""
+        if priority is None:
+            return bool(self._entries)
+        return any(entry['priority'] == priority for entry in self._entries)
+
+    def pop(self, priority: str = None) -> Optional[str]:
+        """
+        Take the next job to run
+
+        Args:
+            priority: Only consider jobs of this priority (None for any)
+
+        Returns:
+            Job id, or None if nothing eligible is pending
+        """
+        index = self._next_index(self._entries, self._last_served, priority)
+        if index is None:
+            return None
+        entry = self._entries.pop(index)
+        self._positions = None
+        self._pops += 1
+        self._last_served[entry['root']] = self._pops
+        self.stats['scheduled'] += 1
+        self.stats['by_priority'][entry['priority']] += 1
+        return entry['job_id']
+
+    def order(self) -> List[str]:
+        """
+        Pending job ids in the order they would run (if nothing else is submitted)
+
+        Replays pop() without rescanning the queue for every job: per priority, roots
+        wait in a heap keyed like _next_index (least recently served, then oldest job),
+        so the whole order costs O(n log n).
+        """
+        per_priority: Dict[str, Dict[str, List[int]]] = {}
+        for index, entry in enumerate(self._entries):
+            per_priority.setdefault(entry['priority'], {}).setdefault(entry['root'], []).append(index)
+
+        last_served = dict(self._last_served)
+        pops = self._pops
+        ordered = []
+        for priority in sorted(per_priority, key=PRIORITY_LEVELS.get):
+            roots = per_priority[priority]
+            heap = [(last_served.get(root, 0), indexes[0], root) for root, indexes in roots.items()]
+            heapq.heapify(heap)
+            while heap:
+                _, index, root = heapq.heappop(heap)
+                indexes = roots[root]
+                indexes.pop(0)
+                ordered.append(self._entries[index]['job_id'])
+                pops += 1
+                last_served[root] = pops
+                if indexes:
+                    heapq.heappush(heap, (pops, indexes[0], root))
+        return ordered
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        1-based queue position of a pending job
+
+        Positions are computed once per scheduling change and cached, so frequent
+        snapshots of queued jobs do not replay the queue.
+
+        Returns:
+            Position, or None if the job is not pending
+        """
+        if self._positions is None:
+            self._positions = {job_id: position for position, job_id in enumerate(self.order(), 1)}
+        return self._positions.get(job_id)
+
+    @staticmethod
+    def _next_index(entries: List[Dict[str, Any]], last_served: Dict[str, int],
+                    priority: str = None) -> Optional[int]:
+        """Index of the entry to run next: best priority, then least recently served root, then oldest"""
+        best_index = None
+        best_key = None
+        for index, entry in enumerate(entries):
+            if priority is not None and entry['priority'] != priority:
+                continue
+            key = (PRIORITY_LEVELS[entry['priority']], last_served.get(entry['root'], 0), index)
+            if best_key is None or key < best_key:
+                best_index, best_key = index, key
+        return best_index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduling statistics"""
+        pending = {priority: 0 for priority in PRIORITY_LEVELS}
+        for entry in self._entries:
+            pending[entry['priority']] += 1
+        return {
+            'scheduled': self.stats['scheduled'],
+            'by_priority': dict(self.stats['by_priority']),
+            'pending': pending,
+            'roots_served': len(self._last_served)
+        }
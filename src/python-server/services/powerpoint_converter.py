@@ -18,13 +18,15 @@
 import os
 import tempfile
 import logging
+import threading
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 import win32com.client
 from PIL import Image
-import base64
 from io import BytesIO
 
+from services.slide_image import SlideImage
+
 logger = logging.getLogger(__name__)
 
 class PowerPointConverter:
@@ -62,7 +64,7 @@ class PowerPointConverter:
                 {
                     'slide_number': int,
                     'image_path': str,
-                    'image_base64': str,
+                    'image': SlideImage,  # lazy handle on the exported PNG
                     'file_path': str,
                     'file_name': str
                 }
@@ -102,13 +104,11 @@ class PowerPointConverter:
                     # Parameters: filename, format, width, height
                     slide.Export(image_path, "PNG", 1920, 1080)  # High resolution export
                     
-                    # Convert to base64 for storage
-                    image_base64 = self._image_to_base64(image_path)
-                    
+                    # File-backed handle: the PNG is only read when it is normalized/uploaded
                     slide_info = {
                         'slide_number': i,
                         'image_path': image_path,
-                        'image_base64': image_base64,
+                        'image': SlideImage.from_file(image_path),
                         'file_path': file_path,
                         'file_name': file_name
                     }
@@ -134,17 +134,6 @@ class PowerPointConverter:
                 except:
                     pass
     
-    def _image_to_base64(self, image_path: str) -> str:
-        """Convert image file to base64 string"""
-        try:
-            with open(image_path, 'rb') as image_file:
-                image_data = image_file.read()
-                base64_string = base64.b64encode(image_data).decode('utf-8')
-                return base64_string
-        except Exception as e:
-            logger.error(f"Error converting image to base64: {e}")
-            return ""
-    
     def get_slide_image_data(self, image_path: str) -> bytes:
         """Get raw image data from file"""
         try:
@@ -190,6 +179,33 @@ def get_powerpoint_converter() -> PowerPointConverter:
         _converter_instance = PowerPointConverter()
     return _converter_instance
 
+# Per-thread converter instances (COM objects must be used from the thread that created them)
+_thread_local = threading.local()
+
+def get_thread_powerpoint_converter() -> PowerPointConverter:
+    """Get or create a PowerPoint converter bound to the calling thread
+    
+    Pipeline worker threads cannot use the global converter's COM proxy, so each
+    worker initializes COM for its own apartment and dispatches its own proxy to
+    the (single) PowerPoint application.
+    """
+    converter = getattr(_thread_local, 'converter', None)
+    if converter is None:
+        import pythoncom
+        pythoncom.CoInitialize()
+        converter = PowerPointConverter()
+        _thread_local.converter = converter
+    return converter
+
+def release_thread_powerpoint_converter():
+    """Release the calling thread's converter without quitting the shared PowerPoint application"""
+    converter = getattr(_thread_local, 'converter', None)
+    if converter is not None:
+        converter.powerpoint = None
+        _thread_local.converter = None
+        import pythoncom
+        pythoncom.CoUninitialize()
+
 def cleanup_powerpoint_converter():
     """Cleanup global converter instance"""
     global _converter_instance
@@ -0,0 +1,298 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# WebSocket message types
+MESSAGE_INGESTION_JOB = 'INGESTION_JOB'            # job lifecycle (queued, started, finished)
+MESSAGE_INGESTION_PROGRESS = 'INGESTION_PROGRESS'  # rate-limited progress with file events
+
+class ProgressPublisher:
+    """
+    Publishes structured ingestion progress to WebSocket clients
+
+    Ingestion threads report progress as it happens; clients receive it pushed
+    instead of polling the HTTP server:
+
+    - Job lifecycle events (queued, started, finished) are sent immediately
+    - Everything else (file started/finished/failed, slides embedded) is coalesced
+      per job and sent at most once per `min_interval_seconds` as one progress
+      message with the latest counters, throughput, ETA and the file events since
+      the previous message
+
+    publish() only updates in-memory state and is safe to call from any thread;
+    sending happens on the event loop the publisher is attached to. Without an
+    attached loop (tests, no server) events are tracked but not sent.
+    """
+
+    MIN_INTERVAL_LIMITS = (0.1, 10.0)
+
+    def __init__(self, min_interval_seconds: float = 0.5, max_events_per_message: int = 50):
+        """
+        Initialize the publisher
+
+        Args:
+            min_interval_seconds: Minimum time between two progress messages of a job
+            max_events_per_message: File events carried per progress message (older ones are counted as dropped)
+        """
+        self.min_interval_seconds = self._clamp_interval(min_interval_seconds)
+        self.max_events_per_message = max_events_per_message
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._loop = None
+        self._send = None
+
+        self.stats = {
+            'events_published': 0,
+            'messages_sent': 0,
+            'events_dropped': 0,
+            'send_errors': 0
+        }
+
+    @classmethod
+    def _clamp_interval(cls, seconds: float) -> float:
+        low, high = cls.MIN_INTERVAL_LIMITS
+        return min(high, max(low, float(seconds)))
+
+    def set_interval(self, seconds: float) -> float:
+        """
+        Change the progress message frequency
+
+        Args:
+            seconds: Minimum seconds between progress messages (clamped to 0.1-10)
+
+        Returns:
+            The interval in effect
+        """
+        self.min_interval_seconds = self._clamp_interval(seconds)
+        logger.info(f"📡 Progress updates every {self.min_interval_seconds}s")
+        return self.min_interval_seconds
+
+    def attach(self, loop: asyncio.AbstractEventLoop, send: Callable[[Dict[str, Any]], Awaitable]):
+        """
+        Deliver messages through an async send function on the given loop
+
+        Args:
+            loop: Event loop running the WebSocket server
+            send: Coroutine function sending one message to clients (e.g. ConnectionManager.broadcast)
+        """
+        self._loop = loop
+        self._send = send
+
+    def detach(self):
+        """Stop delivering messages"""
+        self._loop = None
+        self._send = None
+
+    # ---- producer side (any thread) ----
+
+    def job_event(self, job_id: str, event: str, data: Dict[str, Any] = None):
+        """
+        Publish a job lifecycle event immediately
+
+        Args:
+            job_id: Job the event belongs to
+            event: 'job_queued', 'job_started' or 'job_finished'
+            data: Extra fields (folder_path, status, error, result summary, ...)
+        """
+        now = time.time()
+        with self._lock:
+            if event == 'job_started':
+                self._jobs[job_id] = self._new_job_state(now)
+            state = self._jobs.get(job_id)
+            progress_message = None
+            if event == 'job_finished' and state is not None:
+                # Deliver pending file events before the final message
+                progress_message = self._build_progress_message(job_id, state, now)
+                del self._jobs[job_id]
+            self.stats['events_published'] += 1
+
+        message = dict(data or {}, type=MESSAGE_INGESTION_JOB, event=event, job_id=job_id,
+                       timestamp=datetime.utcnow().isoformat())
+        if progress_message:
+            self._deliver(progress_message)
+        self._deliver(message)
+
+    def publish(self, job_id: str, progress_data: Dict[str, Any]):
+        """
+        Record a progress report from an ingestion run (rate-limited delivery)
+
+        Args:
+            job_id: Job the report belongs to
+            progress_data: Progress callback data - 'status' plus counters such as
+                           'file', 'progress', 'files_processed', 'slides_processed',
+                           'slides_embedded', 'in_flight_bytes' and 'error'
+        """
+        now = time.time()
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is None:
+                state = self._jobs[job_id] = self._new_job_state(now)
+            self.stats['events_published'] += 1
+
+            counters = state['counters']
+            for key in ('progress', 'files_processed', 'slides_processed', 'files_total', 'in_flight_bytes'):
+                if key in progress_data:
+                    counters[key] = progress_data[key]
+            if 'slides_embedded' in progress_data:
+                counters['slides_embedded'] += progress_data['slides_embedded']
+
+            status = progress_data.get('status', '')
+            file_name = progress_data.get('file')
+            if file_name and status != 'file_failed':
+                counters['current_file'] = file_name
+            if status in ('file_started', 'file_finished', 'file_failed', 'processing_file'):
+                file_event = {'event': 'file_finished' if status == 'processing_file' else status,
+                              'file': file_name or ''}
+                if status == 'file_failed':
+                    counters['errors'] += 1
+                    file_event['error'] = progress_data.get('error', '')
+                state['events'].append(file_event)
+                if len(state['events']) > self.max_events_per_message:
+                    state['events'].pop(0)
+                    state['dropped_events'] += 1
+                    self.stats['events_dropped'] += 1
+            state['dirty'] = True
+
+    # ---- consumer side (event loop) ----
+
+    def collect_due(self, now: float = None) -> List[Dict[str, Any]]:
+        """
+        Build the progress messages that are due (at most one per job per interval)
+
+        Args:
+            now: Current time (defaults to time.time())
+
+        Returns:
+            List of progress messages
+        """
+        now = now or time.time()
+        messages = []
+        with self._lock:
+            for job_id, state in self._jobs.items():
+                if state['dirty'] and now - state['last_sent'] >= self.min_interval_seconds:
+                    messages.append(self._build_progress_message(job_id, state, now))
+        return messages
+
+    async def run(self):
+        """Send due progress messages until cancelled (runs on the attached loop)"""
+        logger.info(f"📡 Progress publisher running (every {self.min_interval_seconds}s)")
+        while True:
+            await asyncio.sleep(self.min_interval_seconds)
+            for message in self.collect_due():
+                await self._send_message(message)
+
+    def _deliver(self, message: Dict[str, Any]):
+        """Send a message from any thread (no-op when not attached)"""
+        loop = self._loop
+        if loop is None or self._send is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._send_message(message), loop)
+        except RuntimeError:
+            pass  # loop closed
+
+    async def _send_message(self, message: Dict[str, Any]):
+        try:
+            await self._send(message)
+            self.stats['messages_sent'] += 1
+        except Exception as e:
+            self.stats['send_errors'] += 1
+            logger.error(f"❌ Failed to send progress message: {e}")
+
+    # ---- job state ----
+
+    @staticmethod
+    def _new_job_state(now: float) -> Dict[str, Any]:
+        return {
+            'started_at': now,
+            'last_sent': 0.0,
+            'dirty': False,
+            'events': [],
+            'dropped_events': 0,
+            'counters': {
+                'current_file': '',
+                'progress': 0.0,
+                'files_processed': 0,
+                'files_total': None,
+                'slides_processed': 0,
+                'slides_embedded': 0,
+                'in_flight_bytes': 0,
+                'errors': 0
+            }
+        }
+
+    def _build_progress_message(self, job_id: str, state: Dict[str, Any], now: float) -> Dict[str, Any]:
+        """Build a progress message and reset the job's pending events (lock must be held)"""
+        counters = dict(state['counters'])
+        elapsed = max(0.0, now - state['started_at'])
+        progress = counters['progress'] or 0.0
+
+        # ETA from the completed fraction of the run
+        eta_seconds = None
+        if 0 < progress < 100:
+            eta_seconds = round(elapsed * (100 - progress) / progress, 1)
+        elif progress >= 100:
+            eta_seconds = 0.0
+
+        message = {
+            'type': MESSAGE_INGESTION_PROGRESS,
+            'job_id': job_id,
+            'timestamp': datetime.utcnow().isoformat(),
+            'progress': dict(
+                counters,
+                elapsed_seconds=round(elapsed, 2),
+                files_per_second=round(counters['files_processed'] / elapsed, 3) if elapsed > 0 else 0.0,
+                slides_per_second=round(counters['slides_embedded'] / elapsed, 3) if elapsed > 0 else 0.0,
+                eta_seconds=eta_seconds
+            ),
+            'events': state['events'],
+            'dropped_events': state['dropped_events']
+        }
+        state['events'] = []
+        state['dropped_events'] = 0
+        state['dirty'] = False
+        state['last_sent'] = now
+        return message
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get publisher statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['active_jobs'] = len(self._jobs)
+        stats['min_interval_seconds'] = self.min_interval_seconds
+        stats['attached'] = self._loop is not None
+        return stats
+
+
+# Global progress publisher instance
+_progress_publisher = None
+
+def get_progress_publisher() -> ProgressPublisher:
+    """Get or create global progress publisher"""
+    global _progress_publisher
+    if _progress_publisher is None:
+        _progress_publisher = ProgressPublisher()
+    return _progress_publisher
@@ -20,6 +20,8 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import json
+import re
+import time
 import uuid
 
 from qdrant_client import QdrantClient
@@ -29,15 +31,70 @@ from qdrant_client.http.exceptions import UnexpectedResponse
 
 logger = logging.getLogger(__name__)
 
+# Namespace for deterministic slide point ids (uuid5 of file path, slide number and model)
+SLIDE_POINT_NAMESPACE = uuid.UUID('6f1c2a4e-3b8d-5e7f-9a0b-c1d2e3f4a5b6')
+DEFAULT_EMBEDDING_PROVIDER = "voyage"
+DEFAULT_EMBEDDING_MODEL = "voyage-multimodal-3"
+DEFAULT_VECTOR_SIZE = 1024
+DEFAULT_COLLECTION_NAME = "siffs_slides"
+
+def slide_point_id(file_path: str, slide_number: int, model: str = DEFAULT_EMBEDDING_MODEL) -> str:
+    """
+    Derive the stable point id of a slide
+    
+    The same slide of the same file embedded with the same model always maps to the
+    same id, so re-indexing a deck overwrites its points instead of appending new ones.
+    
+    Args:
+        file_path: Path of the deck or image (made absolute)
+        slide_number: Slide number within the file
+        model: Embedding model that produced the vector
+        
+    Returns:
+        Point id as a UUID string
+    """
+    key = f"{os.path.abspath(file_path)}|{int(slide_number)}|{model or DEFAULT_EMBEDDING_MODEL}"
+    return str(uuid.uuid5(SLIDE_POINT_NAMESPACE, key))
+
+def collection_name_for(provider: str = DEFAULT_EMBEDDING_PROVIDER, model: str = DEFAULT_EMBEDDING_MODEL,
+                        vector_size: int = DEFAULT_VECTOR_SIZE) -> str:
+    """
+    Name the collection holding the vectors of one embedding provider, model and dimension
+    
+    The VoyageAI default keeps the original collection name, so existing databases stay valid.
+    
+    Args:
+        provider: Embedding provider name
+        model: Embedding model
+        vector_size: Vector dimension
+        
+    Returns:
+        Collection name
+    """
+    if (provider, model, vector_size) == (DEFAULT_EMBEDDING_PROVIDER, DEFAULT_EMBEDDING_MODEL, DEFAULT_VECTOR_SIZE):
+        return DEFAULT_COLLECTION_NAME
+    slug = re.sub(r'[^a-z0-9]+', '_', f"{provider}_{model}".lower()).strip('_')
+    return f"{DEFAULT_COLLECTION_NAME}_{slug}_{vector_size}"
+
 class QdrantVectorDB:
     """Qdrant local vector database service for storing and searching slide embeddings"""
     
-    def __init__(self, db_path: str = None):
+    # Records, per collection, that duplicates from random point ids have been removed
+    DEDUPE_MARKER = 'slide_points_deduplicated.json'
+    
+    # Records the embedding provider, model and dimension of every collection in db_path
+    COLLECTIONS_FILE = 'collections.json'
+    
+    def __init__(self, db_path: str = None, embedding_provider: str = DEFAULT_EMBEDDING_PROVIDER,
+                 model: str = DEFAULT_EMBEDDING_MODEL, vector_size: int = DEFAULT_VECTOR_SIZE):
         """
         Initialize Qdrant client with local storage
         
         Args:
             db_path: Path to store the local Qdrant database (if None, uses default app data location)
+            embedding_provider: Provider of the vectors stored (selects the collection)
+            model: Embedding model of the vectors stored
+            vector_size: Vector dimension of the model
         """
         # Set up local database path
         if db_path is None:
@@ -53,8 +110,6 @@ class QdrantVectorDB:
         os.makedirs(db_path, exist_ok=True)
         
         self.db_path = db_path
-        self.collection_name = "siffs_slides"  # Collection name for slide embeddings
-        self.vector_size = 1024  # VoyageAI embedding dimension
         
         try:
             # Initialize Qdrant client with local storage
@@ -62,12 +117,33 @@ class QdrantVectorDB:
             logger.info(f"✅ Qdrant client initialized with local storage: {db_path}")
             
             # Initialize collection
-            self._initialize_collection()
+            self.use_embedding_model(embedding_provider, model, vector_size)
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize Qdrant client: {e}")
             raise
     
+    def use_embedding_model(self, embedding_provider: str, model: str, vector_size: int):
+        """
+        Switch to the collection of an embedding provider, model and dimension (created if needed)
+        
+        Each vector space gets its own collection, so vectors of different providers
+        or models are never mixed; searches only see vectors of the active model.
+        
+        Args:
+            embedding_provider: Provider name
+            model: Embedding model
+            vector_size: Vector dimension
+            
+        Raises:
+            ValueError: If the existing collection was created for different vectors
+        """
+        self.embedding_provider = embedding_provider
+        self.model = model
+        self.vector_size = int(vector_size)
+        self.collection_name = collection_name_for(embedding_provider, model, self.vector_size)
+        self._initialize_collection()
+    
     def _initialize_collection(self):
         """Initialize or connect to Qdrant collection"""
         try:
@@ -97,12 +173,56 @@ class QdrantVectorDB:
                 )
                 logger.info(f"✅ Collection '{self.collection_name}' created successfully")
             else:
+                self._check_collection_vectors()
                 logger.info(f"✅ Using existing collection: {self.collection_name}")
             
+            self._record_collection()
+            
         except Exception as e:
             logger.error(f"❌ Error initializing Qdrant collection: {e}")
             raise
     
+    def _load_collection_records(self) -> Dict[str, Dict[str, Any]]:
+        """Load the provider, model and dimension recorded per collection"""
+        records_path = os.path.join(self.db_path, self.COLLECTIONS_FILE)
+        if not os.path.exists(records_path):
+            return {}
+        with open(records_path, 'r') as f:
+            return json.load(f)
+    
+    def _check_collection_vectors(self):
+        """
+        Verify that the existing collection holds vectors of the active provider, model and dimension
+        
+        Raises:
+            ValueError: If the collection's dimension or recorded provider/model differ
+        """
+        collection_info = self.client.get_collection(self.collection_name)
+        existing_size = collection_info.config.params.vectors.size
+        if existing_size != self.vector_size:
+            raise ValueError(f"Collection '{self.collection_name}' holds {existing_size}-dimensional vectors, "
+                             f"the embedding model produces {self.vector_size}")
+        
+        record = self._load_collection_records().get(self.collection_name)
+        if record and (record.get('provider'), record.get('model')) != (self.embedding_provider, self.model):
+            raise ValueError(f"Collection '{self.collection_name}' was created by "
+                             f"{record.get('provider')}/{record.get('model')}, not {self.embedding_provider}/{self.model}")
+    
+    def _record_collection(self):
+        """Record the provider, model and dimension of the active collection"""
+        records = self._load_collection_records()
+        if self.collection_name in records:
+            return
+        # Collections created before records existed can only hold the default VoyageAI vectors
+        records[self.collection_name] = {
+            'provider': self.embedding_provider,
+            'model': self.model,
+            'vector_size': self.vector_size,
+            'created_at': time.time()
+        }
+        with open(os.path.join(self.db_path, self.COLLECTIONS_FILE), 'w') as f:
+            json.dump(records, f, indent=2)
+    
     def upsert_slide_embeddings(self, embeddings_data: List[Dict]) -> bool:
         """
         Store slide embeddings in Qdrant
@@ -113,54 +233,28 @@ class QdrantVectorDB:
         Returns:
             True if successful, False otherwise
         """
+        return bool(self.upsert_slide_embeddings_with_ids(embeddings_data))
+    
+    def upsert_slide_embeddings_with_ids(self, embeddings_data: List[Dict]) -> List[str]:
+        """
+        Store slide embeddings in Qdrant and return the point ids that were written
+        
+        Args:
+            embeddings_data: List of embedding dictionaries with metadata
+            
+        Returns:
+            List of upserted point ids (empty list on failure)
+        """
         if not embeddings_data:
             logger.warning("⚠️ No embeddings data provided for upsert")
-            return False
+            return []
         
         try:
-            points = []
-            for embedding_data in embeddings_data:
-                embedding = embedding_data.get('embedding', [])
-                metadata = embedding_data.get('metadata', {})
-                
-                if not embedding or len(embedding) != self.vector_size:
-                    logger.warning(f"⚠️ Skipping invalid embedding (expected {self.vector_size} dimensions, got {len(embedding) if embedding else 0})")
-                    continue
-                
-                # Generate UUID for the slide (required by Qdrant)
-                original_slide_id = metadata.get('slide_id', f"slide_{len(points)}")
-                
-                # Convert slide_id to UUID if it's not already
-                try:
-                    # Try to parse as UUID first
-                    slide_uuid = uuid.UUID(original_slide_id)
-                    point_id = str(slide_uuid)
-                except ValueError:
-                    # If not a UUID, generate a new one but keep original in metadata
-                    slide_uuid = uuid.uuid4()
-                    point_id = str(slide_uuid)
-                
-                # Prepare payload (metadata) - Qdrant stores all metadata as payload
-                payload = {
-                    'file_path': metadata.get('file_path', ''),
-                    'file_name': metadata.get('file_name', ''),
-                    'slide_number': int(metadata.get('slide_number', 0)),
-                    'image_path': metadata.get('image_path', ''),
-                    'slide_id': original_slide_id,  # Keep original slide ID in metadata
-                    'uuid_id': point_id  # Store UUID separately
-                }
-                
-                # Create point for Qdrant
-                point = PointStruct(
-                    id=point_id,  # Use UUID for point ID
-                    vector=embedding,
-                    payload=payload
-                )
-                points.append(point)
+            points = self.build_points(embeddings_data)
             
             if not points:
                 logger.warning("⚠️ No valid points to upsert")
-                return False
+                return []
             
             # Upsert points in batches for better performance
             batch_size = 100
@@ -169,25 +263,102 @@ class QdrantVectorDB:
             for i in range(0, len(points), batch_size):
                 batch = points[i:i + batch_size]
                 
-                operation_result = self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch
-                )
-                
-                if isinstance(operation_result, UpdateResult) and operation_result.status == 'completed':
+                if self.upsert_points(batch):
                     total_upserted += len(batch)
                     logger.info(f"📤 Upserted batch {i//batch_size + 1}: {len(batch)} points")
                 else:
                     logger.error(f"❌ Failed to upsert batch {i//batch_size + 1}")
-                    return False
+                    return []
             
             logger.info(f"✅ Successfully upserted {total_upserted} slide embeddings to Qdrant")
-            return True
+            return [str(point.id) for point in points]
             
         except Exception as e:
             logger.error(f"❌ Error upserting embeddings to Qdrant: {e}")
             logger.error(f"   Error type: {type(e).__name__}")
-            return False
+            return []
+    
+    def build_points(self, embeddings_data: List[Dict]) -> List[PointStruct]:
+        """
+        Convert embedding dictionaries to Qdrant points (invalid embeddings are skipped)
+        
+        Args:
+            embeddings_data: List of embedding dictionaries with metadata
+            
+        Returns:
+            List of points with their ids assigned
+        """
+        points = []
+        for embedding_data in embeddings_data:
+            embedding = embedding_data.get('embedding', [])
+            metadata = embedding_data.get('metadata', {})
+            
+            if not embedding or len(embedding) != self.vector_size:
+                logger.warning(f"⚠️ Skipping invalid embedding (expected {self.vector_size} dimensions, got {len(embedding) if embedding else 0})")
+                continue
+            
+            if (metadata.get('model') or DEFAULT_EMBEDDING_MODEL) != self.model:
+                logger.warning(f"⚠️ Skipping embedding from model {metadata.get('model') or DEFAULT_EMBEDDING_MODEL} "
+                               f"(collection holds {self.model} vectors)")
+                continue
+            
+            original_slide_id = metadata.get('slide_id', f"slide_{len(points)}")
+            
+            if metadata.get('point_id'):
+                # Pre-assigned id (ingestion journal) - replays overwrite instead of duplicating
+                point_id = str(metadata['point_id'])
+            elif metadata.get('file_path'):
+                # Stable id per (file, slide, model) so re-ingestion is a true upsert
+                point_id = slide_point_id(metadata['file_path'], metadata.get('slide_number', 0),
+                                          metadata.get('model'))
+            else:
+                # No file to derive an id from: use slide_id if it is a UUID, otherwise a random one
+                try:
+                    point_id = str(uuid.UUID(original_slide_id))
+                except ValueError:
+                    point_id = str(uuid.uuid4())
+            
+            # Prepare payload (metadata) - Qdrant stores all metadata as payload
+            payload = {
+                'file_path': metadata.get('file_path', ''),
+                'file_name': metadata.get('file_name', ''),
+                'slide_number': int(metadata.get('slide_number', 0)),
+                'image_path': metadata.get('image_path', ''),
+                'slide_id': original_slide_id,  # Keep original slide ID in metadata
+                'uuid_id': point_id,  # Store UUID separately
+                'model': self.model
+            }
+            
+            # Create point for Qdrant
+            point = PointStruct(
+                id=point_id,  # Use UUID for point ID
+                vector=embedding,
+                payload=payload
+            )
+            points.append(point)
+        
+        return points
+    
+    def upsert_points(self, points: List[PointStruct], wait: bool = True) -> bool:
+        """
+        Upsert prepared points
+        
+        Args:
+            points: Points to write
+            wait: Wait until the write is applied; with False the server only acknowledges
+                  it (writes are applied in order, so a later waited write acts as a barrier).
+                  Local storage always applies writes immediately.
+            
+        Returns:
+            True if the write was completed (or acknowledged), False otherwise
+        """
+        operation_result = self.client.upsert(
+            collection_name=self.collection_name,
+            points=points,
+            wait=wait
+        )
+        accepted = ('completed',) if wait else ('completed', 'acknowledged')
+        return isinstance(operation_result, UpdateResult) and operation_result.status in accepted
     
     def search_similar_slides(self, query_embedding: List[float], top_k: int = 25, 
                             file_filter: str = None) -> List[Dict]:
@@ -282,12 +453,47 @@ class QdrantVectorDB:
             logger.error(f"❌ Error deleting slides from Qdrant: {e}")
             return False
     
+    def delete_points(self, point_ids: List[str]) -> bool:
+        """
+        Delete specific points by id
+        
+        Args:
+            point_ids: Point ids to delete
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not point_ids:
+            return True
+        
+        try:
+            delete_result = self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(
+                    points=list(point_ids)
+                )
+            )
+            
+            if isinstance(delete_result, UpdateResult):
+                logger.info(f"🗑️ Deleted {len(point_ids)} points")
+                return True
+            else:
+                logger.warning("⚠️ Delete operation returned unexpected result")
+                return False
+                
+        except Exception as e:
+            logger.error(f"❌ Error deleting points from Qdrant: {e}")
+            return False
+    
     def get_collection_info(self) -> Dict:
         """Get information about the Qdrant collection"""
         try:
             collection_info = self.client.get_collection(self.collection_name)
             
             return {
+                'collection_name': self.collection_name,
+                'embedding_provider': self.embedding_provider,
+                'model': self.model,
                 'total_vector_count': collection_info.points_count,
                 'vector_size': collection_info.config.params.vectors.size,
                 'distance_metric': collection_info.config.params.vectors.distance.name,
@@ -403,6 +609,100 @@ class QdrantVectorDB:
             logger.error(f"❌ Error deleting vectors by folder: {e}")
             return 0
     
+    def deduplicate_slide_points(self, keep_ids: List[str] = None) -> Dict[str, Any]:
+        """
+        Delete duplicate points left by re-indexing before point ids were deterministic
+        
+        Points are grouped by (file path, slide number, model); in each group one point
+        survives - the one with the deterministic id if present, otherwise one listed in
+        keep_ids (e.g. the ids the slide catalog references), otherwise the first seen.
+        
+        Args:
+            keep_ids: Point ids to prefer as survivors
+            
+        Returns:
+            Dictionary with points scanned, duplicate groups and points deleted
+        """
+        keep = {str(pid) for pid in (keep_ids or [])}
+        groups: Dict[Tuple[str, int, str], List[str]] = {}
+        scanned = 0
+        offset = None
+        
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=10000,
+                offset=offset,
+                with_payload=['file_path', 'slide_number', 'model'],
+                with_vectors=False
+            )
+            for point in points:
+                scanned += 1
+                payload = point.payload or {}
+                if not payload.get('file_path'):
+                    continue
+                key = (os.path.abspath(payload['file_path']), int(payload.get('slide_number', 0)),
+                       payload.get('model') or DEFAULT_EMBEDDING_MODEL)
+                groups.setdefault(key, []).append(str(point.id))
+            if offset is None:
+                break
+        
+        duplicate_ids = []
+        duplicate_groups = 0
+        for (file_path, slide_number, model), point_ids in groups.items():
+            if len(point_ids) < 2:
+                continue
+            duplicate_groups += 1
+            stable_id = slide_point_id(file_path, slide_number, model)
+            if stable_id in point_ids:
+                survivor = stable_id
+            else:
+                survivor = next((pid for pid in point_ids if pid in keep), point_ids[0])
+            duplicate_ids.extend(pid for pid in point_ids if pid != survivor)
+        
+        if duplicate_ids and not self.delete_points(duplicate_ids):
+            raise RuntimeError("Failed to delete duplicate slide points")
+        
+        logger.info(f"🧹 Deduplicated slide points: {len(duplicate_ids)} duplicates removed "
+                    f"from {duplicate_groups} slides ({scanned} points scanned)")
+        return {
+            'points_scanned': scanned,
+            'duplicate_slides': duplicate_groups,
+            'points_deleted': len(duplicate_ids)
+        }
+    
+    def ensure_slide_points_deduplicated(self, keep_ids: List[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run deduplicate_slide_points once per collection (a marker file records completion)
+        
+        Args:
+            keep_ids: Point ids to prefer as survivors
+            
+        Returns:
+            Deduplication result, or None if it already ran or failed (it is retried next start)
+        """
+        marker_path = os.path.join(self.db_path, self.DEDUPE_MARKER)
+        try:
+            with open(marker_path, 'r') as f:
+                completed = json.load(f)
+        except (OSError, ValueError):
+            completed = {}
+        if 'points_scanned' in completed:
+            # Marker written before collections were tracked: it covers the default collection
+            completed = {DEFAULT_COLLECTION_NAME: completed}
+        if self.collection_name in completed:
+            return None
+        
+        try:
+            result = self.deduplicate_slide_points(keep_ids)
+            completed[self.collection_name] = result
+            with open(marker_path, 'w') as f:
+                json.dump(completed, f, indent=2)
+            return result
+        except Exception as e:
+            logger.error(f"❌ Error deduplicating slide points: {e}")
+            return None
+    
     def get_database_size(self) -> Dict[str, Any]:
         """Get database storage size information"""
         try:
@@ -464,11 +764,25 @@ class QdrantVectorDB:
 # Global Qdrant service instance
 _qdrant_service = None
 
-def get_qdrant_service(db_path: str = None) -> QdrantVectorDB:
-    """Get or create global Qdrant service"""
+def get_qdrant_service(db_path: str = None, embedding_provider: str = None, model: str = None,
+                       vector_size: int = None) -> QdrantVectorDB:
+    """Get or create global Qdrant service
+    
+    Args:
+        db_path: Database path (only applies when creating the service)
+        embedding_provider: Provider of the vectors to store (None keeps the current collection)
+        model: Embedding model of the vectors
+        vector_size: Vector dimension of the model
+    """
     global _qdrant_service
+    identity = (embedding_provider or DEFAULT_EMBEDDING_PROVIDER, model or DEFAULT_EMBEDDING_MODEL,
+                vector_size or DEFAULT_VECTOR_SIZE)
     if _qdrant_service is None:
-        _qdrant_service = QdrantVectorDB(db_path=db_path)
+        _qdrant_service = QdrantVectorDB(db_path, *identity)
+    elif embedding_provider and identity != (_qdrant_service.embedding_provider, _qdrant_service.model,
+                                             _qdrant_service.vector_size):
+        # Local storage allows one client per path - switch the existing one to the other collection
+        _qdrant_service.use_embedding_model(*identity)
     return _qdrant_service
 
 def clear_qdrant_service():
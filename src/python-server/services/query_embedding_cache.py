@@ -41,6 +41,10 @@ class QueryEmbeddingCache:
     - Query normalization for better cache hits
     """
     
+    # Model whose entries predate per-model keys; its queries keep the plain key so
+    # existing caches stay valid
+    UNKEYED_MODEL = "voyage-multimodal-3"
+    
     def __init__(self, 
                  cache_dir: str = None,
                  max_memory_entries: int = 1000,
@@ -105,9 +109,11 @@ class QueryEmbeddingCache:
         normalized = ' '.join(query.lower().strip().split())
         return normalized
     
-    def _get_query_hash(self, query: str) -> str:
-        """Generate a unique hash for the query"""
+    def _get_query_hash(self, query: str, model: str = None) -> str:
+        """Generate a unique hash for the query (per embedding model, except UNKEYED_MODEL)"""
         normalized_query = self._normalize_query(query)
+        if model and model != self.UNKEYED_MODEL:
+            normalized_query = f"{model}\n{normalized_query}"
         return hashlib.sha256(normalized_query.encode('utf-8')).hexdigest()
     
     def _load_disk_index(self):
@@ -195,19 +201,20 @@ class QueryEmbeddingCache:
         logger.info(f"🧹 Disk cache eviction: removed {entries_to_remove} entries")
         self._save_disk_index()
     
-    def get_embedding(self, query: str) -> Optional[List[float]]:
+    def get_embedding(self, query: str, model: str = None) -> Optional[List[float]]:
         """
         Get cached embedding for a query
         
         Args:
             query: Search query text
+            model: Embedding model the vector must come from
             
         Returns:
             Cached embedding if found, None otherwise
         """
         with self._lock:
             self.stats['total_queries'] += 1
-            query_hash = self._get_query_hash(query)
+            query_hash = self._get_query_hash(query, model)
             current_time = time.time()
             
             # Check memory cache first
@@ -252,16 +259,17 @@ class QueryEmbeddingCache:
             logger.debug(f"❌ Cache MISS for query: '{query[:50]}...'")
             return None
     
-    def cache_embedding(self, query: str, embedding: List[float]):
+    def cache_embedding(self, query: str, embedding: List[float], model: str = None):
         """
         Cache an embedding for a query
         
         Args:
             query: Search query text
             embedding: Query embedding vector
+            model: Embedding model that produced the vector
         """
         with self._lock:
-            query_hash = self._get_query_hash(query)
+            query_hash = self._get_query_hash(query, model)
             current_time = time.time()
             
             # Add to memory cache
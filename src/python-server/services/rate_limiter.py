@@ -0,0 +1,390 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Request priorities
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+
+class TokenBucketRateLimiter:
+    """
+    Shared requests-per-minute and tokens-per-minute limiter for embedding API calls
+
+    Two token buckets (requests and tokens) refill continuously at the per-minute
+    limits. Every embedding caller draws from the same buckets before calling the API,
+    so concurrent indexing runs, pipeline stages and searches together stay under the
+    provider limits instead of each discovering them through 429s.
+
+    Interactive requests (search queries) are served first: bulk callers wait while
+    an interactive request is waiting and may not dip into a small reserve that is
+    kept for interactive use.
+    """
+
+    def __init__(self,
+                 requests_per_minute: int = 2000,
+                 tokens_per_minute: int = 2000000,
+                 interactive_reserve: float = 0.05,
+                 throttle_pause_seconds: float = 5.0):
+        """
+        Initialize the rate limiter
+
+        Args:
+            requests_per_minute: Request limit per minute
+            tokens_per_minute: Token limit per minute
+            interactive_reserve: Fraction of each bucket that bulk callers cannot use
+            throttle_pause_seconds: Pause for all callers after a throttling (429) response
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.interactive_reserve = interactive_reserve
+        self.throttle_pause_seconds = throttle_pause_seconds
+
+        self._condition = threading.Condition()
+        self._request_level = float(requests_per_minute)
+        self._token_level = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._interactive_waiting = 0
+
+        self.stats = {
+            'requests': 0,
+            'tokens': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'interactive_requests': 0,
+            'interactive_wait_seconds': 0.0,
+            'throttles': 0
+        }
+
+    def _refill(self, now: float):
+        """Add tokens for the time elapsed since the last refill (lock must be held)"""
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._request_level = min(self.requests_per_minute,
+                                      self._request_level + elapsed * self.requests_per_minute / 60.0)
+            self._token_level = min(self.tokens_per_minute,
+                                    self._token_level + elapsed * self.tokens_per_minute / 60.0)
+            self._last_refill = now
+
+    def _time_until_available(self, tokens: float, interactive: bool, now: float) -> float:
+        """Seconds until a request of `tokens` can be admitted (0 if admissible now; lock must be held)"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if not interactive and self._interactive_waiting:
+            return 0.05
+
+        reserve = 0.0 if interactive else self.interactive_reserve
+        request_floor = self.requests_per_minute * reserve
+        token_floor = self.tokens_per_minute * reserve
+
+        request_deficit = (request_floor + 1) - self._request_level
+        token_deficit = (token_floor + tokens) - self._token_level
+        wait = 0.0
+        if request_deficit > 0:
+            wait = max(wait, request_deficit * 60.0 / self.requests_per_minute)
+        if token_deficit > 0:
+            wait = max(wait, token_deficit * 60.0 / self.tokens_per_minute)
+        return wait
+
+    def _clamp_tokens(self, tokens: int, interactive: bool) -> float:
+        """A request larger than a full minute of tokens can never fit; admit it on a full bucket"""
+        max_tokens = self.tokens_per_minute * (1.0 if interactive else 1.0 - self.interactive_reserve)
+        return min(float(tokens), max_tokens)
+
+    def _record_admission(self, tokens: float, interactive: bool, waited: float):
+        """Update statistics for an admitted request (lock must be held)"""
+        self.stats['requests'] += 1
+        self.stats['tokens'] += int(tokens)
+        if interactive:
+            self.stats['interactive_requests'] += 1
+            self.stats['interactive_wait_seconds'] += waited
+        if waited > 0.01:
+            self.stats['waits'] += 1
+            self.stats['wait_seconds'] += waited
+
+    def acquire(self, tokens: int = 0, priority: str = PRIORITY_BULK) -> float:
+        """
+        Block until one request with `tokens` tokens may be sent
+
+        Args:
+            tokens: Estimated tokens of the request
+            priority: PRIORITY_INTERACTIVE for user-facing requests, PRIORITY_BULK otherwise
+
+        Returns:
+            Seconds spent waiting
+        """
+        interactive = priority == PRIORITY_INTERACTIVE
+        tokens = self._clamp_tokens(tokens, interactive)
+        wait_start = time.monotonic()
+
+        with self._condition:
+            if interactive:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._time_until_available(tokens, interactive, now)
+                    if wait <= 0:
+                        break
+                    self._condition.wait(timeout=min(wait, 1.0))
+
+                self._request_level -= 1
+                self._token_level -= tokens
+            finally:
+                if interactive:
+                    self._interactive_waiting -= 1
+                self._condition.notify_all()
+
+            waited = time.monotonic() - wait_start
+            self._record_admission(tokens, interactive, waited)
+
+        return waited
+
+    async def acquire_async(self, tokens: int = 0, priority: str = PRIORITY_BULK) -> float:
+        """
+        Wait without blocking the event loop until one request with `tokens` tokens may be sent
+
+        Shares the buckets, priorities and statistics of acquire(); waiting coroutines
+        sleep on the loop instead of holding a thread.
+
+        Args:
+            tokens: Estimated tokens of the request
+            priority: PRIORITY_INTERACTIVE for user-facing requests, PRIORITY_BULK otherwise
+
+        Returns:
+            Seconds spent waiting
+        """
+        interactive = priority == PRIORITY_INTERACTIVE
+        tokens = self._clamp_tokens(tokens, interactive)
+        wait_start = time.monotonic()
+
+        if interactive:
+            with self._condition:
+                self._interactive_waiting += 1
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._time_until_available(tokens, interactive, now)
+                    if wait <= 0:
+                        self._request_level -= 1
+                        self._token_level -= tokens
+                        waited = time.monotonic() - wait_start
+                        self._record_admission(tokens, interactive, waited)
+                        return waited
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            if interactive:
+                with self._condition:
+                    self._interactive_waiting -= 1
+                    self._condition.notify_all()
+
+    def record_throttle(self, retry_after: float = None):
+        """
+        Register a throttling (429) response: pause all callers and drain the buckets
+
+        Args:
+            retry_after: Optional server-provided delay in seconds
+        """
+        pause = retry_after if retry_after is not None else self.throttle_pause_seconds
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._request_level = min(self._request_level, 0.0)
+            self._token_level = min(self._token_level, 0.0)
+            self.stats['throttles'] += 1
+            self._condition.notify_all()
+        logger.warning(f"🚦 Embedding API throttled - pausing requests for {pause:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rate limiter statistics"""
+        with self._condition:
+            self._refill(time.monotonic())
+            return {
+                'requests_per_minute': self.requests_per_minute,
+                'tokens_per_minute': self.tokens_per_minute,
+                'available_requests': int(self._request_level),
+                'available_tokens': int(self._token_level),
+                'requests': self.stats['requests'],
+                'tokens': self.stats['tokens'],
+                'waits': self.stats['waits'],
+                'wait_seconds': round(self.stats['wait_seconds'], 2),
+                'interactive_requests': self.stats['interactive_requests'],
+                'interactive_wait_seconds': round(self.stats['interactive_wait_seconds'], 2),
+                'throttles': self.stats['throttles']
+            }
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD controller for the number of concurrent bulk embedding requests
+
+    - Additive increase: after a full window of fast successful requests the limit grows by one
+    - Multiplicative decrease: a throttling error or a latency well above the observed
+      baseline halves the limit (at most once per cooldown period)
+
+    Callers hold a slot for the duration of each API call; worker threads beyond the
+    current limit simply wait, so a fixed pool of embedder threads acts as the upper bound.
+    """
+
+    def __init__(self,
+                 initial_limit: int = 4,
+                 min_limit: int = 1,
+                 max_limit: int = 10,
+                 latency_tolerance: float = 2.0,
+                 decrease_factor: float = 0.5,
+                 cooldown_seconds: float = 5.0):
+        """
+        Initialize the controller
+
+        Args:
+            initial_limit: Starting concurrency
+            min_limit: Lowest concurrency the controller may drop to
+            max_limit: Highest concurrency the controller may grow to
+            latency_tolerance: Per-item latency above baseline × tolerance counts as congestion
+            decrease_factor: Multiplier applied to the limit on congestion
+            cooldown_seconds: Minimum time between two decreases
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial_limit))
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+
+        self._condition = threading.Condition()
+        self._active = 0
+        self._successes_in_window = 0
+        self._last_decrease = 0.0
+        self._baseline_latency = None
+        self._ewma_latency = None
+
+        self.stats = {
+            'increases': 0,
+            'decreases': 0,
+            'throttles': 0,
+            'peak_active': 0
+        }
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot for the duration of an API call"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+            self.stats['peak_active'] = max(self.stats['peak_active'], self._active)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def record_success(self, latency_seconds: float, items: int = 1):
+        """
+        Feed the latency of a successful request into the controller
+
+        Args:
+            latency_seconds: Duration of the API call
+            items: Number of items in the request (latency is normalized per item)
+        """
+        per_item = latency_seconds / max(1, items)
+        with self._condition:
+            self._ewma_latency = per_item if self._ewma_latency is None else 0.8 * self._ewma_latency + 0.2 * per_item
+            if self._baseline_latency is None or self._ewma_latency < self._baseline_latency:
+                self._baseline_latency = self._ewma_latency
+            else:
+                # Let the baseline drift up slowly so a permanently slower network is not punished forever
+                self._baseline_latency = 0.99 * self._baseline_latency + 0.01 * self._ewma_latency
+
+            if self._ewma_latency > self._baseline_latency * self.latency_tolerance:
+                self._decrease("latency")
+                return
+
+            self._successes_in_window += 1
+            if self._successes_in_window >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes_in_window = 0
+                self.stats['increases'] += 1
+                self._condition.notify_all()
+                logger.info(f"📈 Embedding concurrency increased to {self.limit}")
+
+    def record_throttle(self):
+        """Register a throttling (429) response"""
+        with self._condition:
+            self.stats['throttles'] += 1
+            self._decrease("throttled")
+
+    def _decrease(self, reason: str):
+        """Multiplicatively decrease the limit, at most once per cooldown (lock must be held)"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_seconds:
+            return
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self._last_decrease = now
+        self._successes_in_window = 0
+        if new_limit < self.limit:
+            self.limit = new_limit
+            self.stats['decreases'] += 1
+            logger.warning(f"📉 Embedding concurrency decreased to {self.limit} ({reason})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get controller statistics"""
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'active': self._active,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'ewma_latency_per_item': round(self._ewma_latency, 4) if self._ewma_latency is not None else None,
+                'baseline_latency_per_item': round(self._baseline_latency, 4) if self._baseline_latency is not None else None,
+                'increases': self.stats['increases'],
+                'decreases': self.stats['decreases'],
+                'throttles': self.stats['throttles'],
+                'peak_active': self.stats['peak_active']
+            }
+
+
+# Global instances shared by every embedding caller
+_rate_limiter = None
+_concurrency_controller = None
+_globals_lock = threading.Lock()
+
+def get_embedding_rate_limiter() -> TokenBucketRateLimiter:
+    """Get or create global embedding API rate limiter"""
+    global _rate_limiter
+    with _globals_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucketRateLimiter()
+        return _rate_limiter
+
+def get_embedding_concurrency_controller() -> AdaptiveConcurrencyController:
+    """Get or create global bulk embedding concurrency controller"""
+    global _concurrency_controller
+    with _globals_lock:
+        if _concurrency_controller is None:
+            _concurrency_controller = AdaptiveConcurrencyController()
+        return _concurrency_controller
@@ -0,0 +1,443 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import random
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable
+
+from voyageai import error
+
+logger = logging.getLogger(__name__)
+
+# Error classes
+ERROR_THROTTLE = 'throttle'    # 429: wait (Retry-After if given) and retry
+ERROR_RETRYABLE = 'retryable'  # Upstream/transport failure: back off and retry, counts against the breaker
+ERROR_FATAL = 'fatal'          # Request problem (bad input, auth): retrying cannot help
+
+# Circuit breaker states
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised when the embedding API circuit breaker does not admit a request"""
+
+    def __init__(self, message: str, retry_in: float = 0.0):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Shared circuit breaker for embedding API calls
+
+    - Closed: requests flow; consecutive upstream failures (5xx, timeouts, connection
+      errors) are counted and reaching the threshold opens the circuit
+    - Open: every caller is paused until the open period ends, so an outage is not
+      hammered by all worker threads at once
+    - Half-open: traffic resumes gradually - one probe request at a time at first,
+      doubling the allowed concurrent requests with every success; enough successes
+      close the circuit, a failure reopens it for a longer period
+
+    Throttling and request errors (4xx) say nothing about upstream health and are
+    neither failures nor successes here.
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 open_seconds: float = 15.0,
+                 max_open_seconds: float = 300.0,
+                 recovery_successes: int = 8):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            open_seconds: First open period; doubled every time a probe fails
+            max_open_seconds: Upper bound of the open period
+            recovery_successes: Successes in half-open state that close the circuit
+        """
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.recovery_successes = recovery_successes
+
+        self._condition = threading.Condition()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._current_open_seconds = open_seconds
+        self._open_until = 0.0
+        self._probe_limit = 1
+        self._probes_active = 0
+        self._recovery_count = 0
+
+        self.stats = {
+            'opens': 0,
+            'rejected': 0,
+            'paused_seconds': 0.0,
+            'failures': 0,
+            'successes': 0
+        }
+
+    def _update_state(self, now: float):
+        """Move from open to half-open once the open period has passed (lock must be held)"""
+        if self._state == STATE_OPEN and now >= self._open_until:
+            self._state = STATE_HALF_OPEN
+            self._probe_limit = 1
+            self._probes_active = 0
+            self._recovery_count = 0
+            logger.info("🔌 Embedding API circuit half-open - sending probe requests")
+
+    def _time_until_admitted(self, now: float) -> float:
+        """Seconds until a request can be admitted (0 if admissible now; lock must be held)"""
+        self._update_state(now)
+        if self._state == STATE_OPEN:
+            return self._open_until - now
+        if self._state == STATE_HALF_OPEN and self._probes_active >= self._probe_limit:
+            return 0.1
+        return 0.0
+
+    def _admit(self):
+        """Register an admitted request (lock must be held)"""
+        if self._state == STATE_HALF_OPEN:
+            self._probes_active += 1
+
+    def _reject(self, now: float, waited: float) -> CircuitOpenError:
+        """Build the error for a request that was not admitted in time (lock must be held)"""
+        self.stats['rejected'] += 1
+        self.stats['paused_seconds'] += waited
+        retry_in = max(0.0, self._open_until - now)
+        return CircuitOpenError(f"Embedding API circuit is {self._state} - retry in {retry_in:.0f}s", retry_in)
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """
+        Block until the circuit admits a request
+
+        Args:
+            max_wait: Longest time to wait (None waits indefinitely, 0 fails fast)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            CircuitOpenError: If the request was not admitted within max_wait
+        """
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = self._time_until_admitted(now)
+                if wait <= 0:
+                    self._admit()
+                    waited = now - start
+                    self.stats['paused_seconds'] += waited
+                    return waited
+                if max_wait is not None and now - start + wait > max_wait:
+                    raise self._reject(now, now - start)
+                self._condition.wait(timeout=min(wait, 1.0))
+
+    async def acquire_async(self, max_wait: Optional[float] = None) -> float:
+        """
+        Wait without blocking the event loop until the circuit admits a request
+
+        Args:
+            max_wait: Longest time to wait (None waits indefinitely, 0 fails fast)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            CircuitOpenError: If the request was not admitted within max_wait
+        """
+        start = time.monotonic()
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                wait = self._time_until_admitted(now)
+                if wait <= 0:
+                    self._admit()
+                    waited = now - start
+                    self.stats['paused_seconds'] += waited
+                    return waited
+                if max_wait is not None and now - start + wait > max_wait:
+                    raise self._reject(now, now - start)
+            await asyncio.sleep(min(wait, 1.0))
+
+    def release(self, outcome: Optional[bool]):
+        """
+        Report the outcome of an admitted request
+
+        Args:
+            outcome: True for success, False for an upstream failure,
+                     None for outcomes that say nothing about upstream health
+        """
+        with self._condition:
+            was_probe = self._state == STATE_HALF_OPEN and self._probes_active > 0
+            if was_probe:
+                self._probes_active -= 1
+
+            if outcome is True:
+                self.stats['successes'] += 1
+                self._consecutive_failures = 0
+                if self._state == STATE_HALF_OPEN:
+                    self._recovery_count += 1
+                    if self._recovery_count >= self.recovery_successes:
+                        self._state = STATE_CLOSED
+                        self._current_open_seconds = self.open_seconds
+                        logger.info("🔌 Embedding API circuit closed - upstream recovered")
+                    else:
+                        # Resume gradually: double the concurrent requests allowed
+                        self._probe_limit = min(self._probe_limit * 2, self.recovery_successes)
+            elif outcome is False:
+                self.stats['failures'] += 1
+                self._consecutive_failures += 1
+                if self._state == STATE_HALF_OPEN:
+                    self._current_open_seconds = min(self._current_open_seconds * 2, self.max_open_seconds)
+                    self._open(time.monotonic(), "probe failed")
+                elif self._state == STATE_CLOSED and self._consecutive_failures >= self.failure_threshold:
+                    self._open(time.monotonic(), f"{self._consecutive_failures} consecutive failures")
+            self._condition.notify_all()
+
+    def _open(self, now: float, reason: str):
+        """Open the circuit (lock must be held)"""
+        self._state = STATE_OPEN
+        self._open_until = now + self._current_open_seconds
+        self._probes_active = 0
+        self.stats['opens'] += 1
+        logger.warning(f"🔌 Embedding API circuit open ({reason}) - pausing embedding requests "
+                       f"for {self._current_open_seconds:.0f}s")
+
+    @property
+    def state(self) -> str:
+        """Current state (closed, open or half_open)"""
+        with self._condition:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker state and statistics"""
+        with self._condition:
+            now = time.monotonic()
+            self._update_state(now)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'open_for_seconds': round(max(0.0, self._open_until - now), 1) if self._state == STATE_OPEN else 0.0,
+                'probe_limit': self._probe_limit if self._state == STATE_HALF_OPEN else None,
+                'opens': self.stats['opens'],
+                'rejected': self.stats['rejected'],
+                'paused_seconds': round(self.stats['paused_seconds'], 2),
+                'failures': self.stats['failures'],
+                'successes': self.stats['successes']
+            }
+
+class RetryPolicy:
+    """
+    Retry policy for embedding API calls
+
+    Errors are classified as throttling, retryable or fatal. Throttled calls wait
+    for the server's Retry-After delay when one is given; other retries use
+    exponential backoff with full jitter, so workers that failed together do not
+    retry together. Fatal errors are raised at once.
+    """
+
+    # Error types that indicate a transient upstream or transport problem
+    RETRYABLE_ERRORS = (
+        error.ServerError, error.ServiceUnavailableError, error.Timeout,
+        error.APIConnectionError, error.TryAgain, ConnectionError, TimeoutError
+    )
+    FATAL_ERRORS = (
+        error.AuthenticationError, error.InvalidRequestError, error.MalformedRequestError,
+        CircuitOpenError
+    )
+
+    def __init__(self,
+                 max_attempts: int = 4,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff delay scale in seconds (doubled per attempt)
+            max_delay: Upper bound for any single delay, including Retry-After
+            sleep: Sleep function (replaceable in tests)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def classify(self, exc: Exception) -> str:
+        """
+        Classify an error as ERROR_THROTTLE, ERROR_RETRYABLE or ERROR_FATAL
+
+        Args:
+            exc: Error raised by an API call
+
+        Returns:
+            Error class
+        """
+        status = getattr(exc, 'http_status', None)
+        if isinstance(exc, error.RateLimitError) or status == 429:
+            return ERROR_THROTTLE
+        if isinstance(exc, self.FATAL_ERRORS):
+            return ERROR_FATAL
+        if isinstance(exc, self.RETRYABLE_ERRORS):
+            return ERROR_RETRYABLE
+        if isinstance(status, int):
+            return ERROR_RETRYABLE if status >= 500 or status == 408 else ERROR_FATAL
+
+        message = str(exc).lower()
+        if '429' in message or 'rate limit' in message:
+            return ERROR_THROTTLE
+        if any(hint in message for hint in ('timed out', 'timeout', 'connection', 'temporarily unavailable')):
+            return ERROR_RETRYABLE
+        return ERROR_FATAL
+
+    @staticmethod
+    def retry_after(exc: Exception) -> Optional[float]:
+        """
+        Read the server-requested delay from an error's Retry-After header
+
+        Args:
+            exc: Error raised by an API call
+
+        Returns:
+            Delay in seconds, or None if the error carries no usable Retry-After
+        """
+        headers = getattr(exc, 'headers', None) or {}
+        value = next((v for k, v in headers.items() if k.lower() == 'retry-after'), None)
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Jittered backoff delay before retry number `attempt` (1 for the first retry)
+
+        Args:
+            attempt: Retry number
+
+        Returns:
+            Delay in seconds, uniformly drawn up to the exponential bound
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, exc: Exception, kind: str, attempt: int) -> float:
+        """
+        Delay before retrying after an error
+
+        Args:
+            exc: Error raised by the attempt
+            kind: Error class from classify
+            attempt: Retry number (1 for the first retry)
+
+        Returns:
+            Delay in seconds
+        """
+        retry_after = self.retry_after(exc) if kind == ERROR_THROTTLE else None
+        if retry_after is not None:
+            # Honour the server's delay; a little jitter spreads the callers that were throttled together
+            return min(self.max_delay, retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.1)))
+        return self.backoff(attempt)
+
+    def call(self, func: Callable[[], Any], description: str = "API call",
+             on_error: Callable[[Exception, str], None] = None) -> Any:
+        """
+        Call `func`, retrying throttled and retryable failures
+
+        Args:
+            func: Zero-argument callable performing one attempt
+            description: Name used in log messages
+            on_error: Optional callback receiving each error and its class before any retry
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            The last error, once it is fatal or attempts are exhausted
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return func()
+            except Exception as e:
+                kind = self.classify(e)
+                if on_error:
+                    on_error(e, kind)
+                if kind == ERROR_FATAL or attempt == self.max_attempts:
+                    raise
+                delay = self.next_delay(e, kind, attempt)
+                logger.warning(f"⚠️ {description} attempt {attempt}/{self.max_attempts} failed ({kind}): {e} "
+                               f"- retrying in {delay:.1f}s")
+                self.sleep(delay)
+
+    async def acall(self, func: Callable[[], Any], description: str = "API call",
+                    on_error: Callable[[Exception, str], None] = None) -> Any:
+        """
+        Async call: `func` returns an awaitable per attempt; delays sleep on the event loop
+
+        Args:
+            func: Zero-argument callable returning the awaitable of one attempt
+            description: Name used in log messages
+            on_error: Optional callback receiving each error and its class before any retry
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            The last error, once it is fatal or attempts are exhausted
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await func()
+            except Exception as e:
+                kind = self.classify(e)
+                if on_error:
+                    on_error(e, kind)
+                if kind == ERROR_FATAL or attempt == self.max_attempts:
+                    raise
+                delay = self.next_delay(e, kind, attempt)
+                logger.warning(f"⚠️ {description} attempt {attempt}/{self.max_attempts} failed ({kind}): {e} "
+                               f"- retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+# Global circuit breaker shared by all embedding callers
+_circuit_breaker = None
+_globals_lock = threading.Lock()
+
+def get_embedding_circuit_breaker() -> CircuitBreaker:
+    """Get or create global embedding API circuit breaker"""
+    global _circuit_breaker
+    with _globals_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker()
+        return _circuit_breaker
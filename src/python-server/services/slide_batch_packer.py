@@ -0,0 +1,183 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import logging
+import threading
+from typing import List, Dict, Any
+from services.embedding_batch_builder import EmbeddingBatchBuilder
+
+logger = logging.getLogger(__name__)
+
+class SlideBatchPacker:
+    """
+    Packs slides from many files into full embedding batches
+
+    Small decks would otherwise each produce their own tiny embedding request
+    (a folder of 8-slide decks → thousands of 8-item requests). The packer pools
+    converted slides across files, cuts batches of up to `batch_size` slides (or
+    fewer when the upload bytes or image tokens limit is reached first), and once
+    embeddings come back routes each vector to the file it belongs to. A file is
+    released for storage as soon as all of its slides are accounted for.
+    """
+
+    def __init__(self, batch_size: int, max_wait_seconds: float = 2.0,
+                 max_batch_bytes: int = None, max_batch_tokens: int = None):
+        """
+        Initialize the packer
+
+        Args:
+            batch_size: Maximum number of slides per packed batch
+            max_wait_seconds: Maximum time a slide may wait for a batch to fill
+                              before a partial batch is released
+            max_batch_bytes: Upload byte limit per batch (None for the batch builder default)
+            max_batch_tokens: Estimated token limit per batch (None for the batch builder default)
+        """
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max_wait_seconds
+
+        self._lock = threading.Lock()
+        self._builder = EmbeddingBatchBuilder(
+            max_items=self.batch_size,
+            max_bytes=max_batch_bytes,
+            max_tokens=max_batch_tokens
+        )
+        self._oldest_pending_at = None
+
+        # file_path -> {'item', 'expected', 'embeddings', 'failed'}
+        self._files: Dict[str, Dict[str, Any]] = {}
+
+        self.stats = {
+            'files_packed': 0,
+            'slides_packed': 0,
+            'batches_emitted': 0,
+            'partial_batches': 0
+        }
+
+    def add_file(self, item: Dict) -> List[List[Dict]]:
+        """
+        Register a converted file and pool its slides
+
+        Args:
+            item: Work item with 'file_path' and 'slides_data'
+
+        Returns:
+            Full batches that became ready (possibly empty)
+        """
+        slides_data = item.get('slides_data', [])
+        with self._lock:
+            self._files[item['file_path']] = {
+                'item': item,
+                'expected': len(slides_data),
+                'embeddings': [],
+                'failed': 0
+            }
+            if slides_data and not self._builder.pending_count:
+                self._oldest_pending_at = time.time()
+            self.stats['files_packed'] += 1
+            self.stats['slides_packed'] += len(slides_data)
+            return self._emit(self._builder.add_many(slides_data))
+
+    def flush_due(self) -> List[List[Dict]]:
+        """Release a partial batch if its oldest slide has waited longer than max_wait_seconds"""
+        with self._lock:
+            if (self._builder.pending_count and self._oldest_pending_at is not None and
+                    time.time() - self._oldest_pending_at >= self.max_wait_seconds):
+                return self._emit_partial()
+            return []
+
+    def flush(self) -> List[List[Dict]]:
+        """Release all remaining slides as batches (end of input)"""
+        with self._lock:
+            return self._emit_partial()
+
+    def _emit_partial(self) -> List[List[Dict]]:
+        """Release the open partial batch (lock must be held)"""
+        batches = self._builder.flush()
+        self.stats['partial_batches'] += len(batches)
+        return self._emit(batches)
+
+    def _emit(self, batches: List[List[Dict]]) -> List[List[Dict]]:
+        """Account for released batches (lock must be held)"""
+        if batches:
+            self._oldest_pending_at = time.time() if self._builder.pending_count else None
+        self.stats['batches_emitted'] += len(batches)
+        return batches
+
+    def route_results(self, batch_slides: List[Dict], embeddings_data: List[Dict]) -> List[Dict]:
+        """
+        Route the embeddings of a packed batch back to their files
+
+        Slides of the batch without a returned embedding are counted as failed.
+
+        Args:
+            batch_slides: Slides that were sent in the batch
+            embeddings_data: Embedding dicts returned for the batch
+
+        Returns:
+            Work items of files that are now complete, each with 'embeddings_data'
+            and 'slides_failed' added
+        """
+        sent_per_file: Dict[str, int] = {}
+        for slide_data in batch_slides:
+            file_path = slide_data.get('file_path', '')
+            sent_per_file[file_path] = sent_per_file.get(file_path, 0) + 1
+
+        completed = []
+        with self._lock:
+            received_per_file: Dict[str, int] = {}
+            for embedding_data in embeddings_data:
+                file_path = embedding_data.get('metadata', {}).get('file_path', '')
+                entry = self._files.get(file_path)
+                if entry is None:
+                    logger.warning(f"⚠️ Packed embedding for unknown file: {file_path}")
+                    continue
+                entry['embeddings'].append(embedding_data)
+                received_per_file[file_path] = received_per_file.get(file_path, 0) + 1
+
+            for file_path, sent in sent_per_file.items():
+                entry = self._files.get(file_path)
+                if entry is None:
+                    continue
+                entry['failed'] += max(0, sent - received_per_file.get(file_path, 0))
+                if len(entry['embeddings']) + entry['failed'] >= entry['expected']:
+                    completed.append(self._release_file(file_path))
+
+        return completed
+
+    def _release_file(self, file_path: str) -> Dict:
+        """Remove a complete file from tracking and build its output item (lock must be held)"""
+        entry = self._files.pop(file_path)
+        if entry['failed']:
+            logger.warning(f"⚠️ {entry['failed']}/{entry['expected']} slides of {file_path} could not be embedded")
+        return dict(entry['item'], embeddings_data=entry['embeddings'], slides_failed=entry['failed'])
+
+    @property
+    def pending_files(self) -> int:
+        """Number of files still waiting for embeddings"""
+        with self._lock:
+            return len(self._files)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get packing statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['avg_batch_size'] = round(
+                self.stats['slides_packed'] / self.stats['batches_emitted'], 1
+            ) if self.stats['batches_emitted'] else 0.0
+            stats['closed_by'] = self._builder.get_stats()['closed_by']
+            return stats
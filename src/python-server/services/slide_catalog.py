@@ -0,0 +1,404 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+class SlideCatalog:
+    """
+    Persistent catalog of indexed files backed by SQLite
+
+    Records, per absolute file path, the size, mtime and content hash the file
+    had when it was last indexed together with the vector store point ids that
+    were written for it. A folder rescan diffs the current scan against the
+    catalog so only new or modified files are converted and embedded, and the
+    vectors of files that vanished from disk can be deleted.
+
+    Change detection is two-tiered:
+    - size + mtime match → unchanged (no file read at all)
+    - size or mtime differ → content hash decides (handles touched/copied files)
+
+    Slides the embedding API rejected for their content are counted per file; such a
+    file stays cataloged (and is not retried) until it changes.
+    """
+
+    HASH_CHUNK_SIZE = 1024 * 1024  # 1MB reads when hashing file contents
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize the slide catalog
+
+        Args:
+            db_path: Path of the SQLite database file (if None, uses default app data location
+                     next to the Qdrant vector_db directory)
+        """
+        if db_path is None:
+            # Use platform-appropriate app data directory
+            if os.name == 'nt':  # Windows
+                app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+                db_path = os.path.join(app_data, 'SIFFS', 'slide_catalog.db')
+            else:  # Mac/Linux
+                app_data = os.path.expanduser('~/.local/share')
+                db_path = os.path.join(app_data, 'SIFFS', 'slide_catalog.db')
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db_path = db_path
+
+        # Single shared connection guarded by a lock (catalog is written from worker threads)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._initialize_schema()
+
+        logger.info(f"✅ Slide catalog initialized: {db_path}")
+
+    def _initialize_schema(self):
+        """Create catalog tables if they don't exist"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS indexed_files (
+                    file_path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    point_ids TEXT NOT NULL,
+                    slide_count INTEGER NOT NULL,
+                    indexed_at REAL NOT NULL,
+                    failed_slides INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(indexed_files)")}
+            if 'failed_slides' not in columns:
+                # Catalogs created before rejected slides were recorded
+                self._conn.execute("ALTER TABLE indexed_files ADD COLUMN failed_slides INTEGER NOT NULL DEFAULT 0")
+            self._conn.commit()
+
+    @staticmethod
+    def normalize_path(file_path: str) -> str:
+        """Normalize a file path to the form used as catalog key (matches vector payload file_path)"""
+        return os.path.abspath(file_path)
+
+    def compute_content_hash(self, file_path: str) -> str:
+        """
+        Compute SHA-256 hash of a file's contents
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Hex digest of the file contents
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def fingerprint(self, file_path: str) -> Dict[str, Any]:
+        """
+        Capture the size, mtime and content hash of a file before it is indexed
+
+        The stat is taken before the contents are read, so a save during hashing or
+        indexing leaves a fingerprint that no longer matches the file and the next
+        scan re-indexes it.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Dictionary with 'size', 'mtime' and 'content_hash'
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        key = self.normalize_path(file_path)
+        stat = os.stat(key)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'content_hash': self.compute_content_hash(key)}
+
+    def get_entry(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the catalog entry for a file
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Dictionary with entry data, or None if the file is not cataloged
+        """
+        key = self.normalize_path(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM indexed_files WHERE file_path = ?", (key,)
+            ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def _row_to_entry(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a database row to an entry dictionary"""
+        return {
+            'file_path': row['file_path'],
+            'size': row['size'],
+            'mtime': row['mtime'],
+            'content_hash': row['content_hash'],
+            'point_ids': json.loads(row['point_ids']),
+            'slide_count': row['slide_count'],
+            'indexed_at': row['indexed_at'],
+            'failed_slides': row['failed_slides']
+        }
+
+    def get_entries_under(self, folder_path: str) -> List[Dict[str, Any]]:
+        """
+        Get all catalog entries located in a folder (recursively)
+
+        Args:
+            folder_path: Folder to look in
+
+        Returns:
+            List of entry dictionaries
+        """
+        normalized_folder = self.normalize_path(folder_path)
+        prefix = normalized_folder.rstrip(os.sep) + os.sep
+        # Plain prefix comparison: LIKE ignores ASCII case and would match sibling folders
+        # whose names differ only in case (/x/Decks vs /x/decks)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM indexed_files WHERE substr(file_path, 1, ?) = ?",
+                (len(prefix), prefix)
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def get_all_point_ids(self) -> List[str]:
+        """Get the vector store point ids of every cataloged file"""
+        with self._lock:
+            rows = self._conn.execute("SELECT point_ids FROM indexed_files").fetchall()
+        return [pid for row in rows for pid in json.loads(row['point_ids'])]
+
+    def diff_scan(self, file_paths: List[str], root: str = None,
+                  file_stats: Dict[str, Tuple[int, float]] = None,
+                  extensions: Iterable[str] = None,
+                  unlisted_paths: Iterable[str] = None) -> Dict[str, List[str]]:
+        """
+        Diff the files found by a scan against the catalog
+
+        Args:
+            file_paths: File paths found by the scan
+            root: Scanned root folder; cataloged files under it that were not
+                  found by the scan are reported as deleted
+            file_stats: Optional (size, mtime) per file path already collected by the
+                        scanner, so files do not need to be stat'ed again
+            extensions: Optional file extensions the scan looked for (e.g. {'.pptx'});
+                        cataloged files of other types are never reported as deleted
+            unlisted_paths: Optional directories/entries the scan could not list (see
+                            FileScanner.get_unlisted_paths); cataloged files at or below
+                            them are never reported as deleted, nor is anything if the
+                            root itself could not be listed
+
+        Returns:
+            Dictionary with 'new', 'modified', 'unchanged' and 'deleted' path lists
+        """
+        diff_start = time.time()
+        result = {'new': [], 'modified': [], 'unchanged': [], 'deleted': []}
+        seen = set()
+
+        for file_path in file_paths:
+            key = self.normalize_path(file_path)
+            seen.add(key)
+            entry = self.get_entry(key)
+
+            if entry is None:
+                result['new'].append(file_path)
+                continue
+
+            if file_stats and file_path in file_stats:
+                size, mtime = file_stats[file_path]
+            else:
+                try:
+                    stat = os.stat(key)
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not stat {key}: {e}")
+                    continue
+                size, mtime = stat.st_size, stat.st_mtime
+
+            # Fast path: size and mtime unchanged, no need to read the file
+            if size == entry['size'] and mtime == entry['mtime']:
+                result['unchanged'].append(file_path)
+                continue
+
+            # Slow path: metadata changed, compare content hashes
+            try:
+                content_hash = self.compute_content_hash(key)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not hash {key}: {e}")
+                result['modified'].append(file_path)
+                continue
+
+            if content_hash == entry['content_hash']:
+                # Touched or copied without content change - refresh metadata only
+                self._update_stat(key, size, mtime)
+                result['unchanged'].append(file_path)
+            else:
+                result['modified'].append(file_path)
+
+        unlisted = [self.normalize_path(path) for path in unlisted_paths or []]
+        if root and self.normalize_path(root) in unlisted:
+            logger.warning(f"⚠️ {root} could not be listed, no cataloged files are treated as deleted")
+        elif root:
+            suffixes = {extension.lower() for extension in extensions} if extensions else None
+            prefixes = tuple(path.rstrip(os.sep) + os.sep for path in unlisted)
+            kept = 0
+            for entry in self.get_entries_under(root):
+                if entry['file_path'] in seen:
+                    continue
+                if suffixes and os.path.splitext(entry['file_path'])[1].lower() not in suffixes:
+                    continue
+                if entry['file_path'] in unlisted or entry['file_path'].startswith(prefixes):
+                    kept += 1  # not listed, not necessarily gone
+                    continue
+                result['deleted'].append(entry['file_path'])
+            if kept:
+                logger.warning(f"⚠️ Kept {kept} cataloged files below {len(unlisted)} paths the scan could not list")
+
+        logger.info(f"📒 Catalog diff completed in {time.time() - diff_start:.2f}s: "
+                    f"{len(result['new'])} new, {len(result['modified'])} modified, "
+                    f"{len(result['unchanged'])} unchanged, {len(result['deleted'])} deleted")
+        return result
+
+    def _update_stat(self, file_path: str, size: int, mtime: float):
+        """Refresh size/mtime of an entry whose content did not change"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE indexed_files SET size = ?, mtime = ? WHERE file_path = ?",
+                (size, mtime, file_path)
+            )
+            self._conn.commit()
+
+    def record_file(self, file_path: str, point_ids: List[str], slide_count: int,
+                    fingerprint: Dict[str, Any] = None, failed_slides: int = 0):
+        """
+        Record a successfully indexed file
+
+        Args:
+            file_path: Path to the indexed file
+            point_ids: Vector store point ids written for the file
+            slide_count: Number of slides indexed from the file
+            fingerprint: Size, mtime and content hash captured before the file was read
+                         for indexing (see fingerprint); taken now if not provided, which
+                         is only safe when the file cannot have changed since
+            failed_slides: Number of slides the embedding API rejected for their content
+        """
+        key = self.normalize_path(file_path)
+        if fingerprint is None:
+            fingerprint = self.fingerprint(key)
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO indexed_files
+                    (file_path, size, mtime, content_hash, point_ids, slide_count, indexed_at, failed_slides)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, fingerprint['size'], fingerprint['mtime'], fingerprint['content_hash'],
+                 json.dumps([str(pid) for pid in point_ids]), slide_count, time.time(), failed_slides)
+            )
+            self._conn.commit()
+        logger.debug(f"📒 Cataloged {key} ({slide_count} slides, {len(point_ids)} points, "
+                     f"{failed_slides} rejected)")
+
+    def remove_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove a file from the catalog
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            The removed entry, or None if the file was not cataloged
+        """
+        entry = self.get_entry(file_path)
+        if entry is None:
+            return None
+        with self._lock:
+            self._conn.execute("DELETE FROM indexed_files WHERE file_path = ?", (entry['file_path'],))
+            self._conn.commit()
+        return entry
+
+    def remove_folder(self, folder_path: str) -> int:
+        """
+        Remove all files in a folder from the catalog
+
+        Args:
+            folder_path: Folder whose entries should be removed
+
+        Returns:
+            Number of entries removed
+        """
+        entries = self.get_entries_under(folder_path)
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM indexed_files WHERE file_path = ?",
+                [(entry['file_path'],) for entry in entries]
+            )
+            self._conn.commit()
+        return len(entries)
+
+    def clear(self):
+        """Remove all entries from the catalog"""
+        with self._lock:
+            self._conn.execute("DELETE FROM indexed_files")
+            self._conn.commit()
+        logger.info("🧹 Cleared slide catalog")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalog statistics"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS files, COALESCE(SUM(slide_count), 0) AS slides, "
+                "COALESCE(SUM(failed_slides), 0) AS failed FROM indexed_files"
+            ).fetchone()
+        return {
+            'cataloged_files': row['files'],
+            'cataloged_slides': row['slides'],
+            'rejected_slides': row['failed'],
+            'catalog_path': self.db_path
+        }
+
+    def close(self):
+        """Close the catalog database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+# Global catalog instance
+_slide_catalog = None
+
+def get_slide_catalog(db_path: str = None) -> SlideCatalog:
+    """Get or create global slide catalog"""
+    global _slide_catalog
+    if _slide_catalog is None:
+        _slide_catalog = SlideCatalog(db_path=db_path)
+    return _slide_catalog
@@ -0,0 +1,272 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+class SlideEmbeddingStore:
+    """
+    Content-addressed store of slide image embeddings
+
+    Vectors are keyed by a hash of the rendered image bytes plus the model name,
+    so the same title/disclaimer/agenda slide reused across hundreds of decks is
+    only sent to the embedding API once.
+
+    Features:
+    - SQLite persistence across app restarts
+    - Batched lookups and inserts
+    - LRU eviction bounded by entry count and total size
+    - Thread-safe operations
+    - Hit/miss statistics
+    """
+
+    def __init__(self,
+                 db_path: str = None,
+                 max_entries: int = 200000,
+                 max_size_mb: int = 1024):
+        """
+        Initialize the slide embedding store
+
+        Args:
+            db_path: Path of the SQLite database file (if None, uses default app data location)
+            max_entries: Maximum number of vectors to keep
+            max_size_mb: Maximum total size of stored vectors in MB
+        """
+        if db_path is None:
+            # Use platform-appropriate app data directory
+            if os.name == 'nt':  # Windows
+                app_data = os.getenv('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+                db_path = os.path.join(app_data, 'SIFFS', 'embedding_store.db')
+            else:  # Mac/Linux
+                app_data = os.path.expanduser('~/.local/share')
+                db_path = os.path.join(app_data, 'SIFFS', 'embedding_store.db')
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._initialize_schema()
+
+        # Store statistics
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'saves': 0,
+            'evictions': 0
+        }
+
+        logger.info(f"✅ Slide embedding store initialized: {db_path}")
+        logger.info(f"   Limits: {max_entries} entries, {max_size_mb}MB")
+
+    def _initialize_schema(self):
+        """Create store table if it doesn't exist"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    content_key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings(last_access)")
+            self._conn.commit()
+
+    @staticmethod
+    def compute_key(image_bytes: bytes, model: str) -> str:
+        """
+        Compute the content address of an image for a model
+
+        Args:
+            image_bytes: Raw rendered image bytes
+            model: Embedding model name
+
+        Returns:
+            Hex digest identifying the (model, image) pair
+        """
+        digest = hashlib.sha256()
+        digest.update(model.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _encode_vector(vector: List[float]) -> bytes:
+        """Pack a vector as float32 bytes"""
+        return array('f', vector).tobytes()
+
+    @staticmethod
+    def _decode_vector(blob: bytes) -> List[float]:
+        """Unpack float32 bytes into a vector"""
+        values = array('f')
+        values.frombytes(blob)
+        return values.tolist()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up vectors for several content keys
+
+        Args:
+            keys: Content keys to look up
+
+        Returns:
+            Dictionary of found keys to vectors (missing keys are omitted)
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return {}
+
+        found = {}
+        now = time.time()
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT content_key, vector FROM embeddings WHERE content_key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for content_key, blob in rows:
+                    found[content_key] = self._decode_vector(blob)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE content_key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.stats['hits'] += len(found)
+            self.stats['misses'] += len(unique_keys) - len(found)
+
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Look up the vector for a single content key"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: List[Tuple[str, List[float]]]):
+        """
+        Store vectors for several content keys
+
+        Args:
+            items: List of (content_key, vector) tuples
+        """
+        if not items:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (content_key, vector, last_access) VALUES (?, ?, ?)",
+                    [(key, self._encode_vector(vector), now) for key, vector in items if vector]
+                )
+                self._conn.commit()
+                self.stats['saves'] += len(items)
+                self._evict()
+        except Exception as e:
+            logger.error(f"❌ Failed to save embeddings to store: {e}")
+
+    def put(self, key: str, vector: List[float]):
+        """Store the vector for a single content key"""
+        self.put_many([(key, vector)])
+
+    def _evict(self):
+        """Evict least recently used vectors when over the entry or size limit (lock must be held)"""
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+        excess = 0
+        if count > self.max_entries:
+            excess = count - self.max_entries
+        if total_bytes > self.max_size_bytes and count > 0:
+            avg_size = total_bytes / count
+            excess = max(excess, int((total_bytes - self.max_size_bytes) / avg_size) + 1)
+
+        if excess <= 0:
+            return
+
+        self._conn.execute(
+            """
+            DELETE FROM embeddings WHERE content_key IN (
+                SELECT content_key FROM embeddings ORDER BY last_access ASC LIMIT ?
+            )
+            """,
+            (excess,)
+        )
+        self._conn.commit()
+        self.stats['evictions'] += excess
+        logger.info(f"🧹 Embedding store eviction: removed {excess} entries")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store performance statistics"""
+        with self._lock:
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+            lookups = self.stats['hits'] + self.stats['misses']
+            hit_rate = (self.stats['hits'] / lookups * 100) if lookups > 0 else 0.0
+
+            return {
+                'entries': count,
+                'size_mb': round(total_bytes / (1024 * 1024), 2),
+                'hit_rate_percent': round(hit_rate, 1),
+                'hits': self.stats['hits'],
+                'misses': self.stats['misses'],
+                'saves': self.stats['saves'],
+                'evictions': self.stats['evictions']
+            }
+
+    def clear(self):
+        """Remove all stored vectors"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+        logger.info("🧹 Cleared slide embedding store")
+
+    def close(self):
+        """Close the store database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+# Global store instance
+_embedding_store = None
+
+def get_slide_embedding_store() -> SlideEmbeddingStore:
+    """Get or create global slide embedding store"""
+    global _embedding_store
+    if _embedding_store is None:
+        _embedding_store = SlideEmbeddingStore()
+    return _embedding_store
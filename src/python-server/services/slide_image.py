@@ -0,0 +1,250 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import mmap
+import base64
+import logging
+from io import BytesIO
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+class SlideImage:
+    """
+    Encoded slide image carried through the ingestion pipeline
+
+    Replaces the 'image_base64' string in slide records. An image is either
+    file-backed (nothing is read until the bytes are needed, then the file is
+    memory-mapped) or holds raw encoded bytes (e.g. after normalization), possibly
+    in a shared memory block written by a preprocessing worker process.
+    Base64 is only produced for the embedding request itself (to_data_uri) -
+    there is no encode → queue → decode round trip and no 33% inflation while
+    slides wait in pipeline queues.
+    """
+
+    __slots__ = ('path', '_data', '_mime_type', '_dimensions', '_size', '_shm', '__weakref__')
+
+    # Leading bytes identifying the encodings the embedding API accepts
+    SIGNATURES = (
+        (b'\x89PNG\r\n\x1a\n', 'image/png'),
+        (b'\xff\xd8\xff', 'image/jpeg'),
+        (b'GIF87a', 'image/gif'),
+        (b'GIF89a', 'image/gif'),
+    )
+
+    def __init__(self, path: str = None, data: bytes = None, mime_type: str = None,
+                 dimensions: Tuple[int, int] = None):
+        """
+        Initialize the image (use from_file or from_bytes)
+
+        Args:
+            path: Image file for a file-backed image
+            data: Encoded image bytes for an in-memory image
+            mime_type: MIME type of the encoding (detected from the header if None)
+            dimensions: (width, height) if already known
+        """
+        if path is None and data is None:
+            raise ValueError("SlideImage needs a path or data")
+        self.path = path
+        self._data = data
+        self._mime_type = mime_type
+        self._dimensions = dimensions
+        self._size = len(data) if data is not None else None
+        self._shm = None
+
+    @classmethod
+    def from_file(cls, path: str, dimensions: Tuple[int, int] = None) -> 'SlideImage':
+        """Create a lazy, file-backed image"""
+        return cls(path=path, dimensions=dimensions)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, mime_type: str = None,
+                   dimensions: Tuple[int, int] = None) -> 'SlideImage':
+        """Create an in-memory image from encoded bytes"""
+        return cls(data=bytes(data), mime_type=mime_type, dimensions=dimensions)
+
+    @classmethod
+    def from_shared_memory(cls, shm, size: int, mime_type: str = None,
+                           dimensions: Tuple[int, int] = None) -> 'SlideImage':
+        """
+        Create an image over encoded bytes in a shared memory block (no copy)
+
+        The image owns the block: release() closes and unlinks it.
+
+        Args:
+            shm: multiprocessing.shared_memory.SharedMemory holding the bytes
+            size: Number of encoded bytes at the start of the block
+            mime_type: MIME type of the encoding (detected from the header if None)
+            dimensions: (width, height) if already known
+        """
+        image = cls(data=shm.buf[:size], mime_type=mime_type, dimensions=dimensions)
+        image._shm = shm
+        return image
+
+    @classmethod
+    def from_base64(cls, image_base64: str) -> 'SlideImage':
+        """Create an in-memory image from a legacy base64 string"""
+        return cls.from_bytes(base64.b64decode(image_base64, validate=True))
+
+    @property
+    def in_memory(self) -> bool:
+        """True if the encoded bytes are held in memory"""
+        return self._data is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded image in bytes"""
+        if self._size is None:
+            self._size = os.path.getsize(self.path)
+        return self._size
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes this handle keeps in memory (0 for file-backed images)"""
+        if self._shm is not None:
+            return self._shm.size
+        return self._size if self._data is not None else 0
+
+    @property
+    def upload_bytes(self) -> int:
+        """Size of the base64 payload sent to the embedding API"""
+        return (self.nbytes + 2) // 3 * 4
+
+    @contextmanager
+    def buffer(self) -> Iterator[memoryview]:
+        """
+        Zero-copy view of the encoded bytes
+
+        File-backed images are memory-mapped for the duration of the context.
+
+        Yields:
+            memoryview over the encoded image
+        """
+        if self._data is not None:
+            yield memoryview(self._data)
+            return
+
+        with open(self.path, 'rb') as image_file:
+            if os.fstat(image_file.fileno()).st_size == 0:
+                yield memoryview(b'')
+                return
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    def read(self) -> bytes:
+        """Read the encoded bytes (a copy for file-backed and shared memory images)"""
+        if self._data is not None:
+            return bytes(self._data)
+        with open(self.path, 'rb') as image_file:
+            return image_file.read()
+
+    @property
+    def mime_type(self) -> str:
+        """MIME type of the encoding, detected from the header"""
+        if self._mime_type is None:
+            with self.buffer() as view:
+                head = bytes(view[:16])
+            self._mime_type = self.detect_mime_type(head)
+        return self._mime_type
+
+    @classmethod
+    def detect_mime_type(cls, head: bytes) -> str:
+        """Detect the MIME type from the first bytes of an encoded image"""
+        for signature, mime_type in cls.SIGNATURES:
+            if head.startswith(signature):
+                return mime_type
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'image/webp'
+        return 'application/octet-stream'
+
+    @property
+    def dimensions(self) -> Optional[Tuple[int, int]]:
+        """(width, height) read from the image header (pixels are not decoded)"""
+        if self._dimensions is None:
+            try:
+                with self.open() as image:
+                    self._dimensions = image.size
+            except Exception as e:
+                logger.debug(f"Could not read image dimensions: {e}")
+                return None
+        return self._dimensions
+
+    def open(self) -> Image.Image:
+        """Open the image with PIL (lazy: only the header is parsed until pixels are accessed)"""
+        if self._data is not None:
+            return Image.open(BytesIO(self._data))
+        return Image.open(self.path)
+
+    def to_data_uri(self) -> str:
+        """Encode the image as a base64 data URI for the embedding request"""
+        with self.buffer() as view:
+            encoded = base64.b64encode(view).decode('ascii')
+        return f"data:{self.mime_type};base64,{encoded}"
+
+    def to_base64(self) -> str:
+        """Encode the image as plain base64"""
+        with self.buffer() as view:
+            return base64.b64encode(view).decode('ascii')
+
+    def release(self):
+        """Free the shared memory block backing the image (no-op for other images)"""
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        self._data.release()
+        self._data = None
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self) -> str:
+        source = self.path if self._data is None else f"{self._size} bytes"
+        return f"SlideImage({source})"
+
+
+def get_slide_image(slide_data: Dict) -> Optional[SlideImage]:
+    """
+    Get the image of a slide record
+
+    Records carry a SlideImage under 'image'; records still using the legacy
+    'image_base64' string are converted once.
+
+    Args:
+        slide_data: Slide data dictionary
+
+    Returns:
+        SlideImage, or None if the slide has no image
+    """
+    image = slide_data.get('image')
+    if image is not None:
+        return image
+    image_base64 = slide_data.get('image_base64')
+    if image_base64:
+        try:
+            return SlideImage.from_base64(image_base64)
+        except Exception as e:
+            logger.error(f"❌ Invalid base64 image data for {slide_data.get('file_name', '')}: {e}")
+    return None
@@ -16,32 +16,83 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import os
+import time
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
 import asyncio
-import glob
 
 from services.powerpoint_converter import get_powerpoint_converter, cleanup_powerpoint_converter
+from services.powerpoint_converter import get_thread_powerpoint_converter, release_thread_powerpoint_converter
 from services.image_processing_service import get_image_processing_service
 from services.voyage_embeddings import get_voyage_embeddings_service
-from services.qdrant_db import get_qdrant_service
-from services.parallel_image_processor import ParallelImageProcessor
+from services.qdrant_db import get_qdrant_service, DEFAULT_COLLECTION_NAME
 from services.query_embedding_cache import get_query_embedding_cache
+from services.slide_catalog import get_slide_catalog
+from services.file_scanner import FileScanner
+from services.ingestion_journal import get_ingestion_journal
+from services.ingestion_estimator import get_ingestion_estimator, count_pptx_slides
+from services.ingestion_pipeline import IngestionPipeline, PipelineStage
+from services.slide_batch_packer import SlideBatchPacker
+from services.embedding_batch_builder import EmbeddingBatchBuilder
+from services.image_normalizer import ImageNormalizer, get_image_normalizer
+from services.image_preprocess_pool import ImagePreprocessPool
+from services.slide_image import SlideImage
+from services.vector_writer import CoalescingVectorWriter
 
 logger = logging.getLogger(__name__)
 
 class SlideProcessingService:
-    """Main service for processing PowerPoint files and managing slide embeddings"""
+    """Main service for processing PowerPoint files and slide images and managing slide embeddings"""
     
-    def __init__(self, embedding_batch_size: int = None):
+    # Default worker threads per ingestion pipeline stage
+    # - convert: PowerPoint COM export is effectively serialized by the single PowerPoint instance
+    # - preprocess: threads handing standalone images to the preprocessing processes
+    #   (None: one per process)
+    # - normalize: CPU-bound downscale/re-encode (Pillow releases the GIL while resizing/encoding)
+    # - embed: network-bound VoyageAI calls on packed cross-deck batches
+    # - store: hands finished files to the coalescing vector writer
+    DEFAULT_STAGE_CONCURRENCY = {'convert': 1, 'preprocess': None, 'normalize': 2, 'embed': 2, 'store': 1}
+    
+    # Ingestion source types and the file extensions they are scanned for
+    SOURCE_EXTENSIONS = {
+        'pptx': {'.pptx'},
+        'images': {'.jpg', '.jpeg', '.png', '.webp'}
+    }
+    
+    # Source types processed when a request does not choose any
+    DEFAULT_SOURCES = ('pptx',)
+    
+    # Seconds a converted slide may wait for a packed embedding batch to fill up
+    PACK_MAX_WAIT_SECONDS = 2.0
+    
+    # Byte budgets of the queues feeding the image-carrying stages; producers block once
+    # the slide images queued for a stage would exceed its budget
+    QUEUE_BUDGETS_MB = {'normalize': 256, 'pack': 128, 'embed': 64}
+    
+    # Folder scanner defaults (see FileScanner)
+    DEFAULT_SCAN_OPTIONS = {
+        'exclude_patterns': [],
+        'max_depth': None,
+        'skip_hidden': True,
+        'skip_lock_files': True,
+        'max_workers': 4
+    }
+    
+    def __init__(self, embedding_batch_size: int = None, preprocess_workers: int = None):
         self.ppt_converter = None
         self.image_processor = None
         self.embeddings_service = None
         self.vector_db = None
-        self.parallel_processor = None
         self.embedding_batch_size = embedding_batch_size
+        # Image preprocessing processes (None: CPU count - 1, 0: preprocess in the pipeline threads)
+        self.preprocess_workers = ImagePreprocessPool.default_workers() if preprocess_workers is None else preprocess_workers
         self.query_cache = None
+        self.catalog = None
+        self.journal = None
+        self.estimator = None
+        self.image_normalizer = None
         self._initialize_services()
     
     def _initialize_services(self):
@@ -67,22 +118,41 @@ class SlideProcessingService:
                 logger.info("✅ VoyageAI embeddings service initialized with default batch size")
             
             logger.info("🔧 Initializing Qdrant vector database...")
-            self.vector_db = get_qdrant_service()
-            logger.info("✅ Qdrant vector database initialized")
-            
-            logger.info("🔧 Initializing parallel image processor...")
-            batch_size = self.embeddings_service.batch_size
-            self.parallel_processor = ParallelImageProcessor(
-                embeddings_service=self.embeddings_service,
-                vector_db=self.vector_db,
-                batch_size=batch_size
+            # The collection is chosen by the provider, model and dimension of the vectors
+            provider_info = self.embeddings_service.provider.describe()
+            self.vector_db = get_qdrant_service(
+                embedding_provider=provider_info['provider'],
+                model=provider_info['model'],
+                vector_size=provider_info['dimension']
             )
-            logger.info(f"✅ Parallel image processor initialized (batch size: {batch_size})")
+            logger.info(f"✅ Qdrant vector database initialized (collection: {self.vector_db.collection_name})")
+            
+            # Keep the catalog and journal next to the Qdrant vector_db directory
+            data_dir = os.path.dirname(os.path.abspath(self.vector_db.db_path))
+            
+            logger.info("🔧 Initializing ingestion journal...")
+            self.journal = get_ingestion_journal(db_path=self._collection_db_path(data_dir, 'ingestion_journal'))
+            logger.info("✅ Ingestion journal initialized")
+            
+            logger.info("🔧 Initializing ingestion estimator...")
+            self.estimator = get_ingestion_estimator(db_path=os.path.join(data_dir, 'ingestion_history.db'))
+            logger.info("✅ Ingestion estimator initialized")
+            
+            logger.info("🔧 Initializing image normalizer...")
+            self.image_normalizer = get_image_normalizer()
+            logger.info("✅ Image normalizer initialized")
             
             logger.info("🔧 Initializing query embedding cache...")
             self.query_cache = get_query_embedding_cache()
             logger.info("✅ Query embedding cache initialized")
             
+            logger.info("🔧 Initializing slide catalog...")
+            self.catalog = get_slide_catalog(db_path=self._collection_db_path(data_dir, 'slide_catalog'))
+            logger.info("✅ Slide catalog initialized")
+            
+            # One-time cleanup of duplicates written while point ids were random
+            self.vector_db.ensure_slide_points_deduplicated(keep_ids=self.catalog.get_all_point_ids())
+            
             logger.info("🎉 All slide processing services initialized successfully")
         except Exception as e:
             logger.error(f"❌ Failed to initialize slide processing services: {e}")
@@ -90,51 +160,108 @@ class SlideProcessingService:
             logger.error(f"❌ Error details: {str(e)}")
             raise
     
-    def scan_folder_for_files(self, folder_path: str) -> Dict[str, List[str]]:
+    def _collection_db_path(self, data_dir: str, name: str) -> str:
+        """
+        Path of a database that tracks the contents of the active collection
+        
+        The catalog and journal describe what one collection holds, so every non-default
+        collection gets its own (switching providers re-indexes into the new collection).
+        """
+        if self.vector_db.collection_name == DEFAULT_COLLECTION_NAME:
+            return os.path.join(data_dir, f"{name}.db")
+        return os.path.join(data_dir, f"{name}.{self.vector_db.collection_name}.db")
+    
+    def scan_folder_for_files(self, folder_path: str, scan_options: Dict[str, Any] = None,
+                              sources: List[str] = None) -> Dict[str, Any]:
         """
-        Scan folder and subdirectories for PowerPoint files only
+        Scan folder and subdirectories for the files of the enabled source types
         
-        Note: Image file processing has been disabled - only .pptx files are processed
+        Office owner files (~$deck.pptx) and hidden/system directories are skipped.
         
         Args:
             folder_path: Path to the folder to scan
+            scan_options: Optional FileScanner options overriding DEFAULT_SCAN_OPTIONS,
+                          e.g. {'exclude_patterns': ['Archive'], 'max_depth': 3}
+            sources: Source types to scan for ('pptx', 'images'); defaults to DEFAULT_SOURCES
             
         Returns:
-            Dictionary with 'pptx' and 'images' keys (images will always be empty)
+            Dictionary with 'pptx' and 'images' path lists (empty for sources that are not
+            enabled), 'file_stats' mapping each file to the (size, mtime) collected during the scan
+            and 'unlisted' with the paths the scan could not list (see FileScanner.get_unlisted_paths)
         """
+        found = {source: [] for source in self.SOURCE_EXTENSIONS}
         try:
-            logger.info(f"📁 Scanning folder for PowerPoint files only: {folder_path}")
-            logger.info("📁 Image file processing is disabled - only .pptx files will be processed")
+            sources = self._resolve_sources(sources)
+            logger.info(f"📁 Scanning folder for {self._describe_sources(sources)}: {folder_path}")
             
-            # Scan for PowerPoint files only
-            pptx_files = []
-            search_pattern = os.path.join(folder_path, "**", "*.pptx")
-            pptx_files = glob.glob(search_pattern, recursive=True)
+            options = dict(self.DEFAULT_SCAN_OPTIONS)
+            options.update(scan_options or {})
+            extensions = set().union(*(self.SOURCE_EXTENSIONS[source] for source in sources))
+            scanner = FileScanner(extensions=extensions, **options)
             
-            # Image processing is disabled - return empty list
-            image_files = []
+            file_stats = {}
+            for scanned in scanner.scan(folder_path):
+                found[self._source_of(scanned.path)].append(scanned.path)
+                file_stats[scanned.path] = (scanned.size, scanned.mtime)
             
-            total_files = len(pptx_files)
-            logger.info(f"📁 Found {len(pptx_files)} PowerPoint files ({total_files} total) in {folder_path}")
+            total_files = len(file_stats)
+            logger.info(f"📁 Found {len(found['pptx'])} PowerPoint files and {len(found['images'])} images "
+                        f"({total_files} total) in {folder_path}")
             
-            if pptx_files:
-                logger.info("📁 PowerPoint files found:")
-                for i, file in enumerate(pptx_files[:5], 1):  # Show first 5
-                    logger.info(f"   {i}. {file}")
-                if len(pptx_files) > 5:
-                    logger.info(f"   ... and {len(pptx_files) - 5} more PowerPoint files")
+            for source in sources:
+                if found[source]:
+                    logger.info(f"📁 {source} files found:")
+                    for i, file in enumerate(found[source][:5], 1):  # Show first 5
+                        logger.info(f"   {i}. {file}")
+                    if len(found[source]) > 5:
+                        logger.info(f"   ... and {len(found[source]) - 5} more {source} files")
             
-            if not pptx_files:
-                logger.warning(f"📁 No PowerPoint files found in {folder_path}")
+            if not total_files:
+                logger.warning(f"📁 No {self._describe_sources(sources)} found in {folder_path}")
             
-            return {
-                'pptx': pptx_files,
-                'images': image_files  # Always empty now
-            }
+            return dict(found, file_stats=file_stats, unlisted=scanner.get_unlisted_paths())
             
         except Exception as e:
             logger.error(f"❌ Error scanning folder {folder_path}: {e}")
-            return {'pptx': [], 'images': []}
+            # Nothing below the folder is known to be gone
+            return dict(found, file_stats={}, unlisted=[folder_path])
+    
+    @classmethod
+    def _resolve_sources(cls, sources: List[str] = None) -> tuple:
+        """
+        Validate requested source types
+        
+        Args:
+            sources: Requested source types, or None for DEFAULT_SOURCES
+            
+        Returns:
+            Tuple of source types in canonical order
+            
+        Raises:
+            ValueError: If a source type is unknown or none is enabled
+        """
+        if not sources:
+            return cls.DEFAULT_SOURCES
+        unknown = set(sources) - set(cls.SOURCE_EXTENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown source types: {', '.join(sorted(unknown))} "
+                             f"(supported: {', '.join(cls.SOURCE_EXTENSIONS)})")
+        return tuple(source for source in cls.SOURCE_EXTENSIONS if source in sources)
+    
+    @classmethod
+    def _source_of(cls, file_path: str) -> str:
+        """Source type of a scanned file, from its extension"""
+        extension = os.path.splitext(file_path)[1].lower()
+        return 'pptx' if extension in cls.SOURCE_EXTENSIONS['pptx'] else 'images'
+    
+    @staticmethod
+    def _describe_sources(sources: tuple) -> str:
+        """Human-readable name of the files of a set of source types (for messages)"""
+        if sources == ('pptx',):
+            return 'PowerPoint files'
+        if sources == ('images',):
+            return 'image files'
+        return 'files'
     
     def scan_folder_for_pptx(self, folder_path: str) -> List[str]:
         """
@@ -149,72 +276,120 @@ class SlideProcessingService:
         result = self.scan_folder_for_files(folder_path)
         return result['pptx']
     
-    def process_folder(self, folder_path: str, progress_callback=None) -> Dict[str, Any]:
+    def process_folder(self, folder_path: str, progress_callback=None,
+                       stage_concurrency: Dict[str, int] = None,
+                       cancel_event: threading.Event = None,
+                       scan_options: Dict[str, Any] = None,
+                       sources: List[str] = None,
+                       yield_fn: Callable[[], None] = None,
+                       dry_run: bool = False) -> Dict[str, Any]:
         """
-        Process only PowerPoint files in a folder
+        Incrementally process PowerPoint files and slide images in a folder
+        
+        The scan is diffed against the slide catalog: only new or modified files are
+        converted and embedded, and vectors of files that disappeared from disk are deleted.
+        Decks and standalone images flow through one pipeline (see _run_ingestion_pipeline),
+        so deck N+1 converts while deck N embeds and deck N-1 is written to the vector database.
+        
+        Progress is written to the ingestion journal; if a previous run over the same
+        folder was interrupted, its embedded files are stored without re-embedding.
+        Recently modified files are processed first.
         
-        Note: Image file processing has been disabled - only .pptx files are processed
+        A dry run stops after the catalog diff: nothing is converted, embedded, deleted or
+        journaled, and the result carries an estimate of the run instead (see _estimate_run).
         
         Args:
-            folder_path: Path to the folder containing PowerPoint files
+            folder_path: Path to the folder containing PowerPoint files and/or images
             progress_callback: Optional callback function for progress updates
+            stage_concurrency: Optional worker threads per stage, e.g. {'convert': 1, 'embed': 3, 'store': 1}
+            cancel_event: Optional event; once set, no further files are started and the
+                          run returns what has been committed so far
+            scan_options: Optional scanner options, e.g. {'exclude_patterns': ['Archive'], 'max_depth': 3}
+            sources: Source types to ingest - 'pptx' (PowerPoint decks) and/or 'images'
+                     (standalone .jpg/.jpeg/.png/.webp slides); defaults to DEFAULT_SOURCES
+            yield_fn: Optional function called before each file enters the pipeline; it
+                      blocks while higher-priority work should run (see IngestionJobManager)
+            dry_run: Only scan and estimate requests, upload bytes and duration of the run
             
         Returns:
-            Dictionary with processing results
+            Dictionary with processing results (or the estimate of a dry run)
         """
         try:
-            logger.info(f"Starting folder processing (PowerPoint files only): {folder_path}")
+            sources = self._resolve_sources(sources)
+            files_label = self._describe_sources(sources)
+            logger.info(f"Starting folder processing ({', '.join(sources)}): {folder_path}")
+            
+            scan_result = self.scan_folder_for_files(folder_path, scan_options, sources)
+            scanned_files = scan_result['pptx'] + scan_result['images']
+            if os.path.abspath(folder_path) in map(os.path.abspath, scan_result['unlisted']):
+                raise OSError(f"Could not list folder {folder_path}")
+            
+            # Diff scan against the catalog to find what actually needs work; files of
+            # disabled source types are neither processed nor treated as deleted, and
+            # neither are files below directories the scan could not list
+            extensions = set().union(*(self.SOURCE_EXTENSIONS[source] for source in sources))
+            changes = self.catalog.diff_scan(scanned_files, root=folder_path,
+                                             file_stats=scan_result['file_stats'], extensions=extensions,
+                                             unlisted_paths=scan_result['unlisted'])
+            
+            if dry_run:
+                return self._estimate_run(changes, scan_result['file_stats'], sources, stage_concurrency)
             
-            # Scan for PowerPoint files only (images are excluded)
-            scan_result = self.scan_folder_for_files(folder_path)
-            pptx_files = scan_result['pptx']
-            image_files = scan_result['images']  # Will always be empty
+            # Remove vectors of files that vanished from disk
+            files_deleted = 0
+            for deleted_file in changes['deleted']:
+                if self._remove_indexed_file(deleted_file):
+                    files_deleted += 1
             
-            total_files = len(pptx_files)
-            if total_files == 0:
+            files_to_process = changes['new'] + changes['modified']
+            files_unchanged = len(changes['unchanged'])
+            
+            # Finish files an interrupted run already embedded or committed
+            run_key = self.journal.begin_run(folder_path, '+'.join(sources))
+            resumed_items, files_to_process = self._resume_journaled_files(run_key, files_to_process)
+            
+            total_files = len(files_to_process)
+            if total_files == 0 and not resumed_items:
+                self.journal.finish_run(run_key)
+                if progress_callback:
+                    progress_callback({
+                        'status': 'completed',
+                        'files_processed': 0,
+                        'slides_processed': 0
+                    })
+                if not scanned_files:
+                    message = f"No {files_label} found in the specified folder"
+                else:
+                    message = f"All {files_unchanged} {files_label} are up to date"
                 return {
                     'success': True,
-                    'message': 'No PowerPoint files found in the specified folder',
+                    'message': message,
+                    'sources': list(sources),
                     'files_processed': 0,
-                    'slides_processed': 0
+                    'slides_processed': 0,
+                    'files_unchanged': files_unchanged,
+                    'files_deleted': files_deleted
                 }
             
-            logger.info(f"📁 Processing {total_files} PowerPoint files (image processing disabled)")
+            logger.info(f"📁 Processing {total_files} new/modified {files_label} "
+                        f"({files_unchanged} unchanged, {files_deleted} removed)")
             
-            total_slides_processed = 0
-            files_processed = 0
-            failed_files = []
+            # Decks and images share the convert → normalize → pack → embed → store pipeline;
+            # the files someone worked on last become searchable first
+            file_stats = scan_result['file_stats']
+            files_to_process.sort(key=lambda f: file_stats[f][1] if f in file_stats else 0, reverse=True)
+            run_result = self._run_ingestion_pipeline(self._build_work_items(files_to_process), progress_callback,
+                                                      stage_concurrency, cancel_event, run_key, yield_fn)
             
-            # Process PowerPoint files only
-            for i, pptx_file in enumerate(pptx_files):
-                try:
-                    if progress_callback:
-                        progress_callback({
-                            'status': 'processing_file',
-                            'file': os.path.basename(pptx_file),
-                            'progress': (i + 1) / total_files * 100
-                        })
-                    
-                    logger.info(f"Processing PowerPoint file {i+1}/{len(pptx_files)}: {pptx_file}")
-                    
-                    # Process single PowerPoint file
-                    result = self.process_single_file(pptx_file)
-                    
-                    if result['success']:
-                        total_slides_processed += result['slides_processed']
-                        files_processed += 1
-                        logger.info(f"Successfully processed {result['slides_processed']} slides from {pptx_file}")
-                    else:
-                        failed_files.append(pptx_file)
-                        logger.error(f"Failed to process {pptx_file}: {result.get('error', 'Unknown error')}")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing PowerPoint file {pptx_file}: {e}")
-                    failed_files.append(pptx_file)
-                    continue
+            completed_items = resumed_items + run_result['completed_items']
+            total_slides_processed = sum(item['slides_processed'] for item in completed_items)
+            files_processed = len(completed_items)
+            failed_files = [failure['file_path'] for failure in run_result['failed_items']]
+            cancelled = run_result['stats']['cancelled']
             
-            # Image processing is disabled - skip image files entirely
-            logger.info("📁 Image file processing is disabled - skipping any image files")
+            # Keep the journal of an incomplete run so the next run can resume it
+            if not cancelled and not failed_files:
+                self.journal.finish_run(run_key)
             
             if progress_callback:
                 progress_callback({
@@ -225,10 +400,24 @@ class SlideProcessingService:
             
             return {
                 'success': True,
+                'sources': list(sources),
                 'files_processed': files_processed,
                 'slides_processed': total_slides_processed,
+                'files_unchanged': files_unchanged,
+                'files_deleted': files_deleted,
+                'files_resumed': len(resumed_items),
                 'failed_files': failed_files,
-                'message': f"Processed {files_processed} PowerPoint files with {total_slides_processed} slides"
+                'failed_slides': run_result['failed_slides'],
+                'stage_timings': run_result['stats']['stage_timings'],
+                'packing': run_result['stats']['packing'],
+                'normalization': run_result['stats']['normalization'],
+                'preprocessing': run_result['stats']['preprocessing'],
+                'storage': run_result['stats']['storage'],
+                'queues': run_result['stats']['queues'],
+                'cancelled': cancelled,
+                'message': f"{'Cancelled after processing' if cancelled else 'Processed'} "
+                           f"{files_processed} {files_label} with {total_slides_processed} slides "
+                           f"({files_unchanged} unchanged, {files_deleted} removed, {len(resumed_items)} resumed)"
             }
             
         except Exception as e:
@@ -240,58 +429,749 @@ class SlideProcessingService:
                 'slides_processed': 0
             }
     
-    def _process_images_parallel(self, image_files: List[str], pptx_files: List[str], progress_callback=None) -> Dict[str, Any]:
+    def process_files(self, file_paths: List[str], progress_callback=None,
+                      stage_concurrency: Dict[str, int] = None,
+                      cancel_event: threading.Event = None,
+                      yield_fn: Callable[[], None] = None,
+                      deleted_paths: List[str] = None) -> Dict[str, Any]:
         """
-        Legacy method - no longer used since image processing has been disabled
+        Index individual files (e.g. a deck that was just saved) without scanning their folder
+        
+        Files unchanged since they were cataloged are skipped; decks and images are
+        recognized by their extension and go through the same pipeline as folder runs.
         
-        Note: This method is kept for compatibility but will not be called since
-        image_files will always be empty now.
+        Args:
+            file_paths: PowerPoint files and/or images to index
+            progress_callback: Optional callback function for progress updates
+            stage_concurrency: Optional worker threads per stage
+            cancel_event: Optional event that cancels the run when set
+            yield_fn: Optional function called before each file enters the pipeline
+            deleted_paths: Optional files that were removed; their vectors are deleted
+            
+        Returns:
+            Dictionary with processing results
+        """
+        try:
+            files_deleted = 0
+            for deleted_file in deleted_paths or []:
+                if self._remove_indexed_file(deleted_file):
+                    files_deleted += 1
+            
+            supported = set().union(*self.SOURCE_EXTENSIONS.values())
+            file_stats = {}
+            failed_files = []
+            for file_path in file_paths:
+                try:
+                    stat = os.stat(file_path)
+                except OSError as e:
+                    logger.error(f"❌ Cannot index {file_path}: {e}")
+                    failed_files.append(file_path)
+                    continue
+                if os.path.splitext(file_path)[1].lower() not in supported:
+                    logger.error(f"❌ Cannot index {file_path}: unsupported file type")
+                    failed_files.append(file_path)
+                    continue
+                file_stats[file_path] = (stat.st_size, stat.st_mtime)
+            
+            changes = self.catalog.diff_scan(list(file_stats), file_stats=file_stats)
+            files_to_process = changes['new'] + changes['modified']
+            files_unchanged = len(changes['unchanged'])
+            
+            completed_items = []
+            run_result = None
+            if files_to_process:
+                logger.info(f"📄 Processing {len(files_to_process)} files ({files_unchanged} unchanged)")
+                run_result = self._run_ingestion_pipeline(self._build_work_items(files_to_process), progress_callback,
+                                                          stage_concurrency, cancel_event, yield_fn=yield_fn)
+                completed_items = run_result['completed_items']
+                failed_files += [failure['file_path'] for failure in run_result['failed_items']]
+            
+            total_slides_processed = sum(item['slides_processed'] for item in completed_items)
+            if progress_callback:
+                progress_callback({
+                    'status': 'completed',
+                    'files_processed': len(completed_items),
+                    'slides_processed': total_slides_processed
+                })
+            
+            result = {
+                'success': not failed_files or bool(completed_items),
+                'files_processed': len(completed_items),
+                'slides_processed': total_slides_processed,
+                'files_unchanged': files_unchanged,
+                'files_deleted': files_deleted,
+                'failed_files': failed_files,
+                'cancelled': bool(run_result and run_result['stats']['cancelled']),
+                'message': f"Processed {len(completed_items)} files with {total_slides_processed} slides "
+                           f"({files_unchanged} unchanged, {files_deleted} removed, {len(failed_files)} failed)"
+            }
+            if not result['success']:
+                result['error'] = f"Could not index {', '.join(os.path.basename(f) for f in failed_files)}"
+            if run_result:
+                result['failed_slides'] = run_result['failed_slides']
+                result['stage_timings'] = run_result['stats']['stage_timings']
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error processing files {file_paths}: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'files_processed': 0,
+                'slides_processed': 0
+            }
+    
+    def _estimate_run(self, changes: Dict[str, List[str]], file_stats: Dict[str, tuple],
+                      sources: tuple, stage_concurrency: Dict[str, int] = None) -> Dict[str, Any]:
         """
-        logger.warning("⚠️ _process_images_parallel called but image processing is disabled")
+        Estimate the cost of processing the new and modified files of a catalog diff
         
-        # Process only PowerPoint files (images are disabled)
-        total_slides_processed = 0
-        files_processed = 0
-        failed_files = []
+        Deck slides are counted from the .pptx zip directory (nothing is rendered) and
+        image sizes come from the scan; the estimator turns them into embedding requests,
+        upload bytes and duration using the throughput recorded by previous runs.
         
-        # Process PowerPoint files normally
-        for i, pptx_file in enumerate(pptx_files):
+        Args:
+            changes: Catalog diff of the scan
+            file_stats: (size, mtime) per scanned file
+            sources: Source types of the run
+            stage_concurrency: Optional worker threads per stage the run would use
+            
+        Returns:
+            Dry-run result dictionary with file and slide counts and the 'estimate'
+        """
+        concurrency = dict(self.DEFAULT_STAGE_CONCURRENCY)
+        concurrency.update(stage_concurrency or {})
+        
+        pptx_files = 0
+        pptx_slides = 0
+        image_files = 0
+        image_bytes = 0
+        unreadable_files = []
+        for file_path in changes['new'] + changes['modified']:
             try:
-                if progress_callback:
-                    progress_callback({
-                        'status': 'processing_powerpoint',
-                        'file': os.path.basename(pptx_file),
-                        'progress': ((i + 1) / len(pptx_files)) * 100
-                    })
-                
-                logger.info(f"📄 Processing PowerPoint file {i+1}/{len(pptx_files)}: {pptx_file}")
-                result = self.process_single_file(pptx_file)
-                
-                if result['success']:
-                    total_slides_processed += result['slides_processed']
-                    files_processed += 1
+                if self._source_of(file_path) == 'images':
+                    image_bytes += file_stats[file_path][0] if file_path in file_stats else os.path.getsize(file_path)
+                    image_files += 1
                 else:
-                    failed_files.append(pptx_file)
-                    
+                    pptx_slides += count_pptx_slides(file_path)
+                    pptx_files += 1
             except Exception as e:
-                logger.error(f"❌ Error processing PowerPoint file {pptx_file}: {e}")
-                failed_files.append(pptx_file)
+                logger.warning(f"⚠️ Could not inspect {file_path}: {e}")
+                unreadable_files.append(file_path)
         
-        if progress_callback:
-            progress_callback({
-                'status': 'completed',
-                'files_processed': files_processed,
-                'slides_processed': total_slides_processed
-            })
+        batch_builder = getattr(self.embeddings_service, 'batch_builder', None)
+        rate_limiter = getattr(self.embeddings_service, 'rate_limiter', None)
+        estimate = self.estimator.estimate(
+            pptx_slides=pptx_slides,
+            image_files=image_files,
+            image_bytes=image_bytes,
+            batch_size=self.embeddings_service.batch_size,
+            stage_workers={
+                'convert_pptx': concurrency['convert'],
+                # Same image worker count as _run_ingestion_pipeline
+                'convert_images': concurrency['preprocess'] or self.preprocess_workers or concurrency['normalize'],
+                'normalize': concurrency['normalize'],
+                'embed': concurrency['embed'],
+                'store': 1
+            },
+            max_batch_bytes=batch_builder.max_bytes if batch_builder else None,
+            requests_per_minute=rate_limiter.requests_per_minute if rate_limiter else None
+        )
+        
+        files_label = self._describe_sources(sources)
+        logger.info(f"🔮 Dry run: {pptx_files + image_files} {files_label} with {estimate['slides']} slides → "
+                    f"{estimate['requests']} requests, {estimate['upload_bytes'] / (1024 * 1024):.1f}MB upload, "
+                    f"~{estimate['duration_seconds']:.0f}s (bottleneck: {estimate['bottleneck']})")
         
         return {
             'success': True,
-            'files_processed': files_processed,
-            'slides_processed': total_slides_processed,
-            'failed_files': failed_files,
-            'message': f"Processed {files_processed} PowerPoint files with {total_slides_processed} slides (image processing disabled)"
+            'dry_run': True,
+            'sources': list(sources),
+            'files_new': len(changes['new']),
+            'files_modified': len(changes['modified']),
+            'files_unchanged': len(changes['unchanged']),
+            'files_to_delete': len(changes['deleted']),
+            'pptx_files': pptx_files,
+            'pptx_slides': pptx_slides,
+            'image_files': image_files,
+            'image_bytes': image_bytes,
+            'unreadable_files': unreadable_files,
+            'estimate': estimate,
+            'message': f"Would process {pptx_files + image_files} {files_label} with {estimate['slides']} slides "
+                       f"in about {self._format_duration(estimate['duration_seconds'])} "
+                       f"({estimate['requests']} embedding requests, "
+                       f"{estimate['upload_bytes'] / (1024 * 1024):.1f}MB upload)"
+        }
+    
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        """Human-readable duration for messages, e.g. '2h 5m' or '40s'"""
+        seconds = int(round(seconds))
+        if seconds >= 3600:
+            return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+        if seconds >= 60:
+            return f"{seconds // 60}m {seconds % 60}s"
+        return f"{seconds}s"
+    
+    def _build_work_items(self, file_paths: List[str]) -> List[Dict]:
+        """Turn file paths into pipeline work items, keeping their order within each source"""
+        decks = [{'file_path': f, 'source': 'pptx'} for f in file_paths if self._source_of(f) == 'pptx']
+        images = [{'file_path': f, 'source': 'images'} for f in file_paths if self._source_of(f) == 'images']
+        return self._interleave_sources(decks, images)
+    
+    @staticmethod
+    def _interleave_sources(decks: List[Dict], images: List[Dict]) -> List[Dict]:
+        """
+        Spread decks evenly among images
+        
+        Deck conversion holds the single PowerPoint slot while images are preprocessed
+        in parallel; decks fed back to back would park the shared first-stage workers
+        on that slot and leave the image preprocessing processes idle.
+        
+        Args:
+            decks: Deck work items
+            images: Image work items
+            
+        Returns:
+            Combined work items in feeding order
+        """
+        if not decks or not images:
+            return decks + images
+        ordered = []
+        images_per_deck = len(images) / len(decks)
+        image_index = 0
+        for deck_index, deck in enumerate(decks):
+            ordered.append(deck)
+            next_index = round((deck_index + 1) * images_per_deck)
+            ordered.extend(images[image_index:next_index])
+            image_index = next_index
+        ordered.extend(images[image_index:])
+        return ordered
+    
+    def _resume_journaled_files(self, run_key: str, files_to_process: List[str]):
+        """
+        Complete files that an interrupted run already embedded or committed
+        
+        Embedded files are stored straight from the journal (same point ids, no new
+        embedding calls); committed files only need their catalog entry.
+        
+        Args:
+            run_key: Journal run key
+            files_to_process: New or modified files found by the scan
+            
+        Returns:
+            Tuple of (completed items, files that still need the full pipeline)
+        """
+        resumable = self.journal.get_resumable(run_key, files_to_process)
+        resumed_items = []
+        remaining = []
+        
+        for file_path in files_to_process:
+            if file_path not in resumable['committed'] and not resumable['embedded'].get(file_path):
+                remaining.append(file_path)
+                continue
+            
+            fingerprint = self._journaled_fingerprint(file_path, resumable['file_stats'][file_path])
+            if fingerprint is None:
+                logger.info(f"🔄 {file_path} changed since it was journaled, re-processing")
+                remaining.append(file_path)
+            elif file_path in resumable['committed']:
+                point_ids = resumable['committed'][file_path]
+                self._commit_indexed_file(os.path.abspath(file_path), point_ids, len(point_ids), fingerprint)
+                resumed_items.append({
+                    'file_path': os.path.abspath(file_path),
+                    'slides_processed': len(point_ids),
+                    'embeddings_created': 0
+                })
+            elif resumable['embedded'].get(file_path):
+                embeddings_data = resumable['embedded'][file_path]
+                try:
+                    resumed_items.append(self._store_stage({
+                        'file_path': os.path.abspath(file_path),
+                        'embeddings_data': embeddings_data,
+                        'slide_count': len(embeddings_data),
+                        'fingerprint': fingerprint
+                    }, run_key))
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not store journaled embeddings for {file_path}, re-processing: {e}")
+                    remaining.append(file_path)
+        
+        if resumed_items:
+            logger.info(f"♻️ Resumed {len(resumed_items)} files from the ingestion journal")
+        return resumed_items, remaining
+    
+    def _journaled_fingerprint(self, file_path: str, journaled_stat: tuple) -> Optional[Dict[str, Any]]:
+        """
+        Fingerprint a file for the catalog, but only if it is still the journaled version
+        
+        The hash must describe the content the journaled vectors were made from, so the
+        file has to carry the journaled size and mtime both before and after hashing.
+        
+        Args:
+            file_path: Journaled file
+            journaled_stat: (size, mtime) recorded when the file was converted
+            
+        Returns:
+            Fingerprint for SlideCatalog.record_file, or None if the file changed
+        """
+        try:
+            fingerprint = self.catalog.fingerprint(file_path)
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if ((fingerprint['size'], fingerprint['mtime']) != tuple(journaled_stat) or
+                (stat.st_size, stat.st_mtime) != tuple(journaled_stat)):
+            return None
+        return fingerprint
+    
+    def _run_ingestion_pipeline(self, files: List[Dict], progress_callback=None,
+                                stage_concurrency: Dict[str, int] = None,
+                                cancel_event: threading.Event = None,
+                                run_key: str = None,
+                                yield_fn: Callable[[], None] = None) -> Dict[str, Any]:
+        """
+        Run decks and images through the convert → normalize → pack → embed → route → store pipeline
+        
+        Both source types share one pipeline. The convert stage turns each file into slide
+        images: decks are exported by PowerPoint (one conversion at a time), standalone
+        images are decoded, validated and downscaled in the image preprocessing processes.
+        From there on slides of both kinds are normalized, packed into the same embedding
+        batches (one request per `batch_size` slides instead of one per file, sent by one
+        embedder pool behind the embeddings service's shared rate limiter), routed back to
+        their files and handed to one coalescing vector writer. A file counts as processed
+        once the writer has confirmed its points. A file with slides that failed for a
+        retryable reason (throttling, outage, open circuit) is stored as far as it got but
+        neither cataloged nor journaled as done, so the next run processes it again (its
+        embedded slides come from the embedding store). Slides the API rejected for their
+        content are recorded in the catalog instead; the file is only retried once it changes.
+        
+        Args:
+            files: Work items with 'file_path' and 'source' ('pptx' or 'images')
+            progress_callback: Optional callback function for progress updates
+            stage_concurrency: Optional worker threads per stage
+            cancel_event: Optional event that cancels the run when set
+            run_key: Optional ingestion journal run key; progress is journaled when given
+            yield_fn: Optional function called before each file is fed; while it blocks, no
+                      new files start and the files already in flight finish their batches
+            
+        Returns:
+            Pipeline run result with completed items, failed items and stage timings
+        """
+        concurrency = dict(self.DEFAULT_STAGE_CONCURRENCY)
+        concurrency.update(stage_concurrency or {})
+        
+        batch_builder = getattr(self.embeddings_service, 'batch_builder', None)
+        packer = SlideBatchPacker(
+            batch_size=self.embeddings_service.batch_size,
+            max_wait_seconds=self.PACK_MAX_WAIT_SECONDS,
+            max_batch_bytes=batch_builder.max_bytes if batch_builder else None,
+            max_batch_tokens=batch_builder.max_tokens if batch_builder else None
+        )
+        
+        # Fresh normalizer per run so the bytes saved are reported per run
+        normalizer = ImageNormalizer(**self.image_normalizer.get_settings())
+        
+        # Standalone images get extra convert workers, each keeping one image in the preprocessing pool
+        image_workers = 0
+        preprocess_pool = None
+        if any(item['source'] == 'images' for item in files):
+            if self.preprocess_workers > 0:
+                preprocess_pool = ImagePreprocessPool(self.preprocess_workers, normalizer=normalizer)
+            image_workers = concurrency['preprocess'] or (
+                preprocess_pool.max_workers if preprocess_pool else concurrency['normalize'])
+        conversion_slots = threading.BoundedSemaphore(max(1, concurrency['convert']))
+        
+        # Fresh writer per run so flush statistics are reported per run
+        writer = CoalescingVectorWriter(self.vector_db)
+        
+        total_files = len(files)
+        results_lock = threading.Lock()
+        committed_items = []
+        store_failures = []
+        incomplete_failures = []
+        slide_failures = []
+        rejected_slides: Dict[str, int] = {}  # file path -> slides rejected for their content
+        
+        # Work measured per source type, recorded as throughput history for dry-run estimates
+        measured = {'pptx_files': 0, 'pptx_slides': 0, 'image_files': 0, 'image_source_bytes': 0,
+                    'pptx_upload_bytes': 0, 'image_upload_bytes': 0,
+                    'convert_pptx_seconds': 0.0, 'convert_images_seconds': 0.0}
+        
+        def convert_stage(item: Dict) -> Dict:
+            if progress_callback:
+                progress_callback({'status': 'file_started', 'file': os.path.basename(item['file_path'])})
+            # Fingerprint the version about to be read; the catalog and journal record it, not
+            # whatever is on disk once the file is stored
+            fingerprint = self.catalog.fingerprint(item['file_path'])
+            convert_start = time.time()
+            if item['source'] == 'images':
+                result = self._load_image_stage(item, preprocess_pool, normalizer)
+            else:
+                with conversion_slots:
+                    convert_start = time.time()
+                    result = self._convert_stage(item)
+            convert_seconds = time.time() - convert_start
+            with results_lock:
+                if item['source'] == 'images':
+                    measured['image_files'] += 1
+                    measured['image_source_bytes'] += os.path.getsize(result['file_path'])
+                    measured['convert_images_seconds'] += convert_seconds
+                else:
+                    measured['pptx_files'] += 1
+                    measured['pptx_slides'] += len(result['slides_data'])
+                    measured['convert_pptx_seconds'] += convert_seconds
+            if run_key:
+                self.journal.record_converted(run_key, result['file_path'], len(result['slides_data']),
+                                              (fingerprint['size'], fingerprint['mtime']))
+            return dict(result, fingerprint=fingerprint)
+        
+        def normalize_stage(item: Dict) -> Dict:
+            result = self._normalize_stage(item, normalizer)
+            upload_bytes = EmbeddingBatchBuilder.batch_bytes(result['slides_data'])
+            with results_lock:
+                measured['image_upload_bytes' if item['source'] == 'images' else 'pptx_upload_bytes'] += upload_bytes
+            return result
+        
+        def pack_stage(item: Dict) -> List[Dict]:
+            return [{'batch_slides': batch} for batch in packer.add_file(item)]
+        
+        def pack_idle() -> List[Dict]:
+            return [{'batch_slides': batch} for batch in packer.flush_due()]
+        
+        def pack_flush() -> List[Dict]:
+            return [{'batch_slides': batch} for batch in packer.flush()]
+        
+        def embed_stage(item: Dict) -> Dict:
+            try:
+                result = self._embed_batch_stage(item)
+            finally:
+                # Preprocessed images live in shared memory until they are uploaded
+                for slide_data in item['batch_slides']:
+                    if isinstance(slide_data.get('image'), SlideImage):
+                        slide_data['image'].release()
+            if result['embedding_failures']:
+                with results_lock:
+                    slide_failures.extend(result['embedding_failures'])
+                    for failure in result['embedding_failures']:
+                        if not failure['retryable']:
+                            rejected_slides[failure['file_path']] = rejected_slides.get(failure['file_path'], 0) + 1
+            if progress_callback:
+                progress_callback({'status': 'slides_embedded', 'slides_embedded': len(result['embeddings_data'])})
+            return result
+        
+        def retryable_failures(file_item: Dict) -> int:
+            # Slides of a failed batch that never reached isolation count as retryable
+            with results_lock:
+                return file_item['slides_failed'] - rejected_slides.get(file_item['file_path'], 0)
+        
+        def route_stage(item: Dict) -> List[Dict]:
+            completed = packer.route_results(item['batch_slides'], item['embeddings_data'])
+            if run_key:
+                # Persist vectors (with their point ids) before anything is written to the store;
+                # a file missing slides that are worth retrying must not be resumed as complete
+                for file_item in completed:
+                    if retryable_failures(file_item):
+                        self.journal.discard_file(run_key, file_item['file_path'])
+                    elif file_item['embeddings_data']:
+                        self.journal.record_embedded(run_key, file_item['embeddings_data'])
+            return completed
+        
+        def store_stage(item: Dict) -> Dict:
+            if not item['embeddings_data']:
+                if item['slides_failed'] and not retryable_failures(item):
+                    # Every slide was rejected: catalog the file so it is not retried until it changes
+                    on_file_stored(item, [])
+                    return {'file_path': item['file_path']}
+                raise ValueError('Failed to create embeddings')
+            writer.submit(item['embeddings_data'],
+                          on_committed=lambda point_ids: on_file_stored(item, point_ids),
+                          on_failed=lambda error: on_write_failed(item, error))
+            return {'file_path': item['file_path']}
+        
+        def on_file_stored(item: Dict, point_ids: List[str]):
+            if retryable_failures(item):
+                slide_count = item['slides_failed'] + len(item['embeddings_data'])
+                logger.warning(f"⚠️ Stored {len(item['embeddings_data'])}/{slide_count} slides of "
+                               f"{item['file_path']}, not cataloged until every slide is embedded")
+                failure = {'file_path': item['file_path'], 'stage': 'embed',
+                           'error': f"{item['slides_failed']} of {slide_count} slides could not be embedded"}
+                with results_lock:
+                    incomplete_failures.append(failure)
+                on_file_failed(failure)
+                return
+            if item['slides_failed']:
+                logger.warning(f"⚠️ {item['slides_failed']} slides of {item['file_path']} were rejected by the "
+                               f"embedding API, cataloged without them until the file changes")
+            summary = self._finish_stored_file(item, point_ids, run_key)
+            with results_lock:
+                committed_items.append(summary)
+                files_processed = len(committed_items)
+                slides_processed = sum(committed['slides_processed'] for committed in committed_items)
+            if progress_callback:
+                progress_callback({
+                    'status': 'processing_file',
+                    'file': os.path.basename(item['file_path']),
+                    'progress': files_processed / total_files * 100,
+                    'files_processed': files_processed,
+                    'files_total': total_files,
+                    'slides_processed': slides_processed,
+                    'in_flight_bytes': pipeline.in_flight_bytes
+                })
+        
+        def on_write_failed(item: Dict, error: str):
+            # The writer fails files after the pipeline let them go, so they are collected here
+            logger.error(f"❌ Could not store embeddings of {item['file_path']}: {error}")
+            failure = {'file_path': item['file_path'], 'stage': 'store', 'error': error}
+            with results_lock:
+                store_failures.append(failure)
+            on_file_failed(failure)
+        
+        def on_file_failed(failure: Dict):
+            if progress_callback:
+                progress_callback({
+                    'status': 'file_failed',
+                    'file': os.path.basename(failure['file_path']),
+                    'error': f"{failure['stage']}: {failure['error']}"
+                })
+        
+        budgets = {name: mb * 1024 * 1024 for name, mb in self.QUEUE_BUDGETS_MB.items()}
+        pipeline = IngestionPipeline(stages=[
+            PipelineStage('convert', convert_stage, workers=concurrency['convert'] + image_workers,
+                          thread_finalizer=release_thread_powerpoint_converter),
+            PipelineStage('normalize', normalize_stage, workers=concurrency['normalize'],
+                          max_input_bytes=budgets.get('normalize')),
+            # Packing and routing keep shared state, so they run single-threaded
+            PipelineStage('pack', pack_stage, flush_handler=pack_flush,
+                          idle_handler=pack_idle, idle_interval=0.5, max_input_bytes=budgets.get('pack')),
+            PipelineStage('embed', embed_stage, workers=concurrency['embed'], max_input_bytes=budgets.get('embed')),
+            PipelineStage('route', route_stage),
+            PipelineStage('store', store_stage, workers=concurrency['store'])
+        ], cancel_event=cancel_event, item_sizer=self._queued_item_bytes)
+        
+        writer.start()
+        try:
+            run_result = pipeline.run(self._feed(files, yield_fn), on_item_failed=on_file_failed)
+        finally:
+            # Wait until every submitted file is confirmed written (or failed)
+            writer.close()
+            if preprocess_pool:
+                preprocess_pool.close()
+        
+        run_result['completed_items'] = committed_items
+        run_result['failed_items'] += store_failures + incomplete_failures
+        run_result['failed_slides'] = slide_failures
+        
+        storage_stats = writer.get_stats()
+        run_result['stats']['storage'] = storage_stats
+        run_result['stats']['preprocessing'] = preprocess_pool.get_stats() if preprocess_pool else {}
+        
+        queue_stats = run_result['stats']['queues']
+        logger.info(f"📥 Peak {queue_stats['peak_in_flight_bytes'] / (1024 * 1024):.1f}MB of slide images "
+                    f"queued between stages (" + ", ".join(
+                        f"{name} blocked {queue_stats[name]['blocked_puts']}x"
+                        for name in self.QUEUE_BUDGETS_MB if name in queue_stats) + ")")
+        
+        packing_stats = packer.get_stats()
+        run_result['stats']['packing'] = packing_stats
+        logger.info(f"📦 Packed {packing_stats['slides_packed']} slides from {packing_stats['files_packed']} files "
+                    f"into {packing_stats['batches_emitted']} embedding requests "
+                    f"(avg {packing_stats['avg_batch_size']} slides/request)")
+        
+        normalization_stats = normalizer.get_stats()
+        run_result['stats']['normalization'] = normalization_stats
+        logger.info(f"🗜️ Normalized {normalization_stats['images']} slide images: "
+                    f"{normalization_stats['bytes_in'] / (1024 * 1024):.1f}MB → "
+                    f"{normalization_stats['bytes_out'] / (1024 * 1024):.1f}MB "
+                    f"({normalization_stats['percent_saved']}% saved)")
+        logger.info(f"💾 Wrote {storage_stats['points_written']} points in {storage_stats['requests']} "
+                    f"requests ({storage_stats['flushes']} flushes)")
+        
+        self._record_throughput(measured, run_result['stats'])
+        return run_result
+    
+    def _record_throughput(self, measured: Dict[str, Any], stats: Dict[str, Any]):
+        """
+        Record the throughput of a pipeline run for future dry-run estimates
+        
+        Args:
+            measured: Files, slides, upload bytes and convert seconds per source type
+            stats: Pipeline run statistics (stage timings, packing and storage)
+        """
+        stage_timings = stats['stage_timings']
+        try:
+            self.estimator.record_run({
+                'pptx_files': measured['pptx_files'],
+                'pptx_slides': measured['pptx_slides'],
+                'image_files': measured['image_files'],
+                'image_source_bytes': measured['image_source_bytes'],
+                'pptx_upload_bytes': measured['pptx_upload_bytes'],
+                'image_upload_bytes': measured['image_upload_bytes'],
+                'requests': stats['packing']['batches_emitted'],
+                'total_seconds': stats['total_time'],
+                'stage_seconds': {
+                    'convert_pptx': measured['convert_pptx_seconds'],
+                    'convert_images': measured['convert_images_seconds'],
+                    'normalize': stage_timings['normalize']['busy_seconds'],
+                    'embed': stage_timings['embed']['busy_seconds'],
+                    # The store stage only hands files over; the writer thread does the writes
+                    'store': stats['storage']['avg_flush_seconds'] * stats['storage']['flushes']
+                }
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record ingestion throughput: {e}")
+    
+    @staticmethod
+    def _queued_item_bytes(item: Dict) -> int:
+        """Approximate memory held by a pipeline item: its slide images and vectors"""
+        total = 0
+        for slide_data in item.get('slides_data') or item.get('batch_slides') or []:
+            image = slide_data.get('image')
+            if isinstance(image, SlideImage):
+                total += image.memory_bytes
+            else:
+                total += len(slide_data.get('image_base64') or '')
+        for embedding_data in item.get('embeddings_data') or []:
+            total += len(embedding_data.get('embedding') or ()) * 8
+        return total
+    
+    @staticmethod
+    def _feed(files: List[Dict], yield_fn: Callable[[], None] = None):
+        """Yield work items, giving way to higher-priority work between files"""
+        for item in files:
+            if yield_fn:
+                yield_fn()
+            yield item
+    
+    def _convert_stage(self, item: Dict) -> Dict:
+        """Pipeline stage: convert a PowerPoint file to slide images"""
+        pptx_path = os.path.abspath(item['file_path'])
+        logger.info(f"🖼️  Converting slides to images: {pptx_path}")
+        slides_data = get_thread_powerpoint_converter().convert_pptx_to_images(pptx_path)
+        if not slides_data:
+            raise ValueError('No slides could be converted')
+        return {'file_path': pptx_path, 'source': 'pptx', 'slides_data': slides_data}
+    
+    def _load_image_stage(self, item: Dict, preprocess_pool: Optional[ImagePreprocessPool],
+                          normalizer: ImageNormalizer) -> Dict:
+        """
+        Pipeline stage: turn a standalone image into a one-slide file
+        
+        The image is decoded, validated and downscaled in a preprocessing process (or
+        in this thread without a pool); decompression bombs are rejected undecoded.
+        """
+        image_path = os.path.abspath(item['file_path'])
+        slide_data = {
+            'slide_number': 1,
+            'image_path': image_path,
+            'file_path': image_path,
+            'file_name': os.path.basename(image_path),
+            'source_type': 'image_file'
+        }
+        
+        if preprocess_pool is not None:
+            prepared = preprocess_pool.preprocess(image_path)
+            if prepared['error']:
+                raise ValueError(prepared['error'])
+            slide_data['image'] = prepared['image']
+            slide_data['image_dimensions'] = {'width': prepared['width'], 'height': prepared['height']}
+            if prepared['format']:
+                slide_data['image_format'] = prepared['format']
+        else:
+            normalized = normalizer.normalize_file(image_path)
+            if normalized is None:
+                raise ValueError('Could not read or normalize image')
+            slide_data = ImageNormalizer.apply_to_slide(slide_data, normalized)
+        
+        return {'file_path': image_path, 'source': 'images', 'slides_data': [slide_data], 'normalized': True}
+    
+    def _normalize_stage(self, item: Dict, normalizer: ImageNormalizer) -> Dict:
+        """Pipeline stage: downscale and re-encode a file's slide images before upload"""
+        if item.get('normalized'):
+            return item  # standalone images are normalized while preprocessing
+        slides_data = []
+        for slide_data in item['slides_data']:
+            normalized = normalizer.normalize_slide(slide_data)
+            if normalized is None:
+                # Exported slides are trusted - upload the original rather than lose the slide
+                logger.warning(f"⚠️ Could not normalize slide {slide_data.get('slide_number')} "
+                               f"of {item['file_path']}, uploading original image")
+                normalized = slide_data
+            slides_data.append(normalized)
+        return dict(item, slides_data=slides_data)
+    
+    def _embed_batch_stage(self, item: Dict) -> Dict:
+        """Pipeline stage: create embeddings for a packed batch of slides from several files"""
+        failures = []
+        try:
+            embeddings_data = self.embeddings_service.create_batch_slide_embeddings(item['batch_slides'], failures)
+        except Exception as e:
+            # Never drop a packed batch - its files still need to be routed (as failed slides)
+            logger.error(f"❌ Packed batch of {len(item['batch_slides'])} slides failed: {e}")
+            embeddings_data = []
+        return dict(item, embeddings_data=embeddings_data, embedding_failures=failures)
+    
+    def _store_stage(self, item: Dict, run_key: str = None) -> Dict:
+        """Store a file's embeddings synchronously and update the catalog (and journal)"""
+        if not item['embeddings_data']:
+            raise ValueError('Failed to create embeddings')
+        
+        point_ids = self.vector_db.upsert_slide_embeddings_with_ids(item['embeddings_data'])
+        if not point_ids:
+            raise ValueError('Failed to store embeddings in vector database')
+        return self._finish_stored_file(item, point_ids, run_key)
+    
+    def _finish_stored_file(self, item: Dict, point_ids: List[str], run_key: str = None) -> Dict:
+        """
+        Update the catalog (and journal) for a file whose embeddings were written
+        
+        Args:
+            item: Work item with 'file_path', 'embeddings_data', 'fingerprint',
+                  'slide_count' or 'slides_data' and optionally 'slides_failed' (slides
+                  rejected for their content)
+            point_ids: Point ids written for the file
+            run_key: Optional ingestion journal run key
+            
+        Returns:
+            Slim summary of the file - slide images are not needed past this point
+        """
+        slides_failed = item.get('slides_failed', 0)
+        slides_processed = (item['slide_count'] if 'slide_count' in item else len(item['slides_data'])) - slides_failed
+        self._commit_indexed_file(item['file_path'], point_ids, slides_processed, item.get('fingerprint'),
+                                  slides_failed)
+        if run_key:
+            self.journal.record_committed(run_key, [item['file_path']])
+        logger.info(f"✅ Successfully processed {slides_processed} slides from {item['file_path']}")
+        
+        return {
+            'file_path': item['file_path'],
+            'slides_processed': slides_processed,
+            'embeddings_created': len(item['embeddings_data'])
         }
     
+    def _remove_indexed_file(self, file_path: str) -> bool:
+        """
+        Delete the vectors of a cataloged file and drop it from the catalog
+        
+        Args:
+            file_path: Path of the file to remove
+            
+        Returns:
+            True if the file's vectors were deleted, False otherwise
+        """
+        entry = self.catalog.get_entry(file_path)
+        if entry is None:
+            return False
+        
+        if entry['point_ids']:
+            success = self.vector_db.delete_points(entry['point_ids'])
+        else:
+            success = self.vector_db.delete_slides_by_file(entry['file_path'])
+        
+        if success:
+            self.catalog.remove_file(entry['file_path'])
+            logger.info(f"🗑️ Removed {len(entry['point_ids'])} vectors of vanished file: {entry['file_path']}")
+        return success
+    
     def process_single_file(self, pptx_path: str) -> Dict[str, Any]:
         """
         Process a single PowerPoint file
@@ -304,6 +1184,7 @@ class SlideProcessingService:
         """
         try:
             logger.info(f"🔄 Processing PowerPoint file: {pptx_path}")
+            fingerprint = self.catalog.fingerprint(pptx_path)
             
             # Step 1: Convert slides to images
             logger.info(f"🖼️  Step 1: Converting slides to images...")
@@ -323,7 +1204,8 @@ class SlideProcessingService:
             import time
             embedding_start_time = time.time()
             logger.info(f"🧠 Step 2: Creating embeddings for {len(slides_data)} slides using batch processing (batch size: {self.embeddings_service.batch_size})...")
-            embeddings_data = self.embeddings_service.create_batch_slide_embeddings(slides_data)
+            slide_failures = []
+            embeddings_data = self.embeddings_service.create_batch_slide_embeddings(slides_data, slide_failures)
             embedding_time = time.time() - embedding_start_time
             if embeddings_data:
                 logger.info(f"✅ Batch embedding completed in {embedding_time:.2f}s ({len(embeddings_data)/embedding_time:.2f} embeddings/sec)")
@@ -340,9 +1222,9 @@ class SlideProcessingService:
             
             # Step 3: Store embeddings in vector database
             logger.info(f"💾 Step 3: Storing embeddings in Qdrant...")
-            success = self.vector_db.upsert_slide_embeddings(embeddings_data)
+            point_ids = self.vector_db.upsert_slide_embeddings_with_ids(embeddings_data)
             
-            if not success:
+            if not point_ids:
                 logger.error(f"❌ Failed to store embeddings in vector database for {pptx_path}")
                 return {
                     'success': False,
@@ -350,12 +1232,30 @@ class SlideProcessingService:
                     'slides_processed': 0
                 }
             
-            logger.info(f"✅ Successfully processed {len(slides_data)} slides from {pptx_path}")
-            return {
+            # Step 4: Replace the previous vectors of this file and update the catalog; a file
+            # with slides worth retrying stays uncataloged so the next scan indexes it again,
+            # slides rejected for their content are cataloged as such
+            if any(failure['retryable'] for failure in slide_failures):
+                logger.warning(f"⚠️ {len(slide_failures)} of {len(slides_data)} slides of {pptx_path} "
+                               f"could not be embedded, not cataloging the file")
+                return {
+                    'success': True,
+                    'slides_processed': len(embeddings_data),
+                    'embeddings_created': len(embeddings_data),
+                    'failed_slides': slide_failures
+                }
+            slides_processed = len(slides_data) - len(slide_failures)
+            self._commit_indexed_file(pptx_path, point_ids, slides_processed, fingerprint, len(slide_failures))
+            
+            logger.info(f"✅ Successfully processed {slides_processed} slides from {pptx_path}")
+            result = {
                 'success': True,
-                'slides_processed': len(slides_data),
+                'slides_processed': slides_processed,
                 'embeddings_created': len(embeddings_data)
             }
+            if slide_failures:
+                result['failed_slides'] = slide_failures
+            return result
             
         except Exception as e:
             logger.error(f"❌ Error processing file {pptx_path}: {e}")
@@ -366,6 +1266,33 @@ class SlideProcessingService:
                 'slides_processed': 0
             }
     
+    def _commit_indexed_file(self, file_path: str, point_ids: List[str], slide_count: int,
+                             fingerprint: Dict[str, Any] = None, failed_slides: int = 0):
+        """
+        Record a freshly indexed file in the catalog, deleting vectors from its previous version
+        
+        Args:
+            file_path: Path of the indexed file
+            point_ids: Point ids written for the new version of the file
+            slide_count: Number of slides indexed
+            fingerprint: Size, mtime and content hash captured before the file was read
+                         (see SlideCatalog.fingerprint)
+            failed_slides: Number of slides the embedding API rejected for their content
+        """
+        try:
+            previous = self.catalog.get_entry(file_path)
+            if previous:
+                new_ids = set(point_ids)
+                stale_ids = [pid for pid in previous['point_ids'] if pid not in new_ids]
+                if stale_ids:
+                    self.vector_db.delete_points(stale_ids)
+                    logger.info(f"🗑️ Deleted {len(stale_ids)} stale vectors from previous version of {file_path}")
+            
+            self.catalog.record_file(file_path, point_ids, slide_count, fingerprint, failed_slides)
+        except Exception as e:
+            # Failing to catalog only means the file is re-indexed on the next scan
+            logger.warning(f"⚠️ Could not update slide catalog for {file_path}: {e}")
+    
     def process_single_image_file(self, image_path: str) -> Dict[str, Any]:
         """
         Process a single image file as a slide
@@ -378,6 +1305,7 @@ class SlideProcessingService:
         """
         try:
             logger.info(f"🖼️  Processing image file: {image_path}")
+            fingerprint = self.catalog.fingerprint(image_path)
             
             # Step 1: Process image file to slide data
             logger.info(f"🔄 Step 1: Processing image to slide data...")
@@ -409,9 +1337,9 @@ class SlideProcessingService:
             
             # Step 3: Store embedding in vector database
             logger.info(f"💾 Step 3: Storing embedding in Qdrant...")
-            success = self.vector_db.upsert_slide_embeddings(embeddings_data)
+            point_ids = self.vector_db.upsert_slide_embeddings_with_ids(embeddings_data)
             
-            if not success:
+            if not point_ids:
                 logger.error(f"❌ Failed to store embedding in vector database for {image_path}")
                 return {
                     'success': False,
@@ -419,6 +1347,9 @@ class SlideProcessingService:
                     'slides_processed': 0
                 }
             
+            # Step 4: Replace the previous vectors of this image and update the catalog
+            self._commit_indexed_file(image_path, point_ids, 1, fingerprint)
+            
             logger.info(f"✅ Successfully processed image slide: {image_path}")
             return {
                 'success': True,
@@ -435,7 +1366,8 @@ class SlideProcessingService:
                 'slides_processed': 0
             }
     
-    def search_slides(self, query: str, top_k: int = 25, file_filter: str = None, use_reranker: bool = False) -> List[Dict]:
+    def search_slides(self, query: str, top_k: int = 25, file_filter: str = None, use_reranker: bool = False,
+                      query_embedding: List[float] = None) -> List[Dict]:
         """
         Search for slides similar to the given query
         
@@ -444,6 +1376,7 @@ class SlideProcessingService:
             top_k: Number of results to return
             file_filter: Optional filter by file name
             use_reranker: Whether to use reranker (currently not implemented, kept for API compatibility)
+            query_embedding: Precomputed query embedding (looked up or created if None)
             
         Returns:
             List of similar slides with metadata and images
@@ -459,7 +1392,8 @@ class SlideProcessingService:
             logger.info(f"🧠 Step 1: Getting embedding for search query (checking cache first)...")
             
             # Try to get from cache first
-            query_embedding = self.query_cache.get_embedding(query)
+            if query_embedding is None:
+                query_embedding = self.query_cache.get_embedding(query, model=self.embeddings_service.model)
             
             if query_embedding:
                 logger.info(f"🚀 Using cached query embedding ({len(query_embedding)} dimensions)")
@@ -473,7 +1407,7 @@ class SlideProcessingService:
                     return []
                 
                 # Cache the new embedding
-                self.query_cache.cache_embedding(query, query_embedding)
+                self.query_cache.cache_embedding(query, query_embedding, model=self.embeddings_service.model)
                 logger.info(f"✅ Query embedding created and cached ({len(query_embedding)} dimensions)")
             
             # Step 2: Search in vector database
@@ -573,6 +1507,46 @@ class SlideProcessingService:
             logger.error(f"Error searching slides: {e}")
             return []
     
+    async def asearch_slides(self, query: str, top_k: int = 25, file_filter: str = None,
+                             use_reranker: bool = False) -> List[Dict]:
+        """
+        search_slides for async callers: the API calls are awaited on the pooled client,
+        only the local vector search and image loading run in a worker thread
+        
+        Args:
+            query: Search query text
+            top_k: Number of results to return
+            file_filter: Optional filter by file name
+            use_reranker: Whether to rerank the results
+            
+        Returns:
+            List of similar slides with metadata and images
+        """
+        try:
+            query_embedding = self.query_cache.get_embedding(query, model=self.embeddings_service.model)
+            if not query_embedding:
+                query_embedding = await self.embeddings_service.acreate_text_embedding(query)
+                if not query_embedding:
+                    logger.error("❌ Failed to create query embedding")
+                    return []
+                self.query_cache.cache_embedding(query, query_embedding, model=self.embeddings_service.model)
+            
+            results = await asyncio.to_thread(
+                self.search_slides, query, top_k, file_filter, False, query_embedding
+            )
+            
+            if use_reranker and results:
+                results = await self.embeddings_service.arerank_slides(
+                    query=query,
+                    slide_results=results,
+                    top_k=top_k
+                )
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error searching slides: {e}")
+            return []
+    
     def get_processing_stats(self) -> Dict[str, Any]:
         """Get statistics about processed slides"""
         try:
@@ -583,7 +1557,15 @@ class SlideProcessingService:
                     'total_slides': stats.get('total_vector_count', 0),
                     'vector_size': stats.get('vector_size', 0),
                     'distance_metric': stats.get('distance_metric', 'cosine'),
-                    'indexed_vectors': stats.get('indexed_vectors', 0)
+                    'indexed_vectors': stats.get('indexed_vectors', 0),
+                    'collection_name': stats.get('collection_name', ''),
+                    'embedding_provider': self.embeddings_service.get_provider_info(),
+                    'catalog': self.catalog.get_stats() if self.catalog else {},
+                    'journal': self.journal.get_stats() if self.journal else {},
+                    'throughput': self.estimator.get_throughput() if self.estimator else {},
+                    'embedding_store': self._get_embedding_store_stats(),
+                    'rate_limiting': self._get_rate_limit_stats(),
+                    'batching': self._get_batching_stats()
                 }
             # Fallback to Pinecone method for backward compatibility
             elif hasattr(self.vector_db, 'get_index_stats'):
@@ -600,12 +1582,30 @@ class SlideProcessingService:
             logger.error(f"Error getting processing stats: {e}")
             return {}
     
+    def _get_embedding_store_stats(self) -> Dict[str, Any]:
+        """Get hit rate and size of the content-addressed embedding store"""
+        store = getattr(self.embeddings_service, 'embedding_store', None)
+        return store.get_stats() if store else {}
+    
+    def _get_batching_stats(self) -> Dict[str, Any]:
+        """Get embedding batch sizing and upload throughput statistics"""
+        if hasattr(self.embeddings_service, 'get_batching_stats'):
+            return self.embeddings_service.get_batching_stats()
+        return {}
+    
+    def _get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Get shared embedding rate limiter and adaptive concurrency statistics"""
+        if hasattr(self.embeddings_service, 'get_rate_limit_stats'):
+            return self.embeddings_service.get_rate_limit_stats()
+        return {}
     
     def clear_all_slides(self) -> bool:
         """Clear all processed slides from the vector database"""
         try:
             success = self.vector_db.clear_all_vectors()
             if success:
+                self.catalog.clear()
+                self.journal.clear()
                 logger.info("All slides cleared from vector database")
             return success
         except Exception as e:
@@ -624,6 +1624,7 @@ class SlideProcessingService:
         """
         try:
             deleted_count = self.vector_db.delete_vectors_by_folder(folder_path)
+            self.catalog.remove_folder(folder_path)
             if deleted_count > 0:
                 logger.info(f"Deleted {deleted_count} slides from folder: {folder_path}")
             else:
@@ -640,6 +1641,14 @@ class SlideProcessingService:
             if self.query_cache:
                 self.query_cache.cleanup()
             
+            # Close slide catalog
+            if self.catalog:
+                self.catalog.close()
+            
+            # Close ingestion journal
+            if self.journal:
+                self.journal.close()
+            
             # Cleanup PowerPoint converter
             cleanup_powerpoint_converter()
             
@@ -650,7 +1659,7 @@ class SlideProcessingService:
 # Global service instance
 _slide_service = None
 
-def get_slide_processing_service(embedding_batch_size: int = None) -> SlideProcessingService:
+def get_slide_processing_service(embedding_batch_size: int = None, preprocess_workers: int = None) -> SlideProcessingService:
     """Get or create global slide processing service
     
     Args:
@@ -658,10 +1667,14 @@ def get_slide_processing_service(embedding_batch_size: int = None) -> SlideProce
                              If None, uses default (100 - optimal for production).
                              Only applies when creating a new service instance.
                              Recommended: 100 for best performance/reliability balance.
+        preprocess_workers: Optional number of image preprocessing processes
+                            (None: CPU count - 1, 0: preprocess in a thread).
+                            Only applies when creating a new service instance.
     """
     global _slide_service
     if _slide_service is None:
-        _slide_service = SlideProcessingService(embedding_batch_size=embedding_batch_size)
+        _slide_service = SlideProcessingService(embedding_batch_size=embedding_batch_size,
+                                                preprocess_workers=preprocess_workers)
     return _slide_service
 
 def configure_slide_service_batch_size(embedding_batch_size: int) -> SlideProcessingService:
@@ -0,0 +1,301 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class CoalescingVectorWriter:
+    """
+    Dedicated writer that takes vector-store writes off the ingestion critical path
+
+    Embedders submit their results and return immediately. A writer thread
+    coalesces submissions from all embedders into large write batches and
+    flushes when `max_points` are buffered or the oldest buffered point has
+    waited `max_delay_seconds`.
+
+    Writes are sent without waiting for them to be applied (wait=False). Qdrant
+    applies writes in order, so the last chunk of a flush is sent with wait=True
+    whenever confirmation is needed - when more than `confirm_every_points` are
+    unconfirmed, and at drain() (the final barrier). Submission callbacks run
+    only once their points are confirmed, so callers can safely record commits.
+    """
+
+    # Reasons a flush happened
+    FLUSH_SIZE = 'size'
+    FLUSH_DEADLINE = 'deadline'
+    FLUSH_DRAIN = 'drain'
+
+    def __init__(self,
+                 vector_db,
+                 max_points: int = 500,
+                 max_delay_seconds: float = 1.0,
+                 chunk_size: int = 100,
+                 confirm_every_points: int = 2000,
+                 max_buffered_points: int = 5000):
+        """
+        Initialize the writer (call start() before submitting)
+
+        Args:
+            vector_db: Vector database with build_points() and upsert_points()
+            max_points: Buffered points that trigger a flush
+            max_delay_seconds: Longest time a point is buffered before a flush
+            chunk_size: Points per upsert request
+            confirm_every_points: Unconfirmed points after which a flush waits for its last chunk
+            max_buffered_points: submit() blocks while this many points are buffered
+        """
+        self.vector_db = vector_db
+        self.max_points = max_points
+        self.max_delay_seconds = max_delay_seconds
+        self.chunk_size = chunk_size
+        self.confirm_every_points = confirm_every_points
+        self.max_buffered_points = max(max_buffered_points, max_points)
+
+        self._condition = threading.Condition()
+        self._buffer = []            # (points, submission) pairs waiting for a flush
+        self._buffered_points = 0
+        self._oldest_submit = None
+        self._unconfirmed = []       # submissions written without confirmation
+        self._unconfirmed_points = 0
+        self._last_chunk = None      # last chunk written, re-sent with wait=True by an empty barrier
+        self._drain_requested = False
+        self._flushing = False
+        self._stopping = False
+        self._thread = None
+
+        self.stats = {
+            'submissions': 0,
+            'points_submitted': 0,
+            'points_written': 0,
+            'points_failed': 0,
+            'flushes': 0,
+            'requests': 0,
+            'barriers': 0,
+            'flushed_by': {self.FLUSH_SIZE: 0, self.FLUSH_DEADLINE: 0, self.FLUSH_DRAIN: 0},
+            'flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+            'commit_latency_seconds': 0.0,
+            'max_commit_latency_seconds': 0.0,
+            'commits': 0,
+            'blocked_submits': 0
+        }
+
+    def start(self):
+        """Start the writer thread"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._writer_loop, name="vector-writer", daemon=True)
+            self._thread.start()
+        logger.info(f"💾 Vector writer started (flush at {self.max_points} points or {self.max_delay_seconds}s)")
+
+    def submit(self, embeddings_data: List[Dict],
+               on_committed: Callable[[List[str]], None] = None,
+               on_failed: Callable[[str], None] = None):
+        """
+        Queue embeddings for writing (blocks only while the buffer is full)
+
+        Args:
+            embeddings_data: List of embedding dictionaries with metadata
+            on_committed: Called with the point ids once the points are confirmed written
+            on_failed: Called with an error message if the write failed
+        """
+        points = self.vector_db.build_points(embeddings_data)
+        if not points:
+            if on_failed:
+                on_failed("No valid points to write")
+            return
+
+        submission = {
+            'point_ids': [str(point.id) for point in points],
+            'submitted': time.monotonic(),
+            'on_committed': on_committed,
+            'on_failed': on_failed
+        }
+        with self._condition:
+            if self._buffered_points >= self.max_buffered_points:
+                self.stats['blocked_submits'] += 1
+                self._condition.wait_for(lambda: self._buffered_points < self.max_buffered_points or self._stopping)
+            self._buffer.append((points, submission))
+            self._buffered_points += len(points)
+            if self._oldest_submit is None:
+                self._oldest_submit = submission['submitted']
+            self.stats['submissions'] += 1
+            self.stats['points_submitted'] += len(points)
+            self._condition.notify_all()
+
+    def drain(self, timeout: float = None) -> bool:
+        """
+        Flush everything buffered and wait until all written points are confirmed
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the writer is idle and every submission was confirmed or failed
+        """
+        with self._condition:
+            self._drain_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._drain_requested and not self._buffer and not self._flushing,
+                timeout=timeout
+            )
+
+    def close(self):
+        """Drain the writer and stop its thread"""
+        self.drain()
+        with self._condition:
+            self._stopping = True
+            thread, self._thread = self._thread, None
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+
+    def _flush_reason(self, now: float) -> Optional[str]:
+        """Why the buffer should be flushed now, or None (lock must be held)"""
+        if self._drain_requested:
+            return self.FLUSH_DRAIN
+        if self._buffered_points >= self.max_points:
+            return self.FLUSH_SIZE
+        if self._buffer and now - self._oldest_submit >= self.max_delay_seconds:
+            return self.FLUSH_DEADLINE
+        return None
+
+    def _writer_loop(self):
+        """Writer thread: wait for a flush condition, then write outside the lock"""
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    reason = self._flush_reason(now)
+                    if reason or (self._stopping and not self._buffer):
+                        break
+                    timeout = None
+                    if self._buffer:
+                        timeout = max(0.0, self._oldest_submit + self.max_delay_seconds - now)
+                    self._condition.wait(timeout=timeout)
+
+                if reason is None:
+                    return
+
+                batch = self._buffer
+                self._buffer = []
+                self._buffered_points = 0
+                self._oldest_submit = None
+                self._flushing = True
+                self._condition.notify_all()
+
+            try:
+                self._flush(batch, reason)
+            except Exception as e:
+                logger.error(f"❌ Vector writer flush error: {e}")
+            finally:
+                with self._condition:
+                    self._flushing = False
+                    if reason == self.FLUSH_DRAIN and not self._buffer:
+                        self._drain_requested = False
+                    self._condition.notify_all()
+
+    def _flush(self, batch: List, reason: str):
+        """Write one coalesced batch in chunks and confirm it if needed"""
+        flush_start = time.monotonic()
+        points = [point for batch_points, _ in batch for point in batch_points]
+        submissions = [submission for _, submission in batch]
+
+        confirm = (reason == self.FLUSH_DRAIN or
+                   self._unconfirmed_points + len(points) >= self.confirm_every_points)
+
+        try:
+            for i in range(0, len(points), self.chunk_size):
+                chunk = points[i:i + self.chunk_size]
+                wait = confirm and i + self.chunk_size >= len(points)
+                if not self.vector_db.upsert_points(chunk, wait=wait):
+                    raise RuntimeError(f"Vector store rejected a write of {len(chunk)} points")
+                self.stats['requests'] += 1
+                self._last_chunk = chunk
+
+            if confirm and not points and self._unconfirmed:
+                # Nothing new to write - re-send the last chunk with wait=True as the barrier (idempotent)
+                if not self.vector_db.upsert_points(self._last_chunk, wait=True):
+                    raise RuntimeError("Vector store barrier write failed")
+                self.stats['requests'] += 1
+        except Exception as e:
+            logger.error(f"❌ Vector writer failed to write {len(points)} points: {e}")
+            self.stats['points_failed'] += len(points)
+            for submission in submissions:
+                self._notify(submission, error=str(e))
+            if confirm:
+                # The barrier could not confirm earlier writes either
+                self.stats['points_failed'] += self._unconfirmed_points
+                for submission in self._unconfirmed:
+                    self._notify(submission, error=str(e))
+                self._unconfirmed, self._unconfirmed_points = [], 0
+            return
+
+        flush_seconds = time.monotonic() - flush_start
+        if points:
+            self.stats['flushes'] += 1
+            self.stats['flushed_by'][reason] += 1
+            self.stats['points_written'] += len(points)
+            self.stats['flush_seconds'] += flush_seconds
+            self.stats['max_flush_seconds'] = max(self.stats['max_flush_seconds'], flush_seconds)
+            logger.info(f"💾 Vector writer: flushed {len(points)} points from {len(submissions)} submissions "
+                        f"in {flush_seconds:.3f}s ({reason})")
+
+        self._unconfirmed.extend(submissions)
+        self._unconfirmed_points += len(points)
+        if confirm and self._unconfirmed:
+            self.stats['barriers'] += 1
+            confirmed, self._unconfirmed, self._unconfirmed_points = self._unconfirmed, [], 0
+            for submission in confirmed:
+                self._notify(submission)
+
+    def _notify(self, submission: Dict, error: str = None):
+        """Run a submission's callback (writer thread)"""
+        try:
+            if error is None:
+                latency = time.monotonic() - submission['submitted']
+                self.stats['commits'] += 1
+                self.stats['commit_latency_seconds'] += latency
+                self.stats['max_commit_latency_seconds'] = max(self.stats['max_commit_latency_seconds'], latency)
+                if submission['on_committed']:
+                    submission['on_committed'](submission['point_ids'])
+            elif submission['on_failed']:
+                submission['on_failed'](error)
+        except Exception as e:
+            logger.error(f"❌ Vector writer callback error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics, including flush and commit latency"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats['flushed_by'] = dict(self.stats['flushed_by'])
+            stats['buffered_points'] = self._buffered_points
+            stats['unconfirmed_points'] = self._unconfirmed_points
+        flushes = stats['flushes']
+        stats['avg_flush_seconds'] = round(stats.pop('flush_seconds') / flushes, 4) if flushes else 0.0
+        stats['max_flush_seconds'] = round(stats['max_flush_seconds'], 4)
+        commits = stats['commits']
+        stats['avg_commit_latency_seconds'] = round(stats.pop('commit_latency_seconds') / commits, 4) if commits else 0.0
+        stats['max_commit_latency_seconds'] = round(stats['max_commit_latency_seconds'], 4)
+        stats['avg_points_per_flush'] = round(stats['points_written'] / flushes, 1) if flushes else 0.0
+        return stats
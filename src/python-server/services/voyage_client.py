@@ -0,0 +1,350 @@
+# Siffs - Fast File Search Desktop Application
+# Copyright (C) 2025  Siffs
+# 
+# Contact: github.suggest277@passinbox.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import httpx
+from voyageai import error
+from voyageai.object.reranking import RerankingResult
+from voyageai.object.multimodal_embeddings import MultimodalInputRequest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://api.voyageai.com/v1"
+
+class EmbeddingResult:
+    """Embedding response (same attributes as the voyageai SDK result objects)"""
+
+    def __init__(self, response: Dict[str, Any]):
+        self.embeddings: List[List[float]] = [item['embedding'] for item in response.get('data', [])]
+        self.total_tokens: int = response.get('usage', {}).get('total_tokens', 0)
+
+class RerankResult:
+    """Rerank response (same attributes as the voyageai SDK RerankingObject)"""
+
+    def __init__(self, documents: List[str], response: Dict[str, Any]):
+        self.results: List[RerankingResult] = [
+            RerankingResult(index=item['index'], document=documents[item['index']],
+                            relevance_score=item['relevance_score'])
+            for item in response.get('data', [])
+        ]
+        self.total_tokens: int = response.get('usage', {}).get('total_tokens', 0)
+
+class AsyncVoyageClient:
+    """
+    asyncio-native VoyageAI API client over one shared keep-alive connection pool
+
+    Speaks the REST API directly with httpx, so any number of requests can be in
+    flight on a single event loop - bounded by the pool limits, not by threads.
+    Errors are raised as the voyageai SDK error types, so callers can treat both
+    clients alike. Like any httpx.AsyncClient it must only be used from one event loop.
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 base_url: str = None,
+                 max_connections: int = 64,
+                 max_keepalive_connections: int = 16,
+                 keepalive_expiry: float = 30.0,
+                 connect_timeout: float = 10.0,
+                 read_timeout: float = 120.0,
+                 write_timeout: float = 120.0,
+                 pool_timeout: float = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        """
+        Initialize the client
+
+        Args:
+            api_key: VoyageAI API key
+            base_url: API base URL (if None, VOYAGE_API_BASE or the public endpoint)
+            max_connections: Maximum open connections (further requests wait for a free one)
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for response data
+            write_timeout: Seconds to send request data (large image batches upload slowly)
+            pool_timeout: Seconds to wait for a free connection (None waits indefinitely)
+            transport: Custom httpx transport (e.g. httpx.MockTransport in tests)
+        """
+        self.base_url = (base_url or os.getenv('VOYAGE_API_BASE') or DEFAULT_API_BASE).rstrip('/')
+        self.max_connections = max_connections
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                'Authorization': f"Bearer {api_key}",
+                'Content-Type': 'application/json'
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(
+                connect=connect_timeout,
+                read=read_timeout,
+                write=write_timeout,
+                pool=pool_timeout
+            ),
+            transport=transport
+        )
+
+        self._in_flight = 0
+        self.stats = {
+            'requests': 0,
+            'failures': 0,
+            'peak_in_flight': 0,
+            'request_seconds': 0.0
+        }
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        """Raise the voyageai SDK error matching an unsuccessful response"""
+        if response.status_code < 400:
+            return
+        try:
+            json_body = response.json()
+        except ValueError:
+            json_body = None
+        message = (json_body or {}).get('detail') if isinstance(json_body, dict) else None
+        message = message or response.text or response.reason_phrase
+        message = f"HTTP {response.status_code}: {message}"
+
+        if response.status_code == 429:
+            error_class = error.RateLimitError
+        elif response.status_code == 401:
+            error_class = error.AuthenticationError
+        elif response.status_code in (400, 404, 422):
+            error_class = error.InvalidRequestError
+        elif response.status_code in (502, 503, 504):
+            error_class = error.ServiceUnavailableError
+        elif response.status_code >= 500:
+            error_class = error.ServerError
+        else:
+            error_class = error.APIError
+        raise error_class(message, http_body=response.text, http_status=response.status_code,
+                          json_body=json_body, headers=dict(response.headers))
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST a JSON request and return the decoded response
+
+        Args:
+            path: Endpoint path relative to the base URL
+            payload: JSON request body
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            voyageai.error.VoyageError: On HTTP errors, timeouts and connection failures
+        """
+        self._in_flight += 1
+        self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self._in_flight)
+        start = time.monotonic()
+        try:
+            response = await self._client.post(path, json=payload)
+            self._raise_for_status(response)
+            try:
+                return response.json()
+            except ValueError as e:
+                # A garbled answer is an upstream failure: retryable, not a problem with the request
+                raise error.ServerError(f"Malformed response from {path}: {e}", http_body=response.text,
+                                        http_status=response.status_code, headers=dict(response.headers))
+        except httpx.TimeoutException as e:
+            self.stats['failures'] += 1
+            raise error.Timeout(f"Request to {path} timed out: {e!r}")
+        except httpx.TransportError as e:
+            self.stats['failures'] += 1
+            raise error.APIConnectionError(f"Connection error calling {path}: {e!r}")
+        except error.VoyageError:
+            self.stats['failures'] += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self.stats['requests'] += 1
+            self.stats['request_seconds'] += time.monotonic() - start
+
+    def _check_count(self, result: EmbeddingResult, expected: int) -> EmbeddingResult:
+        """Raise a retryable error if a response does not carry one embedding per input"""
+        if len(result.embeddings) != expected:
+            self.stats['failures'] += 1
+            raise error.ServerError(f"Incomplete response: {len(result.embeddings)} embeddings for {expected} inputs")
+        return result
+
+    async def multimodal_embed(self, inputs: List, model: str, input_type: Optional[str] = None,
+                               truncation: bool = True) -> EmbeddingResult:
+        """
+        Create multimodal embeddings
+
+        Args:
+            inputs: Dict inputs with 'content' segments, or lists of strings and/or PIL images
+            model: Model name
+            input_type: "document", "query" or None
+            truncation: Whether over-long inputs are truncated
+
+        Returns:
+            Result with one embedding per input
+        """
+        if all(isinstance(item, dict) for item in inputs):
+            # Already in the wire format - skip the SDK's per-segment validation of large data URIs
+            payload = {'inputs': inputs, 'model': model, 'input_type': input_type, 'truncation': truncation}
+        else:
+            payload = MultimodalInputRequest.from_user_inputs(
+                inputs=inputs, model=model, input_type=input_type, truncation=truncation
+            ).dict()
+        return self._check_count(EmbeddingResult(await self._post('/multimodalembeddings', payload)), len(inputs))
+
+    async def embed(self, texts: List[str], model: str, input_type: Optional[str] = None,
+                    truncation: bool = True) -> EmbeddingResult:
+        """
+        Create text embeddings
+
+        Args:
+            texts: Texts to embed
+            model: Model name
+            input_type: "document", "query" or None
+            truncation: Whether over-long texts are truncated
+
+        Returns:
+            Result with one embedding per text
+        """
+        payload = {'input': texts, 'model': model, 'input_type': input_type, 'truncation': truncation}
+        return self._check_count(EmbeddingResult(await self._post('/embeddings', payload)), len(texts))
+
+    async def rerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None,
+                     truncation: bool = True) -> RerankResult:
+        """
+        Rerank documents by relevance to a query
+
+        Args:
+            query: Query text
+            documents: Documents to rank
+            model: Reranker model name
+            top_k: Number of results to return (None for all)
+            truncation: Whether over-long inputs are truncated
+
+        Returns:
+            Result with documents ordered by relevance
+        """
+        payload = {'query': query, 'documents': documents, 'model': model, 'truncation': truncation}
+        if top_k is not None:
+            payload['top_k'] = top_k
+        return RerankResult(documents, await self._post('/rerank', payload))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and connection pool statistics"""
+        requests = self.stats['requests']
+        return {
+            'base_url': self.base_url,
+            'max_connections': self.max_connections,
+            'in_flight': self._in_flight,
+            'peak_in_flight': self.stats['peak_in_flight'],
+            'requests': requests,
+            'failures': self.stats['failures'],
+            'avg_request_seconds': round(self.stats['request_seconds'] / requests, 3) if requests else 0.0
+        }
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        await self._client.aclose()
+
+class PooledVoyageClient:
+    """
+    VoyageAI client usable from both threads and coroutines
+
+    Owns an AsyncVoyageClient running on a private event loop thread. Blocking
+    methods (same signatures as voyageai.Client) serve the existing thread-based
+    callers; the `a`-prefixed coroutines serve async callers on any event loop.
+    Either way all requests share one keep-alive connection pool.
+    """
+
+    def __init__(self, api_key: str, **client_options):
+        """
+        Initialize the client and start its event loop thread
+
+        Args:
+            api_key: VoyageAI API key
+            **client_options: AsyncVoyageClient options (base_url, connection limits, timeouts)
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='voyage-client-loop', daemon=True)
+        self._thread.start()
+        self.async_client = AsyncVoyageClient(api_key, **client_options)
+        logger.info(f"🌐 VoyageAI client pool ready: {self.async_client.base_url} "
+                    f"(max {self.async_client.max_connections} connections)")
+
+    def _run(self, coroutine):
+        """Run a coroutine on the client loop and block until it finishes"""
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("Blocking VoyageAI call made from the client's own event loop")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _arun(self, coroutine):
+        """Run a coroutine on the client loop and await it from another event loop"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self._loop))
+
+    def multimodal_embed(self, inputs: List, model: str, input_type: Optional[str] = None,
+                         truncation: bool = True) -> EmbeddingResult:
+        """Blocking AsyncVoyageClient.multimodal_embed"""
+        return self._run(self.async_client.multimodal_embed(inputs, model, input_type, truncation))
+
+    def embed(self, texts: List[str], model: str, input_type: Optional[str] = None,
+              truncation: bool = True) -> EmbeddingResult:
+        """Blocking AsyncVoyageClient.embed"""
+        return self._run(self.async_client.embed(texts, model, input_type, truncation))
+
+    def rerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None,
+               truncation: bool = True) -> RerankResult:
+        """Blocking AsyncVoyageClient.rerank"""
+        return self._run(self.async_client.rerank(query, documents, model, top_k, truncation))
+
+    async def amultimodal_embed(self, inputs: List, model: str, input_type: Optional[str] = None,
+                                truncation: bool = True) -> EmbeddingResult:
+        """AsyncVoyageClient.multimodal_embed, awaitable from any event loop"""
+        return await self._arun(self.async_client.multimodal_embed(inputs, model, input_type, truncation))
+
+    async def aembed(self, texts: List[str], model: str, input_type: Optional[str] = None,
+                     truncation: bool = True) -> EmbeddingResult:
+        """AsyncVoyageClient.embed, awaitable from any event loop"""
+        return await self._arun(self.async_client.embed(texts, model, input_type, truncation))
+
+    async def arerank(self, query: str, documents: List[str], model: str, top_k: Optional[int] = None,
+                      truncation: bool = True) -> RerankResult:
+        """AsyncVoyageClient.rerank, awaitable from any event loop"""
+        return await self._arun(self.async_client.rerank(query, documents, model, top_k, truncation))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and connection pool statistics"""
+        return self.async_client.get_stats()
+
+    def close(self):
+        """Close pooled connections and stop the event loop thread"""
+        if not self._loop.is_running():
+            return
+        try:
+            self._run(self.async_client.aclose())
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing VoyageAI connections: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
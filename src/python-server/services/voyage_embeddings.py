@@ -16,12 +16,23 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import os
+import time
 import logging
+import threading
 from typing import List, Dict, Any, Optional
-import voyageai
-import base64
-from PIL import Image
-from io import BytesIO
+from services.rate_limiter import (
+    get_embedding_rate_limiter, get_embedding_concurrency_controller,
+    PRIORITY_INTERACTIVE, PRIORITY_BULK
+)
+from services.embedding_batch_builder import EmbeddingBatchBuilder
+from services.slide_image import SlideImage, get_slide_image
+from services.voyage_client import PooledVoyageClient
+from services.embedding_providers import EmbeddingProvider, VoyageProvider, create_embedding_provider
+from voyageai import error as api_error
+from services.retry_policy import (
+    RetryPolicy, CircuitOpenError, get_embedding_circuit_breaker,
+    ERROR_THROTTLE, ERROR_RETRYABLE, ERROR_FATAL
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,12 +48,45 @@ class VoyageEmbeddingsService:
     DEFAULT_BATCH_SIZE = 75   # Proven maximum batch size for reliable processing
     MAX_BATCH_SIZE = 1000      # VoyageAI theoretical maximum (not practical due to payload size)
     
-    def __init__(self, api_key: str = None, batch_size: int = None):
+    # VoyageAI model used for slide and query embeddings; the active provider's model
+    # (self.model) is part of the embedding store key and of the slide point ids
+    MULTIMODAL_MODEL = VoyageProvider.DEFAULT_MODEL
+    
+    # Token estimation for rate limiting: VoyageAI counts every 560 image pixels as one token
+    PIXELS_PER_TOKEN = 560
+    CHARS_PER_TOKEN = 4
+    
+    # Longest time a call waits for an open circuit: bulk work pauses, searches fail fast
+    BULK_CIRCUIT_WAIT_SECONDS = 600.0
+    INTERACTIVE_CIRCUIT_WAIT_SECONDS = 2.0
+    
+    def __init__(self, api_key: str = None, batch_size: int = None, embedding_store=None,
+                 rate_limiter=None, concurrency_controller=None,
+                 max_batch_bytes: int = None, max_batch_tokens: int = None,
+                 base_url: str = None, client_options: Dict[str, Any] = None, client=None,
+                 retry_policy: RetryPolicy = None, circuit_breaker=None,
+                 provider: EmbeddingProvider = None, provider_options: Dict[str, Any] = None):
         """
         Initialize VoyageAI client
         
         Args:
             api_key: VoyageAI API key (if None, will try to get from environment)
+            batch_size: Number of slides per embedding API request
+            embedding_store: Content-addressed slide embedding store (if None, uses the global store)
+            rate_limiter: Shared RPM/TPM limiter (if None, uses the global limiter)
+            concurrency_controller: Adaptive bulk concurrency controller (if None, uses the global controller)
+            max_batch_bytes: Upload byte limit per request (None for the batch builder default)
+            max_batch_tokens: Estimated token limit per request (None for the batch builder default)
+            base_url: API base URL (if None, VOYAGE_API_BASE or the public endpoint)
+            client_options: Connection pool limits and timeouts for the API client
+                            (max_connections, max_keepalive_connections, read_timeout, ...)
+            client: Existing API client to share (its connection pool is reused)
+            retry_policy: Retry policy for bulk embedding calls (if None, the default policy)
+            circuit_breaker: Shared circuit breaker (if None, uses the global breaker)
+            provider: Embedding provider producing the vectors (if None, the provider named by
+                      SIFFS_EMBEDDING_PROVIDER - the VoyageAI API by default)
+            provider_options: Options for the provider created when none is given
+                              (e.g. model_dir, threads, batch_size for the local provider)
         """
         # Hardcoded API key (temporary fix)
         self.api_key = api_key or "pa-lkitG0Pwd7QpXkb7EUyATIlTGHY2aJ6oYHMvOydjfk7"
@@ -64,6 +108,33 @@ class VoyageEmbeddingsService:
             logger.warning(f"Invalid batch size {self.batch_size}, using default {self.DEFAULT_BATCH_SIZE}")
             self.batch_size = self.DEFAULT_BATCH_SIZE
         
+        # Batches close at whichever of count, upload bytes or image tokens hits its limit first
+        self.batch_builder = EmbeddingBatchBuilder(
+            max_items=self.batch_size,
+            max_bytes=max_batch_bytes,
+            max_tokens=max_batch_tokens
+        )
+        
+        # Content-addressed store that lets duplicate slide images reuse their vectors
+        if embedding_store is None:
+            from services.slide_embedding_store import get_slide_embedding_store
+            embedding_store = get_slide_embedding_store()
+        self.embedding_store = embedding_store
+        
+        # Every API call draws from the same limiter; bulk batch calls are also gated by the controller
+        self.rate_limiter = rate_limiter or get_embedding_rate_limiter()
+        self.concurrency_controller = concurrency_controller or get_embedding_concurrency_controller()
+        
+        # Bulk calls retry patiently; searches retry once, briefly. One breaker guards all callers
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.query_retry_policy = RetryPolicy(max_attempts=2, base_delay=0.25, max_delay=2.0,
+                                              sleep=self.retry_policy.sleep)
+        self.circuit_breaker = circuit_breaker or get_embedding_circuit_breaker()
+        
+        # Failed batches are bisected to isolate the slides the API rejects
+        self.isolation_stats = {'batches_bisected': 0, 'bisect_requests': 0, 'slides_failed': 0}
+        self._isolation_lock = threading.Lock()  # pipeline embed workers share the service
+        
         logger.info(f"VoyageAI API key: {'SET' if self.api_key else 'NOT SET'}")
         logger.info(f"Batch size configured: {self.batch_size}")
         if self.api_key:
@@ -71,74 +142,48 @@ class VoyageEmbeddingsService:
             logger.info(f"VoyageAI API key starts with: {self.api_key[:10]}...")
         
         try:
-            self.client = voyageai.Client(api_key=self.api_key)
-            logger.info("VoyageAI client initialized successfully")
+            # One pooled client serves blocking callers (pipeline threads) and coroutines alike
+            def client_factory():
+                return client or PooledVoyageClient(self.api_key, base_url=base_url, **(client_options or {}))
+            
+            self.provider = provider or create_embedding_provider(client_factory=client_factory,
+                                                                  **(provider_options or {}))
+            self.client = getattr(self.provider, 'client', None)
+            self.model = self.provider.model
+            logger.info(f"Embedding provider initialized: {self.provider.name} ({self.model}, "
+                        f"{self.provider.dimension} dimensions)")
         except Exception as e:
-            logger.error(f"Failed to initialize VoyageAI client: {e}")
+            logger.error(f"Failed to initialize embedding provider: {e}")
             raise
     
-    def create_multimodal_embedding(self, image_base64: str, text: str = "") -> List[float]:
+    def create_multimodal_embedding(self, image, text: str = "") -> List[float]:
         """
         Create multimodal embedding for slide image with optional text
         
         Args:
-            image_base64: Base64 encoded image data
+            image: SlideImage, or base64 encoded image data
             text: Optional text to include in embedding
             
         Returns:
             List of embedding values
         """
         try:
-            # Prepare content list for multimodal embedding
-            # According to VoyageAI docs, content should be a list containing text strings and/or PIL images
-            content_list = []
-            
-            # Add text first if provided
-            if text:
-                content_list.append(text)
-            
-            # Convert base64 to PIL Image and add to content
-            if image_base64:
-                try:
-                    # Decode base64 to bytes
-                    import base64
-                    from PIL import Image
-                    from io import BytesIO
-                    
-                    image_bytes = base64.b64decode(image_base64)
-                    image = Image.open(BytesIO(image_bytes))
-                    content_list.append(image)
-                    
-                except Exception as e:
-                    logger.error(f"Error converting base64 to PIL Image: {e}")
-                    # If image conversion fails, continue with just text
-                    if not content_list:  # If no text was added either
-                        return []
-            
-            # If no content, return empty
-            if not content_list:
+            if isinstance(image, str):
+                image = SlideImage.from_base64(image) if image else None
+            
+            # Single input in VoyageAI's dict format; the image goes out as the data URI of its encoded bytes
+            content_input = self._build_content_input(text, image)
+            if content_input is None:
                 logger.warning("No content to create embedding for")
                 return []
             
-            # Create single input with content list
-            inputs = [content_list]  # VoyageAI expects List[List[Union[str, PIL.Image]]]
-            
-            # Debug logging
-            logger.info(f"🔍 VoyageAI input structure:")
-            logger.info(f"   Content list length: {len(content_list)}")
-            for i, item in enumerate(content_list):
-                if isinstance(item, str):
-                    logger.info(f"   Item {i}: Text (length: {len(item)})")
-                elif isinstance(item, Image.Image):
-                    logger.info(f"   Item {i}: PIL Image (size: {item.size})")
-                else:
-                    logger.info(f"   Item {i}: Unknown type ({type(item)})")
+            logger.info(f"🔍 VoyageAI input: {len(content_input['content'])} content pieces")
             
             # Create embedding using voyage-multimodal-3 model
-            result = self.client.multimodal_embed(
-                inputs=inputs,
-                model="voyage-multimodal-3",
-                input_type="document"  # Since we're indexing documents
+            result = self._call_multimodal_embed(
+                [content_input],
+                input_type="document",  # Since we're indexing documents
+                priority=PRIORITY_BULK
             )
             
             # Extract embedding vector
@@ -154,6 +199,32 @@ class VoyageEmbeddingsService:
             logger.error(f"Error creating multimodal embedding: {e}")
             raise
     
+    def _build_content_input(self, text: str, image: Optional[SlideImage]) -> Optional[Dict]:
+        """
+        Build one multimodal input in VoyageAI's dict format
+        
+        Passing PIL images would make the client re-encode every image (as lossless
+        WebP); sending the already encoded bytes as a data URI avoids decoding and
+        re-encoding, and base64 is produced here - at request time - only.
+        
+        Args:
+            text: Optional text segment
+            image: Optional slide image
+            
+        Returns:
+            Dictionary with a 'content' segment list, or None if there is no content
+        """
+        content = []
+        if text:
+            content.append({'type': 'text', 'text': text})
+        if image is not None:
+            try:
+                content.append({'type': 'image_base64', 'image_base64': image.to_data_uri()})
+            except Exception as e:
+                # Continue with just text if the image cannot be read
+                logger.error(f"Error reading slide image {image}: {e}")
+        return {'content': content} if content else None
+    
     def create_text_embedding(self, text: str) -> List[float]:
         """
         Create text-only embedding for search queries using multimodal model for compatibility
@@ -170,10 +241,14 @@ class VoyageEmbeddingsService:
             # Use multimodal model with text-only input for consistency with slide embeddings
             inputs = [[text]]  # Format as List[List[str]] for multimodal API
             
-            result = self.client.multimodal_embed(
-                inputs=inputs,
-                model="voyage-multimodal-3",  # Use same model as slide embeddings for compatibility
-                input_type="query"  # Specify this is a query, not a document
+            # Queries are interactive: they skip ahead of bulk indexing in the shared rate limiter
+            result = self.query_retry_policy.call(
+                lambda: self._call_multimodal_embed(
+                    inputs,
+                    input_type="query",  # Specify this is a query, not a document
+                    priority=PRIORITY_INTERACTIVE
+                ),
+                description="VoyageAI query embedding"
             )
             
             # Extract embedding vector  
@@ -189,6 +264,175 @@ class VoyageEmbeddingsService:
             logger.error(f"Error creating text embedding: {e}")
             raise
     
+    async def acreate_text_embedding(self, text: str) -> List[float]:
+        """
+        Create a query embedding without blocking the calling event loop
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            List of embedding values
+        """
+        try:
+            logger.info(f"🔍 Creating text embedding for query: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+            result = await self.query_retry_policy.acall(
+                lambda: self._acall_multimodal_embed(
+                    [[text]],
+                    input_type="query",
+                    priority=PRIORITY_INTERACTIVE
+                ),
+                description="VoyageAI query embedding"
+            )
+            
+            if result and result.embeddings and len(result.embeddings) > 0:
+                embedding = result.embeddings[0]
+                logger.info(f"✅ Created text embedding with {len(embedding)} dimensions")
+                return embedding
+            else:
+                logger.error("❌ No embedding returned from VoyageAI for text query")
+                return []
+                
+        except Exception as e:
+            logger.error(f"Error creating text embedding: {e}")
+            raise
+    
+    def estimate_tokens(self, content_batches: List) -> int:
+        """
+        Estimate the tokens VoyageAI will bill for a multimodal request
+        
+        Args:
+            content_batches: List of content lists containing text strings and/or PIL images,
+                             or of dict inputs with 'content' segments
+            
+        Returns:
+            Estimated token count
+        """
+        tokens = 0
+        for content_input in content_batches:
+            if isinstance(content_input, dict):
+                for segment in content_input.get('content', []):
+                    if segment.get('type') == 'text':
+                        tokens += max(1, len(segment.get('text', '')) // self.CHARS_PER_TOKEN)
+                    else:
+                        # Dimensions are not known here - assume a full HD slide export
+                        tokens += (1920 * 1080) // self.PIXELS_PER_TOKEN
+                continue
+            for item in content_input:
+                if isinstance(item, str):
+                    tokens += max(1, len(item) // self.CHARS_PER_TOKEN)
+                elif hasattr(item, 'size'):  # PIL Image
+                    width, height = item.size
+                    tokens += max(1, (width * height) // self.PIXELS_PER_TOKEN)
+        return tokens
+    
+    def _call_multimodal_embed(self, inputs: List, input_type: str, priority: str = PRIORITY_BULK,
+                               tokens: int = None):
+        """
+        Call the multimodal embedding API through the shared rate limiter
+        
+        Args:
+            inputs: List of content lists or dict inputs
+            input_type: "document" or "query"
+            priority: Rate limiter priority (interactive requests are served before bulk ones)
+            tokens: Precomputed token estimate (estimated from the inputs if None)
+            
+        Returns:
+            VoyageAI embedding result
+        """
+        if not self.provider.remote:
+            # Local inference is neither rate limited nor subject to upstream outages
+            return self.provider.multimodal_embed(inputs, input_type=input_type)
+        if tokens is None:
+            tokens = self.estimate_tokens(inputs)
+        self.circuit_breaker.acquire(self._circuit_wait(priority))
+        outcome = None
+        try:
+            waited = self.rate_limiter.acquire(tokens, priority=priority)
+            if waited > 1.0:
+                logger.info(f"🚦 Waited {waited:.2f}s for embedding rate limit ({priority})")
+            result = self.provider.multimodal_embed(inputs, input_type=input_type)
+            outcome = True
+            return result
+        except Exception as e:
+            outcome = self._record_call_error(e)
+            raise
+        finally:
+            self.circuit_breaker.release(outcome)
+    
+    async def _acall_multimodal_embed(self, inputs: List, input_type: str, priority: str = PRIORITY_BULK,
+                                      tokens: int = None):
+        """
+        Async _call_multimodal_embed: waits for the rate limiter and the response on the event loop
+        
+        Args:
+            inputs: List of content lists or dict inputs
+            input_type: "document" or "query"
+            priority: Rate limiter priority (interactive requests are served before bulk ones)
+            tokens: Precomputed token estimate (estimated from the inputs if None)
+            
+        Returns:
+            VoyageAI embedding result
+        """
+        if not self.provider.remote:
+            return await self.provider.amultimodal_embed(inputs, input_type=input_type)
+        if tokens is None:
+            tokens = self.estimate_tokens(inputs)
+        await self.circuit_breaker.acquire_async(self._circuit_wait(priority))
+        outcome = None
+        try:
+            waited = await self.rate_limiter.acquire_async(tokens, priority=priority)
+            if waited > 1.0:
+                logger.info(f"🚦 Waited {waited:.2f}s for embedding rate limit ({priority})")
+            result = await self.provider.amultimodal_embed(inputs, input_type=input_type)
+            outcome = True
+            return result
+        except Exception as e:
+            outcome = self._record_call_error(e)
+            raise
+        finally:
+            self.circuit_breaker.release(outcome)
+    
+    def _circuit_wait(self, priority: str) -> float:
+        """Longest time a call of this priority waits for the circuit breaker"""
+        if priority == PRIORITY_INTERACTIVE:
+            return self.INTERACTIVE_CIRCUIT_WAIT_SECONDS
+        return self.BULK_CIRCUIT_WAIT_SECONDS
+    
+    def _record_call_error(self, error: Exception) -> Optional[bool]:
+        """
+        Feed a failed API call into the rate limiter and return its circuit breaker outcome
+        
+        Args:
+            error: Error raised by the API call
+            
+        Returns:
+            False for upstream failures, None for errors that say nothing about upstream health
+        """
+        kind = self.retry_policy.classify(error)
+        if kind == ERROR_THROTTLE:
+            self.rate_limiter.record_throttle(self.retry_policy.retry_after(error))
+            return None
+        return False if kind == ERROR_RETRYABLE else None
+    
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """Get batch sizing, achieved upload throughput and failure isolation statistics"""
+        stats = self.batch_builder.get_stats()
+        with self._isolation_lock:
+            stats['failure_isolation'] = dict(self.isolation_stats)
+        return stats
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Get rate limiter, adaptive concurrency, circuit breaker and connection pool statistics"""
+        stats = {
+            'rate_limiter': self.rate_limiter.get_stats(),
+            'concurrency': self.concurrency_controller.get_stats()
+        }
+        stats['circuit_breaker'] = self.circuit_breaker.get_stats()
+        if hasattr(self.client, 'get_stats'):
+            stats['http_client'] = self.client.get_stats()
+        return stats
+    
     def create_slide_embedding(self, slide_data: Dict) -> Dict:
         """
         Create embedding for a single slide with metadata
@@ -201,7 +445,6 @@ class VoyageEmbeddingsService:
         """
         try:
             # Extract slide information
-            image_base64 = slide_data.get('image_base64', '')
             file_name = slide_data.get('file_name', '')
             slide_number = slide_data.get('slide_number', 0)
             
@@ -209,7 +452,7 @@ class VoyageEmbeddingsService:
             slide_text = f"Slide {slide_number} from {file_name}"
             
             # Create multimodal embedding
-            embedding = self.create_multimodal_embedding(image_base64, slide_text)
+            embedding = self.create_multimodal_embedding(get_slide_image(slide_data), slide_text)
             
             if not embedding:
                 raise ValueError("Failed to create embedding for slide")
@@ -217,30 +460,25 @@ class VoyageEmbeddingsService:
             # Return embedding with metadata
             return {
                 'embedding': embedding,
-                'metadata': {
-                    'file_path': slide_data.get('file_path', ''),
-                    'file_name': file_name,
-                    'slide_number': slide_number,
-                    'image_path': slide_data.get('image_path', ''),
-                    'slide_id': f"{file_name}_slide_{slide_number}"
-                }
+                'metadata': self._build_slide_metadata(slide_data)
             }
             
         except Exception as e:
             logger.error(f"Error creating slide embedding: {e}")
             raise
     
-    def create_batch_multimodal_embeddings(self, content_batches: List[List]) -> List[List[float]]:
+    def create_batch_multimodal_embeddings(self, content_batches: List, tokens: int = None) -> List[List[float]]:
         """
         Create multimodal embeddings for multiple content items in a single API call
         
         Args:
-            content_batches: List of content lists, each containing [text, PIL.Image] items
+            content_batches: List of content lists ([text, PIL.Image] items) or of dict inputs
+                             with 'content' segments - one kind per call
+            tokens: Precomputed token estimate for the rate limiter (estimated from the inputs if None)
             
         Returns:
             List of embedding vectors
         """
-        import time
         start_time = time.time()
         
         try:
@@ -251,12 +489,17 @@ class VoyageEmbeddingsService:
             logger.info(f"🔍 Starting VoyageAI batch embedding for {len(content_batches)} items...")
             
             # Debug logging for batch structure (first 3 items only)
-            for i, content_list in enumerate(content_batches[:3]):
+            for i, content_input in enumerate(content_batches[:3]):
+                content_list = content_input.get('content', []) if isinstance(content_input, dict) else content_input
                 logger.info(f"   📝 Batch item {i+1}: {len(content_list)} content pieces")
                 for j, item in enumerate(content_list):
+                    if isinstance(item, dict) and item.get('type') == 'text':
+                        item = item.get('text', '')
                     if isinstance(item, str):
                         text_preview = item[:50] + ('...' if len(item) > 50 else '')
                         logger.info(f"      - Text: '{text_preview}'")
+                    elif isinstance(item, dict):  # Encoded image segment
+                        logger.info(f"      - Image: {len(item.get('image_base64', '')) / 1024:.0f}KB data URI")
                     elif hasattr(item, 'size'):  # PIL Image
                         logger.info(f"      - Image: {item.size} ({item.mode})")
                     else:
@@ -269,31 +512,28 @@ class VoyageEmbeddingsService:
             
             api_start = time.time()
             
-            # Create embeddings using voyage-multimodal-3 model with batch processing
-            # Add retry mechanism with exponential backoff
-            max_retries = 3
-            retry_delay = 2  # seconds
-            result = None
-            
-            for attempt in range(max_retries):
-                try:
-                    if attempt > 0:
-                        wait_time = retry_delay * (2 ** (attempt - 1))
-                        logger.info(f"⏳ Retry attempt {attempt + 1}/{max_retries} after {wait_time}s delay...")
-                        time.sleep(wait_time)
-                    
-                    result = self.client.multimodal_embed(
-                        inputs=content_batches,  # Send all batches in one API call
-                        model="voyage-multimodal-3",
-                        input_type="document"  # Since we're indexing documents
+            # Create embeddings using voyage-multimodal-3 model with batch processing.
+            # Throttled calls wait for Retry-After, transient failures back off with jitter,
+            # request errors are not retried; the shared circuit breaker pauses all callers
+            # while the upstream is failing.
+            def attempt():
+                # Send all batches in one API call, gated by the adaptive concurrency limit
+                with self.concurrency_controller.slot():
+                    call_start = time.time()
+                    response = self._call_multimodal_embed(
+                        content_batches,
+                        input_type="document",  # Since we're indexing documents
+                        priority=PRIORITY_BULK,
+                        tokens=tokens
                     )
-                    break  # Success, exit retry loop
-                    
-                except Exception as api_error:
-                    logger.warning(f"⚠️ VoyageAI API attempt {attempt + 1} failed: {str(api_error)}")
-                    if attempt == max_retries - 1:
-                        raise  # Re-raise on final attempt
-                    continue
+                    self.concurrency_controller.record_success(time.time() - call_start, len(content_batches))
+                    return response
+            
+            def on_error(api_error: Exception, kind: str):
+                if kind == ERROR_THROTTLE:
+                    self.concurrency_controller.record_throttle()
+            
+            result = self.retry_policy.call(attempt, description="VoyageAI batch embedding", on_error=on_error)
             
             api_time = time.time() - api_start
             total_time = time.time() - start_time
@@ -319,17 +559,23 @@ class VoyageEmbeddingsService:
             logger.error(f"   Batch size: {len(content_batches)} items")
             raise
     
-    def create_batch_slide_embeddings(self, slides_data: List[Dict]) -> List[Dict]:
+    def create_batch_slide_embeddings(self, slides_data: List[Dict], failures: List[Dict] = None) -> List[Dict]:
         """
         Create embeddings for multiple slides using efficient batch processing
         
         Performance: ~25x faster than individual processing with batch size 100
         - Processes ~0.6 images/second (including conversion time)
         - Optimal batch size: 100 (larger batches cause network timeouts)
-        - Automatically falls back to individual processing on batch failures
+        - A batch rejected because of its content is bisected until the poisoned
+          slides are isolated (O(log n) extra requests per bad slide)
+        - Slide images already embedded (same image bytes + model) are served from
+          the content-addressed embedding store and only unique images hit the API
         
         Args:
             slides_data: List of slide data dictionaries
+            failures: Optional list receiving {'file_path', 'file_name', 'slide_number', 'error',
+                      'retryable'} for every slide that could not be embedded; 'retryable' is
+                      True when the API was unavailable rather than the slide rejected
             
         Returns:
             List of embedding dictionaries
@@ -340,107 +586,44 @@ class VoyageEmbeddingsService:
         
         import time
         start_time = time.time()
+        total_slides = len(slides_data)
+        
+        # Serve duplicate slide images from the embedding store before building any batches
+        all_embeddings, slides_data, content_keys, duplicates = self._resolve_stored_embeddings(slides_data)
+        if all_embeddings:
+            logger.info(f"♻️ Reused {len(all_embeddings)}/{total_slides} embeddings from the embedding store")
+        if not slides_data:
+            logger.info(f"🎉 All {total_slides} slide embeddings served from the embedding store")
+            return all_embeddings
+        
         logger.info(f"🚀 Starting batch embedding processing for {len(slides_data)} slides (batch size: {self.batch_size})")
         logger.info(f"⏱️ Estimated processing time: ~{len(slides_data) * 0.4:.1f}s at 2.5 slides/second")
         
-        all_embeddings = []
-        total_batches = (len(slides_data) + self.batch_size - 1) // self.batch_size
+        # Cut by count, upload bytes and image tokens so large PNG exports don't form oversized requests
+        batches = self.batch_builder.split(slides_data)
+        total_batches = len(batches)
         
         # Process slides in batches
-        for batch_idx in range(0, len(slides_data), self.batch_size):
-            batch_end = min(batch_idx + self.batch_size, len(slides_data))
-            current_batch = slides_data[batch_idx:batch_end]
-            batch_num = (batch_idx // self.batch_size) + 1
-            
+        for batch_num, current_batch in enumerate(batches, 1):
             batch_start_time = time.time()
-            logger.info(f"📦 Processing batch {batch_num}/{total_batches} ({len(current_batch)} slides) - Started at {time.strftime('%H:%M:%S')}")
+            batch_bytes = self.batch_builder.batch_bytes(current_batch)
+            logger.info(f"📦 Processing batch {batch_num}/{total_batches} ({len(current_batch)} slides, "
+                        f"{batch_bytes / (1024 * 1024):.1f}MB) - Started at {time.strftime('%H:%M:%S')}")
             
             try:
-                # Prepare content batches for this batch of slides
-                prep_start = time.time()
-                content_batches = []
-                batch_metadata = []
-                
-                for slide_data in current_batch:
-                    # Prepare content list for each slide
-                    content_list = []
-                    
-                    # Extract slide information
-                    image_base64 = slide_data.get('image_base64', '')
-                    file_name = slide_data.get('file_name', '')
-                    slide_number = slide_data.get('slide_number', 0)
-                    
-                    # Create text context for the slide
-                    slide_text = f"Slide {slide_number} from {file_name}"
-                    content_list.append(slide_text)
-                    
-                    # Convert base64 to PIL Image and add to content
-                    if image_base64:
-                        try:
-                            import base64
-                            from PIL import Image
-                            from io import BytesIO
-                            
-                            image_bytes = base64.b64decode(image_base64)
-                            image = Image.open(BytesIO(image_bytes))
-                            content_list.append(image)
-                        except Exception as e:
-                            logger.error(f"Error converting base64 to PIL Image for {file_name} slide {slide_number}: {e}")
-                            # Continue with just text if image conversion fails
-                    
-                    content_batches.append(content_list)
-                    
-                    # Store metadata for later use
-                    batch_metadata.append({
-                        'file_path': slide_data.get('file_path', ''),
-                        'file_name': file_name,
-                        'slide_number': slide_number,
-                        'image_path': slide_data.get('image_path', ''),
-                        'slide_id': f"{file_name}_slide_{slide_number}"
-                    })
-                
-                # Log preparation timing
-                prep_time = time.time() - prep_start
-                logger.info(f"⚙️ Batch {batch_num} preparation completed in {prep_time:.2f}s - calling VoyageAI API...")
-                
-                # Create embeddings for the entire batch in one API call
-                api_call_start = time.time()
-                batch_embeddings = self.create_batch_multimodal_embeddings(content_batches)
-                api_call_time = time.time() - api_call_start
-                
-                if len(batch_embeddings) != len(current_batch):
-                    logger.error(f"❌ Mismatch: Expected {len(current_batch)} embeddings, got {len(batch_embeddings)}")
-                    # Fall back to individual processing for this batch
-                    logger.info(f"🔄 Falling back to individual processing for batch {batch_num}")
-                    batch_embeddings = self._process_batch_individually(current_batch)
-                
-                # Combine embeddings with metadata
-                for i, embedding in enumerate(batch_embeddings):
-                    if i < len(batch_metadata):  # Safety check
-                        embedding_data = {
-                            'embedding': embedding,
-                            'metadata': batch_metadata[i]
-                        }
-                        all_embeddings.append(embedding_data)
-                
-                batch_total_time = time.time() - batch_start_time
-                logger.info(f"✅ Completed batch {batch_num}/{total_batches}: {len(batch_embeddings)} embeddings")
-                logger.info(f"⏱️ Batch {batch_num} timing breakdown:")
-                logger.info(f"   - Preparation: {prep_time:.2f}s")
-                logger.info(f"   - API call: {api_call_time:.2f}s")
-                logger.info(f"   - Total batch: {batch_total_time:.2f}s")
-                logger.info(f"   - Rate: {len(batch_embeddings)/batch_total_time:.2f} embeddings/second")
-                
+                batch_results = self._embed_slide_batch(current_batch, batch_bytes)
             except Exception as e:
                 logger.error(f"❌ Error processing batch {batch_num}: {e}")
-                # Fall back to individual processing for this batch
-                logger.info(f"🔄 Falling back to individual processing for batch {batch_num}")
-                individual_embeddings = self._process_batch_individually(current_batch)
-                all_embeddings.extend(individual_embeddings)
-                continue
+                batch_results, batch_failures = self._isolate_failed_slides(current_batch, e)
+                self._record_slide_failures(batch_failures, content_keys, duplicates, failures)
+            
+            all_embeddings.extend(self._store_and_fan_out(batch_results, content_keys, duplicates))
+            
+            batch_total_time = time.time() - batch_start_time
+            logger.info(f"✅ Completed batch {batch_num}/{total_batches}: {len(batch_results)} embeddings "
+                        f"in {batch_total_time:.2f}s ({len(batch_results)/batch_total_time:.2f} embeddings/second)")
         
         success_count = len(all_embeddings)
-        total_slides = len(slides_data)
         total_time = time.time() - start_time
         
         logger.info(f"🎉 Batch processing completed: {success_count}/{total_slides} embeddings created successfully")
@@ -451,31 +634,226 @@ class VoyageEmbeddingsService:
         
         return all_embeddings
     
-    def _process_batch_individually(self, slides_data: List[Dict]) -> List[Dict]:
+    def _build_slide_metadata(self, slide_data: Dict) -> Dict:
+        """Build the embedding metadata for a slide"""
+        file_name = slide_data.get('file_name', '')
+        slide_number = slide_data.get('slide_number', 0)
+        return {
+            'file_path': slide_data.get('file_path', ''),
+            'file_name': file_name,
+            'slide_number': slide_number,
+            'image_path': slide_data.get('image_path', ''),
+            'slide_id': f"{file_name}_slide_{slide_number}",
+            'model': self.model
+        }
+    
+    @staticmethod
+    def _slide_key(metadata: Dict) -> tuple:
+        """Identify a slide within a batch call by file path and slide number"""
+        return (metadata.get('file_path', ''), metadata.get('slide_number', 0))
+    
+    def _resolve_stored_embeddings(self, slides_data: List[Dict]):
         """
-        Fallback method to process slides individually when batch processing fails
+        Split slides into those served from the embedding store and unique slides still to embed
+        
+        Slides sharing identical image bytes within the call are collapsed to one
+        representative; the others receive its vector once it has been created.
         
         Args:
             slides_data: List of slide data dictionaries
             
         Returns:
-            List of embedding dictionaries
+            Tuple of (reused embedding dicts, unique slides to embed,
+                      content key per slide, duplicate slides per content key)
         """
-        logger.info(f"🔄 Processing {len(slides_data)} slides individually as fallback")
-        embeddings = []
+        if not self.embedding_store:
+            return [], slides_data, {}, {}
+        
+        content_keys = {}   # slide key -> content key
+        slides_by_key = {}  # content key -> slides sharing that image
+        unkeyed = []
         
-        for i, slide_data in enumerate(slides_data):
+        for slide_data in slides_data:
+            image = get_slide_image(slide_data)
+            if image is None:
+                unkeyed.append(slide_data)
+                continue
             try:
-                embedding_data = self.create_slide_embedding(slide_data)
-                embeddings.append(embedding_data)
-                logger.debug(f"   Individual embedding created for slide {i+1}/{len(slides_data)}")
-                
-            except Exception as e:
-                logger.error(f"   Failed to create individual embedding for slide {i+1}: {e}")
+                # Hash the encoded bytes in place (memory-mapped for file-backed images)
+                with image.buffer() as image_bytes:
+                    content_key = self.embedding_store.compute_key(image_bytes, self.model)
+            except Exception:
+                unkeyed.append(slide_data)
+                continue
+            content_keys[self._slide_key(self._build_slide_metadata(slide_data))] = content_key
+            slides_by_key.setdefault(content_key, []).append(slide_data)
+        
+        stored = self.embedding_store.get_many(list(slides_by_key.keys()))
+        
+        reused = []
+        to_embed = list(unkeyed)
+        duplicates = {}
+        for content_key, group in slides_by_key.items():
+            if content_key in stored:
+                for slide_data in group:
+                    reused.append({
+                        'embedding': stored[content_key],
+                        'metadata': self._build_slide_metadata(slide_data)
+                    })
+            else:
+                to_embed.append(group[0])
+                if len(group) > 1:
+                    duplicates[content_key] = group[1:]
+        
+        return reused, to_embed, content_keys, duplicates
+    
+    def _store_and_fan_out(self, results: List[Dict], content_keys: Dict, duplicates: Dict) -> List[Dict]:
+        """
+        Save freshly created vectors to the embedding store and copy them to duplicate slides
+        
+        Args:
+            results: Embedding dicts created for unique slides
+            content_keys: Content key per slide key
+            duplicates: Duplicate slides per content key
+            
+        Returns:
+            The results plus embedding dicts for the duplicate slides
+        """
+        if not self.embedding_store or not results:
+            return results
+        
+        to_store = []
+        fanned_out = list(results)
+        for result in results:
+            content_key = content_keys.get(self._slide_key(result['metadata']))
+            if not content_key or not result.get('embedding'):
                 continue
+            to_store.append((content_key, result['embedding']))
+            for slide_data in duplicates.pop(content_key, []):
+                fanned_out.append({
+                    'embedding': result['embedding'],
+                    'metadata': self._build_slide_metadata(slide_data)
+                })
+        
+        self.embedding_store.put_many(to_store)
+        return fanned_out
+    
+    def _embed_slide_batch(self, slides: List[Dict], batch_bytes: int = None) -> List[Dict]:
+        """
+        Embed slides in one API request
+        
+        Args:
+            slides: Slide data dictionaries
+            batch_bytes: Upload size of the slides (computed if None)
+            
+        Returns:
+            Embedding dicts in slide order
+            
+        Raises:
+            Exception: If the request fails or returns a different number of embeddings
+        """
+        content_batches = []
+        batch_metadata = []
+        for slide_data in slides:
+            # Create text context for the slide
+            slide_text = f"Slide {slide_data.get('slide_number', 0)} from {slide_data.get('file_name', '')}"
+            
+            # Encoded image bytes go straight into the request (no decode/re-encode)
+            content_batches.append(self._build_content_input(slide_text, get_slide_image(slide_data)))
+            batch_metadata.append(self._build_slide_metadata(slide_data))
+        
+        if batch_bytes is None:
+            batch_bytes = self.batch_builder.batch_bytes(slides)
+        batch_tokens = sum(self.batch_builder.estimate_item(slide_data)[1] for slide_data in slides)
+        api_call_start = time.time()
+        batch_embeddings = self.create_batch_multimodal_embeddings(content_batches, tokens=batch_tokens)
+        api_call_time = time.time() - api_call_start
+        self.batch_builder.record_request(batch_bytes, api_call_time)
+        logger.info(f"   - API call: {api_call_time:.2f}s ({batch_bytes / max(api_call_time, 0.001) / 1024:.0f} KB/s upload)")
+        
+        if len(batch_embeddings) != len(slides):
+            raise ValueError(f"Expected {len(slides)} embeddings, got {len(batch_embeddings)}")
+        
+        return [
+            {'embedding': embedding, 'metadata': metadata}
+            for embedding, metadata in zip(batch_embeddings, batch_metadata)
+        ]
+    
+    def _isolate_failed_slides(self, slides: List[Dict], error: Exception):
+        """
+        Find the slides that made a batch fail by recursive bisection
+        
+        The failed batch is split in halves and each half is retried; halves that
+        fail again are split further until single poisoned slides remain. One bad
+        slide in n costs about 2*log2(n) extra requests instead of n single-slide calls.
+        When the failure is not caused by the content (throttling, outage, open
+        circuit, authentication) the batch is not split - every half would fail the same way.
         
-        logger.info(f"✅ Individual processing completed: {len(embeddings)}/{len(slides_data)} embeddings")
-        return embeddings
+        Args:
+            slides: Slides of the failed batch
+            error: Error the batch failed with
+            
+        Returns:
+            Tuple of (embedding dicts of the slides that succeeded,
+                      list of (slide data, error message, retryable) for the slides that failed)
+        """
+        if not self._is_content_error(error):
+            logger.warning(f"⚠️ Not bisecting {len(slides)} slides: embedding API unavailable ({error})")
+            return [], [(slide_data, str(error), True) for slide_data in slides]
+        
+        if len(slides) == 1:
+            slide_data = slides[0]
+            logger.error(f"☠️ Slide {slide_data.get('slide_number')} of {slide_data.get('file_path')} "
+                         f"cannot be embedded: {error}")
+            return [], [(slide_data, str(error), False)]
+        
+        with self._isolation_lock:
+            self.isolation_stats['batches_bisected'] += 1
+            self.isolation_stats['bisect_requests'] += 2
+        middle = len(slides) // 2
+        results, failed = [], []
+        for half in (slides[:middle], slides[middle:]):
+            try:
+                results.extend(self._embed_slide_batch(half))
+            except Exception as half_error:
+                half_results, half_failed = self._isolate_failed_slides(half, half_error)
+                results.extend(half_results)
+                failed.extend(half_failed)
+        return results, failed
+    
+    def _is_content_error(self, error: Exception) -> bool:
+        """Check whether a batch failed because of what it contained (as opposed to the API being unavailable)"""
+        if isinstance(error, (CircuitOpenError, api_error.AuthenticationError)):
+            return False
+        return self.retry_policy.classify(error) == ERROR_FATAL
+    
+    def _record_slide_failures(self, failed: List, content_keys: Dict, duplicates: Dict,
+                               failures: Optional[List[Dict]]):
+        """
+        Report slides that could not be embedded, including duplicates that shared their image
+        
+        Args:
+            failed: (slide data, error message, retryable) triples from _isolate_failed_slides
+            content_keys: Content key per slide key
+            duplicates: Duplicate slides per content key
+            failures: Caller's failure list (may be None)
+        """
+        for slide_data, message, retryable in failed:
+            content_key = content_keys.get(self._slide_key(self._build_slide_metadata(slide_data)))
+            failed_slides = [slide_data] + duplicates.pop(content_key, [])
+            with self._isolation_lock:
+                self.isolation_stats['slides_failed'] += len(failed_slides)
+            if failures is not None:
+                failures.extend({
+                    'file_path': failed_slide.get('file_path', ''),
+                    'file_name': failed_slide.get('file_name', ''),
+                    'slide_number': failed_slide.get('slide_number', 0),
+                    'error': message,
+                    'retryable': retryable
+                } for failed_slide in failed_slides)
+    
+    # Reranker model used for search results
+    RERANK_MODEL = "rerank-2.5-lite"  # Fast and high quality
     
     def rerank_slides(self, query: str, slide_results: List[Dict], top_k: int = None) -> List[Dict]:
         """
@@ -490,79 +868,111 @@ class VoyageEmbeddingsService:
             Reranked list of slide results
         """
         try:
-            if not slide_results:
+            if not slide_results or not self.provider.supports_rerank:
                 return slide_results
                 
             logger.info(f"🔄 Reranking {len(slide_results)} slides with query: '{query[:50]}{'...' if len(query) > 50 else ''}'")
             
-            # Extract text representations for reranking
-            # Since VoyageAI reranker only works with text, we create text representations
-            documents = []
-            for result in slide_results:
-                # Create a text representation of each slide
-                file_name = result.get('file_name', 'Unknown')
-                slide_num = result.get('slide_number', 0)
-                
-                # Create a descriptive text for the slide
-                slide_text = f"Slide {slide_num} from {file_name}"
-                
-                # If we had OCR text from the slides, we would add it here:
-                # slide_text += f" Content: {result.get('ocr_text', '')}"
-                
-                documents.append(slide_text)
-            
             # Use VoyageAI reranker
-            reranking_result = self.client.rerank(
+            reranking_result = self.provider.rerank(
                 query=query,
-                documents=documents,
-                model="rerank-2.5-lite",  # Fast and high quality
-                top_k=top_k,
-                truncation=True
+                documents=self._rerank_documents(slide_results),
+                model=self.RERANK_MODEL,
+                top_k=top_k
             )
+            return self._apply_rerank(slide_results, reranking_result)
             
-            # Reorder the slide results based on reranking
-            reranked_results = []
-            for ranking_result in reranking_result.results:
-                original_index = ranking_result.index
-                slide_result = slide_results[original_index].copy()
-                
-                # Update the score with the reranker score
-                # Combine both vector similarity and reranker scores
-                original_score = slide_result.get('score', 0.0)
-                rerank_score = ranking_result.relevance_score
-                
-                # Weighted combination: 60% reranker, 40% original vector score
-                combined_score = (0.6 * rerank_score) + (0.4 * original_score)
-                slide_result['score'] = combined_score
-                slide_result['rerank_score'] = rerank_score
-                slide_result['original_score'] = original_score
-                
-                reranked_results.append(slide_result)
+        except Exception as e:
+            logger.error(f"❌ Error during reranking: {e}")
+            logger.info("🔄 Falling back to original vector search results")
+            return slide_results
+    
+    async def arerank_slides(self, query: str, slide_results: List[Dict], top_k: int = None) -> List[Dict]:
+        """
+        Rerank slide results without blocking the calling event loop (see rerank_slides)
+        
+        Args:
+            query: The search query text
+            slide_results: List of slide result dictionaries from vector search
+            top_k: Number of top results to return after reranking
             
-            logger.info(f"✅ Reranking completed: {len(reranked_results)} results")
-            if reranked_results:
-                logger.info(f"   Top result: combined_score={reranked_results[0]['score']:.4f}, rerank_score={reranked_results[0]['rerank_score']:.4f}")
+        Returns:
+            Reranked list of slide results
+        """
+        try:
+            if not slide_results or not self.provider.supports_rerank:
+                return slide_results
+                
+            logger.info(f"🔄 Reranking {len(slide_results)} slides with query: '{query[:50]}{'...' if len(query) > 50 else ''}'")
             
-            return reranked_results
+            reranking_result = await self.provider.arerank(
+                query=query,
+                documents=self._rerank_documents(slide_results),
+                model=self.RERANK_MODEL,
+                top_k=top_k
+            )
+            return self._apply_rerank(slide_results, reranking_result)
             
         except Exception as e:
             logger.error(f"❌ Error during reranking: {e}")
             logger.info("🔄 Falling back to original vector search results")
             return slide_results
     
+    @staticmethod
+    def _rerank_documents(slide_results: List[Dict]) -> List[str]:
+        """Build the text representation of each slide sent to the reranker"""
+        # Since VoyageAI reranker only works with text, we create text representations
+        documents = []
+        for result in slide_results:
+            # Create a text representation of each slide
+            file_name = result.get('file_name', 'Unknown')
+            slide_num = result.get('slide_number', 0)
+            
+            # Create a descriptive text for the slide
+            slide_text = f"Slide {slide_num} from {file_name}"
+            
+            # If we had OCR text from the slides, we would add it here:
+            # slide_text += f" Content: {result.get('ocr_text', '')}"
+            
+            documents.append(slide_text)
+        return documents
+    
+    @staticmethod
+    def _apply_rerank(slide_results: List[Dict], reranking_result) -> List[Dict]:
+        """Reorder slide results by reranker relevance and combine the scores"""
+        reranked_results = []
+        for ranking_result in reranking_result.results:
+            original_index = ranking_result.index
+            slide_result = slide_results[original_index].copy()
+            
+            # Update the score with the reranker score
+            # Combine both vector similarity and reranker scores
+            original_score = slide_result.get('score', 0.0)
+            rerank_score = ranking_result.relevance_score
+            
+            # Weighted combination: 60% reranker, 40% original vector score
+            combined_score = (0.6 * rerank_score) + (0.4 * original_score)
+            slide_result['score'] = combined_score
+            slide_result['rerank_score'] = rerank_score
+            slide_result['original_score'] = original_score
+            
+            reranked_results.append(slide_result)
+        
+        logger.info(f"✅ Reranking completed: {len(reranked_results)} results")
+        if reranked_results:
+            logger.info(f"   Top result: combined_score={reranked_results[0]['score']:.4f}, rerank_score={reranked_results[0]['rerank_score']:.4f}")
+        
+        return reranked_results
+    
     def get_embedding_dimension(self) -> int:
-        """Get the dimension of embeddings from VoyageAI"""
-        try:
-            # Create a test embedding to get dimensions
-            test_result = self.client.embed(
-                texts=["test"],
-                model="voyage-3"
-            )
-            if test_result and test_result.embeddings:
-                return len(test_result.embeddings[0])
-            return 1024  # Default dimension for voyage-3
-        except:
-            return 1024  # Fallback
+        """Get the dimension of the provider's embeddings"""
+        return self.provider.dimension
+    
+    def get_provider_info(self) -> Dict[str, Any]:
+        """Get the provider, model and dimension of the vectors with the provider's statistics"""
+        info = self.provider.describe()
+        info['stats'] = self.provider.get_stats()
+        return info
 
 # Global embeddings service instance
 _embeddings_service = None
@@ -602,5 +1012,7 @@ def configure_voyage_batch_size(batch_size: int) -> VoyageEmbeddingsService:
         Configured VoyageEmbeddingsService instance
     """
     global _embeddings_service
-    _embeddings_service = VoyageEmbeddingsService(batch_size=batch_size)
+    # Keep the existing provider (connection pool or loaded model) - only the batch size changes
+    provider = _embeddings_service.provider if _embeddings_service is not None else None
+    _embeddings_service = VoyageEmbeddingsService(batch_size=batch_size, provider=provider)
     return _embeddings_service
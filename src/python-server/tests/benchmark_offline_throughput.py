@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Offline ingestion and search throughput benchmark against the local VoyageAI stand-in
+
+Runs the real embedding service (batch builder, rate limiter, adaptive concurrency,
+retry policy, circuit breaker, failure isolation, pooled client) against
+voyage_stub_server instead of the live API, so results are reproducible and the
+effect of latency, throttling and upstream faults can be measured in isolation.
+
+    python tests/benchmark_offline_throughput.py --slides 600 --latency-ms 400 --throttle-rate 0.05
+    python tests/benchmark_offline_throughput.py --base-url http://127.0.0.1:8765/v1   # external stand-in
+
+The live-API scripts (test_production_batch_limits, test_ultra_fast_batch,
+test_real_world_batch) can be pointed at a running stand-in the same way the
+app can: set VOYAGE_API_BASE to its base URL.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+sys.path.append(str(current_dir))
+
+from PIL import Image
+from services.slide_image import SlideImage
+from services.slide_embedding_store import SlideEmbeddingStore
+from services.rate_limiter import TokenBucketRateLimiter, AdaptiveConcurrencyController
+from services.retry_policy import RetryPolicy, CircuitBreaker
+from services.voyage_client import PooledVoyageClient
+from services.voyage_embeddings import VoyageEmbeddingsService
+from voyage_stub_server import VoyageStubServer, StubBehavior
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def create_slides(count: int, size=(1280, 720)) -> List[Dict]:
+    """Distinct slide images (JPEG, like normalized slide exports) so none are served from the embedding store"""
+    slides = []
+    for n in range(count):
+        image = Image.new('RGB', size, (n % 251, (n // 251) % 251, 96))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        slides.append({
+            'file_path': f"/benchmark/deck_{n // 50}.pptx",
+            'file_name': f"deck_{n // 50}.pptx",
+            'slide_number': n % 50 + 1,
+            'image': SlideImage.from_bytes(buffer.getvalue())
+        })
+    return slides
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+def run_ingestion(service: VoyageEmbeddingsService, slides: List[Dict], workers: int) -> Dict[str, Any]:
+    """Embed slides from several pipeline-like worker threads"""
+    chunk_size = max(1, len(slides) // workers)
+    chunks = [slides[i:i + chunk_size] for i in range(0, len(slides), chunk_size)]
+    failures = []
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda chunk: service.create_batch_slide_embeddings(chunk, failures), chunks))
+    elapsed = time.time() - start
+
+    embedded = sum(len(result) for result in results)
+    return {
+        'slides': len(slides),
+        'embedded': embedded,
+        'failed': len(failures),
+        'seconds': round(elapsed, 2),
+        'slides_per_second': round(embedded / elapsed, 2) if elapsed else 0.0
+    }
+
+async def run_search(service: VoyageEmbeddingsService, queries: int, concurrency: int, rerank: bool) -> Dict[str, Any]:
+    """Concurrent query embeddings (and reranking of a fixed candidate list) on one event loop"""
+    semaphore = asyncio.Semaphore(concurrency)
+    candidates = [{'file_name': f"deck_{n // 10}.pptx", 'slide_number': n % 10 + 1, 'score': 0.5} for n in range(25)]
+    latencies, errors = [], 0
+
+    async def search(n: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.time()
+            try:
+                embedding = await service.acreate_text_embedding(f"benchmark query {n}")
+                if rerank and embedding:
+                    await service.arerank_slides(f"benchmark query {n}", candidates, top_k=10)
+                latencies.append(time.time() - start)
+            except Exception as e:
+                errors += 1
+                logger.warning(f"⚠️ Query {n} failed: {e}")
+
+    start = time.time()
+    await asyncio.gather(*(search(n) for n in range(queries)))
+    elapsed = time.time() - start
+    return {
+        'queries': queries,
+        'failed': errors,
+        'seconds': round(elapsed, 2),
+        'queries_per_second': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1)
+    }
+
+def run_benchmark(args, base_url: str) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        client = PooledVoyageClient('benchmark-key', base_url=base_url, read_timeout=args.read_timeout,
+                                    max_connections=args.max_connections)
+        service = VoyageEmbeddingsService(
+            batch_size=args.batch_size,
+            client=client,
+            embedding_store=SlideEmbeddingStore(db_path=os.path.join(tmp, 'embedding_store.db')),
+            rate_limiter=TokenBucketRateLimiter(requests_per_minute=args.client_rpm, throttle_pause_seconds=1.0),
+            concurrency_controller=AdaptiveConcurrencyController(initial_limit=args.workers, max_limit=args.workers),
+            retry_policy=RetryPolicy(max_attempts=args.max_attempts, base_delay=0.25, max_delay=5.0),
+            circuit_breaker=CircuitBreaker(open_seconds=2.0, max_open_seconds=10.0)
+        )
+        try:
+            logger.info(f"🚀 Ingestion: {args.slides} slides, batch size {args.batch_size}, {args.workers} workers")
+            ingestion = run_ingestion(service, create_slides(args.slides), args.workers)
+            logger.info(f"📦 Ingestion: {ingestion}")
+
+            logger.info(f"🔍 Search: {args.queries} queries, concurrency {args.search_concurrency}")
+            search = asyncio.run(run_search(service, args.queries, args.search_concurrency, not args.no_rerank))
+            logger.info(f"🔍 Search: {search}")
+
+            return {
+                'ingestion': ingestion,
+                'search': search,
+                'client': service.get_rate_limit_stats(),
+                'batching': service.get_batching_stats()
+            }
+        finally:
+            client.close()
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Offline ingestion/search throughput benchmark")
+    parser.add_argument('--base-url', help="Use a running stand-in instead of starting one")
+    parser.add_argument('--slides', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=75)
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent embedding threads")
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--search-concurrency', type=int, default=16)
+    parser.add_argument('--no-rerank', action='store_true')
+    parser.add_argument('--client-rpm', type=int, default=2000, help="Client-side rate limit")
+    parser.add_argument('--max-attempts', type=int, default=4)
+    parser.add_argument('--read-timeout', type=float, default=10.0)
+    parser.add_argument('--max-connections', type=int, default=64)
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    for name, field_type in StubBehavior.FIELDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=field_type, default=None,
+                            help="Stand-in setting (ignored with --base-url)")
+    args = parser.parse_args(argv)
+
+    behavior = {name: getattr(args, name) for name in StubBehavior.FIELDS if getattr(args, name) is not None}
+    if args.base_url:
+        report = run_benchmark(args, args.base_url)
+    else:
+        with VoyageStubServer(**behavior) as server:
+            report = run_benchmark(args, server.base_url)
+            report['stand_in'] = server.get_stats()
+
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test bisecting isolation of slides that make an embedding batch fail
+"""
+
+import io
+import os
+import sys
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+import httpx
+from PIL import Image
+from services.slide_image import SlideImage
+from services.slide_embedding_store import SlideEmbeddingStore
+from services.rate_limiter import TokenBucketRateLimiter, AdaptiveConcurrencyController
+from services.retry_policy import RetryPolicy, CircuitBreaker
+from services.voyage_client import PooledVoyageClient
+from services.voyage_embeddings import VoyageEmbeddingsService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+POISON = 'poison.pptx'
+
+def _png(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (16, 9), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def _slides(count: int, poisoned: set, duplicate_of: dict = None, shade: int = 0):
+    """Slides of deck.pptx with distinct images; the poisoned slide numbers claim to come from poison.pptx"""
+    slides = []
+    for n in range(1, count + 1):
+        name = POISON if n in poisoned else 'deck.pptx'
+        color = ((duplicate_of or {}).get(n, n) * 7 % 255, shade, 0)
+        slides.append({
+            'file_path': f"/decks/{name}",
+            'file_name': name,
+            'slide_number': n,
+            'image': SlideImage.from_bytes(_png(color))
+        })
+    return slides
+
+class PoisonAwareAPI:
+    """Answers like the VoyageAI API but rejects any request containing a poisoned slide"""
+
+    def __init__(self, status: int = 400):
+        self.status = status
+        self.request_sizes = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        inputs = json.loads(request.content)['inputs']
+        self.request_sizes.append(len(inputs))
+        texts = [segment['text'] for item in inputs for segment in item['content'] if segment['type'] == 'text']
+        if self.status != 200 and any(POISON in text for text in texts):
+            return httpx.Response(self.status, json={'detail': 'Image could not be decoded'})
+        return httpx.Response(200, json={'data': [{'embedding': [0.5] * 4} for _ in inputs],
+                                         'usage': {'total_tokens': len(inputs)}})
+
+def _service(api: PoisonAwareAPI, store_dir: str, batch_size: int = 64) -> VoyageEmbeddingsService:
+    client = PooledVoyageClient('test-key', base_url='http://voyage.test/v1', transport=httpx.MockTransport(api))
+    return VoyageEmbeddingsService(
+        batch_size=batch_size, client=client,
+        embedding_store=SlideEmbeddingStore(db_path=os.path.join(store_dir, 'store.db')),
+        rate_limiter=TokenBucketRateLimiter(requests_per_minute=100000),
+        concurrency_controller=AdaptiveConcurrencyController(),
+        retry_policy=RetryPolicy(sleep=lambda seconds: None),
+        circuit_breaker=CircuitBreaker()
+    )
+
+def test_bisection_isolates_one_bad_slide():
+    """One poisoned slide in 64 costs about 2*log2(64) extra requests, not 64"""
+    logger.info("🧪 Testing bisection of a poisoned batch...")
+
+    api = PoisonAwareAPI()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = _service(api, tmp)
+        try:
+            failures = []
+            embeddings = service.create_batch_slide_embeddings(_slides(64, {37}), failures)
+
+            assert len(embeddings) == 63
+            assert [(f['file_name'], f['slide_number']) for f in failures] == [(POISON, 37)]
+            assert 'could not be decoded' in failures[0]['error']
+            assert failures[0]['retryable'] is False
+
+            # 1 failed batch + 2 requests per level down to the single slide
+            assert api.request_sizes[0] == 64
+            assert len(api.request_sizes) - 1 == 2 * 6
+
+            stats = service.get_batching_stats()['failure_isolation']
+            assert stats['bisect_requests'] == 12
+            assert stats['slides_failed'] == 1
+        finally:
+            service.client.close()
+
+    logger.info("✅ Single poisoned slide test passed")
+
+def test_failures_include_duplicates_and_outages_are_not_bisected():
+    """Duplicates of a poisoned image fail with it; an unavailable API is not bisected and its failures are retryable"""
+    logger.info("🧪 Testing duplicate failures and outage handling...")
+
+    api = PoisonAwareAPI()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = _service(api, tmp)
+        try:
+            # Slide 8 shares slide 3's image, so only slide 3 is sent and both fail together
+            failures = []
+            embeddings = service.create_batch_slide_embeddings(_slides(8, {3, 6}, duplicate_of={8: 3}), failures)
+            assert len(embeddings) == 5
+            assert sorted(f['slide_number'] for f in failures) == [3, 6, 8]
+
+            # A 503 says nothing about the content: the batch is not split
+            api.status = 503
+            api.request_sizes.clear()
+            failures = []
+            embeddings = service.create_batch_slide_embeddings(_slides(16, {5}, shade=99), failures)
+            assert embeddings == []
+            assert len(failures) == 16
+            assert all(failure['retryable'] for failure in failures)
+            assert set(api.request_sizes) == {16}
+        finally:
+            service.client.close()
+
+    logger.info("✅ Duplicate and outage test passed")
+
+if __name__ == "__main__":
+    test_bisection_isolates_one_bad_slide()
+    test_failures_include_duplicates_and_outages_are_not_bisected()
+    logger.info("🎉 All batch failure isolation tests passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the byte-budget bounded queue (backpressure by payload bytes instead of item count)
+"""
+
+import sys
+import time
+import threading
+import logging
+from queue import Empty, Full
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.bounded_queue import ByteBudgetQueue
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_producer_blocks_on_byte_budget():
+    """put() blocks once queued bytes would exceed the budget and resumes after get()"""
+    logger.info("🧪 Testing byte budget backpressure...")
+
+    deltas = []
+    queue = ByteBudgetQueue(max_bytes=10, sizer=len, on_size_change=deltas.append)
+    queue.put('aaaa')
+    queue.put('bbbb')
+    assert queue.bytes_queued == 8
+
+    try:
+        queue.put('cccc', block=False)
+        raise AssertionError("put should not fit into the budget")
+    except Full:
+        pass
+
+    def consume():
+        time.sleep(0.1)
+        queue.get()
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    queue.put('cccc')  # blocks until the consumer frees 4 bytes
+    consumer.join()
+
+    stats = queue.get_stats()
+    assert stats['bytes'] == 8
+    assert stats['blocked_puts'] == 1
+    assert stats['blocked_seconds'] > 0
+    assert sum(deltas) == 8
+
+    logger.info("✅ Byte budget backpressure test passed")
+
+def test_oversized_items_and_sentinels_never_deadlock():
+    """An item larger than the budget fits into an empty queue; None sentinels always fit"""
+    logger.info("🧪 Testing oversized items and sentinels...")
+
+    queue = ByteBudgetQueue(max_bytes=4, sizer=len)
+    queue.put('x' * 100)
+    queue.put(None, block=False)
+    assert queue.qsize() == 2
+    assert queue.get() == 'x' * 100
+    assert queue.get() is None
+
+    try:
+        queue.get(timeout=0.01)
+        raise AssertionError("get should time out on an empty queue")
+    except Empty:
+        pass
+
+    logger.info("✅ Oversized items and sentinels test passed")
+
+def test_item_limit_and_unbounded_bytes():
+    """max_items bounds the count like queue.Queue(maxsize); max_bytes=None only tracks bytes"""
+    logger.info("🧪 Testing item limit...")
+
+    queue = ByteBudgetQueue(max_bytes=None, sizer=len, max_items=2)
+    queue.put('a' * 1000)
+    queue.put('b' * 1000)
+    try:
+        queue.put('c', block=False)
+        raise AssertionError("put should not exceed the item limit")
+    except Full:
+        pass
+    queue.put(None, block=False)
+    assert queue.bytes_queued == 2000
+    assert queue.get_stats()['max_items'] == 2
+
+    logger.info("✅ Item limit test passed")
+
+if __name__ == "__main__":
+    test_producer_blocks_on_byte_budget()
+    test_oversized_items_and_sentinels_never_deadlock()
+    test_item_limit_and_unbounded_bytes()
+    logger.info("🎉 All bounded queue tests passed!")
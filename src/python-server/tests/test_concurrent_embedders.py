@@ -1,100 +0,0 @@
-#!/usr/bin/env python3
-"""
-Test concurrent embedder workers functionality
-"""
-
-import logging
-import time
-from services.parallel_image_processor import ParallelImageProcessor
-from services.voyage_embeddings import get_voyage_embeddings_service
-from services.pinecone_db import get_pinecone_service
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-def test_concurrent_embedder_initialization():
-    """Test that concurrent embedder workers can be initialized properly"""
-    try:
-        logger.info("🧪 Testing concurrent embedder initialization...")
-        
-        # Test different concurrent worker configurations
-        for num_workers in [1, 5, 10, 15]:
-            processor = ParallelImageProcessor(
-                embeddings_service=get_voyage_embeddings_service(),
-                vector_db=get_pinecone_service(),
-                batch_size=75,
-                max_concurrent_embedders=num_workers
-            )
-            
-            logger.info(f"✅ Successfully created processor with {num_workers} concurrent embedders")
-            logger.info(f"   - Batch size: {processor.batch_size}")
-            logger.info(f"   - Max concurrent embedders: {processor.max_concurrent_embedders}")
-        
-        logger.info("🎉 All concurrent embedder configurations initialized successfully!")
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Test failed: {e}")
-        return False
-
-def test_threading_components():
-    """Test that threading components are properly set up"""
-    try:
-        logger.info("🧪 Testing threading components...")
-        
-        processor = ParallelImageProcessor(
-            embeddings_service=get_voyage_embeddings_service(),
-            vector_db=get_pinecone_service(),
-            max_concurrent_embedders=5
-        )
-        
-        # Check that all required components exist
-        assert hasattr(processor, 'scan_queue'), "Missing scan_queue"
-        assert hasattr(processor, 'process_queue'), "Missing process_queue" 
-        assert hasattr(processor, 'embed_queue'), "Missing embed_queue"
-        assert hasattr(processor, 'stats_lock'), "Missing stats_lock"
-        assert hasattr(processor, 'max_concurrent_embedders'), "Missing max_concurrent_embedders"
-        
-        logger.info("✅ All threading components present")
-        logger.info(f"   - Queues: scan, process, embed")
-        logger.info(f"   - Thread safety: stats_lock")
-        logger.info(f"   - Concurrent workers: {processor.max_concurrent_embedders}")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Threading test failed: {e}")
-        return False
-
-def main():
-    """Run all tests"""
-    logger.info("🚀 Starting concurrent embedder tests...")
-    
-    tests = [
-        test_concurrent_embedder_initialization,
-        test_threading_components
-    ]
-    
-    passed = 0
-    for test in tests:
-        if test():
-            passed += 1
-        time.sleep(0.5)  # Small delay between tests
-    
-    logger.info(f"📊 Test Results: {passed}/{len(tests)} tests passed")
-    
-    if passed == len(tests):
-        logger.info("🎉 All tests passed! Concurrent embedders ready for production.")
-        logger.info("💡 Expected benefits:")
-        logger.info("   - Up to 10x faster embedding creation")
-        logger.info("   - Better VoyageAI API utilization (2000 requests/min)")
-        logger.info("   - Concurrent processing instead of sequential")
-    else:
-        logger.error("❌ Some tests failed. Check implementation.")
-    
-    return passed == len(tests)
-
-if __name__ == "__main__":
-    success = main()
-    exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test payload-aware embedding batch building (count, upload bytes and image tokens)
+"""
+
+import sys
+import logging
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.embedding_batch_builder import EmbeddingBatchBuilder
+from services.slide_image import SlideImage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _slide(width: int, height: int, image_format: str = 'PNG', number: int = 1):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, format=image_format)
+    return {
+        'file_path': 'deck.pptx',
+        'slide_number': number,
+        'image': SlideImage.from_bytes(buffer.getvalue())
+    }
+
+def test_estimate_reads_image_headers():
+    """Dimensions come from PNG/JPEG headers; tokens follow the pixels/560 rule"""
+    logger.info("🧪 Testing batch item estimation...")
+
+    for image_format in ('PNG', 'JPEG'):
+        slide = _slide(1120, 560, image_format)
+        assert EmbeddingBatchBuilder.image_dimensions(slide) == (1120, 560)
+        upload_bytes, tokens = EmbeddingBatchBuilder.estimate_item(slide)
+        assert upload_bytes == len(slide['image'].to_base64())
+        assert tokens == 1120 + EmbeddingBatchBuilder.TEXT_TOKENS_PER_ITEM
+
+    # Recorded dimensions are used without touching the payload
+    slide = {'image': SlideImage.from_bytes(b'not-an-image'), 'image_dimensions': {'width': 560, 'height': 10}}
+    assert EmbeddingBatchBuilder.estimate_item(slide)[1] == 10 + EmbeddingBatchBuilder.TEXT_TOKENS_PER_ITEM
+
+    logger.info("✅ Batch item estimation test passed")
+
+def test_batches_close_on_first_limit():
+    """A batch closes at whichever of count, bytes or tokens is reached first"""
+    logger.info("🧪 Testing batch limits...")
+
+    small = [_slide(56, 10, number=n) for n in range(10)]
+    large = [_slide(1120, 560, number=n) for n in range(10)]
+    item_tokens = 1120 + EmbeddingBatchBuilder.TEXT_TOKENS_PER_ITEM
+
+    # Count limit
+    builder = EmbeddingBatchBuilder(max_items=4)
+    assert [len(b) for b in builder.split(small)] == [4, 4, 2]
+
+    # Token limit: three large images per batch
+    builder = EmbeddingBatchBuilder(max_items=100, max_tokens=item_tokens * 3)
+    assert [len(b) for b in builder.split(large)] == [3, 3, 3, 1]
+    assert builder.get_stats()['closed_by']['tokens'] == 3
+
+    # Byte limit: two items per batch
+    item_bytes = large[0]['image'].upload_bytes
+    builder = EmbeddingBatchBuilder(max_items=100, max_bytes=item_bytes * 2)
+    assert [len(b) for b in builder.split(large)] == [2, 2, 2, 2, 2]
+
+    # An item above a limit still forms a batch of its own
+    builder = EmbeddingBatchBuilder(max_items=100, max_tokens=10)
+    assert [len(b) for b in builder.split(large[:2])] == [1, 1]
+
+    # Incremental add/flush produces the same cut
+    builder = EmbeddingBatchBuilder(max_items=100, max_tokens=item_tokens * 3)
+    batches = builder.add_many(large)
+    assert [len(b) for b in batches] == [3, 3, 3]
+    assert builder.pending_count == 1
+    assert [len(b) for b in builder.flush()] == [1]
+
+    logger.info("✅ Batch limits test passed")
+
+def test_throughput_tracking():
+    """Recorded requests produce bytes/second statistics"""
+    logger.info("🧪 Testing throughput tracking...")
+
+    builder = EmbeddingBatchBuilder(max_items=10)
+    builder.record_request(1000000, 2.0)
+    builder.record_request(3000000, 2.0)
+
+    stats = builder.get_stats()
+    assert stats['requests_timed'] == 2
+    assert stats['bytes_per_second'] == 1000000
+    assert 500000 < stats['recent_bytes_per_second'] < 1500000
+
+    logger.info("✅ Throughput tracking test passed")
+
+if __name__ == "__main__":
+    test_estimate_reads_image_headers()
+    test_batches_close_on_first_limit()
+    test_throughput_tracking()
+    logger.info("🎉 All embedding batch builder tests passed!")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Test pluggable embedding providers, the local ONNX backend and per-model collections
+"""
+
+import io
+import os
+import sys
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+import numpy as np
+from PIL import Image
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from services.slide_image import SlideImage
+from services.slide_embedding_store import SlideEmbeddingStore
+from services.rate_limiter import TokenBucketRateLimiter, AdaptiveConcurrencyController
+from services.retry_policy import RetryPolicy, CircuitBreaker
+from services.embedding_providers import LocalOnnxProvider, PROVIDER_LOCAL
+from services.voyage_embeddings import VoyageEmbeddingsService
+from services.qdrant_db import QdrantVectorDB, collection_name_for, DEFAULT_COLLECTION_NAME
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FakeNode:
+    def __init__(self, name, shape=None):
+        self.name = name
+        self.shape = shape
+
+class FakeSession:
+    """Stands in for an onnxruntime session: 4-dimensional vectors derived from the inputs"""
+
+    def __init__(self, model_path: str, threads: int):
+        self.kind = 'image' if 'image' in os.path.basename(model_path) else 'text'
+        self.threads = threads
+        self.batch_sizes = []
+
+    def get_inputs(self):
+        if self.kind == 'image':
+            return [FakeNode('pixel_values')]
+        return [FakeNode('input_ids'), FakeNode('attention_mask')]
+
+    def get_outputs(self):
+        return [FakeNode(f"{self.kind}_embeds", ['batch', 4])]
+
+    def run(self, output_names, feeds):
+        if self.kind == 'image':
+            pixels = feeds['pixel_values']
+            self.batch_sizes.append(len(pixels))
+            return [np.stack([pixels.mean(axis=(2, 3))[:, 0], np.zeros(len(pixels)),
+                              np.zeros(len(pixels)), np.ones(len(pixels))], axis=1)]
+        mask = feeds['attention_mask']
+        self.batch_sizes.append(len(mask))
+        return [np.stack([np.zeros(len(mask)), mask.sum(axis=1), np.zeros(len(mask)), np.zeros(len(mask))], axis=1)]
+
+def _model_dir(root: str) -> str:
+    """Model directory with placeholder encoders and a tiny word-level tokenizer"""
+    model_dir = os.path.join(root, 'clip-test')
+    os.makedirs(model_dir)
+    for file_name in (LocalOnnxProvider.IMAGE_MODEL_FILE, LocalOnnxProvider.TEXT_MODEL_FILE):
+        Path(model_dir, file_name).write_bytes(b'')
+    vocab = {'[PAD]': 0, '[UNK]': 1, 'quarterly': 2, 'revenue': 3, 'slide': 4}
+    tokenizer = Tokenizer(WordLevel(vocab, unk_token='[UNK]'))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(os.path.join(model_dir, LocalOnnxProvider.TOKENIZER_FILE))
+    with open(os.path.join(model_dir, LocalOnnxProvider.MANIFEST_FILE), 'w') as f:
+        json.dump({'name': 'clip-test', 'image_size': 8, 'context_length': 6}, f)
+    return model_dir
+
+def _provider(root: str, **options) -> LocalOnnxProvider:
+    sessions = []
+
+    def session_factory(model_path, threads):
+        sessions.append(FakeSession(model_path, threads))
+        return sessions[-1]
+
+    provider = LocalOnnxProvider(model_dir=_model_dir(root), session_factory=session_factory, **options)
+    provider.test_sessions = sessions
+    return provider
+
+def _png(color, size=(32, 18)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def test_local_provider_batches_inference():
+    """Images and texts are embedded in batches, in input order, as unit vectors"""
+    logger.info("🧪 Testing local provider batching...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = _provider(tmp, threads=3, batch_size=2)
+        image_session, text_session = provider.test_sessions
+
+        assert provider.model == 'local/clip-test'
+        assert provider.dimension == 4
+        assert image_session.threads == text_session.threads == 3
+
+        inputs = [
+            {'content': [{'type': 'text', 'text': 'Slide 1'},
+                         {'type': 'image_base64', 'image_base64': SlideImage.from_bytes(_png((255, 0, 0))).to_data_uri()}]},
+            ['quarterly revenue'],
+            ['Slide 3', Image.new('RGB', (40, 20), (0, 0, 0))],
+            {'content': [{'type': 'image_base64',
+                          'image_base64': SlideImage.from_bytes(_png((128, 0, 0), (10, 30))).to_data_uri()}]},
+            {'content': [{'type': 'text', 'text': 'slide'}]}
+        ]
+        embeddings = provider.multimodal_embed(inputs, input_type='document').embeddings
+
+        assert len(embeddings) == 5
+        for embedding in embeddings:
+            assert abs(np.linalg.norm(embedding) - 1.0) < 1e-5
+        # Images in two batches (2 + 1), texts in one
+        assert image_session.batch_sizes == [2, 1]
+        assert text_session.batch_sizes == [2]
+        # Red slide is brighter in the red channel than the dark one; texts follow their token counts
+        assert embeddings[0][0] > embeddings[3][0] > embeddings[2][0]
+        assert embeddings[1][1] == embeddings[4][1] == 1.0
+
+        stats = provider.get_stats()
+        assert stats['images_embedded'] == 3 and stats['texts_embedded'] == 2
+        assert stats['inference_calls'] == 3
+
+    logger.info("✅ Local provider batching test passed")
+
+def test_service_uses_local_provider():
+    """With a local provider slides skip the rate limiter and carry the local model"""
+    logger.info("🧪 Testing embeddings service with the local provider...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = _provider(tmp, batch_size=8)
+        rate_limiter = TokenBucketRateLimiter(requests_per_minute=1)
+        service = VoyageEmbeddingsService(
+            provider=provider,
+            embedding_store=SlideEmbeddingStore(db_path=os.path.join(tmp, 'store.db')),
+            rate_limiter=rate_limiter,
+            concurrency_controller=AdaptiveConcurrencyController(),
+            retry_policy=RetryPolicy(sleep=lambda seconds: None),
+            circuit_breaker=CircuitBreaker()
+        )
+        slides = [{'file_path': '/decks/deck.pptx', 'file_name': 'deck.pptx', 'slide_number': n,
+                   'image': SlideImage.from_bytes(_png((n * 40, 0, 0)))} for n in (1, 2, 3)]
+        embeddings = service.create_batch_slide_embeddings(slides)
+
+        assert len(embeddings) == 3
+        assert all(e['metadata']['model'] == 'local/clip-test' for e in embeddings)
+        assert len(service.create_text_embedding('quarterly revenue')) == 4
+        assert rate_limiter.get_stats()['requests'] == 0
+        assert service.client is None
+        assert service.get_embedding_dimension() == 4
+        assert service.get_provider_info()['provider'] == PROVIDER_LOCAL
+
+        # No reranker: results come back unchanged
+        results = [{'file_name': 'deck.pptx', 'slide_number': 1, 'score': 0.5}]
+        assert service.rerank_slides('revenue', results) is results
+
+    logger.info("✅ Local provider service test passed")
+
+def test_collections_are_separated_by_model():
+    """Each provider/model/dimension gets its own recorded collection; mismatches are refused"""
+    logger.info("🧪 Testing per-model collections...")
+
+    assert collection_name_for() == DEFAULT_COLLECTION_NAME
+    local_name = collection_name_for(PROVIDER_LOCAL, 'local/clip-test', 4)
+    assert local_name == 'siffs_slides_local_local_clip_test_4'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'vector_db')
+        db = QdrantVectorDB(db_path=db_path)
+        try:
+            assert db.collection_name == DEFAULT_COLLECTION_NAME
+
+            db.use_embedding_model(PROVIDER_LOCAL, 'local/clip-test', 4)
+            assert db.collection_name == local_name
+            local = {'embedding': [0.5] * 4,
+                     'metadata': {'file_path': '/decks/deck.pptx', 'slide_number': 1, 'model': 'local/clip-test'}}
+            voyage = {'embedding': [0.5] * 4,
+                      'metadata': {'file_path': '/decks/deck.pptx', 'slide_number': 2, 'model': 'voyage-multimodal-3'}}
+            assert len(db.upsert_slide_embeddings_with_ids([local, voyage])) == 1
+            assert db.get_collection_info()['model'] == 'local/clip-test'
+
+            with open(os.path.join(db_path, QdrantVectorDB.COLLECTIONS_FILE)) as f:
+                records = json.load(f)
+            assert records[DEFAULT_COLLECTION_NAME]['vector_size'] == 1024
+            assert records[local_name]['provider'] == PROVIDER_LOCAL
+
+            # A collection recorded for one model is never reused for another
+            records[local_name]['model'] = 'local/other'
+            with open(os.path.join(db_path, QdrantVectorDB.COLLECTIONS_FILE), 'w') as f:
+                json.dump(records, f)
+            try:
+                db.use_embedding_model(PROVIDER_LOCAL, 'local/clip-test', 4)
+                raise AssertionError("Mismatched collection was accepted")
+            except ValueError as e:
+                assert 'local/other' in str(e)
+        finally:
+            db.client.close()
+
+    logger.info("✅ Per-model collection test passed")
+
+if __name__ == "__main__":
+    test_local_provider_batches_inference()
+    test_service_uses_local_provider()
+    test_collections_are_separated_by_model()
+    logger.info("🎉 All embedding provider tests passed!")
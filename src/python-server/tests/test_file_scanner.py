@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test the scandir-based streaming file scanner
+"""
+
+import sys
+import os
+import tempfile
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.file_scanner import FileScanner
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _write(path: str, data: bytes = b'deck'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _build_tree(root: str):
+    _write(os.path.join(root, 'top.pptx'))
+    _write(os.path.join(root, 'TOP2.PPTX'))
+    _write(os.path.join(root, '~$top.pptx'))
+    _write(os.path.join(root, 'empty.pptx'), b'')
+    _write(os.path.join(root, 'notes.txt'))
+    _write(os.path.join(root, 'q1', 'sales.pptx'))
+    _write(os.path.join(root, 'q1', 'deep', 'deeper', 'old.pptx'))
+    _write(os.path.join(root, 'Archive', 'archived.pptx'))
+    _write(os.path.join(root, '.hidden', 'secret.pptx'))
+
+def test_scanner_filters_entries():
+    """Lock files, empty files, hidden folders and other extensions are skipped"""
+    logger.info("🧪 Testing scanner filtering...")
+
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+
+        for workers in (1, 4):
+            scanner = FileScanner(extensions={'.pptx'}, max_workers=workers)
+            found = sorted(os.path.relpath(f.path, root) for f in scanner.scan(root))
+            assert found == sorted([
+                'top.pptx', 'TOP2.PPTX',
+                os.path.join('q1', 'sales.pptx'),
+                os.path.join('q1', 'deep', 'deeper', 'old.pptx'),
+                os.path.join('Archive', 'archived.pptx')
+            ]), found
+            stats = scanner.get_stats()
+            assert stats['skipped_lock_files'] == 1
+            assert stats['skipped_hidden'] == 1
+
+        scanned = next(f for f in FileScanner(extensions={'.pptx'}).scan(root) if f.path.endswith('top.pptx'))
+        assert scanned.size == 4
+        assert scanned.mtime == os.stat(scanned.path).st_mtime
+
+    logger.info("✅ Scanner filtering test passed")
+
+def test_scanner_excludes_and_depth():
+    """Exclude globs match names and relative paths; max_depth limits descent"""
+    logger.info("🧪 Testing scanner excludes and depth...")
+
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+
+        scanner = FileScanner(extensions={'.pptx'}, exclude_patterns=['Archive', 'q1/deep'])
+        found = sorted(os.path.basename(f.path) for f in scanner.scan(root))
+        assert found == ['TOP2.PPTX', 'sales.pptx', 'top.pptx'], found
+
+        scanner = FileScanner(extensions={'.pptx'}, max_depth=0)
+        assert sorted(os.path.basename(p) for p in scanner.scan_paths(root)) == ['TOP2.PPTX', 'top.pptx']
+
+        # Stopping early closes the generator cleanly
+        scan = FileScanner(extensions={'.pptx'}).scan(root)
+        next(scan)
+        scan.close()
+
+    logger.info("✅ Scanner excludes and depth test passed")
+
+def test_matches_agrees_with_scan():
+    """Paths from filesystem events are filtered like a scan filters them"""
+    logger.info("🧪 Testing path matching...")
+
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+
+        for options in ({}, {'exclude_patterns': ['Archive', 'q1/deep']}, {'max_depth': 1}):
+            scanner = FileScanner(extensions={'.pptx'}, **options)
+            scanned = set(scanner.scan_paths(root))
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    if name == 'empty.pptx':
+                        continue  # sizes are not checked
+                    assert scanner.matches(path, root) == (path in scanned), (options, path)
+
+        scanner = FileScanner(extensions={'.pptx'}, exclude_patterns=['Archive'], max_depth=1)
+        assert scanner.matches(os.path.join(root, 'q1'), root, is_dir=True)
+        assert not scanner.matches(os.path.join(root, 'q1', 'deep'), root, is_dir=True)
+        assert not scanner.matches(os.path.join(root, 'Archive'), root, is_dir=True)
+        assert not scanner.matches(os.path.join(root, '.hidden'), root, is_dir=True)
+        assert not scanner.matches(os.path.join(os.path.dirname(root), 'other.pptx'), root)
+
+    logger.info("✅ Path matching test passed")
+
+def test_unlisted_directories_are_reported():
+    """Directories that cannot be listed are reported instead of silently yielding nothing"""
+    logger.info("🧪 Testing unlisted directory reporting...")
+
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+        unreadable = os.path.join(root, 'q1')
+        real_scandir = os.scandir
+
+        def flaky_scandir(path):
+            if os.path.abspath(path) == unreadable:
+                raise PermissionError(13, 'Permission denied', path)
+            return real_scandir(path)
+
+        os.scandir = flaky_scandir
+        try:
+            for workers in (1, 4):
+                scanner = FileScanner(extensions={'.pptx'}, max_workers=workers)
+                found = sorted(os.path.basename(p) for p in scanner.scan_paths(root))
+                assert found == ['TOP2.PPTX', 'archived.pptx', 'top.pptx'], found
+                assert scanner.get_unlisted_paths() == [unreadable]
+                assert scanner.get_stats()['errors'] == 1
+        finally:
+            os.scandir = real_scandir
+
+        missing = os.path.join(root, 'offline-share')
+        scanner = FileScanner(extensions={'.pptx'})
+        assert scanner.scan_paths(missing) == []
+        assert scanner.get_unlisted_paths() == [missing]
+
+        scanner.scan_paths(root)
+        assert scanner.get_unlisted_paths() == []
+
+    logger.info("✅ Unlisted directory test passed")
+
+if __name__ == "__main__":
+    test_scanner_filters_entries()
+    test_scanner_excludes_and_depth()
+    test_matches_agrees_with_scan()
+    test_unlisted_directories_are_reported()
+    logger.info("🎉 All file scanner tests passed!")
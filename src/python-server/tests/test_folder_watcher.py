@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Test watching folders: debounced change batches, inotify and polling backends,
+event queue overflow and persisted roots
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.folder_watcher import FolderWatcher, _InotifyBackend, EVENT_CHANGED
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FakeJobManager:
+    """Records the jobs a watcher submits"""
+
+    def __init__(self):
+        self.jobs = []
+        self._lock = threading.Lock()
+
+    def _add(self, job):
+        with self._lock:
+            self.jobs.append(job)
+            return {'job_id': f"job-{len(self.jobs)}"}
+
+    def submit(self, folder_path, options=None, priority=None):
+        return self._add({'kind': 'rescan', 'root': folder_path, 'options': options, 'priority': priority})
+
+    def submit_changes(self, root, changed_paths, deleted_paths=None, options=None, priority=None):
+        return self._add({'kind': 'changes', 'root': root, 'changed': changed_paths,
+                          'deleted': deleted_paths, 'priority': priority})
+
+    def wait_for(self, kind, count=1, timeout=10.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                matching = [job for job in self.jobs if job['kind'] == kind]
+            if len(matching) >= count:
+                return matching
+            time.sleep(0.05)
+        raise AssertionError(f"Expected {count} {kind} jobs, got {self.jobs}")
+
+def _write(path: str, data: bytes = b'deck'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _check_debounced_changes(backend: str):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, 'decks')
+        _write(os.path.join(root, 'old.pptx'))
+        _write(os.path.join(root, 'keep.pptx'))
+
+        jobs = FakeJobManager()
+        watcher = FolderWatcher(db_path=os.path.join(temp_dir, 'watches.db'), job_manager=jobs, backend=backend,
+                                debounce_seconds=0.5, poll_interval_seconds=0.2)
+        watcher.start()
+        try:
+            folder = watcher.add_folder(root, {'.pptx'}, priority='background')
+            assert folder['backend'] == backend
+            # Adding a folder indexes it right away, at the requested priority
+            assert jobs.wait_for('rescan')[0]['priority'] == 'background'
+            time.sleep(0.5)  # polling takes its baseline snapshot
+
+            # A burst of saves, a lock file, another type and a deletion
+            for _ in range(3):
+                _write(os.path.join(root, 'new.pptx'), b'draft')
+            _write(os.path.join(root, 'q1', 'sales.pptx'))
+            _write(os.path.join(root, '~$new.pptx'))
+            _write(os.path.join(root, 'notes.txt'))
+            os.remove(os.path.join(root, 'old.pptx'))
+
+            changes = jobs.wait_for('changes')
+            time.sleep(0.8)
+            assert len([job for job in jobs.jobs if job['kind'] == 'changes']) == 1, jobs.jobs
+            job = changes[0]
+            assert job['root'] == os.path.abspath(root)
+            assert job['changed'] == [os.path.join(root, 'new.pptx'), os.path.join(root, 'q1', 'sales.pptx')]
+            assert job['deleted'] == [os.path.join(root, 'old.pptx')]
+            assert job['priority'] == 'interactive'
+            return watcher.get_stats()
+        finally:
+            watcher.close()
+
+def test_polling_submits_debounced_changes():
+    """Polling reports added, modified and deleted files as one debounced batch"""
+    logger.info("🧪 Testing polling watch...")
+    stats = _check_debounced_changes('polling')
+    assert stats['change_jobs'] == 1
+    logger.info("✅ Polling watch test passed")
+
+def test_inotify_submits_debounced_changes():
+    """inotify reports the same batch, including files in new subdirectories, and survives a lost root"""
+    logger.info("🧪 Testing inotify watch...")
+    if not _InotifyBackend.available():
+        logger.info("⏭️ inotify not available, skipping")
+        return
+    stats = _check_debounced_changes('inotify')
+    assert stats['files_submitted'] == 3
+
+    # A removed subdirectory triggers a rescan of its root
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, 'decks')
+        _write(os.path.join(root, 'q2', 'plan.pptx'))
+        jobs = FakeJobManager()
+        watcher = FolderWatcher(db_path=os.path.join(temp_dir, 'watches.db'), job_manager=jobs,
+                                backend='inotify', debounce_seconds=0.3)
+        watcher.start()
+        try:
+            watcher.add_folder(root, {'.pptx'})
+            jobs.wait_for('rescan')
+            shutil.rmtree(os.path.join(root, 'q2'))
+            jobs.wait_for('rescan', count=2)
+            assert not [job for job in jobs.jobs if job['kind'] == 'changes']
+        finally:
+            watcher.close()
+
+    # A root that vanishes loses its watches; once it is back it is watched and rescanned again
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, 'decks')
+        os.makedirs(root)
+        jobs = FakeJobManager()
+        watcher = FolderWatcher(db_path=os.path.join(temp_dir, 'watches.db'), job_manager=jobs,
+                                backend='inotify', debounce_seconds=0.3, poll_interval_seconds=0.2)
+        watcher.start()
+        try:
+            watcher.add_folder(root, {'.pptx'})
+            jobs.wait_for('rescan')
+            shutil.rmtree(root)
+            deadline = time.time() + 5
+            while watcher.get_stats()['deferred_roots'] == 0 and time.time() < deadline:
+                time.sleep(0.05)
+            assert watcher.get_stats()['deferred_roots'] == 1
+
+            _write(os.path.join(root, 'b.pptx'))
+            assert jobs.wait_for('rescan', count=2)[1]['priority'] == 'normal'
+            _write(os.path.join(root, 'c.pptx'))
+            assert jobs.wait_for('changes')[0]['changed'] == [os.path.join(root, 'c.pptx')]
+            assert watcher.list_folders()[0]['backend'] == 'inotify'
+        finally:
+            watcher.close()
+    logger.info("✅ inotify watch test passed")
+
+def test_queue_overflow_rescans_root():
+    """Events dropped by a full queue turn into a rescan of the root"""
+    logger.info("🧪 Testing event queue overflow...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, 'decks')
+        os.makedirs(root)
+        jobs = FakeJobManager()
+        watcher = FolderWatcher(db_path=os.path.join(temp_dir, 'watches.db'), job_manager=jobs,
+                                backend='polling', max_queued_events=2, poll_interval_seconds=60)
+        watcher.start()
+        try:
+            watcher.add_folder(root, {'.pptx'})
+            jobs.wait_for('rescan')
+
+            # Hold the dispatcher so the queue fills up
+            watcher._stop_event.set()
+            watcher._dispatcher.join()
+            for n in range(5):
+                watcher._emit(os.path.abspath(root), os.path.join(root, f'{n}.pptx'), EVENT_CHANGED)
+            assert watcher.get_stats()['dropped_events'] == 3
+
+            while not watcher._events.empty():
+                watcher._record(*watcher._events.get())
+            # The overflow is debounced like any other event
+            watcher._flush_due(time.monotonic())
+            assert len(jobs.jobs) == 1
+            watcher._flush_due(time.monotonic() + 10)
+            assert [job['kind'] for job in jobs.jobs] == ['rescan', 'rescan']
+        finally:
+            watcher._stop_event.clear()
+            watcher.close()
+
+    logger.info("✅ Event queue overflow test passed")
+
+def test_watched_folders_persist():
+    """Roots survive a restart and are caught up at background priority once they are online"""
+    logger.info("🧪 Testing persisted watched folders...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, 'decks')
+        os.makedirs(os.path.join(root, 'sub'))
+        db_path = os.path.join(temp_dir, 'watches.db')
+        options = {'sources': ['pptx', 'images'], 'scan_options': {'exclude_patterns': ['Archive']}}
+
+        watcher = FolderWatcher(db_path=db_path, job_manager=FakeJobManager(), backend='polling')
+        try:
+            watcher.add_folder(root, {'.pptx'}, priority='urgent')
+            assert False, "unknown priority accepted"
+        except ValueError:
+            pass
+        watcher.add_folder(root, {'.pptx', '.png'}, options)
+        for overlapping in (os.path.join(root, 'sub'), temp_dir):
+            try:
+                watcher.add_folder(overlapping, {'.pptx'})
+                assert False, "overlapping folder accepted"
+            except ValueError:
+                pass
+        watcher.close()
+
+        jobs = FakeJobManager()
+        watcher = FolderWatcher(db_path=db_path, job_manager=jobs, backend='polling')
+        watcher.start()
+        try:
+            folders = watcher.list_folders()
+            assert [folder['folder_path'] for folder in folders] == [os.path.abspath(root)]
+            assert folders[0]['extensions'] == ['.png', '.pptx']
+            assert folders[0]['backend'] == 'polling'
+            assert jobs.jobs == [{'kind': 'rescan', 'root': os.path.abspath(root), 'options': options,
+                                  'priority': 'background'}]
+
+        finally:
+            watcher.close()
+
+        # An offline root is not caught up (it would scan as empty) until it is back
+        offline = os.path.join(temp_dir, 'offline')
+        os.rename(root, offline)
+        jobs = FakeJobManager()
+        watcher = FolderWatcher(db_path=db_path, job_manager=jobs, backend='polling', poll_interval_seconds=0.2)
+        watcher.start()
+        try:
+            time.sleep(0.5)
+            assert jobs.jobs == []
+            assert watcher.get_stats()['deferred_roots'] == 1
+            os.rename(offline, root)
+            assert jobs.wait_for('rescan')[0]['priority'] == 'background'
+            assert watcher.get_stats()['deferred_roots'] == 0
+
+            assert watcher.remove_folder(root)
+            assert not watcher.remove_folder(root)
+            assert watcher.list_folders() == []
+        finally:
+            watcher.close()
+
+    logger.info("✅ Persisted watched folders test passed")
+
+if __name__ == "__main__":
+    test_polling_submits_debounced_changes()
+    test_inotify_submits_debounced_changes()
+    test_queue_overflow_rescans_root()
+    test_watched_folders_persist()
+    logger.info("🎉 All folder watcher tests passed!")
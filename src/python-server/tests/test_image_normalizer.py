@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test pre-embedding image normalization (downscale, re-encode, pixel caps)
+"""
+
+import sys
+import random
+import base64
+import struct
+import zlib
+import logging
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.image_normalizer import ImageNormalizer
+from services.slide_image import SlideImage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _encode(image: Image.Image, image_format: str = 'PNG') -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+def _noisy_slide(width: int, height: int) -> Image.Image:
+    # Noise compresses badly as PNG, like a photo-heavy slide export
+    return Image.frombytes('RGB', (width, height), random.Random(42).randbytes(width * height * 3))
+
+def test_downscale_and_reencode():
+    """A full HD PNG export is downscaled into the box and re-encoded smaller"""
+    logger.info("🧪 Testing downscale and re-encode...")
+
+    normalizer = ImageNormalizer(max_width=1280, max_height=1280, max_pixels=1280 * 960)
+    original = _encode(_noisy_slide(1920, 1080))
+    result = normalizer.normalize_bytes(original)
+
+    assert (result['width'], result['height']) == (1280, 720)
+    assert result['format'] == 'JPEG'
+    assert result['resized']
+    assert result['normalized_bytes'] < result['original_bytes']
+    with Image.open(BytesIO(result['data'])) as image:
+        assert image.size == (1280, 720)
+
+    stats = normalizer.get_stats()
+    assert stats['images'] == 1
+    assert stats['bytes_saved'] == len(original) - len(result['data'])
+    assert stats['percent_saved'] > 0
+
+    logger.info("✅ Downscale and re-encode test passed")
+
+def test_pixel_cap_and_small_images():
+    """Tall images respect the pixel cap; small compact images keep their original bytes"""
+    logger.info("🧪 Testing pixel cap and small images...")
+
+    normalizer = ImageNormalizer(max_width=2000, max_height=2000, max_pixels=100 * 100)
+    result = normalizer.normalize_bytes(_encode(Image.new('RGB', (400, 1600), 'white')))
+    assert result['width'] * result['height'] <= 100 * 100
+    assert abs(result['height'] / result['width'] - 4) < 0.1
+
+    small = _encode(Image.new('RGB', (40, 30), 'white'), 'JPEG')
+    result = normalizer.normalize_bytes(small)
+    assert not result['resized']
+    assert len(result['data']) <= len(small)
+
+    # Flat slides that compress better losslessly stay PNG, still downscaled
+    flat = _encode(Image.new('RGB', (1920, 1080), 'white'))
+    result = ImageNormalizer(max_width=1280).normalize_bytes(flat)
+    assert result['format'] == 'PNG'
+    assert result['width'] == 1280
+    assert result['normalized_bytes'] <= len(flat)
+
+    # Transparent images are flattened onto white
+    transparent = _encode(Image.new('RGBA', (300, 200), (0, 0, 0, 0)))
+    result = ImageNormalizer(max_width=100).normalize_bytes(transparent)
+    with Image.open(BytesIO(result['data'])) as image:
+        assert image.mode == 'RGB'
+        assert image.getpixel((10, 10))[0] > 240
+
+    logger.info("✅ Pixel cap and small images test passed")
+
+def test_rejects_decompression_bombs():
+    """Images declaring too many pixels are rejected from their header alone"""
+    logger.info("🧪 Testing decompression bomb rejection...")
+
+    # Hand-built PNG headers declaring huge images with almost no data
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    def bomb(size):
+        return (b'\x89PNG\r\n\x1a\n' +
+                chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)) +
+                chunk(b'IDAT', zlib.compress(b'')) + chunk(b'IEND', b''))
+
+    normalizer = ImageNormalizer(max_input_pixels=50000000)
+    assert normalizer.normalize_bytes(bomb(10000)) is None   # above our limit
+    assert normalizer.normalize_bytes(bomb(30000)) is None   # above Pillow's own limit
+    assert normalizer.normalize_bytes(b'not an image') is None
+
+    stats = normalizer.get_stats()
+    assert stats['rejected'] == 2
+    assert stats['errors'] == 1
+
+    logger.info("✅ Decompression bomb rejection test passed")
+
+def test_normalize_slide():
+    """Slide data gets the normalized image, dimensions and format"""
+    logger.info("🧪 Testing slide normalization...")
+
+    original = _encode(_noisy_slide(1920, 1080))
+    slide = {
+        'file_path': 'deck.pptx',
+        'slide_number': 1,
+        'image': SlideImage.from_bytes(original)
+    }
+    normalized = ImageNormalizer().normalize_slide(slide)
+
+    assert normalized['file_path'] == 'deck.pptx'
+    assert normalized['image_dimensions'] == {'width': 1280, 'height': 720}
+    assert normalized['image_format'] == 'JPEG'
+    assert normalized['image'].mime_type == 'image/jpeg'
+    assert normalized['image'].nbytes < len(original)
+    assert slide['image'].read() == original  # input left untouched
+
+    # Legacy base64 slides are accepted and converted to raw bytes
+    legacy = {'slide_number': 2, 'image_base64': base64.b64encode(original).decode('utf-8')}
+    normalized = ImageNormalizer().normalize_slide(legacy)
+    assert 'image_base64' not in normalized
+    assert normalized['image'].dimensions == (1280, 720)
+
+    logger.info("✅ Slide normalization test passed")
+
+if __name__ == "__main__":
+    test_downscale_and_reencode()
+    test_pixel_cap_and_small_images()
+    test_rejects_decompression_bombs()
+    test_normalize_slide()
+    logger.info("🎉 All image normalizer tests passed!")
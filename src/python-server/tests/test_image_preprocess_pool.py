@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the process-pool image preprocessing stage (validation, resizing, shared memory hand-off)
+"""
+
+import os
+import sys
+import random
+import logging
+import tempfile
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.image_normalizer import ImageNormalizer
+from services.image_preprocess_pool import ImagePreprocessPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _write_images(folder: Path):
+    noisy = Image.frombytes('RGB', (1920, 1080), random.Random(7).randbytes(1920 * 1080 * 3))
+    noisy.save(folder / 'large.png')
+    Image.new('RGB', (40, 30), 'white').save(folder / 'small.png')
+    (folder / 'broken.png').write_bytes(b'\x89PNG\r\n\x1a\nnot really')
+    return [str(folder / name) for name in ('large.png', 'small.png', 'broken.png')]
+
+def test_normalizes_through_shared_memory():
+    """Resized images come back in shared memory; small ones stay file-backed"""
+    logger.info("🧪 Testing preprocessing with normalization...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_images(Path(temp_dir))
+        normalizer = ImageNormalizer()
+        pool = ImagePreprocessPool(max_workers=2, normalizer=normalizer)
+        try:
+            results = list(pool.imap(iter(paths)))
+            assert [path for path, _ in results] == paths  # input order is kept
+
+            large, small, broken = [prepared for _, prepared in results]
+            assert (large['width'], large['height']) == (1280, 720)
+            assert large['image'].in_memory
+            assert large['image'].memory_bytes >= large['image'].nbytes
+            with Image.open(BytesIO(large['image'].read())) as image:
+                assert image.size == (1280, 720)
+
+            assert not small['image'].in_memory  # original kept, read from the file
+            assert broken['image'] is None and broken['error']
+
+            stats = pool.get_stats()
+            assert stats['images'] == 2
+            assert stats['failed'] == 1
+            assert stats['shared_memory_images'] == 1
+
+            # Worker statistics are merged into the run's normalizer
+            assert normalizer.get_stats()['images'] == 2
+            assert normalizer.get_stats()['resized'] == 1
+
+            large['image'].release()
+            assert large['image'].memory_bytes == 0
+        finally:
+            pool.close()
+
+    logger.info("✅ Preprocessing with normalization test passed")
+
+def test_validates_without_normalizer():
+    """Without a normalizer images are validated and keep their files"""
+    logger.info("🧪 Testing validation-only preprocessing...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_images(Path(temp_dir))
+        pool = ImagePreprocessPool(max_workers=1)
+        try:
+            results = dict(pool.imap(paths))
+        finally:
+            pool.close()
+
+        assert results[paths[0]]['image'].dimensions == (1920, 1080)
+        assert not results[paths[0]]['image'].in_memory
+        assert results[paths[1]]['format'] == 'PNG'
+        assert results[paths[2]]['error']
+
+    logger.info("✅ Validation-only preprocessing test passed")
+
+def test_preprocess_from_many_threads():
+    """preprocess() can be called from several pipeline threads sharing one pool"""
+    logger.info("🧪 Testing threaded single-image preprocessing...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_images(Path(temp_dir))
+        pool = ImagePreprocessPool(max_workers=2, normalizer=ImageNormalizer(max_width=640))
+        try:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                results = dict(zip(paths, executor.map(pool.preprocess, paths)))
+            missing = pool.preprocess(os.path.join(temp_dir, 'missing.png'))
+        finally:
+            pool.close()
+
+        assert results[paths[0]]['width'] == 640
+        assert results[paths[2]]['error']
+        assert missing['error'] and missing['image'] is None
+        assert pool.get_stats()['images'] == 2
+
+    logger.info("✅ Threaded single-image preprocessing test passed")
+
+if __name__ == "__main__":
+    test_normalizes_through_shared_memory()
+    test_validates_without_normalizer()
+    test_preprocess_from_many_threads()
+    logger.info("🎉 All image preprocess pool tests passed!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test dry-run estimates from slide counts and recorded run throughput
+"""
+
+import sys
+import os
+import zipfile
+import tempfile
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.ingestion_estimator import IngestionEstimator, count_pptx_slides
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+WORKERS = {'convert_pptx': 1, 'convert_images': 4, 'normalize': 2, 'embed': 2, 'store': 1}
+
+def _write_pptx(path: str, slides: int):
+    with zipfile.ZipFile(path, 'w') as package:
+        package.writestr('ppt/presentation.xml', '<p:presentation/>')
+        for n in range(1, slides + 1):
+            package.writestr(f'ppt/slides/slide{n}.xml', '<p:sld/>')
+            package.writestr(f'ppt/slides/_rels/slide{n}.xml.rels', '<Relationships/>')
+        package.writestr('ppt/slideLayouts/slideLayout1.xml', '<p:sldLayout/>')
+
+def test_count_pptx_slides():
+    """Slides are counted from the package directory; non-decks raise"""
+    logger.info("🧪 Testing slide counting...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        deck = os.path.join(temp_dir, 'deck.pptx')
+        _write_pptx(deck, 12)
+        assert count_pptx_slides(deck) == 12
+
+        broken = os.path.join(temp_dir, 'broken.pptx')
+        with open(broken, 'wb') as f:
+            f.write(b'not a zip')
+        try:
+            count_pptx_slides(broken)
+            assert False, "broken deck counted"
+        except zipfile.BadZipFile:
+            pass
+
+    logger.info("✅ Slide counting test passed")
+
+def test_estimate_from_history():
+    """Recorded runs set the per-slide costs; the slowest stage sets the duration"""
+    logger.info("🧪 Testing estimates from run history...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        estimator = IngestionEstimator(db_path=os.path.join(temp_dir, 'history.db'))
+
+        # No history yet: built-in defaults
+        throughput = estimator.get_throughput()
+        assert throughput['runs'] == 0
+        assert 'convert_pptx' in throughput['defaults']
+
+        # Empty runs are not recorded
+        estimator.record_run({'pptx_slides': 0, 'image_files': 0})
+        assert estimator.get_throughput()['runs'] == 0
+
+        for _ in range(2):
+            estimator.record_run({
+                'pptx_files': 10, 'pptx_slides': 100, 'image_files': 50,
+                'image_source_bytes': 50 * 1000, 'pptx_upload_bytes': 100 * 2000,
+                'image_upload_bytes': 50 * 500, 'requests': 3, 'total_seconds': 60.0,
+                'stage_seconds': {'convert_pptx': 100.0, 'convert_images': 5.0, 'normalize': 3.0,
+                                  'embed': 30.0, 'store': 1.5}
+            })
+        throughput = estimator.get_throughput()
+        assert throughput['runs'] == 2
+        assert throughput['defaults'] == []
+        assert throughput['seconds_per_slide']['convert_pptx'] == 1.0
+        assert throughput['seconds_per_slide']['convert_images'] == 0.1
+        assert throughput['seconds_per_slide']['embed'] == 0.2
+        assert throughput['upload_bytes_per_pptx_slide'] == 2000
+        assert throughput['image_upload_ratio'] == 0.5
+
+        # 1000 deck slides + 10000 images of 2000 bytes each
+        estimate = estimator.estimate(pptx_slides=1000, image_files=10000, image_bytes=10000 * 2000,
+                                      batch_size=100, stage_workers=WORKERS)
+        assert estimate['slides'] == 11000
+        assert estimate['requests'] == 110
+        assert estimate['upload_bytes'] == 1000 * 2000 + 10000 * 1000
+        assert estimate['stage_seconds']['convert_pptx'] == 1000.0
+        assert estimate['stage_seconds']['convert_images'] == 250.0
+        assert estimate['stage_seconds']['embed'] == 1100.0
+        assert estimate['bottleneck'] == 'embed'
+        assert estimate['duration_seconds'] == 1100.0
+
+        # Request byte limit and rate limit
+        estimate = estimator.estimate(pptx_slides=1000, image_files=0, image_bytes=0, batch_size=100,
+                                      stage_workers=WORKERS, max_batch_bytes=100 * 1000,
+                                      requests_per_minute=1)
+        assert estimate['requests'] == 20
+        assert estimate['bottleneck'] == 'rate_limit'
+        assert estimate['duration_seconds'] == 1200.0
+
+        estimator.clear()
+        assert estimator.get_throughput()['runs'] == 0
+        estimator.close()
+
+    logger.info("✅ Estimates from run history test passed")
+
+if __name__ == "__main__":
+    test_count_pptx_slides()
+    test_estimate_from_history()
+    logger.info("🎉 All ingestion estimator tests passed!")
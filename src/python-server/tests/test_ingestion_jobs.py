@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test the ingestion job manager behind the asynchronous process-folder API
+"""
+
+import sys
+import time
+import threading
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.ingestion_jobs import IngestionJobManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _wait_for(manager: IngestionJobManager, job_id: str, status: str, timeout: float = 5.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach '{status}': {manager.get(job_id)}")
+
+def test_jobs_queue_and_complete_in_order():
+    """Submitting returns at once and a second folder queues behind the first"""
+    logger.info("🧪 Testing job queueing...")
+
+    release = threading.Event()
+    started = []
+
+    def process_folder(folder_path, progress_callback=None, cancel_event=None, **options):
+        started.append(folder_path)
+        release.wait(5)
+        progress_callback({'file': 'deck.pptx', 'progress': 100.0, 'files_processed': 2, 'slides_processed': 10})
+        return {'success': True, 'files_processed': 2, 'slides_processed': 10, 'message': 'done'}
+
+    manager = IngestionJobManager(process_folder_fn=process_folder)
+    first = manager.submit('/decks/a')
+    second = manager.submit('/decks/b')
+
+    _wait_for(manager, first['job_id'], 'running')
+    queued = manager.get(second['job_id'])
+    assert queued['status'] == 'queued'
+    assert queued['queue_position'] == 1
+    assert manager.get_status_summary()['is_processing']
+
+    release.set()
+    done = _wait_for(manager, second['job_id'], 'completed')
+    assert started == ['/decks/a', '/decks/b']
+    assert done['result']['slides_processed'] == 10
+    assert done['progress']['files_processed'] == 2
+    assert done['throughput']['slides_per_second'] > 0
+    assert not manager.get_status_summary()['is_processing']
+
+    logger.info("✅ Job queueing test passed")
+
+def test_cancel_queued_and_running_jobs():
+    """Queued jobs are dropped and running jobs see their cancel event"""
+    logger.info("🧪 Testing job cancellation...")
+
+    def process_folder(folder_path, progress_callback=None, cancel_event=None, **options):
+        cancel_event.wait(5)
+        return {'success': True, 'files_processed': 0, 'slides_processed': 0, 'cancelled': True}
+
+    manager = IngestionJobManager(process_folder_fn=process_folder)
+    running = manager.submit('/decks/a')
+    queued = manager.submit('/decks/b')
+    _wait_for(manager, running['job_id'], 'running')
+
+    assert manager.cancel(queued['job_id'])['status'] == 'cancelled'
+    manager.cancel(running['job_id'])
+    _wait_for(manager, running['job_id'], 'cancelled')
+    assert manager.cancel('missing') is None
+    assert len(manager.list_jobs()) == 2
+
+    logger.info("✅ Job cancellation test passed")
+
+def test_failed_job_records_error():
+    """A failing or crashing run marks the job failed with its error"""
+    logger.info("🧪 Testing job failure...")
+
+    def process_folder(folder_path, progress_callback=None, cancel_event=None, **options):
+        raise RuntimeError("boom")
+
+    manager = IngestionJobManager(process_folder_fn=process_folder)
+    job = manager.submit('/decks/a')
+    failed = _wait_for(manager, job['job_id'], 'failed')
+    assert failed['error'] == 'boom'
+
+    logger.info("✅ Job failure test passed")
+
+def test_interactive_job_preempts_bulk_job():
+    """A saved file runs at once while the running folder job pauses between files"""
+    logger.info("🧪 Testing interactive preemption...")
+
+    file_done = threading.Event()
+    fed = []
+
+    def process_folder(folder_path, progress_callback=None, cancel_event=None, yield_fn=None, **options):
+        for n in range(50):
+            yield_fn()
+            fed.append((n, file_done.is_set()))
+            time.sleep(0.01)
+        return {'success': True, 'files_processed': 50, 'slides_processed': 50}
+
+    def process_files(file_paths, progress_callback=None, cancel_event=None, yield_fn=None, **options):
+        yield_fn()  # interactive jobs never wait
+        file_done.set()
+        return {'success': True, 'files_processed': 1, 'slides_processed': 4}
+
+    manager = IngestionJobManager(process_folder_fn=process_folder, process_files_fn=process_files)
+    bulk = manager.submit('/decks/archive', priority='background')
+    _wait_for(manager, bulk['job_id'], 'running')
+    while not fed:
+        time.sleep(0.01)
+
+    saved = manager.submit_file('/decks/q3/plan.pptx')
+    assert saved['priority'] == 'interactive'
+    done = _wait_for(manager, saved['job_id'], 'completed')
+    assert done['result']['slides_processed'] == 4
+
+    _wait_for(manager, bulk['job_id'], 'completed', timeout=10)
+    # The bulk job was still running when the file finished
+    assert any(finished for _, finished in fed)
+    assert not all(finished for _, finished in fed)
+
+    try:
+        manager.submit('/decks/b', priority='urgent')
+        assert False, "unknown priority accepted"
+    except ValueError:
+        pass
+
+    logger.info("✅ Interactive preemption test passed")
+
+def test_queued_jobs_follow_priority():
+    """Queued jobs run by priority, and priorities can be changed while queued"""
+    logger.info("🧪 Testing queued job priorities...")
+
+    release = threading.Event()
+    started = []
+
+    def process_folder(folder_path, progress_callback=None, cancel_event=None, **options):
+        started.append(folder_path)
+        release.wait(5)
+        return {'success': True, 'files_processed': 0, 'slides_processed': 0}
+
+    manager = IngestionJobManager(process_folder_fn=process_folder)
+    first = manager.submit('/decks/first')
+    _wait_for(manager, first['job_id'], 'running')
+    background = manager.submit('/decks/background', priority='background')
+    normal = manager.submit('/decks/normal')
+    assert manager.get(normal['job_id'])['queue_position'] == 1
+
+    manager.set_priority(background['job_id'], 'normal')
+    assert manager.get(background['job_id'])['queue_position'] == 1
+    assert manager.set_priority('missing', 'normal') is None
+
+    release.set()
+    _wait_for(manager, normal['job_id'], 'completed')
+    assert started == ['/decks/first', '/decks/background', '/decks/normal']
+
+    logger.info("✅ Queued job priority test passed")
+
+def test_watched_changes_job():
+    """Changes collected by a folder watch run as one file job with their deletions"""
+    logger.info("🧪 Testing watched change jobs...")
+
+    calls = []
+
+    def process_files(file_paths, progress_callback=None, cancel_event=None, yield_fn=None, **options):
+        calls.append((file_paths, options))
+        return {'success': True, 'files_processed': len(file_paths), 'slides_processed': 3}
+
+    manager = IngestionJobManager(process_folder_fn=lambda *args, **kwargs: {'success': True},
+                                  process_files_fn=process_files)
+    job = manager.submit_changes('/decks', ['/decks/a.pptx', '/decks/b.png'], ['/decks/old.pptx'])
+    assert job['kind'] == 'changes'
+    assert job['priority'] == 'normal'
+    assert job['file_paths'] == ['/decks/a.pptx', '/decks/b.png']
+
+    _wait_for(manager, job['job_id'], 'completed')
+    assert calls == [(['/decks/a.pptx', '/decks/b.png'], {'deleted_paths': ['/decks/old.pptx']})]
+
+    logger.info("✅ Watched change job test passed")
+
+if __name__ == "__main__":
+    test_jobs_queue_and_complete_in_order()
+    test_cancel_queued_and_running_jobs()
+    test_failed_job_records_error()
+    test_interactive_job_preempts_bulk_job()
+    test_queued_jobs_follow_priority()
+    test_watched_changes_job()
+    logger.info("🎉 All ingestion job tests passed!")
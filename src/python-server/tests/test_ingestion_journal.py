@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the write-ahead ingestion journal used to resume interrupted runs
+"""
+
+import sys
+import os
+import tempfile
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.ingestion_journal import IngestionJournal
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _write(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _embeddings(file_path: str, count: int):
+    return [
+        {'embedding': [float(i), 0.5, 0.25], 'metadata': {'file_path': file_path, 'slide_number': i + 1}}
+        for i in range(count)
+    ]
+
+def test_journal_resumes_interrupted_run():
+    """A reopened run returns embedded vectors with their point ids and committed files"""
+    logger.info("🧪 Testing journal resume...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'journal.db')
+        deck_a = os.path.join(temp_dir, 'a.pptx')
+        deck_b = os.path.join(temp_dir, 'b.pptx')
+        _write(deck_a, b'deck a')
+        _write(deck_b, b'deck b')
+
+        journal = IngestionJournal(db_path=db_path)
+        run_key = journal.begin_run(temp_dir, 'pptx')
+        journal.record_converted(run_key, deck_a, 2)
+        embedded = journal.record_embedded(run_key, _embeddings(deck_a, 2))
+        point_ids = [data['metadata']['point_id'] for data in embedded]
+        journal.record_embedded(run_key, _embeddings(deck_b, 1))
+        journal.record_committed(run_key, [deck_b])
+        journal.close()
+
+        # Simulated restart
+        journal = IngestionJournal(db_path=db_path)
+        run_key = journal.begin_run(temp_dir, 'pptx')
+        resumable = journal.get_resumable(run_key, [deck_a, deck_b])
+
+        resumed = resumable['embedded'][deck_a]
+        assert [data['metadata']['point_id'] for data in resumed] == point_ids
+        assert resumed[1]['embedding'] == [1.0, 0.5, 0.25]
+        assert len(resumable['committed'][deck_b]) == 1
+        assert journal.get_stats()['pending_vectors'] == 2
+
+        journal.finish_run(run_key)
+        assert journal.get_stats()['open_runs'] == 0
+        assert journal.get_resumable(run_key, [deck_a]) == {'embedded': {}, 'committed': {}, 'file_stats': {}}
+        journal.close()
+
+    logger.info("✅ Journal resume test passed")
+
+def test_journal_discards_changed_files():
+    """Entries of files modified after journaling (or embedded incompletely) are not resumed"""
+    logger.info("🧪 Testing journal staleness...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal = IngestionJournal(db_path=os.path.join(temp_dir, 'journal.db'))
+        deck = os.path.join(temp_dir, 'deck.pptx')
+        _write(deck, b'first version')
+
+        run_key = journal.begin_run(temp_dir, 'pptx')
+        journal.record_embedded(run_key, _embeddings(deck, 3))
+
+        _write(deck, b'second, longer version')
+        assert journal.get_resumable(run_key, [deck])['embedded'] == {}
+        assert journal.get_stats()['pending_vectors'] == 0
+
+        # Saved between conversion and embedding: the converted version's stat is kept
+        converted_stat = (os.path.getsize(deck), os.path.getmtime(deck))
+        journal.record_converted(run_key, deck, 3, converted_stat)
+        _write(deck, b'third version, saved while embedding')
+        journal.record_embedded(run_key, _embeddings(deck, 3))
+        assert journal.get_resumable(run_key, [deck])['embedded'] == {}
+
+        # A file with slides that failed to embed is forgotten, not resumed as complete
+        journal.record_embedded(run_key, _embeddings(deck, 2))
+        journal.discard_file(run_key, deck)
+        assert journal.get_resumable(run_key, [deck]) == {'embedded': {}, 'committed': {}, 'file_stats': {}}
+        journal.close()
+
+    logger.info("✅ Journal staleness test passed")
+
+if __name__ == "__main__":
+    test_journal_resumes_interrupted_run()
+    test_journal_discards_changed_files()
+    logger.info("🎉 All ingestion journal tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test priority ordering and per-root fair sharing of ingestion jobs
+"""
+
+import sys
+import random
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.ingestion_scheduler import IngestionScheduler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_priority_order():
+    """Interactive jobs run before normal ones, normal before background"""
+    logger.info("🧪 Testing priority order...")
+
+    scheduler = IngestionScheduler()
+    scheduler.push('bulk', 'background', '/archive')
+    scheduler.push('folder', 'normal', '/decks')
+    scheduler.push('saved', 'interactive', '/decks')
+
+    assert scheduler.order() == ['saved', 'folder', 'bulk']
+    assert scheduler.pop('interactive') == 'saved'
+    assert scheduler.pop('interactive') is None
+    assert scheduler.pop() == 'folder'
+
+    # Priorities can be changed while queued
+    scheduler.push('later', 'normal', '/decks')
+    assert scheduler.set_priority('bulk', 'interactive')
+    assert scheduler.order() == ['bulk', 'later']
+    assert not scheduler.set_priority('missing', 'normal')
+
+    try:
+        scheduler.push('bad', 'urgent', '/decks')
+        assert False, "unknown priority accepted"
+    except ValueError:
+        pass
+
+    logger.info("✅ Priority order test passed")
+
+def test_roots_take_turns():
+    """Root folders with queued jobs are served round-robin, each in submission order"""
+    logger.info("🧪 Testing fair share per root folder...")
+
+    scheduler = IngestionScheduler()
+    for n in range(3):
+        scheduler.push(f'a{n}', 'normal', '/a')
+    scheduler.push('b0', 'normal', '/b')
+    scheduler.push('c0', 'normal', '/c')
+
+    assert scheduler.order() == ['a0', 'b0', 'c0', 'a1', 'a2']
+    assert [scheduler.pop() for _ in range(2)] == ['a0', 'b0']
+
+    # A newly queued root goes ahead of roots that were just served
+    scheduler.push('d0', 'normal', '/d')
+    assert [scheduler.pop() for _ in range(4)] == ['c0', 'd0', 'a1', 'a2']
+    assert scheduler.pop() is None
+
+    stats = scheduler.get_stats()
+    assert stats['scheduled'] == 6
+    assert stats['by_priority']['normal'] == 6
+    assert stats['roots_served'] == 4
+
+    logger.info("✅ Fair share test passed")
+
+def test_order_matches_pops():
+    """order() and cached positions agree with the jobs pop() actually hands out"""
+    logger.info("🧪 Testing queue order and positions...")
+
+    rng = random.Random(7)
+    scheduler = IngestionScheduler()
+    for n in range(200):
+        scheduler.push(f'job{n}', rng.choice(['interactive', 'normal', 'background']), f'/root{rng.randrange(6)}')
+        if n % 40 == 39:
+            scheduler.pop()
+
+    order = scheduler.order()
+    assert [scheduler.position(job_id) for job_id in order] == list(range(1, len(order) + 1))
+
+    # Every change invalidates the cached positions
+    last = order[-1]
+    scheduler.set_priority(last, 'interactive')
+    order = scheduler.order()
+    assert scheduler.position(last) == order.index(last) + 1 < len(order)
+
+    popped = []
+    while len(scheduler):
+        popped.append(scheduler.pop())
+    assert popped == order
+    assert scheduler.position(last) is None
+
+    logger.info("✅ Queue order and position test passed")
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_roots_take_turns()
+    test_order_matches_pops()
+    logger.info("🎉 All ingestion scheduler tests passed!")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test pushed ingestion progress (job events, rate-limited progress messages, ETA)
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.progress_publisher import ProgressPublisher, MESSAGE_INGESTION_JOB, MESSAGE_INGESTION_PROGRESS
+from services.ingestion_jobs import IngestionJobManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class LoopThread:
+    """Event loop in a background thread collecting sent messages, like the server's loop"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.messages = []
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    def wait_for(self, predicate, timeout: float = 5.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            matching = [m for m in self.messages if predicate(m)]
+            if matching:
+                return matching
+            time.sleep(0.01)
+        raise AssertionError(f"No matching message in {self.messages}")
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+def test_progress_is_rate_limited():
+    """Many reports within one interval produce a single message carrying all file events"""
+    logger.info("🧪 Testing progress rate limiting...")
+
+    publisher = ProgressPublisher(min_interval_seconds=1.0)
+    publisher.job_event('job-1', 'job_started')
+    start = time.time()
+
+    publisher.publish('job-1', {'status': 'file_started', 'file': 'a.pptx'})
+    publisher.publish('job-1', {'status': 'slides_embedded', 'slides_embedded': 10})
+    publisher.publish('job-1', {'status': 'slides_embedded', 'slides_embedded': 5})
+    publisher.publish('job-1', {'status': 'file_finished', 'file': 'a.pptx', 'progress': 50.0,
+                                'files_processed': 1, 'files_total': 2, 'slides_processed': 15})
+    publisher.publish('job-1', {'status': 'file_failed', 'file': 'b.pptx', 'error': 'corrupt'})
+
+    messages = publisher.collect_due(start + 10)
+    assert len(messages) == 1
+    message = messages[0]
+    assert message['type'] == MESSAGE_INGESTION_PROGRESS
+    assert [e['event'] for e in message['events']] == ['file_started', 'file_finished', 'file_failed']
+    assert message['events'][2]['error'] == 'corrupt'
+    progress = message['progress']
+    assert progress['slides_embedded'] == 15
+    assert progress['files_total'] == 2
+    assert progress['errors'] == 1
+    assert progress['current_file'] == 'a.pptx'
+    assert progress['eta_seconds'] is not None and progress['eta_seconds'] > 0
+    assert progress['slides_per_second'] > 0
+
+    # Nothing new, then a new report inside the interval: nothing due until it elapses
+    assert publisher.collect_due(start + 10.1) == []
+    publisher.publish('job-1', {'status': 'slides_embedded', 'slides_embedded': 1})
+    assert publisher.collect_due(start + 10.5) == []
+    assert len(publisher.collect_due(start + 11.1)) == 1
+
+    logger.info("✅ Progress rate limiting test passed")
+
+def test_event_overflow_and_interval():
+    """File events beyond the per-message cap are counted as dropped; intervals are clamped"""
+    logger.info("🧪 Testing event overflow and interval changes...")
+
+    publisher = ProgressPublisher(min_interval_seconds=0.5, max_events_per_message=3)
+    for n in range(5):
+        publisher.publish('job-2', {'status': 'file_finished', 'file': f'{n}.pptx'})
+    message = publisher.collect_due(time.time() + 1)[0]
+    assert [e['file'] for e in message['events']] == ['2.pptx', '3.pptx', '4.pptx']
+    assert message['dropped_events'] == 2
+
+    assert publisher.set_interval(2.0) == 2.0
+    assert publisher.set_interval(0) == 0.1
+    assert publisher.set_interval(1000) == 10.0
+
+    logger.info("✅ Event overflow and interval test passed")
+
+def test_job_events_are_pushed():
+    """Job lifecycle events are delivered at once, with pending progress flushed before job_finished"""
+    logger.info("🧪 Testing job event delivery...")
+
+    runner = LoopThread()
+    publisher = ProgressPublisher(min_interval_seconds=10.0)
+    publisher.attach(runner.loop, runner.send)
+    try:
+        def process_folder(folder_path, progress_callback=None, cancel_event=None, **options):
+            progress_callback({'status': 'file_finished', 'file': 'deck.pptx', 'progress': 100.0,
+                               'files_processed': 1, 'slides_processed': 3})
+            return {'success': True, 'files_processed': 1, 'slides_processed': 3, 'message': 'done'}
+
+        manager = IngestionJobManager(process_folder_fn=process_folder, publisher=publisher)
+        job_id = manager.submit('/decks/a')['job_id']
+
+        runner.wait_for(lambda m: m.get('event') == 'job_finished')
+        messages = [m for m in runner.messages if m['job_id'] == job_id]
+        assert [m.get('event', m['type']) for m in messages] == \
+            ['job_queued', 'job_started', MESSAGE_INGESTION_PROGRESS, 'job_finished']
+        assert all(m['type'] == MESSAGE_INGESTION_JOB for m in messages if 'event' in m)
+        assert messages[2]['events'] == [{'event': 'file_finished', 'file': 'deck.pptx'}]
+        assert messages[3]['status'] == 'completed'
+        assert messages[3]['slides_processed'] == 3
+
+        stats = manager.get_status_summary()['progress_publisher']
+        assert stats['active_jobs'] == 0
+        assert stats['messages_sent'] == 4
+    finally:
+        publisher.detach()
+        runner.stop()
+
+    logger.info("✅ Job event delivery test passed")
+
+if __name__ == "__main__":
+    test_progress_is_rate_limited()
+    test_event_overflow_and_interval()
+    test_job_events_are_pushed()
+    logger.info("🎉 All progress publisher tests passed!")
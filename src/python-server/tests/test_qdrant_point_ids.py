@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test deterministic slide point ids and the one-time dedupe of duplicate points
+"""
+
+import os
+import sys
+import uuid
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from qdrant_client.models import PointStruct
+from services.qdrant_db import QdrantVectorDB, slide_point_id
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _embedding(file_path: str, slide_number: int, value: float = 0.5):
+    return {
+        'embedding': [value] * 1024,
+        'metadata': {
+            'file_path': file_path,
+            'file_name': os.path.basename(file_path),
+            'slide_number': slide_number,
+            'slide_id': f"{os.path.basename(file_path)}_slide_{slide_number}",
+            'model': 'voyage-multimodal-3'
+        }
+    }
+
+def test_point_ids_are_stable():
+    """Same file, slide and model give the same id; same file name in another folder does not"""
+    logger.info("🧪 Testing deterministic point ids...")
+
+    first = slide_point_id('/decks/a/deck.pptx', 1)
+    assert first == slide_point_id('/decks/a/deck.pptx', 1, 'voyage-multimodal-3')
+    assert str(uuid.UUID(first)) == first
+    assert first != slide_point_id('/decks/b/deck.pptx', 1)
+    assert first != slide_point_id('/decks/a/deck.pptx', 2)
+    assert first != slide_point_id('/decks/a/deck.pptx', 1, 'other-model')
+
+    logger.info("✅ Deterministic point id test passed")
+
+def test_reindexing_overwrites_points():
+    """Upserting the same slides twice keeps one point per slide"""
+    logger.info("🧪 Testing re-ingestion upsert...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = QdrantVectorDB(db_path=os.path.join(tmp, 'vector_db'))
+        try:
+            embeddings = [_embedding('/decks/a/deck.pptx', n) for n in (1, 2)]
+            embeddings.append(_embedding('/decks/b/deck.pptx', 1))
+            first_ids = db.upsert_slide_embeddings_with_ids(embeddings)
+            second_ids = db.upsert_slide_embeddings_with_ids(
+                [_embedding('/decks/a/deck.pptx', n, 0.25) for n in (1, 2)]
+            )
+
+            assert len(set(first_ids)) == 3
+            assert second_ids == first_ids[:2]
+            assert db.get_collection_info()['total_vector_count'] == 3
+        finally:
+            db.client.close()
+
+    logger.info("✅ Re-ingestion upsert test passed")
+
+def test_dedupe_runs_once():
+    """Duplicates from random ids are removed once per collection, preferring stable then catalog ids"""
+    logger.info("🧪 Testing one-time dedupe...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = QdrantVectorDB(db_path=os.path.join(tmp, 'vector_db'))
+        try:
+            def legacy_point(file_path, slide_number, point_id=None):
+                # Points as written before ids were deterministic (random id, no model)
+                return PointStruct(id=point_id or str(uuid.uuid4()), vector=[0.5] * 1024,
+                                   payload={'file_path': file_path, 'slide_number': slide_number})
+
+            stable_id = slide_point_id('/decks/a/deck.pptx', 1)
+            cataloged_id = str(uuid.uuid4())
+            db.upsert_points([
+                legacy_point('/decks/a/deck.pptx', 1),
+                legacy_point('/decks/a/deck.pptx', 1, stable_id),
+                legacy_point('/decks/a/deck.pptx', 2),
+                legacy_point('/decks/a/deck.pptx', 2, cataloged_id),
+                legacy_point('/decks/a/deck.pptx', 2),
+                legacy_point('/decks/b/deck.pptx', 1),
+            ])
+
+            result = db.ensure_slide_points_deduplicated(keep_ids=[cataloged_id])
+            assert result == {'points_scanned': 6, 'duplicate_slides': 2, 'points_deleted': 3}
+
+            remaining = {str(point.id) for point in db.client.scroll(db.collection_name, limit=100)[0]}
+            assert len(remaining) == 3
+            assert stable_id in remaining and cataloged_id in remaining
+
+            # Marker written: later starts skip the scan
+            db.upsert_points([legacy_point('/decks/b/deck.pptx', 1)])
+            assert db.ensure_slide_points_deduplicated() is None
+            assert db.get_collection_info()['total_vector_count'] == 4
+
+            # Completion is recorded per collection: another model's collection is still cleaned
+            db.use_embedding_model('local', 'local/clip-test', 1024)
+            db.upsert_points([legacy_point('/decks/a/deck.pptx', 1), legacy_point('/decks/a/deck.pptx', 1)])
+            assert db.ensure_slide_points_deduplicated()['points_deleted'] == 1
+            assert db.ensure_slide_points_deduplicated() is None
+        finally:
+            db.client.close()
+
+    logger.info("✅ One-time dedupe test passed")
+
+if __name__ == "__main__":
+    test_point_ids_are_stable()
+    test_reindexing_overwrites_points()
+    test_dedupe_runs_once()
+    logger.info("🎉 All Qdrant point id tests passed!")
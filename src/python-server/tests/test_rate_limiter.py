@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test the shared embedding rate limiter and the adaptive concurrency controller
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.rate_limiter import (
+    TokenBucketRateLimiter, AdaptiveConcurrencyController,
+    PRIORITY_INTERACTIVE, PRIORITY_BULK
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_token_bucket_limits_and_priority():
+    """Bulk callers wait for tokens while interactive callers can use the reserve"""
+    logger.info("🧪 Testing token bucket rate limiter...")
+
+    # 600 requests/min = 10 per second, 6000 tokens/min = 100 per second
+    limiter = TokenBucketRateLimiter(requests_per_minute=600, tokens_per_minute=6000,
+                                     interactive_reserve=0.1)
+
+    # Bulk may use the bucket down to the 10% reserve without waiting
+    assert limiter.acquire(5000, priority=PRIORITY_BULK) < 0.05
+    assert limiter.acquire(400, priority=PRIORITY_BULK) < 0.05
+
+    # The next bulk request has to wait for ~200 tokens to refill (~2s at 100 tokens/s)
+    start = time.monotonic()
+    limiter.acquire(200, priority=PRIORITY_BULK)
+    assert 1.5 < time.monotonic() - start < 3.0
+
+    # Interactive requests may draw from the reserve and do not wait for bulk refill
+    limiter = TokenBucketRateLimiter(requests_per_minute=600, tokens_per_minute=6000,
+                                     interactive_reserve=0.1)
+    limiter.acquire(5400, priority=PRIORITY_BULK)
+    assert limiter.acquire(100, priority=PRIORITY_INTERACTIVE) < 0.05
+
+    stats = limiter.get_stats()
+    assert stats['requests'] == 2
+    assert stats['interactive_requests'] == 1
+
+    logger.info("✅ Token bucket rate limiter test passed")
+
+def test_throttle_pauses_callers():
+    """A throttling response pauses every caller"""
+    logger.info("🧪 Testing throttle pause...")
+
+    limiter = TokenBucketRateLimiter(requests_per_minute=60000, tokens_per_minute=6000000)
+    limiter.record_throttle(retry_after=0.5)
+
+    start = time.monotonic()
+    limiter.acquire(1, priority=PRIORITY_INTERACTIVE)
+    assert time.monotonic() - start >= 0.45
+    assert limiter.get_stats()['throttles'] == 1
+
+    logger.info("✅ Throttle pause test passed")
+
+def test_adaptive_concurrency_aimd():
+    """Limit grows additively on fast successes and halves on throttling or slow responses"""
+    logger.info("🧪 Testing adaptive concurrency controller...")
+
+    controller = AdaptiveConcurrencyController(initial_limit=4, min_limit=1, max_limit=6,
+                                               cooldown_seconds=0.0)
+
+    # A full window of successes at steady latency increases the limit by one
+    for _ in range(4):
+        controller.record_success(1.0, items=10)
+    assert controller.limit == 5
+
+    # Throttling halves the limit
+    controller.record_throttle()
+    assert controller.limit == 2
+
+    # Latency far above the baseline counts as congestion
+    controller.record_success(20.0, items=10)
+    assert controller.limit == 1
+
+    # Never below the minimum
+    controller.record_throttle()
+    assert controller.limit == 1
+
+    stats = controller.get_stats()
+    assert stats['increases'] == 1
+    assert stats['decreases'] == 2
+    assert stats['throttles'] == 2
+
+    logger.info("✅ Adaptive concurrency controller test passed")
+
+def test_concurrency_slots_gate_workers():
+    """Worker threads beyond the current limit wait for a slot"""
+    logger.info("🧪 Testing concurrency slots...")
+
+    controller = AdaptiveConcurrencyController(initial_limit=2, max_limit=2)
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def worker():
+        with controller.slot():
+            with lock:
+                active.append(1)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    assert controller.get_stats()['active'] == 0
+
+    logger.info("✅ Concurrency slots test passed")
+
+def test_async_acquire_shares_buckets():
+    """Coroutines wait on the event loop for the same buckets as blocking callers"""
+    logger.info("🧪 Testing async acquire...")
+
+    # 600 requests/min = 10 per second, 6000 tokens/min = 100 per second
+    limiter = TokenBucketRateLimiter(requests_per_minute=600, tokens_per_minute=6000,
+                                     interactive_reserve=0.1)
+    limiter.acquire(5400, priority=PRIORITY_BULK)
+
+    async def run():
+        ticks = []
+
+        async def ticker():
+            # Keeps running while the bulk request waits: the loop is not blocked
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.1)
+
+        start = time.monotonic()
+        waited, _ = await asyncio.gather(limiter.acquire_async(100, priority=PRIORITY_BULK), ticker())
+        return waited, time.monotonic() - start, ticks
+
+    waited, elapsed, ticks = asyncio.run(run())
+    assert 0.5 < waited < 2.0 and elapsed >= waited
+    assert len(ticks) == 5
+
+    # Interactive coroutines may still draw from the reserve at once
+    assert asyncio.run(limiter.acquire_async(100, priority=PRIORITY_INTERACTIVE)) < 0.05
+
+    stats = limiter.get_stats()
+    assert stats['requests'] == 3
+    assert stats['interactive_requests'] == 1
+
+    logger.info("✅ Async acquire test passed")
+
+if __name__ == "__main__":
+    test_token_bucket_limits_and_priority()
+    test_throttle_pauses_callers()
+    test_adaptive_concurrency_aimd()
+    test_concurrency_slots_gate_workers()
+    test_async_acquire_shares_buckets()
+    logger.info("🎉 All rate limiter tests passed!")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test the embedding retry policy (error classes, Retry-After, jitter) and the shared circuit breaker
+"""
+
+import sys
+import time
+import logging
+from pathlib import Path
+from email.utils import formatdate
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+import httpx
+from voyageai import error
+from services.retry_policy import (
+    RetryPolicy, CircuitBreaker, CircuitOpenError,
+    ERROR_THROTTLE, ERROR_RETRYABLE, ERROR_FATAL, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+)
+from services.rate_limiter import TokenBucketRateLimiter, AdaptiveConcurrencyController
+from services.voyage_client import PooledVoyageClient
+from services.voyage_embeddings import VoyageEmbeddingsService
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_error_classes_and_retry_after():
+    """Throttles, transient failures and request errors are told apart; Retry-After is parsed"""
+    logger.info("🧪 Testing error classification...")
+
+    policy = RetryPolicy()
+    throttled = error.RateLimitError("HTTP 429: slow down", http_status=429, headers={'Retry-After': '3'})
+    assert policy.classify(throttled) == ERROR_THROTTLE
+    assert policy.retry_after(throttled) == 3.0
+
+    dated = error.RateLimitError("HTTP 429", http_status=429,
+                                 headers={'retry-after': formatdate(time.time() + 10, usegmt=True)})
+    assert 8.0 < policy.retry_after(dated) <= 10.0
+    assert policy.retry_after(error.RateLimitError("HTTP 429")) is None
+
+    assert policy.classify(error.ServiceUnavailableError("HTTP 503")) == ERROR_RETRYABLE
+    assert policy.classify(error.Timeout("timed out")) == ERROR_RETRYABLE
+    assert policy.classify(ConnectionError("reset")) == ERROR_RETRYABLE
+    assert policy.classify(error.APIError("HTTP 502", http_status=502)) == ERROR_RETRYABLE
+    assert policy.classify(error.InvalidRequestError("HTTP 400: image too large")) == ERROR_FATAL
+    assert policy.classify(error.AuthenticationError("HTTP 401")) == ERROR_FATAL
+    assert policy.classify(CircuitOpenError("open")) == ERROR_FATAL
+    assert policy.classify(ValueError("bad image")) == ERROR_FATAL
+
+    logger.info("✅ Error classification test passed")
+
+def test_retry_delays():
+    """Retry-After is honoured, backoff is jittered and bounded, fatal errors are not retried"""
+    logger.info("🧪 Testing retry delays...")
+
+    delays = []
+    policy = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=60.0, sleep=delays.append)
+    errors = [
+        error.RateLimitError("HTTP 429", http_status=429, headers={'Retry-After': '5'}),
+        error.ServiceUnavailableError("HTTP 503"),
+        error.ServiceUnavailableError("HTTP 503"),
+    ]
+
+    def flaky():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+
+    assert policy.call(flaky) == 'ok'
+    assert 5.0 <= delays[0] <= 5.6
+    assert 0.0 <= delays[1] <= 4.0 and 0.0 <= delays[2] <= 8.0
+
+    # Fatal errors raise on the first attempt
+    calls = []
+    def invalid():
+        calls.append(1)
+        raise error.InvalidRequestError("HTTP 400")
+    try:
+        policy.call(invalid)
+        raise AssertionError("Expected InvalidRequestError")
+    except error.InvalidRequestError:
+        assert len(calls) == 1
+
+    # Retryable errors stop after max_attempts
+    def down():
+        calls.append(1)
+        raise error.ServerError("HTTP 500")
+    calls.clear()
+    try:
+        policy.call(down)
+        raise AssertionError("Expected ServerError")
+    except error.ServerError:
+        assert len(calls) == 4
+
+    # Jitter: the same attempt does not always get the same delay
+    assert len({round(policy.backoff(3), 6) for _ in range(20)}) > 1
+
+    logger.info("✅ Retry delay test passed")
+
+def test_circuit_breaker_opens_and_recovers_gradually():
+    """Consecutive failures open the circuit; half-open admits probes, doubling on success"""
+    logger.info("🧪 Testing circuit breaker...")
+
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=0.2, recovery_successes=3)
+    for _ in range(3):
+        breaker.acquire(0)
+        breaker.release(False)
+    assert breaker.state == STATE_OPEN
+
+    # Callers that cannot wait out the open period are rejected; patient callers are paused
+    try:
+        breaker.acquire(0)
+        raise AssertionError("Expected CircuitOpenError")
+    except CircuitOpenError as e:
+        assert e.retry_in > 0
+    assert breaker.acquire(2.0) >= 0.1
+    assert breaker.state == STATE_HALF_OPEN
+
+    # One probe at a time: a second caller is not admitted until the probe finishes
+    try:
+        breaker.acquire(0)
+        raise AssertionError("Expected CircuitOpenError")
+    except CircuitOpenError:
+        pass
+    breaker.release(True)
+    assert breaker.get_stats()['probe_limit'] == 2
+    breaker.acquire(0)
+    breaker.acquire(0)
+    breaker.release(True)
+    breaker.release(True)
+    assert breaker.state == STATE_CLOSED
+
+    # A failed probe reopens the circuit for twice as long
+    for _ in range(3):
+        breaker.acquire(0)
+        breaker.release(False)
+    breaker.acquire(2.0)
+    breaker.release(False)
+    stats = breaker.get_stats()
+    assert stats['state'] == STATE_OPEN
+    assert 0.2 < stats['open_for_seconds'] <= 0.4
+    assert stats['opens'] == 3
+
+    # Throttles and request errors do not count as failures
+    breaker = CircuitBreaker(failure_threshold=2)
+    for _ in range(5):
+        breaker.acquire(0)
+        breaker.release(None)
+    assert breaker.state == STATE_CLOSED
+
+    logger.info("✅ Circuit breaker test passed")
+
+def _service(handler, breaker: CircuitBreaker, limiter: TokenBucketRateLimiter) -> VoyageEmbeddingsService:
+    client = PooledVoyageClient('test-key', base_url='http://voyage.test/v1', transport=httpx.MockTransport(handler))
+    service = VoyageEmbeddingsService(
+        client=client, embedding_store=object(), rate_limiter=limiter,
+        concurrency_controller=AdaptiveConcurrencyController(),
+        retry_policy=RetryPolicy(max_attempts=3, sleep=lambda seconds: None),
+        circuit_breaker=breaker
+    )
+    service.BULK_CIRCUIT_WAIT_SECONDS = 0.0
+    return service
+
+def test_outage_opens_shared_breaker():
+    """An upstream outage stops bulk calls after the threshold instead of hammering the API"""
+    logger.info("🧪 Testing embedding calls during an outage...")
+
+    requests = []
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503, json={'detail': 'unavailable'})
+
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=60)
+    service = _service(handler, breaker, TokenBucketRateLimiter())
+    try:
+        inputs = [{'content': [{'type': 'text', 'text': 'slide'}]}]
+        for _ in range(3):
+            try:
+                service.create_batch_multimodal_embeddings(inputs)
+                raise AssertionError("Expected an error")
+            except (error.ServiceUnavailableError, CircuitOpenError):
+                pass
+
+        # Three attempts opened the circuit; later calls never reach the API
+        assert len(requests) == 3
+        stats = service.get_rate_limit_stats()['circuit_breaker']
+        assert stats['state'] == STATE_OPEN
+        assert stats['rejected'] == 2
+    finally:
+        service.client.close()
+
+    logger.info("✅ Outage test passed")
+
+def test_throttle_uses_retry_after():
+    """A 429 pauses the shared rate limiter for the Retry-After delay and the call is retried"""
+    logger.info("🧪 Testing throttled embedding calls...")
+
+    responses = [httpx.Response(429, json={'detail': 'slow down'}, headers={'Retry-After': '0.3'})]
+    def handler(request):
+        if responses:
+            return responses.pop(0)
+        return httpx.Response(200, json={'data': [{'embedding': [0.5] * 4}], 'usage': {'total_tokens': 1}})
+
+    limiter = TokenBucketRateLimiter()
+    breaker = CircuitBreaker(failure_threshold=1)
+    service = _service(handler, breaker, limiter)
+    try:
+        start = time.monotonic()
+        embeddings = service.create_batch_multimodal_embeddings([{'content': [{'type': 'text', 'text': 'slide'}]}])
+        assert embeddings == [[0.5] * 4]
+        # The retry waited for the limiter pause set from Retry-After
+        assert time.monotonic() - start >= 0.25
+        assert limiter.get_stats()['throttles'] == 1
+        assert breaker.state == STATE_CLOSED
+    finally:
+        service.client.close()
+
+    logger.info("✅ Throttle test passed")
+
+if __name__ == "__main__":
+    test_error_classes_and_retry_after()
+    test_retry_delays()
+    test_circuit_breaker_opens_and_recovers_gradually()
+    test_outage_opens_shared_breaker()
+    test_throttle_uses_retry_after()
+    logger.info("🎉 All retry policy tests passed!")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test cross-deck packing of slides into embedding batches
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.slide_batch_packer import SlideBatchPacker
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _deck(file_path: str, slide_count: int):
+    return {
+        'file_path': file_path,
+        'slides_data': [{'file_path': file_path, 'slide_number': n + 1} for n in range(slide_count)]
+    }
+
+def _embed(batch):
+    return [{'embedding': [1.0], 'metadata': {'file_path': s['file_path'], 'slide_number': s['slide_number']}}
+            for s in batch]
+
+def test_packer_fills_batches_across_decks():
+    """Five 8-slide decks become two full 16-slide requests plus one partial"""
+    logger.info("🧪 Testing cross-deck batch packing...")
+
+    packer = SlideBatchPacker(batch_size=16)
+    batches = []
+    for i in range(5):
+        batches.extend(packer.add_file(_deck(f"deck_{i}.pptx", 8)))
+    assert [len(b) for b in batches] == [16, 16]
+
+    batches.extend(packer.flush())
+    assert [len(b) for b in batches] == [16, 16, 8]
+
+    completed = []
+    for batch in batches:
+        completed.extend(packer.route_results(batch, _embed(batch)))
+
+    assert sorted(item['file_path'] for item in completed) == [f"deck_{i}.pptx" for i in range(5)]
+    assert all(len(item['embeddings_data']) == 8 for item in completed)
+    assert packer.pending_files == 0
+
+    logger.info("✅ Cross-deck batch packing test passed")
+
+def test_packer_routes_partial_failures():
+    """Slides missing from a batch result count as failed so the file still completes"""
+    logger.info("🧪 Testing packed batch failure routing...")
+
+    packer = SlideBatchPacker(batch_size=4)
+    batches = packer.add_file(_deck('a.pptx', 2)) + packer.add_file(_deck('b.pptx', 2))
+    assert len(batches) == 1
+
+    # Only a's slides come back
+    completed = packer.route_results(batches[0], _embed(batches[0][:2]))
+    by_file = {item['file_path']: item for item in completed}
+    assert by_file['a.pptx']['slides_failed'] == 0
+    assert by_file['b.pptx']['slides_failed'] == 2
+    assert by_file['b.pptx']['embeddings_data'] == []
+
+    logger.info("✅ Packed batch failure routing test passed")
+
+if __name__ == "__main__":
+    test_packer_fills_batches_across_decks()
+    test_packer_routes_partial_failures()
+    logger.info("🎉 All batch packer tests passed!")
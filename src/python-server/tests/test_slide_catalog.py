@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test the persistent slide catalog used for incremental folder rescans
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.slide_catalog import SlideCatalog
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _write(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_catalog_diff_detects_changes():
+    """New, unchanged, modified and deleted files are classified correctly"""
+    logger.info("🧪 Testing slide catalog diff...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        catalog = SlideCatalog(db_path=os.path.join(temp_dir, 'catalog.db'))
+        root = os.path.join(temp_dir, 'decks')
+        os.makedirs(root)
+
+        deck_a = os.path.join(root, 'a.pptx')
+        deck_b = os.path.join(root, 'b.pptx')
+        deck_c = os.path.join(root, 'c.pptx')
+        _write(deck_a, b'deck a')
+        _write(deck_b, b'deck b')
+        _write(deck_c, b'deck c')
+
+        diff = catalog.diff_scan([deck_a, deck_b, deck_c], root=root)
+        assert len(diff['new']) == 3, diff
+
+        catalog.record_file(deck_a, ['p1', 'p2'], 2)
+        catalog.record_file(deck_b, ['p3'], 1)
+        catalog.record_file(deck_c, ['p4'], 1)
+
+        # Touch a without changing content, rewrite b, delete c
+        future = time.time() + 10
+        os.utime(deck_a, (future, future))
+        _write(deck_b, b'deck b, edited')
+        os.remove(deck_c)
+
+        diff = catalog.diff_scan([deck_a, deck_b], root=root)
+        assert diff['unchanged'] == [deck_a], diff
+        assert diff['modified'] == [deck_b], diff
+        assert diff['deleted'] == [os.path.abspath(deck_c)], diff
+        assert catalog.get_entry(deck_c)['point_ids'] == ['p4']
+
+        # A scan for other file types never reports decks as deleted
+        diff = catalog.diff_scan([], root=root, extensions={'.png', '.jpg'})
+        assert diff['deleted'] == [], diff
+
+        # Files below paths the scan could not list are not deleted; nothing is if the root failed
+        nested = os.path.join(root, 'q1', 'nested.pptx')
+        os.makedirs(os.path.dirname(nested))
+        _write(nested, b'nested')
+        catalog.record_file(nested, ['p5'], 1)
+        diff = catalog.diff_scan([deck_a, deck_b], root=root, unlisted_paths=[os.path.join(root, 'q1')])
+        assert diff['deleted'] == [os.path.abspath(deck_c)], diff
+        assert catalog.diff_scan([], root=root, unlisted_paths=[root])['deleted'] == []
+
+        catalog.close()
+
+    logger.info("✅ Slide catalog diff test passed")
+
+def test_catalog_folder_removal_is_scoped():
+    """Removing a folder does not touch sibling folders sharing a name prefix or differing in case"""
+    logger.info("🧪 Testing slide catalog folder removal...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        catalog = SlideCatalog(db_path=os.path.join(temp_dir, 'catalog.db'))
+        folder = os.path.join(temp_dir, 'q1')
+        sibling = os.path.join(temp_dir, 'q1_archive')
+        os.makedirs(folder)
+        os.makedirs(sibling)
+
+        deck = os.path.join(folder, 'deck.pptx')
+        other = os.path.join(sibling, 'deck.pptx')
+        _write(deck, b'one')
+        _write(other, b'two')
+        catalog.record_file(deck, ['p1'], 1)
+        catalog.record_file(other, ['p2'], 1)
+
+        assert catalog.remove_folder(folder) == 1
+        assert catalog.get_entry(other) is not None
+        assert catalog.get_stats()['cataloged_files'] == 1
+
+        # Folder names differing only in case are different folders (on case-sensitive file systems)
+        upper = os.path.join(temp_dir, 'Decks')
+        lower = os.path.join(temp_dir, 'decks')
+        os.makedirs(upper)
+        os.makedirs(lower, exist_ok=True)
+        if not os.path.samefile(upper, lower):
+            lower_deck = os.path.join(lower, 'a.pptx')
+            _write(lower_deck, b'lower')
+            catalog.record_file(lower_deck, ['p3'], 1)
+            assert catalog.get_entries_under(upper) == []
+            assert catalog.diff_scan([], root=upper, extensions={'.pptx'})['deleted'] == []
+            assert catalog.remove_folder(upper) == 0
+            assert catalog.get_entry(lower_deck) is not None
+
+        catalog.close()
+
+    logger.info("✅ Slide catalog folder removal test passed")
+
+def test_catalog_records_version_that_was_indexed():
+    """A file saved while it was being indexed is still reported as modified"""
+    logger.info("🧪 Testing slide catalog fingerprints...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        catalog = SlideCatalog(db_path=os.path.join(temp_dir, 'catalog.db'))
+        deck = os.path.join(temp_dir, 'deck.pptx')
+        _write(deck, b'version one')
+
+        fingerprint = catalog.fingerprint(deck)
+        # Saved during conversion/embedding, before the vectors are cataloged
+        _write(deck, b'version two, saved mid-run')
+        later = time.time() + 10
+        os.utime(deck, (later, later))
+        catalog.record_file(deck, ['p1'], 1, fingerprint)
+
+        assert catalog.get_entry(deck)['content_hash'] == fingerprint['content_hash']
+        assert catalog.diff_scan([deck])['modified'] == [deck]
+
+        catalog.close()
+
+    logger.info("✅ Slide catalog fingerprint test passed")
+
+def test_catalog_records_rejected_slides():
+    """Rejected slides are counted per file, also in catalogs created before they were recorded"""
+    logger.info("🧪 Testing rejected slide counts...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'catalog.db')
+        legacy = sqlite3.connect(db_path)
+        legacy.execute("""
+            CREATE TABLE indexed_files (
+                file_path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL,
+                content_hash TEXT NOT NULL, point_ids TEXT NOT NULL, slide_count INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+        """)
+        legacy.execute("INSERT INTO indexed_files VALUES ('/decks/old.pptx', 1, 1.0, 'h', '[]', 3, 1.0)")
+        legacy.commit()
+        legacy.close()
+
+        catalog = SlideCatalog(db_path=db_path)
+        assert catalog.get_entry('/decks/old.pptx')['failed_slides'] == 0
+
+        deck = os.path.join(temp_dir, 'deck.pptx')
+        _write(deck, b'deck with a broken slide')
+        catalog.record_file(deck, ['p1', 'p2'], 2, failed_slides=1)
+        assert catalog.get_entry(deck)['failed_slides'] == 1
+        assert catalog.diff_scan([deck])['unchanged'] == [deck]
+        assert catalog.get_stats()['rejected_slides'] == 1
+
+        catalog.close()
+
+    logger.info("✅ Rejected slide count test passed")
+
+if __name__ == "__main__":
+    test_catalog_diff_detects_changes()
+    test_catalog_folder_removal_is_scoped()
+    test_catalog_records_version_that_was_indexed()
+    test_catalog_records_rejected_slides()
+    logger.info("🎉 All slide catalog tests passed!")
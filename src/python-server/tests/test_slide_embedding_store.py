@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed slide embedding store
+"""
+
+import sys
+import os
+import time
+import tempfile
+import logging
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.slide_embedding_store import SlideEmbeddingStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_store_roundtrip_and_hit_rate():
+    """Stored vectors are returned for identical image bytes and model only"""
+    logger.info("🧪 Testing embedding store roundtrip...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = SlideEmbeddingStore(db_path=os.path.join(temp_dir, 'store.db'))
+
+        key = store.compute_key(b'same image', 'voyage-multimodal-3')
+        assert key == store.compute_key(b'same image', 'voyage-multimodal-3')
+        assert key != store.compute_key(b'same image', 'other-model')
+
+        store.put(key, [0.5, 0.25, 1.0])
+        assert store.get(key) == [0.5, 0.25, 1.0]
+        assert store.get(store.compute_key(b'other image', 'voyage-multimodal-3')) is None
+
+        stats = store.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        assert stats['hit_rate_percent'] == 50.0
+
+        store.close()
+
+    logger.info("✅ Embedding store roundtrip test passed")
+
+def test_store_evicts_least_recently_used():
+    """Entry limit evicts the least recently accessed vectors"""
+    logger.info("🧪 Testing embedding store eviction...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = SlideEmbeddingStore(db_path=os.path.join(temp_dir, 'store.db'), max_entries=2)
+
+        store.put('a', [1.0])
+        time.sleep(0.02)
+        store.put('b', [2.0])
+        time.sleep(0.02)
+        store.get('a')  # a is now more recent than b
+        time.sleep(0.02)
+        store.put('c', [3.0])
+
+        found = store.get_many(['a', 'b', 'c'])
+        assert set(found) == {'a', 'c'}, found
+        assert store.get_stats()['evictions'] == 1
+
+        store.close()
+
+    logger.info("✅ Embedding store eviction test passed")
+
+if __name__ == "__main__":
+    test_store_roundtrip_and_hit_rate()
+    test_store_evicts_least_recently_used()
+    logger.info("🎉 All embedding store tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test raw-bytes and file-backed slide image handles
+"""
+
+import sys
+import base64
+import logging
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.slide_image import SlideImage, get_slide_image
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _encode(width: int, height: int, image_format: str = 'PNG') -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, format=image_format)
+    return buffer.getvalue()
+
+def test_file_backed_image():
+    """File-backed images are read lazily through a memory map"""
+    logger.info("🧪 Testing file-backed slide images...")
+
+    data = _encode(320, 180)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'slide_001.png'
+        path.write_bytes(data)
+
+        image = SlideImage.from_file(str(path))
+        assert not image.in_memory
+        assert image.memory_bytes == 0
+        assert image.nbytes == len(data)
+        assert image.upload_bytes == len(base64.b64encode(data))
+
+        with image.buffer() as view:
+            assert isinstance(view, memoryview)
+            assert bytes(view) == data
+
+        assert image.mime_type == 'image/png'
+        assert image.dimensions == (320, 180)
+        assert image.read() == data
+
+    logger.info("✅ File-backed slide image test passed")
+
+def test_in_memory_image_and_data_uri():
+    """In-memory images encode to base64 only when a request needs it"""
+    logger.info("🧪 Testing in-memory slide images...")
+
+    data = _encode(64, 48, 'JPEG')
+    image = SlideImage.from_bytes(data)
+    assert image.in_memory
+    assert image.memory_bytes == len(data)
+    assert image.mime_type == 'image/jpeg'
+
+    uri = image.to_data_uri()
+    prefix = 'data:image/jpeg;base64,'
+    assert uri.startswith(prefix)
+    assert base64.b64decode(uri[len(prefix):]) == data
+    assert image.to_base64() == uri[len(prefix):]
+    assert SlideImage.detect_mime_type(b'not an image') == 'application/octet-stream'
+
+    logger.info("✅ In-memory slide image test passed")
+
+def test_get_slide_image_legacy_records():
+    """Slide records with the legacy base64 string are still accepted"""
+    logger.info("🧪 Testing legacy slide records...")
+
+    data = _encode(10, 10)
+    image = SlideImage.from_bytes(data)
+    assert get_slide_image({'image': image}) is image
+
+    legacy = get_slide_image({'image_base64': base64.b64encode(data).decode('utf-8')})
+    assert legacy.read() == data
+
+    assert get_slide_image({}) is None
+    assert get_slide_image({'image_base64': '###'}) is None
+
+    logger.info("✅ Legacy slide record test passed")
+
+if __name__ == "__main__":
+    test_file_backed_image()
+    test_in_memory_image_and_data_uri()
+    test_get_slide_image_legacy_records()
+    logger.info("🎉 All slide image tests passed!")
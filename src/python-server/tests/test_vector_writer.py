@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the coalescing vector writer (size/deadline flushes, non-blocking writes, barrier)
+"""
+
+import sys
+import time
+import logging
+import threading
+from types import SimpleNamespace
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+from services.vector_writer import CoalescingVectorWriter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class RecordingVectorDB:
+    """Vector database stand-in recording upsert sizes and wait flags"""
+
+    def __init__(self, fail: bool = False):
+        self.writes = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def build_points(self, embeddings_data):
+        return [SimpleNamespace(id=data['metadata']['point_id']) for data in embeddings_data]
+
+    def upsert_points(self, points, wait=True):
+        with self.lock:
+            self.writes.append((len(points), wait))
+        return not self.fail
+
+def _embeddings(start: int, count: int):
+    return [{'embedding': [0.0], 'metadata': {'point_id': f"p{n}"}} for n in range(start, start + count)]
+
+def test_coalesces_and_confirms_on_drain():
+    """Many small submissions become few writes; callbacks run after the final barrier"""
+    logger.info("🧪 Testing coalescing and drain barrier...")
+
+    db = RecordingVectorDB()
+    writer = CoalescingVectorWriter(db, max_points=50, max_delay_seconds=10.0, chunk_size=20,
+                                    confirm_every_points=1000)
+    writer.start()
+    committed = []
+    for n in range(0, 50, 5):
+        writer.submit(_embeddings(n, 5), on_committed=committed.extend)
+
+    # 50 points flush by size without waiting - nothing is confirmed yet
+    time.sleep(0.3)
+    assert db.writes == [(20, False), (20, False), (10, False)]
+    assert committed == []
+
+    writer.submit(_embeddings(50, 5), on_committed=committed.extend)
+    writer.submit(_embeddings(55, 5), on_committed=committed.extend)
+
+    assert writer.drain(timeout=5.0)
+    assert sorted(committed) == sorted(f"p{n}" for n in range(60))
+    assert db.writes[-1] == (10, True)  # the final chunk is the barrier
+
+    stats = writer.get_stats()
+    assert stats['submissions'] == 12
+    assert stats['points_written'] == 60
+    assert stats['flushed_by'] == {'size': 1, 'deadline': 0, 'drain': 1}
+    assert stats['barriers'] == 1
+    assert stats['avg_commit_latency_seconds'] > 0
+    writer.close()
+
+    logger.info("✅ Coalescing and drain barrier test passed")
+
+def test_deadline_flush_and_empty_barrier():
+    """A lone submission is flushed at its deadline; drain then confirms it with a barrier write"""
+    logger.info("🧪 Testing deadline flush...")
+
+    db = RecordingVectorDB()
+    writer = CoalescingVectorWriter(db, max_points=500, max_delay_seconds=0.1)
+    writer.start()
+    committed = []
+    writer.submit(_embeddings(0, 3), on_committed=committed.extend)
+
+    time.sleep(0.4)
+    assert db.writes == [(3, False)]
+    assert writer.get_stats()['flushed_by']['deadline'] == 1
+
+    writer.close()
+    assert db.writes[-1] == (3, True)  # last chunk re-sent with wait=True
+    assert committed == ['p0', 'p1', 'p2']
+
+    logger.info("✅ Deadline flush test passed")
+
+def test_failed_writes_reach_callbacks():
+    """Failed writes are reported to the submitters instead of being committed"""
+    logger.info("🧪 Testing failed writes...")
+
+    writer = CoalescingVectorWriter(RecordingVectorDB(fail=True), max_points=10)
+    writer.start()
+    committed, failed = [], []
+    writer.submit(_embeddings(0, 4), on_committed=committed.extend, on_failed=failed.append)
+    writer.close()
+
+    assert committed == []
+    assert len(failed) == 1
+    assert writer.get_stats()['points_failed'] == 4
+
+    logger.info("✅ Failed writes test passed")
+
+if __name__ == "__main__":
+    test_coalesces_and_confirms_on_drain()
+    test_deadline_flush_and_empty_barrier()
+    test_failed_writes_reach_callbacks()
+    logger.info("🎉 All vector writer tests passed!")
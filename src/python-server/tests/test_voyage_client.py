@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the pooled asyncio VoyageAI client (wire format, error mapping, concurrency, sync wrappers)
+"""
+
+import sys
+import json
+import asyncio
+import logging
+import threading
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+
+import httpx
+from voyageai import error
+from services.voyage_client import PooledVoyageClient
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FakeVoyageAPI:
+    """httpx transport handler answering like the VoyageAI API"""
+
+    def __init__(self, delay: float = 0.0, status: int = 200, headers: dict = None):
+        self.delay = delay
+        self.status = status
+        self.headers = headers or {}
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append((request.url.path, request.headers.get('authorization'), body))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status, json={'detail': 'slow down'}, headers=self.headers)
+        if request.url.path.endswith('/rerank'):
+            order = sorted(range(len(body['documents'])), key=lambda i: -len(body['documents'][i]))
+            data = [{'index': i, 'relevance_score': 1.0 / (rank + 1)} for rank, i in enumerate(order)]
+        else:
+            items = body.get('inputs') or body.get('input')
+            data = [{'embedding': [float(n)] * 4, 'index': n} for n in range(len(items))]
+        return httpx.Response(200, json={'data': data, 'usage': {'total_tokens': 7}})
+
+def _client(api: FakeVoyageAPI) -> PooledVoyageClient:
+    return PooledVoyageClient('test-key', base_url='http://voyage.test/v1',
+                              transport=httpx.MockTransport(api))
+
+def test_sync_wrappers_speak_the_api():
+    """Blocking calls send the VoyageAI wire format and return SDK-shaped results"""
+    logger.info("🧪 Testing sync wrappers...")
+
+    api = FakeVoyageAPI()
+    client = _client(api)
+    try:
+        result = client.multimodal_embed([['find the roadmap']], model='voyage-multimodal-3', input_type='query')
+        assert result.embeddings == [[0.0] * 4]
+        assert result.total_tokens == 7
+
+        path, auth, body = api.requests[0]
+        assert path == '/v1/multimodalembeddings'
+        assert auth == 'Bearer test-key'
+        assert body['inputs'] == [{'content': [{'type': 'text', 'text': 'find the roadmap'}]}]
+        assert body['input_type'] == 'query'
+
+        # Dict inputs are sent unchanged
+        segment = {'content': [{'type': 'image_base64', 'image_base64': 'data:image/png;base64,AAAA'}]}
+        client.multimodal_embed([segment, segment], model='voyage-multimodal-3')
+        assert api.requests[1][2]['inputs'] == [segment, segment]
+
+        ranked = client.rerank('q', ['a', 'ccc', 'bb'], model='rerank-2.5-lite', top_k=2)
+        assert [r.index for r in ranked.results] == [1, 2, 0]
+        assert ranked.results[0].document == 'ccc'
+        assert api.requests[2][2]['top_k'] == 2
+
+        assert client.get_stats()['requests'] == 3
+    finally:
+        client.close()
+
+    logger.info("✅ Sync wrapper test passed")
+
+def test_errors_map_to_sdk_types():
+    """HTTP errors surface as the voyageai SDK error classes, with response headers"""
+    logger.info("🧪 Testing error mapping...")
+
+    api = FakeVoyageAPI(status=429, headers={'Retry-After': '3'})
+    client = _client(api)
+    try:
+        try:
+            client.multimodal_embed([['q']], model='voyage-multimodal-3')
+            raise AssertionError("Expected RateLimitError")
+        except error.RateLimitError as e:
+            assert e.http_status == 429
+            assert e.headers.get('retry-after') == '3'
+            assert '429' in str(e)
+
+        api.status = 503
+        try:
+            client.embed(['q'], model='voyage-3')
+            raise AssertionError("Expected ServiceUnavailableError")
+        except error.ServiceUnavailableError:
+            pass
+
+        assert client.get_stats()['failures'] == 2
+    finally:
+        client.close()
+
+    logger.info("✅ Error mapping test passed")
+
+def test_many_requests_in_flight_without_threads():
+    """Hundreds of concurrent requests from a coroutine caller share one loop thread"""
+    logger.info("🧪 Testing concurrent async requests...")
+
+    api = FakeVoyageAPI(delay=0.2)
+    client = _client(api)
+    try:
+        threads_before = threading.active_count()
+
+        async def run():
+            return await asyncio.gather(*[
+                client.amultimodal_embed([[f"query {n}"]], model='voyage-multimodal-3')
+                for n in range(300)
+            ])
+
+        results = asyncio.run(run())
+        assert len(results) == 300
+        assert all(result.embeddings == [[0.0] * 4] for result in results)
+
+        stats = client.get_stats()
+        assert stats['peak_in_flight'] >= 250
+        assert threading.active_count() <= threads_before + 1
+    finally:
+        client.close()
+
+    logger.info("✅ Concurrent async request test passed")
+
+if __name__ == "__main__":
+    test_sync_wrappers_speak_the_api()
+    test_errors_map_to_sdk_types()
+    test_many_requests_in_flight_without_threads()
+    logger.info("🎉 All VoyageAI client tests passed!")
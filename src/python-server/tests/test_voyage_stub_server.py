@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test the local VoyageAI stand-in: deterministic answers, injected faults and offline ingestion
+"""
+
+import io
+import os
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the python-server directory to sys.path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir.parent))
+sys.path.append(str(current_dir))
+
+from PIL import Image
+from voyageai import error
+from services.slide_image import SlideImage
+from services.slide_embedding_store import SlideEmbeddingStore
+from services.rate_limiter import TokenBucketRateLimiter, AdaptiveConcurrencyController
+from services.retry_policy import RetryPolicy, CircuitBreaker, ERROR_THROTTLE, ERROR_RETRYABLE
+from services.voyage_client import PooledVoyageClient
+from services.voyage_embeddings import VoyageEmbeddingsService
+from voyage_stub_server import VoyageStubServer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MODEL = 'voyage-multimodal-3'
+
+def _expect(error_class, call):
+    try:
+        call()
+    except error_class as e:
+        return e
+    raise AssertionError(f"Expected {error_class.__name__}")
+
+def test_answers_are_deterministic():
+    """Same input, same vector - across requests and server instances; rerank is ordered"""
+    logger.info("🧪 Testing deterministic stand-in answers...")
+
+    inputs = [[f"Slide {n} from deck.pptx"] for n in range(3)]
+    vectors = []
+    for _ in range(2):
+        with VoyageStubServer(dimension=8) as server:
+            client = PooledVoyageClient('test-key', base_url=server.base_url)
+            try:
+                vectors.append(client.multimodal_embed(inputs, model=MODEL, input_type='document').embeddings)
+                again = client.multimodal_embed(inputs[:1], model=MODEL, input_type='document').embeddings
+                query = client.multimodal_embed(inputs[:1], model=MODEL, input_type='query').embeddings
+                ranked = client.rerank('revenue', ['a', 'b', 'c', 'd'], model='rerank-2.5-lite', top_k=3)
+            finally:
+                client.close()
+            assert server.get_stats()['inputs_embedded'] == 5
+
+        assert again[0] == vectors[-1][0]
+        assert query[0] != vectors[-1][0]
+        assert len(ranked.results) == 3
+        scores = [result.relevance_score for result in ranked.results]
+        assert scores == sorted(scores, reverse=True)
+
+    assert vectors[0] == vectors[1]
+    assert len(vectors[0]) == 3 and len(vectors[0][0]) == 8
+    assert len({tuple(vector) for vector in vectors[0]}) == 3
+
+    logger.info("✅ Deterministic answer test passed")
+
+def test_injected_faults_map_to_client_errors():
+    """429s carry Retry-After; 503s, timeouts and malformed answers are retryable"""
+    logger.info("🧪 Testing injected faults...")
+
+    policy = RetryPolicy()
+    with VoyageStubServer(dimension=4, hang_seconds=1.0) as server:
+        client = PooledVoyageClient('test-key', base_url=server.base_url, read_timeout=0.2)
+        embed = lambda: client.multimodal_embed([['text']], model=MODEL)
+        try:
+            server.configure(throttle_rate=1.0, retry_after_seconds=2.5)
+            throttled = _expect(error.RateLimitError, embed)
+            assert policy.classify(throttled) == ERROR_THROTTLE
+            assert policy.retry_after(throttled) == 2.5
+
+            server.configure(throttle_rate=0.0, error_rate=1.0)
+            assert policy.classify(_expect(error.ServiceUnavailableError, embed)) == ERROR_RETRYABLE
+
+            server.configure(error_rate=0.0, timeout_rate=1.0)
+            assert policy.classify(_expect(error.Timeout, embed)) == ERROR_RETRYABLE
+
+            # Invalid JSON, too few embeddings and an empty body all surface as retryable server errors
+            server.configure(timeout_rate=0.0, malformed_rate=1.0)
+            for _ in range(3):
+                assert policy.classify(_expect(error.ServerError, embed)) == ERROR_RETRYABLE
+
+            server.configure(malformed_rate=0.0, requests_per_minute=1)
+            server.state.reset()
+            embed()
+            _expect(error.RateLimitError, embed)
+        finally:
+            client.close()
+
+        stats = server.get_stats()
+        assert stats['requests'] == 2 and stats['ok'] == 1 and stats['rate_limited'] == 1
+
+    logger.info("✅ Injected fault test passed")
+
+def test_offline_ingestion_survives_faults():
+    """The embedding service pointed at a flaky stand-in still embeds every slide"""
+    logger.info("🧪 Testing offline ingestion against a flaky stand-in...")
+
+    slides = []
+    for n in range(1, 41):
+        buffer = io.BytesIO()
+        Image.new('RGB', (32, 18), (n * 6, 0, 0)).save(buffer, 'PNG')
+        slides.append({'file_path': '/decks/deck.pptx', 'file_name': 'deck.pptx', 'slide_number': n,
+                       'image': SlideImage.from_bytes(buffer.getvalue())})
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            VoyageStubServer(dimension=4, throttle_rate=0.3, error_rate=0.2, malformed_rate=0.1,
+                             retry_after_seconds=0.01, seed=11) as server:
+        client = PooledVoyageClient('test-key', base_url=server.base_url)
+        service = VoyageEmbeddingsService(
+            batch_size=8, client=client,
+            embedding_store=SlideEmbeddingStore(db_path=os.path.join(tmp, 'store.db')),
+            rate_limiter=TokenBucketRateLimiter(requests_per_minute=100000, tokens_per_minute=10 ** 9,
+                                                interactive_reserve=0.0, throttle_pause_seconds=0.01),
+            concurrency_controller=AdaptiveConcurrencyController(),
+            retry_policy=RetryPolicy(max_attempts=8, base_delay=0.01, max_delay=0.05),
+            circuit_breaker=CircuitBreaker(failure_threshold=100)
+        )
+        try:
+            failures = []
+            embeddings = service.create_batch_slide_embeddings(slides, failures)
+        finally:
+            client.close()
+
+        assert len(embeddings) == 40 and failures == []
+        stats = server.get_stats()
+        assert stats['inputs_embedded'] == 40
+        assert stats['throttled'] + stats['errors'] + stats['malformed'] > 0
+        assert stats['requests'] == 5 + stats['throttled'] + stats['errors'] + stats['malformed']
+
+    logger.info("✅ Offline ingestion test passed")
+
+if __name__ == "__main__":
+    test_answers_are_deterministic()
+    test_injected_faults_map_to_client_errors()
+    test_offline_ingestion_survives_faults()
+    logger.info("🎉 All VoyageAI stand-in tests passed!")
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the VoyageAI embedding and rerank endpoints
+
+Answers /multimodalembeddings, /embeddings and /rerank with deterministic vectors
+and scores (the same input always gets the same vector), after a configurable
+latency, and injects 429s, 5xx errors, timeouts and malformed responses at
+configurable rates. Fault decisions are drawn per request number from a seeded
+generator, so a run with the same seed and request order is reproducible.
+
+Point the services at it through configuration - nothing else changes:
+
+    python tests/voyage_stub_server.py --port 8765 --latency-ms 300 --throttle-rate 0.05
+    VOYAGE_API_BASE=http://127.0.0.1:8765/v1 python app.py
+
+Behavior can also be changed while the server runs:
+    GET  /_stub/stats    request, fault and latency counters
+    POST /_stub/config   JSON object with StubBehavior fields to change
+    POST /_stub/reset    clear the counters and the request numbering
+"""
+
+import json
+import math
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Latency distributions
+LATENCY_FIXED = 'fixed'          # latency_ms
+LATENCY_UNIFORM = 'uniform'      # latency_ms +/- latency_jitter_ms
+LATENCY_NORMAL = 'normal'        # mean latency_ms, standard deviation latency_jitter_ms
+LATENCY_LOGNORMAL = 'lognormal'  # median latency_ms, shape latency_sigma (long tail, like real APIs)
+
+# Malformed response kinds, cycled through
+MALFORMED_KINDS = ('invalid_json', 'missing_embeddings', 'empty_body')
+
+class StubBehavior:
+    """Latency and fault settings of the stand-in server"""
+
+    FIELDS = {
+        'dimension': int,
+        'latency_distribution': str,
+        'latency_ms': float,
+        'latency_jitter_ms': float,
+        'latency_sigma': float,
+        'per_item_latency_ms': float,
+        'requests_per_minute': int,
+        'throttle_rate': float,
+        'retry_after_seconds': float,
+        'error_rate': float,
+        'timeout_rate': float,
+        'hang_seconds': float,
+        'malformed_rate': float,
+        'seed': int
+    }
+
+    def __init__(self, **settings):
+        """
+        Args:
+            dimension: Embedding dimension (1024 like voyage-multimodal-3)
+            latency_distribution: fixed, uniform, normal or lognormal
+            latency_ms: Base latency per request (mean, median or center of the distribution)
+            latency_jitter_ms: Half-width (uniform) or standard deviation (normal)
+            latency_sigma: Shape of the lognormal distribution
+            per_item_latency_ms: Extra latency per input (larger batches take longer)
+            requests_per_minute: Answer 429 above this rate (0 for no limit)
+            throttle_rate: Share of requests answered with 429
+            retry_after_seconds: Retry-After sent with 429s (0 to omit the header)
+            error_rate: Share of requests answered with 503
+            timeout_rate: Share of requests that hang for hang_seconds before answering 504
+            hang_seconds: How long a timed-out request hangs (set above the client read timeout)
+            malformed_rate: Share of requests answered with a broken 200 response
+            seed: Seed of the per-request fault decisions
+        """
+        self.dimension = 1024
+        self.latency_distribution = LATENCY_FIXED
+        self.latency_ms = 0.0
+        self.latency_jitter_ms = 0.0
+        self.latency_sigma = 0.5
+        self.per_item_latency_ms = 0.0
+        self.requests_per_minute = 0
+        self.throttle_rate = 0.0
+        self.retry_after_seconds = 1.0
+        self.error_rate = 0.0
+        self.timeout_rate = 0.0
+        self.hang_seconds = 30.0
+        self.malformed_rate = 0.0
+        self.seed = 0
+        self.update(settings)
+
+    def update(self, settings: Dict[str, Any]):
+        """
+        Change settings
+
+        Raises:
+            ValueError: If a setting is unknown or the latency distribution is not supported
+        """
+        for name, value in settings.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown stub setting: {name}")
+            setattr(self, name, self.FIELDS[name](value))
+        if self.latency_distribution not in (LATENCY_FIXED, LATENCY_UNIFORM, LATENCY_NORMAL, LATENCY_LOGNORMAL):
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+
+    def sample_latency(self, rng: random.Random, items: int) -> float:
+        """Draw the latency of one request in seconds"""
+        if self.latency_distribution == LATENCY_FIXED:
+            latency_ms = self.latency_ms
+        elif self.latency_distribution == LATENCY_UNIFORM:
+            latency_ms = rng.uniform(self.latency_ms - self.latency_jitter_ms, self.latency_ms + self.latency_jitter_ms)
+        elif self.latency_distribution == LATENCY_NORMAL:
+            latency_ms = rng.gauss(self.latency_ms, self.latency_jitter_ms)
+        else:
+            latency_ms = self.latency_ms * math.exp(rng.gauss(0.0, self.latency_sigma))
+        return max(0.0, latency_ms + self.per_item_latency_ms * items) / 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+def deterministic_vector(key: str, dimension: int) -> List[float]:
+    """Unit vector derived from a content key (same key, same vector)"""
+    seed = int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+    vector = np.random.default_rng(seed).standard_normal(dimension)
+    return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+def deterministic_score(query: str, document: str) -> float:
+    """Relevance score in [0, 1) derived from the query and the document"""
+    digest = hashlib.sha256(f"{query}\n{document}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+class StubState:
+    """Behavior, request numbering and counters shared by all handler threads"""
+
+    def __init__(self, behavior: StubBehavior):
+        self.behavior = behavior
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.request_count = 0
+            self.window = []  # admission times within the last minute
+            self.stats = {
+                'requests': 0, 'ok': 0, 'throttled': 0, 'rate_limited': 0, 'errors': 0,
+                'timeouts': 0, 'malformed': 0, 'inputs_embedded': 0, 'documents_reranked': 0,
+                'latency_seconds': 0.0
+            }
+
+    def next_request(self) -> int:
+        """Number the next request and count it"""
+        with self.lock:
+            self.request_count += 1
+            self.stats['requests'] += 1
+            return self.request_count
+
+    def over_rate_limit(self) -> bool:
+        """Record an admission and check it against requests_per_minute"""
+        limit = self.behavior.requests_per_minute
+        if not limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 60.0]
+            if len(self.window) >= limit:
+                return True
+            self.window.append(now)
+            return False
+
+    def count(self, outcome: str, amount: float = 1):
+        with self.lock:
+            self.stats[outcome] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        answered = stats['ok'] or 1
+        stats['avg_latency_seconds'] = round(stats.pop('latency_seconds') / answered, 4)
+        stats['behavior'] = self.behavior.to_dict()
+        return stats
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Handles one connection (keep-alive, like the real API)"""
+
+    protocol_version = 'HTTP/1.1'
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status: int, body: bytes = b'', headers: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any, headers: Dict[str, str] = None):
+        self._send(status, json.dumps(payload).encode('utf-8'), headers)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/_stub/stats':
+            self._send_json(200, self.state.get_stats())
+        else:
+            self._send_json(404, {'detail': f"Not found: {self.path}"})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {'detail': 'Request body is not valid JSON'})
+            return
+
+        path = self.path.rstrip('/')
+        if path == '/_stub/config':
+            try:
+                self.state.behavior.update(payload)
+            except ValueError as e:
+                self._send_json(400, {'detail': str(e)})
+                return
+            self._send_json(200, self.state.behavior.to_dict())
+            return
+        if path == '/_stub/reset':
+            self.state.reset()
+            self._send_json(200, {'reset': True})
+            return
+
+        endpoint = path.rsplit('/', 1)[-1]
+        if endpoint not in ('multimodalembeddings', 'embeddings', 'rerank'):
+            self._send_json(404, {'detail': f"Not found: {self.path}"})
+            return
+        if endpoint == 'multimodalembeddings':
+            items = payload.get('inputs') or []
+        elif endpoint == 'embeddings':
+            items = payload.get('input') or []
+        else:
+            items = payload.get('documents') or []
+        if not isinstance(items, list) or not items:
+            self._send_json(400, {'detail': 'No inputs provided'})
+            return
+
+        self._answer(endpoint, payload, items)
+
+    def _answer(self, endpoint: str, payload: Dict[str, Any], items: List):
+        """Apply the rate limit, the injected faults and the latency, then respond"""
+        state, behavior = self.state, self.state.behavior
+        request_number = state.next_request()
+        rng = random.Random(f"{behavior.seed}:{request_number}")
+
+        if state.over_rate_limit():
+            state.count('rate_limited')
+            self._send_throttle(behavior)
+            return
+
+        # One draw decides the fault, so rates add up and each request gets at most one
+        draw = rng.random()
+        if draw < behavior.throttle_rate:
+            state.count('throttled')
+            self._send_throttle(behavior)
+            return
+        draw -= behavior.throttle_rate
+        if draw < behavior.error_rate:
+            state.count('errors')
+            self._send_json(503, {'detail': 'Service temporarily unavailable (injected)'})
+            return
+        draw -= behavior.error_rate
+        if draw < behavior.timeout_rate:
+            state.count('timeouts')
+            time.sleep(behavior.hang_seconds)
+            self._send_json(504, {'detail': 'Gateway timeout (injected)'})
+            return
+        draw -= behavior.timeout_rate
+        malformed = draw < behavior.malformed_rate
+
+        latency = behavior.sample_latency(rng, len(items))
+        time.sleep(latency)
+
+        if malformed:
+            state.count('malformed')
+            kind = MALFORMED_KINDS[request_number % len(MALFORMED_KINDS)]
+            if kind == 'invalid_json':
+                self._send(200, b'{"data": [{"embedding": [0.1, 0.2')
+            elif kind == 'missing_embeddings':
+                self._send_json(200, {'data': [], 'usage': {'total_tokens': 0}})
+            else:
+                self._send(200, b'')
+            return
+
+        if endpoint == 'rerank':
+            response = self._rerank(payload, items)
+            state.count('documents_reranked', len(items))
+        else:
+            response = self._embed(payload, items)
+            state.count('inputs_embedded', len(items))
+        state.count('ok')
+        state.count('latency_seconds', latency)
+        self._send_json(200, response)
+
+    def _send_throttle(self, behavior: StubBehavior):
+        headers = {}
+        if behavior.retry_after_seconds > 0:
+            headers['Retry-After'] = f"{behavior.retry_after_seconds:g}"
+        self._send_json(429, {'detail': 'Rate limit exceeded (injected)'}, headers)
+
+    def _embed(self, payload: Dict[str, Any], items: List) -> Dict[str, Any]:
+        """Deterministic embeddings keyed by model, input type and content"""
+        dimension = self.state.behavior.dimension
+        prefix = f"{payload.get('model')}|{payload.get('input_type')}|"
+        data, tokens = [], 0
+        for index, item in enumerate(items):
+            key = json.dumps(item, sort_keys=True)
+            data.append({'object': 'embedding', 'embedding': deterministic_vector(prefix + key, dimension),
+                         'index': index})
+            tokens += max(1, len(key) // 4)
+        return {'object': 'list', 'data': data, 'model': payload.get('model'), 'usage': {'total_tokens': tokens}}
+
+    def _rerank(self, payload: Dict[str, Any], documents: List[str]) -> Dict[str, Any]:
+        """Deterministic relevance scores, best first"""
+        query = payload.get('query', '')
+        ranked = sorted(
+            ({'index': index, 'relevance_score': deterministic_score(query, document)}
+             for index, document in enumerate(documents)),
+            key=lambda result: result['relevance_score'], reverse=True
+        )
+        if payload.get('top_k'):
+            ranked = ranked[:int(payload['top_k'])]
+        tokens = sum(max(1, len(document) // 4) for document in documents) + len(query) // 4
+        return {'object': 'list', 'data': ranked, 'model': payload.get('model'), 'usage': {'total_tokens': tokens}}
+
+class VoyageStubServer:
+    """Runs the stand-in on a background thread (port 0 picks a free port)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **behavior):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 for any free port)
+            **behavior: StubBehavior settings
+        """
+        self.state = StubState(StubBehavior(**behavior))
+        handler = type('BoundStubRequestHandler', (StubRequestHandler,), {'state': self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        """API base URL to configure the services with (VOYAGE_API_BASE)"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def behavior(self) -> StubBehavior:
+        return self.state.behavior
+
+    def configure(self, **settings):
+        """Change behavior settings while running"""
+        self.state.behavior.update(settings)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.state.get_stats()
+
+    def start(self) -> 'VoyageStubServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='voyage-stub', daemon=True)
+        self.thread.start()
+        logger.info(f"🧪 VoyageAI stand-in listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join(5)
+
+    def __enter__(self) -> 'VoyageStubServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the VoyageAI embedding and rerank API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    for name, field_type in StubBehavior.FIELDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=field_type, default=None)
+    args = parser.parse_args(argv)
+
+    behavior = {name: getattr(args, name) for name in StubBehavior.FIELDS if getattr(args, name) is not None}
+    server = VoyageStubServer(args.host, args.port, **behavior)
+    logger.info(f"   Behavior: {server.behavior.to_dict()}")
+    logger.info(f"   Point the services at it with VOYAGE_API_BASE={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        logger.info(f"📊 Stand-in stats: {server.get_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@
  * You should have received a copy of the GNU General Public License
  * along with this program.  If not, see <https://www.gnu.org/licenses/>.
  */
+import { webSocketService } from './websocket/websocket.service';
+
 class SlideProcessingService {
   private baseUrl: string;
 
@@ -25,7 +27,7 @@ class SlideProcessingService {
     this.baseUrl = isDev ? 'http://localhost:3001/api' : 'http://localhost:5001/api';
   }
 
-  async processFolderIndex(folderPath: string): Promise<any> {
+  async processFolderIndex(folderPath: string, onProgress?: (progress: any) => void): Promise<any> {
     try {
       console.log('Frontend: Sending folder path:', folderPath);
       console.log('Frontend: Path type:', typeof folderPath);
@@ -51,7 +53,10 @@ class SlideProcessingService {
         throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
       }
 
-      const result = await response.json();
+      const submitted = await response.json();
+      console.log('Folder processing job queued:', submitted);
+
+      const result = await this.waitForJob(submitted.job_id, onProgress);
       console.log('Folder processing result:', result);
       return result;
 
@@ -61,6 +66,176 @@ class SlideProcessingService {
     }
   }
 
+  // Index a single file (e.g. a deck that was just saved) ahead of queued folder jobs
+  async processFile(filePath: string, onProgress?: (progress: any) => void, priority: string = 'interactive'): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/process-file`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ file_path: filePath, priority })
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const submitted = await response.json();
+    return await this.waitForJob(submitted.job_id, onProgress);
+  }
+
+  // Dry run: estimated slides, embedding requests, upload bytes and duration of indexing a folder
+  async estimateFolder(folderPath: string, sources?: string[]): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/estimate-folder`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ folder_path: folderPath, sources })
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  }
+
+  // Let the server watch a folder and reindex changed files itself (persists across restarts)
+  async watchFolder(folderPath: string, sources?: string[]): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/watches`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ folder_path: folderPath, sources })
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  }
+
+  async unwatchFolder(folderPath: string): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/watches/remove`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ folder_path: folderPath })
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  }
+
+  async getWatchedFolders(): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/watches`);
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    return data.folders;
+  }
+
+  async getJob(jobId: string): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/jobs/${jobId}`);
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    return data.job;
+  }
+
+  async cancelJob(jobId: string): Promise<any> {
+    const response = await fetch(`${this.baseUrl}/slides/jobs/${jobId}/cancel`, {
+      method: 'POST',
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  }
+
+  // Wait for a processing job to finish and return its result. Job events and progress are
+  // pushed over the WebSocket (INGESTION_JOB / INGESTION_PROGRESS); polling is only a slow fallback.
+  async waitForJob(jobId: string, onProgress?: (progress: any) => void, pollIntervalMs: number = 5000): Promise<any> {
+    let finished = false;
+    let wake: (() => void) | null = null;
+
+    const handleJobEvent = (message: any) => {
+      if (message?.job_id === jobId && message.event === 'job_finished') {
+        finished = true;
+        wake?.();
+      }
+    };
+    const handleProgress = (message: any) => {
+      if (message?.job_id === jobId && onProgress) {
+        onProgress(message);
+      }
+    };
+
+    webSocketService.on('INGESTION_JOB', handleJobEvent);
+    webSocketService.on('INGESTION_PROGRESS', handleProgress);
+
+    try {
+      while (true) {
+        const job = await this.getJob(jobId);
+
+        if (job.status === 'completed') {
+          return job.result;
+        }
+        if (job.status === 'failed') {
+          throw new Error(`Processing failed: ${job.error || 'Unknown error'}`);
+        }
+        if (job.status === 'cancelled') {
+          throw new Error('Processing was cancelled');
+        }
+
+        if (!finished) {
+          await new Promise<void>(resolve => {
+            const timer = setTimeout(resolve, pollIntervalMs);
+            wake = () => {
+              clearTimeout(timer);
+              resolve();
+            };
+          });
+          wake = null;
+        }
+        finished = false;
+      }
+    } finally {
+      webSocketService.off('INGESTION_JOB', handleJobEvent);
+      webSocketService.off('INGESTION_PROGRESS', handleProgress);
+    }
+  }
+
+  // Change how often the server pushes INGESTION_PROGRESS messages
+  setProgressInterval(intervalSeconds: number): void {
+    webSocketService.sendMessage({
+      type: 'SET_PROGRESS_INTERVAL',
+      data: { interval_seconds: intervalSeconds }
+    });
+  }
+
   async getProcessingStatus(): Promise<any> {
     try {
       const response = await fetch(`${this.baseUrl}/slides/processing-status`);